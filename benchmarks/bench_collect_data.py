@@ -0,0 +1,93 @@
+"""Benchmark the streaming `collect_deepmd_npy` against collecting the
+labeled data in one `dpdata.MultiSystems`, on single-frame FP outputs of a
+few formulas. Reports the wall time and the peak of the traced memory.
+
+Usage: python benchmarks/bench_collect_data.py [--nsys N] [--natoms N]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+
+from dpgen2.op.collect_data import (
+    collect_deepmd_npy,
+)
+
+type_map = ["H", "O"]
+
+
+def write_labeled(path, rng, natoms, nO):
+    atom_types = np.array([1] * nO + [0] * (natoms - nO))
+    ss = dpdata.LabeledSystem(
+        data={
+            "atom_names": type_map,
+            "atom_numbs": [natoms - nO, nO],
+            "atom_types": atom_types,
+            "orig": np.zeros(3),
+            "cells": rng.random((1, 3, 3)),
+            "coords": rng.random((1, natoms, 3)),
+            "energies": rng.random(1),
+            "forces": rng.random((1, natoms, 3)),
+            "virials": rng.random((1, 3, 3)),
+        }
+    )
+    ss.to_deepmd_npy(path)
+
+
+def collect_with_dpdata(labeled_data, out_dir):
+    ms = dpdata.MultiSystems(type_map=type_map)
+    for ii in labeled_data:
+        ms.append(dpdata.LabeledSystem(ii, fmt="deepmd/npy"))
+    Path(out_dir).mkdir(parents=True)
+    ms.to_deepmd_npy(out_dir)
+
+
+def measure(func, labeled_data, out_dir):
+    tic = time.perf_counter()
+    func(labeled_data, out_dir / "timed")
+    elapsed = time.perf_counter() - tic
+    # the memory is traced in a separate run, tracing slows down the run
+    tracemalloc.start()
+    func(labeled_data, out_dir / "traced")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nsys", type=int, default=5000)
+    parser.add_argument("--natoms", type=int, default=128)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        labeled_data = []
+        for ii in range(args.nsys):
+            labeled_data.append(tmp / "labeled" / f"task.{ii:06d}")
+            write_labeled(labeled_data[-1], rng, args.natoms, 1 + ii % 4)
+
+        t0, m0 = measure(collect_with_dpdata, labeled_data, tmp / "dpdata")
+        t1, m1 = measure(
+            lambda ii, oo: collect_deepmd_npy(ii, type_map, oo),
+            labeled_data,
+            tmp / "stream",
+        )
+        for ff in [f"H{args.natoms - 1}O1", f"H{args.natoms - 4}O4"]:
+            ref = dpdata.LabeledSystem(tmp / "dpdata" / "timed" / ff, fmt="deepmd/npy")
+            ret = dpdata.LabeledSystem(tmp / "stream" / "timed" / ff, fmt="deepmd/npy")
+            np.testing.assert_array_equal(ref["forces"], ret["forces"])
+        print(f"{args.nsys} systems x {args.natoms} atoms")
+        print(f"dpdata.MultiSystems: {t0:8.3f} s  peak {m0:8.1f} MiB")
+        print(f"collect_deepmd_npy : {t1:8.3f} s  peak {m1:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark `ConfDeduplicator` on candidates of one formula, of which a
+fraction are noisy copies of the others. Reports the time of the
+fingerprints and of the near-duplicate search, and the removed frames.
+
+Usage: python benchmarks/bench_conf_dedup.py [--nframes N] [--natoms N] [--dup-ratio R] [--max-workers N]
+"""
+import argparse
+import time
+
+import dpdata
+import numpy as np
+
+from dpgen2.exploration.selector import (
+    ConfDeduplicator,
+)
+from dpgen2.exploration.selector.conf_dedup import (
+    find_near_duplicates,
+)
+
+
+def make_candidates(rng, nframes, natoms, dup_ratio):
+    nuniq = nframes - int(nframes * dup_ratio)
+    cell = np.diag([8.0, 8.0, 8.0])
+    coords = rng.random((nuniq, natoms, 3)) @ cell
+    src = rng.integers(0, nuniq, nframes - nuniq)
+    dups = coords[src] + 1e-4 * rng.standard_normal((src.size, natoms, 3))
+    coords = np.concatenate([coords, dups])[rng.permutation(nframes)]
+    atom_types = np.arange(natoms) % 2
+    return dpdata.System(
+        data={
+            "atom_names": ["H", "O"],
+            "atom_numbs": np.bincount(atom_types).tolist(),
+            "atom_types": atom_types,
+            "orig": np.zeros(3),
+            "cells": np.tile(cell, (nframes, 1, 1)),
+            "coords": coords,
+        }
+    ), nframes - nuniq
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nframes", type=int, default=100000)
+    parser.add_argument("--natoms", type=int, default=16)
+    parser.add_argument("--dup-ratio", type=float, default=0.3)
+    parser.add_argument("--max-workers", type=int, default=1)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    system, ndups = make_candidates(rng, args.nframes, args.natoms, args.dup_ratio)
+    dedup = ConfDeduplicator(tolerance=1e-3, max_workers=args.max_workers)
+    tic = time.perf_counter()
+    fps = dedup.fingerprints(system)
+    t_fp = time.perf_counter() - tic
+    tic = time.perf_counter()
+    keep = find_near_duplicates(fps, dedup.tolerance)
+    t_nn = time.perf_counter() - tic
+    print(f"{args.nframes} frames x {args.natoms} atoms, {ndups} noisy copies")
+    print(f"fingerprints : {t_fp:8.3f} s")
+    print(f"KD-tree      : {t_nn:8.3f} s")
+    print(f"removed      : {args.nframes - int(keep.sum())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark the neighbor list based `DistanceConfFilter.check` against
+the previous double loop over the ASE minimum image distances, on valid
+(i.e. fully scanned) frames of 100, 1k and 10k atoms.
+
+The double loop takes hours on 10k atoms, so it is only run on the smaller
+frames unless `--ase-max-atoms` is raised.
+
+Usage: python benchmarks/bench_distance_conf_filter.py [--ase-max-atoms N]
+"""
+import argparse
+import time
+
+import dpdata
+import numpy as np
+
+from dpgen2.exploration.selector import (
+    DistanceConfFilter,
+)
+from dpgen2.exploration.selector.distance_conf_filter import (
+    _lattice_combinations,
+    safe_dist_dict,
+)
+
+
+def check_with_ase(frame):
+    from ase import (
+        Atoms,
+    )
+
+    safe_dist = {k: v * 0.529 / 1.2 for k, v in safe_dist_dict.items()}
+    structure = Atoms(
+        symbols=[frame["atom_names"][t] for t in frame["atom_types"]],
+        positions=frame["coords"][0],
+        cell=frame["cells"][0],
+        pbc=(not frame.nopbc),
+    )
+    symbols = structure.get_chemical_symbols()
+    cell, _ = structure.get_cell().standard_form()
+    lengths = np.linalg.norm(_lattice_combinations @ cell.array, axis=1)
+    if lengths.min() < 2 * max([safe_dist[ii] for ii in symbols]):
+        return False
+    for i in range(len(symbols)):
+        for j in range(i + 1, len(symbols)):
+            dist = structure.get_distance(i, j, mic=True)
+            if dist < safe_dist[symbols[i]] + safe_dist[symbols[j]]:
+                return False
+    return True
+
+
+def make_frame(shape, rng, spacing=2.2):
+    grid = np.stack(
+        np.meshgrid(*[np.arange(nn) for nn in shape], indexing="ij"), axis=-1
+    ).reshape(-1, 3)
+    cell = np.diag(shape) * spacing
+    # tilt the cell to exercise the triclinic images
+    cell[1, 0] = 0.3 * cell[1, 1]
+    frac = (grid + rng.uniform(-0.05, 0.05, grid.shape)) / shape
+    natoms = grid.shape[0]
+    return dpdata.System(
+        data={
+            "atom_names": ["Cu", "Ni"],
+            "atom_numbs": [natoms - natoms // 2, natoms // 2],
+            "atom_types": np.arange(natoms) % 2,
+            "orig": np.zeros(3),
+            "cells": cell[None, :, :],
+            "coords": (frac @ cell)[None, :, :],
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ase-max-atoms", type=int, default=1000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    print(f"{'natoms':>8s} {'ase/s':>10s} {'kdtree/s':>10s} {'speedup':>8s}")
+    for shape in [(5, 5, 4), (10, 10, 10), (25, 20, 20)]:
+        frame = make_frame(shape, rng)
+        natoms = frame.get_natoms()
+        tic = time.perf_counter()
+        valid = DistanceConfFilter().check(frame)
+        t1 = time.perf_counter() - tic
+        assert valid
+        if natoms <= args.ase_max_atoms:
+            tic = time.perf_counter()
+            assert check_with_ase(frame) == valid
+            t0 = time.perf_counter() - tic
+            print(f"{natoms:>8d} {t0:>10.4f} {t1:>10.4f} {t0 / t1:>8.1f}")
+        else:
+            print(f"{natoms:>8d} {'-':>10s} {t1:>10.4f} {'-':>8s}")
+
+
+if __name__ == "__main__":
+    main()
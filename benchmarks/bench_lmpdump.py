@@ -0,0 +1,52 @@
+"""Benchmark rendering a trajectory of ASE `Atoms` to a LAMMPS dump by
+`traj2lmpdump` against `atoms2lmpdump` frame by frame, on a triclinic cell.
+
+Usage: python benchmarks/bench_lmpdump.py [--nframes N] [--natoms N]
+"""
+import argparse
+import time
+
+import numpy as np
+from ase import (
+    Atoms,
+)
+
+from dpgen2.op.run_caly_model_devi import (
+    atoms2lmpdump,
+    traj2lmpdump,
+)
+
+type_map = ["H", "O"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nframes", type=int, default=1000)
+    parser.add_argument("--natoms", type=int, default=100)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    numbers = rng.choice([1, 8], args.natoms)
+    atoms_list = [
+        Atoms(
+            numbers=numbers,
+            positions=rng.random((args.natoms, 3)) * 10.0,
+            cell=np.eye(3) * 10.0 + rng.random((3, 3)),
+            pbc=True,
+        )
+        for _ in range(args.nframes)
+    ]
+    tic = time.perf_counter()
+    ref = "".join(
+        atoms2lmpdump(atoms, ii, type_map) for ii, atoms in enumerate(atoms_list)
+    )
+    t_frame = time.perf_counter() - tic
+    tic = time.perf_counter()
+    dump_str = traj2lmpdump(atoms_list, type_map)
+    t_traj = time.perf_counter() - tic
+    assert dump_str == ref
+    print(f"atoms2lmpdump: {t_frame:8.4f} s")
+    print(f"traj2lmpdump:  {t_traj:8.4f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark `load_model_devi` and the process-pool `load_model_devis`
+against the serial `np.loadtxt` loop on synthetic LAMMPS model deviation
+files of 10^3 - 10^6 lines.
+
+Usage: python benchmarks/bench_model_devi_reader.py [--max-workers N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import (
+    Path,
+)
+
+import numpy as np
+
+from dpgen2.exploration.render import (
+    load_model_devi,
+    load_model_devis,
+)
+
+header = "%10s%19s%19s%19s%19s%19s%19s" % (
+    "step",
+    "max_devi_v",
+    "min_devi_v",
+    "avg_devi_v",
+    "max_devi_f",
+    "min_devi_f",
+    "avg_devi_f",
+)
+
+
+def write_file(fname, nlines, rng):
+    data = rng.random((nlines, 7))
+    data[:, 0] = np.arange(nlines)
+    np.savetxt(fname, data, fmt=["%12d"] + ["%19.6e"] * 6, delimiter="", header=header)
+
+
+def timeit(func, *args):
+    tic = time.perf_counter()
+    ret = func(*args)
+    return time.perf_counter() - tic, ret
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--nfiles", type=int, default=1000)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        print(f"{'lines':>10s} {'loadtxt/s':>12s} {'reader/s':>12s} {'speedup':>8s}")
+        for nlines in [10**3, 10**4, 10**5, 10**6]:
+            fname = tmp / f"model_devi.{nlines}.out"
+            write_file(fname, nlines, rng)
+            t0, ref = timeit(np.loadtxt, fname)
+            t1, ret = timeit(load_model_devi, fname)
+            np.testing.assert_array_equal(ref, ret)
+            print(f"{nlines:>10d} {t0:>12.4f} {t1:>12.4f} {t0 / t1:>8.1f}")
+
+        fnames = []
+        for ii in range(args.nfiles):
+            fname = tmp / f"model_devi.many.{ii}.out"
+            write_file(fname, 1000, rng)
+            fnames.append(fname)
+        t0, _ = timeit(lambda: [np.loadtxt(ff) for ff in fnames])
+        t1, _ = timeit(load_model_devis, fnames, 1)
+        t2, _ = timeit(load_model_devis, fnames, args.max_workers)
+        print(
+            f"{args.nfiles} files x 1000 lines: loadtxt {t0:.4f}s, "
+            f"reader serial {t1:.4f}s, reader parallel {t2:.4f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark `ExplorationReportTrustLevels.record` against the previous
+set based classification of the frames, and check that both give the
+same candidates and ratios.
+
+Usage: python benchmarks/bench_report_trust_levels.py
+"""
+import time
+
+import numpy as np
+
+from dpgen2.exploration.deviation import (
+    DeviManager,
+    DeviManagerColumnar,
+)
+from dpgen2.exploration.report import (
+    ExplorationReportTrustLevelsMax,
+    ExplorationReportTrustLevelsRandom,
+)
+
+level_f_lo, level_f_hi, level_v_lo, level_v_hi = 0.3, 0.6, 0.4, 0.8
+
+
+def record_with_sets(md_f, md_v):
+    nframes, naccu, nfail, cand = 0, 0, 0, []
+    for ii in range(len(md_f)):
+        nn = md_f[ii].shape[0]
+        set_f_accu = set(np.where(md_f[ii] < level_f_lo)[0])
+        set_f_fail = set(np.where(md_f[ii] >= level_f_hi)[0])
+        set_f_cand = set(
+            np.where(np.logical_and(md_f[ii] >= level_f_lo, md_f[ii] < level_f_hi))[0]
+        )
+        set_v_accu = set(np.where(md_v[ii] < level_v_lo)[0])
+        set_v_fail = set(np.where(md_v[ii] >= level_v_hi)[0])
+        set_v_cand = set(
+            np.where(np.logical_and(md_v[ii] >= level_v_lo, md_v[ii] < level_v_hi))[0]
+        )
+        set_cand = (
+            (set_f_cand & set_v_accu)
+            | (set_f_cand & set_v_cand)
+            | (set_f_accu & set_v_cand)
+        )
+        nframes += nn
+        naccu += len(set_f_accu & set_v_accu)
+        nfail += len(set_f_fail | set_v_fail)
+        cand += [(ii, ff) for ff in sorted(set_cand)]
+    return nframes, naccu, nfail, cand
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(
+        f"{'ntraj':>8s} {'nframes':>10s} {'sets/s':>10s} {'masks/s':>10s} {'speedup':>8s}"
+    )
+    for ntraj, nframes in [(100, 1000), (1000, 1000), (100, 100000), (10000, 1000)]:
+        md_f = [rng.random(nframes) for _ in range(ntraj)]
+        md_v = [rng.random(nframes) for _ in range(ntraj)]
+        model_devi = DeviManagerColumnar()
+        for ff, vv in zip(md_f, md_v):
+            model_devi.add(DeviManager.MAX_DEVI_F, ff)
+            model_devi.add(DeviManager.MAX_DEVI_V, vv)
+
+        tic = time.perf_counter()
+        ref_nframes, ref_naccu, ref_nfail, ref_cand = record_with_sets(md_f, md_v)
+        t0 = time.perf_counter() - tic
+
+        for report in [
+            ExplorationReportTrustLevelsRandom,
+            ExplorationReportTrustLevelsMax,
+        ]:
+            ter = report(level_f_lo, level_f_hi, level_v_lo, level_v_hi)
+            tic = time.perf_counter()
+            ter.record(model_devi)
+            t1 = time.perf_counter() - tic
+            assert [tuple(ii) for ii in ter.cand_ids.tolist()] == ref_cand
+            assert ter.accurate_ratio() == ref_naccu / ref_nframes
+            assert ter.failed_ratio() == ref_nfail / ref_nframes
+        print(f"{ntraj:>8d} {nframes:>10d} {t0:>10.4f} {t1:>10.4f} {t0 / t1:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
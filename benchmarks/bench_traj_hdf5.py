@@ -0,0 +1,71 @@
+"""Compare the size and the frame selection time of the LAMMPS dump
+trajectories and the HDF5 exploration artifacts written with
+`use_hdf5_traj`.
+
+Usage: python benchmarks/bench_traj_hdf5.py [--nframes N] [--natoms N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import (
+    Path,
+)
+
+import numpy as np
+
+from dpgen2.exploration.render import (
+    TrajRenderLammps,
+    lammps_dump_to_hdf5,
+)
+
+
+def write_dump(fname, nframes, natoms, rng):
+    with open(fname, "w") as fp:
+        for ii in range(nframes):
+            fp.write(f"ITEM: TIMESTEP\n{ii * 100}\nITEM: NUMBER OF ATOMS\n{natoms}\n")
+            fp.write("ITEM: BOX BOUNDS xy xz yz pp pp pp\n")
+            fp.write("0.0 20.0 0.0\n0.0 20.0 0.0\n0.0 20.0 0.0\n")
+            fp.write("ITEM: ATOMS id type x y z fx fy fz\n")
+            data = np.zeros((natoms, 8))
+            data[:, 0] = np.arange(1, natoms + 1)
+            data[:, 1] = np.arange(natoms) % 2 + 1
+            data[:, 2:5] = rng.random((natoms, 3)) * 20.0
+            data[:, 5:] = rng.normal(size=(natoms, 3))
+            np.savetxt(fp, data, fmt=["%d", "%d"] + ["%.8f"] * 6)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nframes", type=int, default=1000)
+    parser.add_argument("--natoms", type=int, default=500)
+    parser.add_argument("--nsel", type=int, default=50)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        dump_file = Path(tmp) / "traj.dump"
+        h5_file = Path(tmp) / "traj.h5"
+        write_dump(dump_file, args.nframes, args.natoms, rng)
+        tic = time.perf_counter()
+        lammps_dump_to_hdf5(dump_file, h5_file)
+        t_conv = time.perf_counter() - tic
+        id_selected = [
+            sorted(rng.choice(args.nframes, args.nsel, replace=False).tolist())
+        ]
+        render = TrajRenderLammps()
+        timings = []
+        for fname in [dump_file, h5_file]:
+            tic = time.perf_counter()
+            ms = render.get_confs([fname], id_selected, type_map=["A", "B"])
+            timings.append(time.perf_counter() - tic)
+            assert ms.get_nframes() == args.nsel
+        size_dump = dump_file.stat().st_size
+        size_h5 = h5_file.stat().st_size
+        print(f"conversion: {t_conv:.3f}s")
+        print(
+            f"size:   dump {size_dump / 2**20:8.2f} MiB, hdf5 {size_h5 / 2**20:8.2f} MiB"
+        )
+        print(f"select: dump {timings[0]:8.4f} s,   hdf5 {timings[1]:8.4f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,11 +15,17 @@ lmp_traj_name = "traj.dump"
 lmp_pimd_traj_name = "traj.%s.dump"
 lmp_log_name = "log.lammps"
 lmp_model_devi_name = "model_devi.out"
+lmp_traj_hdf5_name = "traj.h5"
+lmp_model_devi_hdf5_name = "model_devi.h5"
 lmp_pimd_model_devi_name = "model_devi.%s.out"
 fp_index_pattern = "%06d"
 fp_task_pattern = "task." + fp_index_pattern
+fp_shared_input_dir = "shared_inputs"
 fp_default_log_name = "fp.log"
 fp_default_out_data_name = "data"
+fp_cache_key_name = "fp_cache_key"
+fp_cache_record_name = "fp_cache.json"
+data_manifest_name = "data_manifest.json"
 calypso_log_name = "caly.log"
 calypso_input_file = "input.dat"
 calypso_index_pattern = "%06d"
@@ -20,6 +20,7 @@ from dpgen2.exploration.report import (
     conv_styles,
 )
 from dpgen2.exploration.selector import (
+    ConfDeduplicator,
     conf_filter_styles,
 )
 from dpgen2.fp import (
@@ -203,6 +204,12 @@ def lmp_args():
         "Fatal when the number of iteration per stage reaches the `max_numb_iter`"
     )
     doc_output_nopbc = "Remove pbc of the output configurations"
+    doc_render_max_workers = (
+        "The maximum number of processes used to read the model deviations "
+        + "and render the trajectories in the configuration selection, "
+        + "None represents as many as "
+        + "the processors of the machine, and 1 for serial"
+    )
     doc_convergence = "The method of convergence check."
     doc_configuration = "A list of initial configurations."
     doc_stages = (
@@ -212,6 +219,7 @@ def lmp_args():
         "Each task group is described in :ref:`the task group definition<task_group_sec>` "
     )
     doc_filters = "A list of configuration filters"
+    doc_dedup = "Remove the near-duplicate candidate configurations before FP. Not applied if not set"
 
     return [
         Argument(
@@ -231,6 +239,13 @@ def lmp_args():
         Argument(
             "output_nopbc", bool, optional=True, default=False, doc=doc_output_nopbc
         ),
+        Argument(
+            "render_max_workers",
+            [int, None],
+            optional=True,
+            default=1,
+            doc=doc_render_max_workers,
+        ),
         Argument(
             "convergence",
             dict,
@@ -259,6 +274,14 @@ def lmp_args():
             default=[],
             doc=doc_filters,
         ),
+        Argument(
+            "dedup",
+            dict,
+            ConfDeduplicator.args(),
+            optional=True,
+            default=None,
+            doc=doc_dedup,
+        ),
     ]
 
 
@@ -296,6 +319,12 @@ def caly_args():
         "Fatal when the number of iteration per stage reaches the `max_numb_iter`"
     )
     doc_output_nopbc = "Remove pbc of the output configurations"
+    doc_render_max_workers = (
+        "The maximum number of processes used to read the model deviations "
+        + "and render the trajectories in the configuration selection, "
+        + "None represents as many as "
+        + "the processors of the machine, and 1 for serial"
+    )
     doc_convergence = "The method of convergence check."
     doc_configuration = "A list of initial configurations."
     doc_stages = (
@@ -305,6 +334,7 @@ def caly_args():
         "Each task group is described in :ref:`the task group definition<task_group_sec>` "
     )
     doc_filters = "A list of configuration filters"
+    doc_dedup = "Remove the near-duplicate candidate configurations before FP. Not applied if not set"
 
     return [
         Argument(
@@ -324,6 +354,13 @@ def caly_args():
         Argument(
             "output_nopbc", bool, optional=True, default=False, doc=doc_output_nopbc
         ),
+        Argument(
+            "render_max_workers",
+            [int, None],
+            optional=True,
+            default=1,
+            doc=doc_render_max_workers,
+        ),
         Argument(
             "convergence",
             dict,
@@ -352,6 +389,14 @@ def caly_args():
             default=[],
             doc=doc_filters,
         ),
+        Argument(
+            "dedup",
+            dict,
+            ConfDeduplicator.args(),
+            optional=True,
+            default=None,
+            doc=doc_dedup,
+        ),
     ]
 
 
@@ -360,6 +405,11 @@ def run_diffcsp_args():
     doc_gen_command = "Command for DiffCSP generation"
     doc_relax_group_size = "Group size for relaxation"
     doc_use_hdf5 = "Use HDF5 to store trajs and model_devis"
+    doc_use_hdf5_traj = (
+        "Write the trajectories and the model deviations to chunked, "
+        "compressed HDF5 files, from which the selected frames are read by "
+        "slicing. Can not be used together with `use_hdf5`"
+    )
     return [
         Argument(
             "gen_tasks",
@@ -388,6 +438,13 @@ def run_diffcsp_args():
             default=False,
             doc=doc_use_hdf5,
         ),
+        Argument(
+            "use_hdf5_traj",
+            bool,
+            optional=True,
+            default=False,
+            doc=doc_use_hdf5_traj,
+        ),
     ]
 
 
@@ -398,6 +455,12 @@ def diffcsp_args():
         "Fatal when the number of iteration per stage reaches the `max_numb_iter`"
     )
     doc_output_nopbc = "Remove pbc of the output configurations"
+    doc_render_max_workers = (
+        "The maximum number of processes used to read the model deviations "
+        + "and render the trajectories in the configuration selection, "
+        + "None represents as many as "
+        + "the processors of the machine, and 1 for serial"
+    )
     doc_convergence = "The method of convergence check."
     doc_stages = (
         "The definition of exploration stages of type `List[List[ExplorationTaskGroup]`. "
@@ -406,6 +469,7 @@ def diffcsp_args():
         "Each task group is described in :ref:`the task group definition<task_group_sec>` "
     )
     doc_filters = "A list of configuration filters"
+    doc_dedup = "Remove the near-duplicate candidate configurations before FP. Not applied if not set"
 
     return [
         Argument(
@@ -424,6 +488,13 @@ def diffcsp_args():
         Argument(
             "output_nopbc", bool, optional=True, default=False, doc=doc_output_nopbc
         ),
+        Argument(
+            "render_max_workers",
+            [int, None],
+            optional=True,
+            default=1,
+            doc=doc_render_max_workers,
+        ),
         Argument(
             "convergence",
             dict,
@@ -442,6 +513,14 @@ def diffcsp_args():
             default=[],
             doc=doc_filters,
         ),
+        Argument(
+            "dedup",
+            dict,
+            ConfDeduplicator.args(),
+            optional=True,
+            default=None,
+            doc=doc_dedup,
+        ),
     ]
 
 
@@ -463,11 +542,43 @@ def variant_explore():
     )
 
 
-def fp_args(inputs, run):
+def fp_args(inputs, run, run_batch=None):
     doc_inputs_config = "Configuration for preparing vasp inputs"
     doc_run_config = "Configuration for running vasp tasks"
     doc_task_max = "Maximum number of vasp tasks for each iteration"
     doc_extra_output_files = "Extra output file names, support wildcards"
+    doc_prep_max_workers = (
+        "The maximum number of processes used to prepare the fp tasks, "
+        + "None represents as many as the processors of the machine, and 1 for serial"
+    )
+    doc_cache_dir = (
+        "The directory of the FP label cache. The labels of a configuration are "
+        "reused if the configuration and the FP inputs are the same as a cached "
+        "task. The directory should be accessible by all the FP tasks, e.g. a "
+        "mounted volume. The cache is not used if not set"
+    )
+    doc_cache_decimals = (
+        "The number of decimals of the coordinates and cells (in angstrom) "
+        "considered when matching the configurations in the FP label cache"
+    )
+    doc_batch_config = (
+        "Configuration for labeling all the selected configurations of an "
+        "iteration in one step, instead of running one task for each "
+        "configuration. The configurations are labeled by tasks if not set"
+    )
+
+    batch_args = []
+    if run_batch is not None:
+        batch_args = [
+            Argument(
+                "batch_config",
+                dict,
+                run_batch.args(),
+                optional=True,
+                default=None,
+                doc=doc_batch_config,
+            ),
+        ]
 
     return [
         Argument(
@@ -492,7 +603,28 @@ def fp_args(inputs, run):
             default=[],
             doc=doc_extra_output_files,
         ),
-    ]
+        Argument(
+            "prep_max_workers",
+            [int, None],
+            optional=True,
+            default=1,
+            doc=doc_prep_max_workers,
+        ),
+        Argument(
+            "cache_dir",
+            str,
+            optional=True,
+            default=None,
+            doc=doc_cache_dir,
+        ),
+        Argument(
+            "cache_decimals",
+            int,
+            optional=True,
+            default=6,
+            doc=doc_cache_decimals,
+        ),
+    ] + batch_args
 
 
 def variant_fp():
@@ -504,7 +636,11 @@ def variant_fp():
             Argument(
                 kk,
                 dict,
-                fp_args(fp_styles[kk]["inputs"], fp_styles[kk]["run"]),
+                fp_args(
+                    fp_styles[kk]["inputs"],
+                    fp_styles[kk]["run"],
+                    fp_styles[kk].get("run_batch"),
+                ),
             )
         )
 
@@ -66,6 +66,7 @@ from dpgen2.exploration.scheduler import (
     ExplorationScheduler,
 )
 from dpgen2.exploration.selector import (
+    ConfDeduplicator,
     ConfFilters,
     ConfSelectorFrames,
     conf_filter_styles,
@@ -102,6 +103,7 @@ from dpgen2.op import (
     RunCalyDPOptim,
     RunCalyModelDevi,
     RunDPTrain,
+    RunDPTrainPacked,
     RunLmp,
     RunLmpHDF5,
     RunRelax,
@@ -118,6 +120,7 @@ from dpgen2.superop import (
     PrepRunDPTrain,
     PrepRunFp,
     PrepRunLmp,
+    RunFpBatch,
 )
 from dpgen2.superop.caly_evo_step import (
     CalyEvoStep,
@@ -134,6 +137,7 @@ from dpgen2.utils import (
     sort_slice_ops,
     upload_artifact_and_print_uri,
     workflow_config_from_dict,
+    write_data_manifest,
 )
 from dpgen2.utils.step_config import normalize as normalize_step_dict
 
@@ -163,20 +167,29 @@ def make_concurrent_learning_op(
     valid_data: Optional[S3Artifact] = None,
     train_optional_files: Optional[List[str]] = None,
     explore_config: Optional[dict] = None,
+    fp_batch_labeling: bool = False,
+    train_stage_data: bool = False,
+    train_packed: bool = False,
+    explore_freeze_models: bool = False,
 ):
     if train_style in ("dp", "dp-dist"):
         prep_run_train_op = PrepRunDPTrain(
             "prep-run-dp-train",
             PrepDPTrain,
-            RunDPTrain,
+            RunDPTrainPacked if train_packed else RunDPTrain,  # type: ignore
             prep_config=prep_train_config,
             run_config=run_train_config,
             upload_python_packages=upload_python_packages,
             valid_data=valid_data,
             optional_files=train_optional_files,
+            stage_data=train_stage_data,
         )
     else:
         raise RuntimeError(f"unknown train_style {train_style}")
+    if explore_config is not None:
+        assert not (
+            explore_config.get("use_hdf5") and explore_config.get("use_hdf5_traj")
+        ), "Error: `use_hdf5` and `use_hdf5_traj` can not be used together"
     if explore_style == "lmp":
         prep_run_explore_op = PrepRunLmp(
             "prep-run-lmp",
@@ -185,6 +198,7 @@ def make_concurrent_learning_op(
             prep_config=prep_explore_config,
             run_config=run_explore_config,
             upload_python_packages=upload_python_packages,
+            freeze_models=explore_freeze_models,
         )
     elif "calypso" in explore_style:
         expl_mode = explore_style.split(":")[-1] if ":" in explore_style else "default"
@@ -238,7 +252,17 @@ def make_concurrent_learning_op(
     else:
         raise RuntimeError(f"unknown explore_style {explore_style}")
 
-    if fp_style in fp_styles.keys():
+    if fp_style in fp_styles.keys() and fp_batch_labeling:
+        assert (
+            "run_batch" in fp_styles[fp_style]
+        ), f"Error: fp_style {fp_style} does not support batch labeling"
+        prep_run_fp_op = RunFpBatch(
+            "prep-run-fp",
+            fp_styles[fp_style]["run_batch"],
+            run_config=run_fp_config,
+            upload_python_packages=upload_python_packages,
+        )
+    elif fp_style in fp_styles.keys():
         prep_run_fp_op = PrepRunFp(
             "prep-run-fp",
             fp_styles[fp_style]["prep"],
@@ -298,6 +322,10 @@ def get_conf_filters(config):
     return conf_filters
 
 
+def get_conf_dedup(config):
+    return ConfDeduplicator(**config) if config is not None else None
+
+
 def make_naive_exploration_scheduler_without_conf(config, explore_style):
     model_devi_jobs = config["explore"]["stages"]
     fp_task_max = config["fp"]["task_max"]
@@ -305,19 +333,22 @@ def make_naive_exploration_scheduler_without_conf(config, explore_style):
     fatal_at_max = config["explore"]["fatal_at_max"]
     convergence = config["explore"]["convergence"]
     output_nopbc = config["explore"]["output_nopbc"]
+    render_max_workers = config["explore"]["render_max_workers"]
     conf_filters = get_conf_filters(config["explore"]["filters"])
+    conf_dedup = get_conf_dedup(config["explore"].get("dedup"))
     scheduler = ExplorationScheduler()
     # report
     conv_style = convergence.pop("type")
     report = conv_styles[conv_style](**convergence)
     # trajectory render, the format of the output trajs are assumed to be lammps/dump
-    render = TrajRenderLammps(nopbc=output_nopbc)
+    render = TrajRenderLammps(nopbc=output_nopbc, max_workers=render_max_workers)
     # selector
     selector = ConfSelectorFrames(
         render,
         report,
         fp_task_max,
         conf_filters,
+        conf_dedup,
     )
 
     for job_ in model_devi_jobs:
@@ -365,19 +396,26 @@ def make_lmp_naive_exploration_scheduler(config):
     fatal_at_max = config["explore"]["fatal_at_max"]
     convergence = config["explore"]["convergence"]
     output_nopbc = config["explore"]["output_nopbc"]
+    render_max_workers = config["explore"]["render_max_workers"]
     conf_filters = get_conf_filters(config["explore"]["filters"])
+    conf_dedup = get_conf_dedup(config["explore"].get("dedup"))
     use_ele_temp = config["inputs"]["use_ele_temp"]
     scheduler = ExplorationScheduler()
     # report
     conv_style = convergence.pop("type")
     report = conv_styles[conv_style](**convergence)
-    render = TrajRenderLammps(nopbc=output_nopbc, use_ele_temp=use_ele_temp)
+    render = TrajRenderLammps(
+        nopbc=output_nopbc,
+        use_ele_temp=use_ele_temp,
+        max_workers=render_max_workers,
+    )
     # selector
     selector = ConfSelectorFrames(
         render,
         report,
         fp_task_max,
         conf_filters,
+        conf_dedup,
     )
 
     sys_configs_lmp = []
@@ -462,6 +500,18 @@ def get_systems_from_data(data, data_prefix=None):
     return data
 
 
+def write_init_data_manifests(systems):
+    r"""Write the data manifests of the local init data systems before they
+    are uploaded, so the training OPs read the data sizes without loading
+    the data. The manifests are refreshed on each submission.
+    """
+    for ii in systems:
+        try:
+            write_data_manifest(ii)
+        except OSError as e:
+            logging.warning(f"cannot write the data manifest of {ii}: {e}")
+
+
 def workflow_concurrent_learning(
     config: Dict,
 ) -> Step:
@@ -549,6 +599,12 @@ def workflow_concurrent_learning(
         valid_data=valid_data,
         train_optional_files=train_optional_files,
         explore_config=explore_config,
+        fp_batch_labeling=config["fp"].get("batch_config") is not None,
+        # split the last iteration data once for all the models
+        train_stage_data=train_config.get("split_last_iter_valid_ratio") is not None,
+        train_packed=train_config.get("packed", False),
+        # freeze the pytorch models once for all the lmp tasks
+        explore_freeze_models=train_config.get("impl", "tensorflow") == "pytorch",
     )
     scheduler = make_naive_exploration_scheduler(config)
 
@@ -578,6 +634,10 @@ def workflow_concurrent_learning(
     fp_config["inputs"] = fp_inputs
     fp_config["run"] = config["fp"]["run_config"]
     fp_config["extra_output_files"] = config["fp"]["extra_output_files"]
+    fp_config["prep_max_workers"] = config["fp"]["prep_max_workers"]
+    fp_config["cache_dir"] = config["fp"]["cache_dir"]
+    fp_config["cache_decimals"] = config["fp"]["cache_decimals"]
+    fp_config["batch"] = config["fp"].get("batch_config")
     if fp_style == "deepmd":
         assert (
             "teacher_model_path" in fp_config["run"]
@@ -600,6 +660,7 @@ def workflow_concurrent_learning(
             for k, v in multi_init_data.items():
                 sys = v["sys"]
                 sys = get_systems_from_data(sys, v.get("prefix", None))
+                write_init_data_manifests(sys)
                 init_data[k] = sys
             init_data = upload_artifact_and_print_uri(init_data, "multi_init_data")
         train_config["multitask"] = True
@@ -612,6 +673,7 @@ def workflow_concurrent_learning(
             init_data_prefix = config["inputs"]["init_data_prefix"]
             init_data = config["inputs"]["init_data_sys"]
             init_data = get_systems_from_data(init_data, init_data_prefix)
+            write_init_data_manifests(init_data)
             init_data = upload_artifact_and_print_uri(init_data, "init_data")
     iter_data = upload_artifact([])
     if train_style == "dp" and config["train"]["init_models_uri"] is not None:
@@ -0,0 +1,195 @@
+from pathlib import (
+    Path,
+)
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from .deviation_manager import (
+    DeviManager,
+)
+
+_model_devi_names = (
+    DeviManager.MAX_DEVI_V,
+    DeviManager.MIN_DEVI_V,
+    DeviManager.AVG_DEVI_V,
+    DeviManager.MAX_DEVI_F,
+    DeviManager.MIN_DEVI_F,
+    DeviManager.AVG_DEVI_F,
+)
+
+
+class DeviManagerColumnar(DeviManager):
+    r"""The columnar implementation of DeviManager.
+
+    All the trajectories of one deviation (e.g. max_devi_f) are stored
+    in a single contiguous one-dimensional array, together with the
+    number of frames of each trajectory. The frames of the ii-th
+    trajectory are `data[offsets[ii]:offsets[ii+1]]`.
+
+    `get` returns the same List[Optional[np.ndarray]] as `DeviManagerStd`,
+    where each item is a view on the contiguous array. `get_flat` gives
+    direct access to the contiguous array and the offsets.
+
+    The manager can be saved to a directory of `.npy` files by `save`, and
+    restored by `load`. When loaded with `mmap_mode`, the deviations are
+    memory-mapped and never fully loaded into the memory.
+
+    """
+
+    _offsets_fname = "offsets.npy"
+
+    def __init__(self):
+        super().__init__()
+        self._data: Dict[str, np.ndarray] = {}
+        self._size: Dict[str, int] = {}
+        self._nframes: Dict[str, List[int]] = {}
+
+    def _add(self, name: str, deviation: np.ndarray) -> None:
+        assert isinstance(
+            deviation, np.ndarray
+        ), f"Error: deviation(type: {type(deviation)}) is not a np.ndarray"
+        assert len(deviation.shape) == 1, (
+            f"Error: deviation(shape: {deviation.shape}) is not a "
+            + f"one-dimensional array"
+        )
+
+        size = self._size.get(name, 0)
+        self._reserve(name, size + deviation.shape[0], deviation.dtype)
+        self._data[name][size : size + deviation.shape[0]] = deviation
+        self._size[name] = size + deviation.shape[0]
+        self._nframes.setdefault(name, []).append(deviation.shape[0])
+        self.ntraj = max(self.ntraj, len(self._nframes[name]))
+
+    def _reserve(self, name: str, size: int, dtype) -> None:
+        r"""Make sure the buffer of `name` can hold `size` frames.
+        The capacity is doubled when growing, so that appending
+        trajectories one by one costs amortized O(1) per frame.
+        """
+        buf = self._data.get(name)
+        if buf is None:
+            self._data[name] = np.empty(max(size, 1), dtype=dtype)
+            return
+        dtype = np.result_type(buf.dtype, dtype)
+        if buf.shape[0] >= size and buf.dtype == dtype and buf.flags.writeable:
+            return
+        new_buf = np.empty(max(size, 2 * buf.shape[0]), dtype=dtype)
+        new_buf[: self._size[name]] = buf[: self._size[name]]
+        self._data[name] = new_buf
+
+    def _offsets(self, name: str) -> np.ndarray:
+        nframes = self._nframes.get(name, [])
+        offsets = np.zeros(len(nframes) + 1, dtype=np.int64)
+        np.cumsum(nframes, out=offsets[1:])
+        return offsets
+
+    def _get(self, name: str) -> List[Optional[np.ndarray]]:
+        if self.ntraj == 0:
+            return []
+        elif name not in self._nframes:
+            return [None for _ in range(self.ntraj)]
+        else:
+            data = self._data[name][: self._size[name]]
+            offsets = self._offsets(name)
+            return [data[offsets[ii] : offsets[ii + 1]] for ii in range(self.ntraj)]
+
+    def get_flat(self, name: str) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        self._check_name(name)
+        self._check_data()
+        offsets = self._offsets(DeviManager.MAX_DEVI_F)
+        if name not in self._nframes:
+            return None, offsets
+        return self._data[name][: self._size[name]], offsets
+
+    def clear(self) -> None:
+        self.__init__()
+        return None
+
+    def _check_data(self) -> None:
+        r"""Check if data is valid"""
+        # check the length of model deviations
+        frames = {}
+        for name in _model_devi_names:
+            if name not in self._nframes:
+                continue
+            assert len(self._nframes[name]) == self.ntraj, (
+                f"Error: the number of model deviation {name} "
+                + f"({len(self._nframes[name])}) and trajectory files ({self.ntraj}) "
+                + f"are not equal."
+            )
+            frames[name] = np.asarray(self._nframes[name])
+
+        # check if "max_devi_f" exists
+        assert (
+            len(self._nframes.get(DeviManager.MAX_DEVI_F, [])) == self.ntraj
+        ), f"Error: cannot find model deviation {DeviManager.MAX_DEVI_F}"
+
+        # check if the length of the arrays corresponding to the same
+        # trajectory has the same number of frames
+        non_empty_deviations = list(frames.keys())
+        for name in non_empty_deviations[1:]:
+            assert np.array_equal(frames[name], frames[non_empty_deviations[0]]), (
+                f"Error: the number of frames in {name} is different "
+                + f"with that in {non_empty_deviations[0]}.\n"
+                + f"{name}: {frames[name].tolist()}\n"
+                + f"{non_empty_deviations[0]}: {frames[non_empty_deviations[0]].tolist()}\n"
+            )
+
+    def save(self, path: Union[str, Path]) -> None:
+        r"""Save the model deviations to a directory.
+
+        Each non-empty deviation is saved as `<name>.npy`, and the
+        trajectory offsets are saved as `offsets.npy`.
+
+        Parameters
+        ----------
+        path : str or Path
+            The directory to save the model deviations.
+        """
+        self._check_data()
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in self._nframes:
+            np.save(path / f"{name}.npy", self._data[name][: self._size[name]])
+        np.save(path / self._offsets_fname, self._offsets(DeviManager.MAX_DEVI_F))
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        mmap_mode: Optional[str] = "r",
+    ) -> "DeviManagerColumnar":
+        r"""Load the model deviations saved by `save`.
+
+        Parameters
+        ----------
+        path : str or Path
+            The directory of the saved model deviations.
+        mmap_mode : str, optional
+            Passed to `np.load`. By default the deviations are memory-mapped
+            read-only. Adding new deviations to a memory-mapped manager
+            copies the existing data into the memory.
+
+        Returns
+        -------
+        model_devi : DeviManagerColumnar
+            The loaded model deviations.
+        """
+        path = Path(path)
+        offsets = np.load(path / cls._offsets_fname)
+        nframes = np.diff(offsets).tolist()
+        ret = cls()
+        for name in _model_devi_names:
+            fname = path / f"{name}.npy"
+            if fname.is_file():
+                ret._data[name] = np.load(fname, mmap_mode=mmap_mode)
+                ret._size[name] = ret._data[name].shape[0]
+                ret._nframes[name] = list(nframes)
+        ret.ntraj = len(nframes)
+        return ret
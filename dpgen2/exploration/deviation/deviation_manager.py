@@ -5,6 +5,7 @@ from abc import (
 from typing import (
     List,
     Optional,
+    Tuple,
 )
 
 import numpy as np
@@ -74,6 +75,31 @@ class DeviManager(ABC):
     def _get(self, name: str) -> List[Optional[np.ndarray]]:
         pass
 
+    def get_flat(self, name: str) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        r"""Get a model deviation of all trajectories as one contiguous array.
+
+        Parameters
+        ----------
+        name : str
+            The name of the deviation.
+
+        Returns
+        -------
+        deviation : np.ndarray or None
+            The concatenated deviation of all trajectories. None if the
+            deviation is not recorded.
+        offsets : np.ndarray
+            The frames of the ii-th trajectory are
+            `deviation[offsets[ii]:offsets[ii+1]]`. The shape is (ntraj+1,).
+        """
+        devi = self.get(name)
+        nframes = [arr.shape[0] for arr in self.get(DeviManager.MAX_DEVI_F)]  # type: ignore
+        offsets = np.zeros(len(nframes) + 1, dtype=np.int64)
+        np.cumsum(nframes, out=offsets[1:])
+        if len(devi) == 0 or devi[0] is None:
+            return None, offsets
+        return np.concatenate(devi), offsets  # type: ignore
+
     @abstractmethod
     def clear(self) -> None:
         r"""Clear all data in this manager."""
@@ -1,3 +1,19 @@
+from .lammps_dump_index import (
+    get_dump_frame_offsets,
+    read_dump_frames,
+    select_dump_frames,
+)
+from .model_devi_reader import (
+    load_model_devi,
+    load_model_devis,
+)
+from .traj_hdf5 import (
+    lammps_dump_to_hdf5,
+    read_model_devi_hdf5,
+    read_traj_hdf5,
+    write_model_devi_hdf5,
+    write_traj_hdf5,
+)
 from .traj_render import (
     TrajRender,
 )
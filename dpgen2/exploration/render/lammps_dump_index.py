@@ -0,0 +1,125 @@
+import mmap
+import os
+from functools import (
+    lru_cache,
+)
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Union,
+)
+
+import numpy as np
+
+_frame_header = "ITEM: TIMESTEP"
+
+
+def _find_all(buf, sub) -> np.ndarray:
+    ret = []
+    pos = buf.find(sub)
+    while pos >= 0:
+        ret.append(pos)
+        pos = buf.find(sub, pos + len(sub))
+    return np.array(ret, dtype=np.int64)
+
+
+@lru_cache(maxsize=1024)
+def _dump_frame_offsets(
+    fname: str,
+    mtime_ns: int,
+    size: int,
+) -> np.ndarray:
+    offsets = np.zeros(1, dtype=np.int64)
+    if size > 0:
+        with open(fname, "rb") as fp:
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets = _find_all(mm, _frame_header.encode())
+    return np.append(offsets, size)
+
+
+def get_dump_frame_offsets(
+    fname: Union[str, Path],
+) -> np.ndarray:
+    r"""Get the byte offsets of the frames in a LAMMPS dump file.
+
+    The file is scanned once for the `ITEM: TIMESTEP` lines. The index is
+    cached and reused as long as the file is not modified.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The LAMMPS dump file.
+
+    Returns
+    -------
+    offsets : np.ndarray
+        The ii-th frame is stored in bytes [offsets[ii], offsets[ii+1]).
+        The shape is (nframes+1,).
+    """
+    stat = os.stat(fname)
+    return _dump_frame_offsets(str(fname), stat.st_mtime_ns, stat.st_size)
+
+
+def read_dump_frames(
+    fname: Union[str, Path],
+    id_selected: List[int],
+) -> str:
+    r"""Read selected frames from a LAMMPS dump file without parsing
+    the other frames.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The LAMMPS dump file.
+    id_selected : List[int]
+        The indexes of the selected frames. The frames are returned in
+        the same order.
+
+    Returns
+    -------
+    dump : str
+        The selected frames in LAMMPS dump format.
+    """
+    offsets = get_dump_frame_offsets(fname)
+    nframes = offsets.shape[0] - 1
+    ret = []
+    with open(fname, "rb") as fp:
+        for ii in id_selected:
+            if not 0 <= ii < nframes:
+                raise IndexError(
+                    f"frame {ii} is out of range of the {nframes} frames in {fname}"
+                )
+            fp.seek(offsets[ii])
+            ret.append(fp.read(offsets[ii + 1] - offsets[ii]))
+    return b"".join(ret).decode()
+
+
+def select_dump_frames(
+    dump: str,
+    id_selected: List[int],
+) -> str:
+    r"""Select frames from the content of a LAMMPS dump file.
+
+    Parameters
+    ----------
+    dump : str
+        The content of the LAMMPS dump file.
+    id_selected : List[int]
+        The indexes of the selected frames. The frames are returned in
+        the same order.
+
+    Returns
+    -------
+    dump : str
+        The selected frames in LAMMPS dump format.
+    """
+    offsets = np.append(_find_all(dump, _frame_header), len(dump))
+    nframes = offsets.shape[0] - 1
+    ret = []
+    for ii in id_selected:
+        if not 0 <= ii < nframes:
+            raise IndexError(f"frame {ii} is out of range of the {nframes} frames")
+        ret.append(dump[offsets[ii] : offsets[ii + 1]])
+    return "".join(ret)
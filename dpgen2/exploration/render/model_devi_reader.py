@@ -0,0 +1,84 @@
+import os
+import warnings
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+    Union,
+)
+
+import numpy as np
+
+from .traj_hdf5 import (
+    is_hdf5_file,
+    read_model_devi_hdf5,
+)
+
+# step, max_devi_v, min_devi_v, avg_devi_v, max_devi_f, min_devi_f, avg_devi_f
+_default_ncols = 7
+
+
+def load_model_devi(
+    fname: Union[str, Path],
+) -> np.ndarray:
+    r"""Load a model deviation file written by LAMMPS or DeePMD-kit.
+
+    Comment lines (the header, or the headers in the middle of merged
+    files) are skipped. Extra columns after the seventh one, e.g. the
+    `devi_e` written by `write_model_devi_out`, are kept.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The model deviation file. A file with the `.h5` or `.hdf5` suffix
+        is read by `read_model_devi_hdf5`.
+
+    Returns
+    -------
+    model_devi : np.ndarray
+        The model deviation in a two-dimensional array of shape
+        (nframes, ncols). A file with only one frame gives nframes == 1,
+        a file without any frame gives an array of shape (0, 7).
+    """
+    if is_hdf5_file(fname):
+        data = read_model_devi_hdf5(fname)
+        return data if data.size > 0 else np.zeros((0, _default_ncols))
+    with warnings.catch_warnings():
+        # np.loadtxt warns on files without data
+        warnings.simplefilter("ignore", UserWarning)
+        data = np.loadtxt(fname, ndmin=2)
+    if data.size == 0:
+        return np.zeros((0, _default_ncols))
+    return data
+
+
+def load_model_devis(
+    fnames: List[Union[str, Path]],
+    max_workers: Optional[int] = 1,
+) -> List[np.ndarray]:
+    r"""Load a list of model deviation files, see `load_model_devi`.
+
+    Parameters
+    ----------
+    fnames : List[str] or List[Path]
+        The model deviation files.
+    max_workers : int, optional
+        The maximum number of processes used to parse the files, None
+        represents as many as the processors of the machine, and 1 for serial.
+
+    Returns
+    -------
+    model_devis : List[np.ndarray]
+        The model deviations in the same order as `fnames`.
+    """
+    if max_workers == 1 or len(fnames) <= 1:
+        return list(map(load_model_devi, fnames))
+    nworkers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+    chunksize = max(1, len(fnames) // (4 * nworkers))
+    with ProcessPoolExecutor(max_workers) as executor:
+        return list(executor.map(load_model_devi, fnames, chunksize=chunksize))
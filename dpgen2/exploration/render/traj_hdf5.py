@@ -0,0 +1,201 @@
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+    Union,
+)
+
+import dpdata
+import numpy as np
+
+_hdf5_suffixes = (".h5", ".hdf5")
+# the number of frames in a chunk of the compressed datasets
+_default_chunk_frames = 64
+
+
+def is_hdf5_file(
+    fname: Union[str, Path],
+) -> bool:
+    r"""If the file is an HDF5 exploration artifact, judged by the suffix."""
+    return Path(fname).suffix in _hdf5_suffixes
+
+
+def _create_dataset(h5file, name, data, chunk_frames):
+    if data.shape[0] == 0:
+        h5file.create_dataset(name, data=data)
+    else:
+        h5file.create_dataset(
+            name,
+            data=data,
+            chunks=(min(chunk_frames, data.shape[0]),) + data.shape[1:],
+            compression="gzip",
+            shuffle=True,
+        )
+
+
+def write_traj_hdf5(
+    fname: Union[str, Path],
+    coords: np.ndarray,
+    cells: np.ndarray,
+    atom_types: np.ndarray,
+    chunk_frames: int = _default_chunk_frames,
+):
+    r"""Write a trajectory to an HDF5 file as chunked, compressed datasets.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The HDF5 file.
+    coords : np.ndarray
+        The coordinates, shape (nframes, natoms, 3).
+    cells : np.ndarray
+        The cells, shape (nframes, 3, 3).
+    atom_types : np.ndarray
+        The types of the atoms, indexes starting from 0, shape (natoms,).
+    chunk_frames : int
+        The number of frames in a chunk.
+    """
+    import h5py
+
+    coords = np.asarray(coords, dtype=float)
+    cells = np.asarray(cells, dtype=float)
+    atom_types = np.asarray(atom_types, dtype=int)
+    assert coords.ndim == 3 and coords.shape[1:] == (atom_types.shape[0], 3), (
+        f"Error: inconsistent shape of coords {coords.shape} "
+        f"and atom_types {atom_types.shape}"
+    )
+    assert cells.shape == (coords.shape[0], 3, 3), (
+        f"Error: inconsistent shape of cells {cells.shape} "
+        f"and coords {coords.shape}"
+    )
+    with h5py.File(fname, "w") as f:
+        _create_dataset(f, "coords", coords, chunk_frames)
+        _create_dataset(f, "cells", cells, chunk_frames)
+        f.create_dataset("atom_types", data=atom_types)
+
+
+def write_model_devi_hdf5(
+    fname: Union[str, Path],
+    model_devi: np.ndarray,
+    chunk_frames: int = 4096,
+):
+    r"""Write the model deviation to an HDF5 file as a chunked, compressed
+    dataset.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The HDF5 file.
+    model_devi : np.ndarray
+        The model deviation, shape (nframes, ncols), in the same columns as
+        the `model_devi.out` file.
+    chunk_frames : int
+        The number of frames in a chunk.
+    """
+    import h5py
+
+    with h5py.File(fname, "w") as f:
+        _create_dataset(f, "model_devi", np.asarray(model_devi), chunk_frames)
+
+
+def read_model_devi_hdf5(
+    fname: Union[str, Path],
+) -> np.ndarray:
+    r"""Read the model deviation written by `write_model_devi_hdf5`."""
+    import h5py
+
+    with h5py.File(fname, "r") as f:
+        return f["model_devi"][()]
+
+
+def read_traj_hdf5(
+    fname: Union[str, Path],
+    id_selected: List[int],
+    type_map: Optional[List[str]] = None,
+) -> dpdata.System:
+    r"""Read selected frames from an HDF5 trajectory written by
+    `write_traj_hdf5`. Only the chunks holding the selected frames are
+    decompressed.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The HDF5 file.
+    id_selected : List[int]
+        The indexes of the selected frames. The frames are returned in
+        the same order.
+    type_map : List[str], optional
+        The names of the atom types. The types are named `TYPE_i` if not
+        provided. The atom names are the same as reading a LAMMPS dump file
+        by dpdata.
+
+    Returns
+    -------
+    system : dpdata.System
+        The selected frames.
+    """
+    import h5py
+
+    id_selected = np.asarray(id_selected, dtype=int)
+    with h5py.File(fname, "r") as f:
+        nframes = f["coords"].shape[0]
+        for ii in id_selected:
+            if not 0 <= ii < nframes:
+                raise IndexError(
+                    f"frame {ii} is out of range of the {nframes} frames in {fname}"
+                )
+        # h5py reads increasing indexes only
+        uniq, inverse = np.unique(id_selected, return_inverse=True)
+        coords = f["coords"][uniq][inverse]
+        cells = f["cells"][uniq][inverse]
+        atom_types = f["atom_types"][()]
+
+    if type_map is None:
+        atom_numbs = np.bincount(atom_types).tolist()
+        atom_names = ["TYPE_%d" % ii for ii in range(len(atom_numbs))]
+    else:
+        assert len(type_map) > atom_types.max(initial=-1), (
+            f"Error: the type_map {type_map} is shorter than the number "
+            "of types in the trajectory"
+        )
+        atom_numbs = np.bincount(atom_types, minlength=len(type_map)).tolist()
+        atom_names = list(type_map)
+    return dpdata.System(
+        data={
+            "atom_names": atom_names,
+            "atom_numbs": atom_numbs,
+            "atom_types": atom_types,
+            "orig": np.zeros(3),
+            "cells": cells,
+            "coords": coords,
+        },
+    )
+
+
+def lammps_dump_to_hdf5(
+    dump_file: Union[str, Path],
+    fname: Union[str, Path],
+    chunk_frames: int = _default_chunk_frames,
+):
+    r"""Convert a LAMMPS dump trajectory to an HDF5 trajectory, see
+    `write_traj_hdf5`.
+
+    Parameters
+    ----------
+    dump_file : str or Path
+        The LAMMPS dump file.
+    fname : str or Path
+        The HDF5 file.
+    chunk_frames : int
+        The number of frames in a chunk.
+    """
+    system = dpdata.System(dump_file, fmt="lammps/dump")
+    write_traj_hdf5(
+        fname,
+        system["coords"],
+        system["cells"],
+        system["atom_types"],
+        chunk_frames=chunk_frames,
+    )
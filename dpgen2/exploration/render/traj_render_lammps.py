@@ -1,4 +1,8 @@
 import json
+import os
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
 from io import (
     StringIO,
 )
@@ -25,7 +29,19 @@ from dpgen2.utils import (
 
 from ..deviation import (
     DeviManager,
-    DeviManagerStd,
+    DeviManagerColumnar,
+)
+from .lammps_dump_index import (
+    read_dump_frames,
+    select_dump_frames,
+)
+from .model_devi_reader import (
+    load_model_devi,
+    load_model_devis,
+)
+from .traj_hdf5 import (
+    is_hdf5_file,
+    read_traj_hdf5,
 )
 from .traj_render import (
     TrajRender,
@@ -37,14 +53,33 @@ if TYPE_CHECKING:
     )
 
 
+def _render_one_traj(
+    traj: Union[Path, str],
+    id_selected: List[int],
+    type_map: Optional[List[str]],
+    nopbc: bool,
+) -> dpdata.System:
+    # traj is either the trajectory file, or the already selected frames
+    if isinstance(traj, Path) and is_hdf5_file(traj):
+        ss = read_traj_hdf5(traj, id_selected, type_map=type_map)
+    else:
+        if isinstance(traj, Path):
+            traj = read_dump_frames(traj, id_selected)
+        ss = dpdata.System(StringIO(traj), fmt="lammps/dump", type_map=type_map)
+    ss.nopbc = nopbc
+    return ss
+
+
 class TrajRenderLammps(TrajRender):
     def __init__(
         self,
         nopbc: bool = False,
         use_ele_temp: int = 0,
+        max_workers: Optional[int] = 1,
     ):
         self.nopbc = nopbc
         self.use_ele_temp = use_ele_temp
+        self.max_workers = max_workers
 
     def get_model_devi(
         self,
@@ -52,7 +87,9 @@ class TrajRenderLammps(TrajRender):
     ) -> DeviManager:
         ntraj = len(files)
 
-        model_devi = DeviManagerStd()
+        model_devi = DeviManagerColumnar()
+        if ntraj > 0 and not isinstance(files[0], HDF5Dataset):
+            files = load_model_devis(files, self.max_workers)  # type: ignore
         for ii in range(ntraj):
             self._load_one_model_devi(files[ii], model_devi)
 
@@ -61,8 +98,10 @@ class TrajRenderLammps(TrajRender):
     def _load_one_model_devi(self, fname, model_devi):
         if isinstance(fname, HDF5Dataset):
             dd = fname.get_data()
+        elif isinstance(fname, np.ndarray):
+            dd = fname
         else:
-            dd = np.loadtxt(fname)
+            dd = load_model_devi(fname)
         if (
             len(np.shape(dd)) == 1  # type: ignore
         ):  # In case model-devi.out is 1-dimensional
@@ -115,20 +154,37 @@ class TrajRenderLammps(TrajRender):
             assert ntraj == len(optional_outputs)
             ele_temp = self.get_ele_temp(optional_outputs)
 
-        traj_fmt = "lammps/dump"
+        sel = [ii for ii in range(ntraj) if len(id_selected[ii]) > 0]
+        # only the selected frames are read and parsed
+        trajs_sel = [
+            select_dump_frames(trajs[ii].get_data(), id_selected[ii])  # type: ignore
+            if isinstance(trajs[ii], HDF5Dataset)
+            else Path(trajs[ii])  # type: ignore
+            for ii in sel
+        ]
+        ids_sel = [id_selected[ii] for ii in sel]
+        args = (trajs_sel, ids_sel, [type_map] * len(sel), [self.nopbc] * len(sel))
+        if self.max_workers == 1 or len(sel) <= 1:
+            systems = list(map(_render_one_traj, *args))
+        else:
+            nworkers = (
+                self.max_workers
+                if self.max_workers is not None
+                else (os.cpu_count() or 1)
+            )
+            chunksize = max(1, len(sel) // (4 * nworkers))
+            with ProcessPoolExecutor(self.max_workers) as executor:
+                systems = list(
+                    executor.map(_render_one_traj, *args, chunksize=chunksize)
+                )
+
+        # the systems are merged in the order of the trajectories,
+        # independent of the number of workers
         ms = dpdata.MultiSystems(type_map=type_map)
-        for ii in range(ntraj):
-            if len(id_selected[ii]) > 0:
-                if isinstance(trajs[ii], HDF5Dataset):
-                    traj = StringIO(trajs[ii].get_data())  # type: ignore
-                else:
-                    traj = trajs[ii]
-                ss = dpdata.System(traj, fmt=traj_fmt, type_map=type_map)
-                ss.nopbc = self.nopbc
-                if ele_temp:
-                    self.set_ele_temp(ss, ele_temp[ii])
-                ss = ss.sub_system(id_selected[ii])
-                ms.append(ss)
+        for ii, ss in zip(sel, systems):
+            if ele_temp:
+                self.set_ele_temp(ss, ele_temp[ii])
+            ms.append(ss)
         if conf_filters is not None:
             ms = conf_filters.check(ms)
         return ms
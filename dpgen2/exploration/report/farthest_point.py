@@ -0,0 +1,153 @@
+from typing import (
+    Optional,
+)
+
+import dpdata
+import numpy as np
+
+
+def structure_features(
+    ms: dpdata.MultiSystems,
+    rcut: float = 6.0,
+    nbins: int = 24,
+) -> np.ndarray:
+    r"""The structural features of the frames used by the farthest-point
+    selection of candidates.
+
+    The features are the normalized radial distribution fingerprints, see
+    `dpgen2.exploration.selector.conf_dedup.rdf_fingerprint`, so the
+    candidates are compared in the configuration space. They are computed
+    from the rendered candidate frames only.
+
+    Parameters
+    ----------
+    ms : dpdata.MultiSystems
+        The frames.
+    rcut : float
+        The cutoff distance of the radial distribution functions.
+    nbins : int
+        The number of bins of the radial distribution functions.
+
+    Returns
+    -------
+    features : np.ndarray
+        The features, shape (nframes, nfeatures). The frames are in the
+        order of the systems in `ms`.
+    """
+    # imported here to avoid the circular import through the package
+    from dpgen2.exploration.selector.conf_dedup import (
+        rdf_fingerprint,
+    )
+
+    ntypes = len(ms.atom_names)
+    nfeatures = ntypes * (ntypes + 1) // 2 * nbins
+    features = [np.zeros((0, nfeatures))]
+    for system in ms:
+        # the types indexed by the atom names of the multi-systems
+        type_idx = np.array([ms.atom_names.index(nn) for nn in system["atom_names"]])
+        atom_types = type_idx[np.asarray(system["atom_types"], dtype=int)]
+        for coords, cell in zip(system["coords"], system["cells"]):
+            fingerprint = rdf_fingerprint(
+                coords, cell, atom_types, ntypes, system.nopbc, rcut, nbins
+            )
+            features.append(fingerprint.reshape(1, nfeatures))
+    return np.concatenate(features)
+
+
+def farthest_point_frames(
+    ms: dpdata.MultiSystems,
+    numb: int,
+    rcut: float = 6.0,
+    nbins: int = 24,
+) -> dpdata.MultiSystems:
+    r"""Select frames by the farthest-point sampling of their structural
+    features, see `structure_features`.
+
+    Parameters
+    ----------
+    ms : dpdata.MultiSystems
+        The frames.
+    numb : int
+        The number of frames to select.
+    rcut : float
+        The cutoff distance of the radial distribution functions.
+    nbins : int
+        The number of bins of the radial distribution functions.
+
+    Returns
+    -------
+    ms : dpdata.MultiSystems
+        The selected frames. The order of the frames is not changed.
+    """
+    if ms.get_nframes() <= numb:
+        return ms
+    features = structure_features(ms, rcut, nbins)
+    # the fingerprints are normalized, the distances are not standardized
+    sel = farthest_point_sampling(features, numb, standardize=False)
+    ret = dpdata.MultiSystems(type_map=ms.atom_names)
+    offset = 0
+    for system in ms:
+        nframes = system.get_nframes()
+        idx = sel[(sel >= offset) & (sel < offset + nframes)] - offset
+        if idx.size > 0:
+            ret.append(system.sub_system(idx))
+        offset += nframes
+    return ret
+
+
+def farthest_point_sampling(
+    features: np.ndarray,
+    numb: int,
+    first: Optional[int] = None,
+    standardize: bool = True,
+) -> np.ndarray:
+    r"""Select frames by the farthest-point (greedy k-center) sampling.
+
+    The features are standardized column-wise if `standardize`, missing
+    (nan) values are treated as the mean. Starting from `first`, the frame farthest from all
+    the selected frames is selected in each step. The distances of the
+    frames to the selected set are updated in a vectorized way, so the cost
+    is O(numb * nframes * nfeatures).
+
+    Parameters
+    ----------
+    features : np.ndarray
+        The features of the frames, shape (nframes, nfeatures).
+    numb : int
+        The number of frames to select.
+    first : int, optional
+        The index of the first selected frame. The frame with the largest
+        first feature if not provided.
+    standardize : bool
+        If the features are standardized column-wise.
+
+    Returns
+    -------
+    idx : np.ndarray
+        The indexes of the selected frames in ascending order.
+    """
+    nframes = features.shape[0]
+    numb = min(numb, nframes)
+    if numb <= 0:
+        return np.zeros(0, dtype=np.int64)
+    xx = np.asarray(features, dtype=np.float64)
+    with np.errstate(invalid="ignore"):
+        mean = np.nanmean(xx, axis=0)
+        if standardize:
+            std = np.nanstd(xx, axis=0)
+            xx = (xx - mean) / np.where(std > 0, std, 1.0)
+        else:
+            xx = xx - mean
+    xx = np.nan_to_num(xx, nan=0.0)
+    if first is None:
+        first = int(np.argmax(xx[:, 0])) if xx.shape[1] > 0 else 0
+    sel = np.empty(numb, dtype=np.int64)
+    sel[0] = first
+    dist = np.sum((xx - xx[first]) ** 2, axis=1)
+    dist[first] = -1.0
+    for ii in range(1, numb):
+        sel[ii] = np.argmax(dist)
+        np.minimum(dist, np.sum((xx - xx[sel[ii]]) ** 2, axis=1), out=dist)
+        # selected frames are never selected again, even among duplicates
+        dist[sel[ii]] = -1.0
+    return np.sort(sel)
@@ -86,6 +86,14 @@ class ExplorationReport(ABC):
         """
         pass
 
+    def fps_candidates(self) -> bool:
+        r"""If the candidates are selected by the farthest-point sampling of
+        their structures. If True, `get_candidate_ids` returns all the
+        candidates, and the selector picks at most `max_nframes` of them
+        after the configurations are rendered.
+        """
+        return False
+
     @abstractmethod
     def print_header(self) -> str:
         r"""Print the header of report"""
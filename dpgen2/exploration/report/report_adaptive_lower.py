@@ -69,6 +69,8 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
         propotional to the population of a histogram between
         level_f_lo and level_f_hi. The number of bins in the histogram
         is set by nhist, which should be an integer. The default is 10.
+        "fps": the candidates are selected by the farthest-point sampling
+        of their structures after they are rendered, see `fps_candidates`.
     """
 
     def __init__(
@@ -169,7 +171,11 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
             "'inv_pop_f' or 'inv_pop_f:nhist': the probability is inversely "
             "propotional to the population of a histogram between "
             "leven_f_lo and level_f_hi. The number of bins in the histogram "
-            "is set by nhist, which should be an integer. The default is 10."
+            "is set by nhist, which should be an integer. The default is 10. "
+            "'fps': the candidates are selected by the farthest-point sampling "
+            "of their radial distribution fingerprints, which covers the "
+            "configuration space better than the random selection. The "
+            "fingerprints are computed for the candidate configurations only."
         )
 
         return [
@@ -215,112 +221,110 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
     ):
         self.ntraj = 0
         self.nframes = 0
-        self.candi = set()
-        self.accur = set()
-        self.failed = []
-        self.candi_picked = []
+        self.traj_offsets = np.zeros(1, dtype=np.int64)
+        self.candi = np.zeros(0, dtype=bool)
+        self.accur = np.zeros(0, dtype=bool)
+        self.failed = np.zeros(0, dtype=bool)
+        self.candi_picked = np.zeros((0, 2), dtype=np.int64)
         self.model_devi = None
-        self.md_f = []
-        self.md_v = []
+        self.md_f = np.zeros(0)
+        self.md_v = np.zeros(0)
 
     def record(
         self,
         model_devi: DeviManager,
     ):
-        ntraj = model_devi.ntraj
-        self.ntraj += ntraj
-        md_f = model_devi.get(DeviManager.MAX_DEVI_F)
-        md_v = model_devi.get(DeviManager.MAX_DEVI_V)
-        self.md_f += md_f
-        self.md_v += md_v
-
-        # inits
-        coll_f = []
-        coll_v = []
-        # loop over trajs
-        for ii in range(ntraj):
-            add_nframes, add_accur, add_failed, add_f, add_v = self._record_one_traj(
-                ii, md_f[ii], md_v[ii]
+        md_f, offsets = model_devi.get_flat(DeviManager.MAX_DEVI_F)
+        md_v, _ = model_devi.get_flat(DeviManager.MAX_DEVI_V)
+        if md_f is None:
+            md_f = np.zeros(0)
+        # check consistency
+        if self.has_virial and md_v is None:
+            raise FatalError(
+                "report requires virial model deviation, but no virial "
+                "model deviation is provided."
             )
-            self.nframes += add_nframes
-            self.accur.update(add_accur)
-            self.failed += add_failed
-            coll_f += add_f
-            coll_v += add_v
-        # sort
-        coll_f.sort()
-        coll_v.sort()
-        assert len(coll_v) == len(coll_f)
+        # fake md_v as zeros if None is provided
+        if md_v is None:
+            md_v = np.zeros_like(md_f)
+        assert md_f.shape == md_v.shape
+
+        # the frames of this record are appended after the recorded ones
+        self.ntraj += offsets.shape[0] - 1
+        self.traj_offsets = np.concatenate(
+            (self.traj_offsets, self.traj_offsets[-1] + offsets[1:])
+        )
+        self.nframes += md_f.shape[0]
+        self.md_f = np.concatenate((self.md_f, md_f))
+        self.md_v = np.concatenate((self.md_v, md_v))
+
+        failed = np.logical_or(md_f > self.level_f_hi, md_v > self.level_v_hi)
+        # indexes of the frames that are not failed
+        coll = np.flatnonzero(~failed)
         # calcuate numbers
-        numb_candi_f = max(self.numb_candi_f, int(self.rate_candi_f * len(coll_f)))
-        numb_candi_v = max(self.numb_candi_v, int(self.rate_candi_v * len(coll_v)))
+        numb_candi_f = max(self.numb_candi_f, int(self.rate_candi_f * coll.shape[0]))
+        numb_candi_v = max(self.numb_candi_v, int(self.rate_candi_v * coll.shape[0]))
         # adjust number of candidate
-        if len(coll_f) < numb_candi_f:
-            numb_candi_f = len(coll_f)
-        if len(coll_v) < numb_candi_v:
-            numb_candi_v = len(coll_v)
-        # compute trust lo
-        if numb_candi_v == 0:
-            self.level_v_lo = self.level_v_hi
-        else:
-            self.level_v_lo = coll_v[-numb_candi_v][0]
+        numb_candi_f = min(numb_candi_f, coll.shape[0])
+        numb_candi_v = min(numb_candi_v, coll.shape[0])
+        # compute trust lo and candidates
+        candi_f, level_f_lo = self._top_frames(md_f[coll], numb_candi_f)
+        candi_v, level_v_lo = self._top_frames(md_v[coll], numb_candi_v)
+        self.level_f_lo = self.level_f_hi if level_f_lo is None else level_f_lo
+        self.level_v_lo = self.level_v_hi if level_v_lo is None else level_v_lo
         if not self.has_virial:
             self.level_v_lo = None
-        if numb_candi_f == 0:
-            self.level_f_lo = self.level_f_hi
-        else:
-            self.level_f_lo = coll_f[-numb_candi_f][0]
-        # add to candidate set
-        for ii in range(len(coll_f) - numb_candi_f, len(coll_f)):
-            self.candi.add(tuple(coll_f[ii][1:]))
-        for ii in range(len(coll_v) - numb_candi_v, len(coll_v)):
-            self.candi.add(tuple(coll_v[ii][1:]))
-        # accurate set is substracted by the candidate set
-        self.accur = self.accur - self.candi
+        candi = np.zeros(md_f.shape[0], dtype=bool)
+        candi[coll[candi_f]] = True
+        candi[coll[candi_v]] = True
+        self.candi = np.concatenate((self.candi, candi))
+        self.failed = np.concatenate((self.failed, failed))
+        # accurate frames are the ones neither failed nor candidate
+        self.accur = ~(self.failed | self.candi)
         self.model_devi = model_devi
-        self._no_candidate = len(self.candi) == 0
-        self._failed_ratio = float(len(self.failed)) / float(self.nframes)
-        self._accurate_ratio = float(len(self.accur)) / float(self.nframes)
-        self._candidate_ratio = float(len(self.candi)) / float(self.nframes)
+        numb_candi = np.count_nonzero(self.candi)
+        self._no_candidate = numb_candi == 0
+        self._failed_ratio = float(np.count_nonzero(self.failed)) / float(self.nframes)
+        self._accurate_ratio = float(np.count_nonzero(self.accur)) / float(self.nframes)
+        self._candidate_ratio = float(numb_candi) / float(self.nframes)
 
-    def _record_one_traj(
-        self,
-        tt,
-        md_f,
-        md_v,
-    ):
+    @staticmethod
+    def _top_frames(
+        md: np.ndarray,
+        numb: int,
+    ) -> Tuple[np.ndarray, Optional[float]]:
         """
-        Record one trajctory.
+        Find the `numb` frames with the largest model deviations by a
+        partial sort. Among the frames with the same model deviation,
+        the ones with larger indexes are taken.
 
-        tt:             traj index
-        md_f, md_v:     model deviations of force and virial
+        Returns
+        -------
+        idx     np.ndarray
+            The indexes of the frames in `md`.
+        level   float or None
+            The lowest model deviation of the frames. None if `numb` is 0.
         """
-        # check consistency
-        if self.has_virial and md_v is None:
-            raise FatalError(
-                "report requires virial model deviation, but no virial "
-                "model deviation is provided."
-            )
-        # fake md_v as zeros if None is provided
-        if md_v is None:
-            md_v = np.zeros_like(md_f)
-        # loop over frames
-        nframes = md_f.shape[0]
-        assert nframes == md_v.shape[0]
-        failed = []
-        accur = set()
-        coll_f = []
-        coll_v = []
-        for ii in range(nframes):
-            if md_f[ii] > self.level_f_hi or md_v[ii] > self.level_v_hi:
-                failed.append((tt, ii))
-            else:
-                coll_f.append([md_f[ii], tt, ii])
-                coll_v.append([md_v[ii], tt, ii])
-                # now accur takes all non-failed frames,
-                # will be substracted by candidate later
-                accur.add((tt, ii))
-        return nframes, accur, failed, coll_f, coll_v
+        if numb == 0:
+            return np.zeros(0, dtype=np.int64), None
+        kth = md.shape[0] - numb
+        level = md[np.argpartition(md, kth)[kth]]
+        larger = np.flatnonzero(md > level)
+        equal = np.flatnonzero(md == level)
+        idx = np.concatenate((larger, equal[equal.shape[0] - numb + larger.shape[0] :]))
+        return idx, float(level)
+
+    def _mask_to_ids(
+        self,
+        mask: np.ndarray,
+    ) -> np.ndarray:
+        """
+        Convert a mask over all the recorded frames to an array of
+        shape (n, 2), each row is (traj_idx, frame_idx).
+        """
+        flat = np.flatnonzero(mask)
+        traj = np.searchsorted(self.traj_offsets, flat, side="right") - 1
+        return np.stack((traj, flat - self.traj_offsets[traj]), axis=1)
 
     def _sequence_conv(
         self,
@@ -379,28 +383,34 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
         ntraj = self.ntraj
         id_cand = self._get_candidates(max_nframes)
         id_cand_list = [[] for ii in range(ntraj)]
-        for ii in id_cand:
-            id_cand_list[ii[0]].append(ii[1])
+        for tt, ff in id_cand.tolist():
+            id_cand_list[tt].append(ff)
         # free the memory, this method should only be called once
         if clear:
             self.clear()
         return id_cand_list
 
+    def fps_candidates(self) -> bool:
+        return self.candi_sel_prob == "fps"
+
     def _get_candidates(
         self,
         max_nframes: Optional[int] = None,
-    ) -> List[Tuple[int, int]]:
+    ) -> np.ndarray:
         if self.candi_sel_prob == "uniform":
             return self._get_candidates_uniform(max_nframes)
         elif self.candi_sel_prob == "inv_pop_f":
             return self._get_candidates_inv_pop_f(max_nframes)
+        elif self.candi_sel_prob == "fps":
+            # the candidates are picked by the selector, see `fps_candidates`
+            return self._get_candidates_uniform(None)
         else:
             raise FatalError("unknown candidate selection style")
 
     def _get_candidates_uniform(
         self,
         max_nframes: Optional[int] = None,
-    ) -> List[Tuple[int, int]]:
+    ) -> np.ndarray:
         """
         Get candidates. If number of candidates is larger than `max_nframes`,
         then randomly pick `max_nframes` frames from the candidates.
@@ -412,13 +422,16 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
 
         Returns
         -------
-        cand_frames   List[Tuple[int,int]]
-            Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
+        cand_frames   np.ndarray
+            Candidate frames. An array of shape (ncand, 2), each row
+            is (traj_idx, frame_idx).
         """
-        self.candi_picked = [(ii[0], ii[1]) for ii in self.candi]
-        if max_nframes is not None and max_nframes < len(self.candi_picked):
-            random.shuffle(self.candi_picked)
-            ret = sorted(self.candi_picked[:max_nframes])
+        self.candi_picked = self._mask_to_ids(self.candi)
+        ncand = self.candi_picked.shape[0]
+        if max_nframes is not None and max_nframes < ncand:
+            perm = list(range(ncand))
+            random.shuffle(perm)
+            ret = self.candi_picked[np.sort(perm[:max_nframes])]
         else:
             ret = self.candi_picked
         return ret
@@ -426,7 +439,7 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
     def _get_candidates_inv_pop_f(
         self,
         max_nframes: Optional[int] = None,
-    ) -> List[Tuple[int, int]]:
+    ) -> np.ndarray:
         """
         Get candidates. If number of candidates is larger than `max_nframes`,
         then randomly pick `max_nframes` frames from the candidates.
@@ -440,68 +453,60 @@ class ExplorationReportAdaptiveLower(ExplorationReport):
 
         Returns
         -------
-        cand_frames   List[Tuple[int,int]]
-            Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
+        cand_frames   np.ndarray
+            Candidate frames. An array of shape (ncand, 2), each row
+            is (traj_idx, frame_idx).
         """
-        self.candi_picked = [(ii[0], ii[1]) for ii in self.candi]
-        if max_nframes is not None and max_nframes < len(self.candi_picked):
-            prob = self._choice_prob_inv_pop_f(self.candi_picked)
+        self.candi_picked = self._mask_to_ids(self.candi)
+        ncand = self.candi_picked.shape[0]
+        if max_nframes is not None and max_nframes < ncand:
+            prob = self._choice_prob_inv_pop_f(self.md_f[self.candi])
             indices = np.random.choice(
-                len(self.candi_picked),
+                ncand,
                 size=max_nframes,
                 replace=False,
                 p=prob / np.sum(prob),
             )
-            ret = [self.candi_picked[i] for i in indices]
+            ret = self.candi_picked[indices]
         else:
             ret = self.candi_picked
         return ret
 
     def _choice_prob_inv_pop_f(
         self,
-        candi: List,
-    ):
+        candi_md_f: np.ndarray,
+    ) -> np.ndarray:
         """Compute the probability of candi frames according to the inverse
         population in the model deviation statistics.
 
         Parameters
         ----------
-        candi   List[Tuple[int,int]]
-            Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
+        candi_md_f   np.ndarray
+            The force model deviations of the candidate frames.
 
         Returns
         -------
-        prob    List[float]
+        prob    np.ndarray
             The probability of each candidate frame.
 
         """
-        histo = np.zeros(self.nhist, dtype=int)
-        for ii in candi:
-            frame_md_f = self.md_f[ii[0]][ii[1]]
-            hist_idx = self._histo_idx(frame_md_f)
-            histo[hist_idx] += 1
-        prob_tab = [1.0 / float(ii) if ii > 0 else 0.0 for ii in histo]
-        prob = []
-        for ii in candi:
-            frame_md_f = self.md_f[ii[0]][ii[1]]
-            hist_idx = self._histo_idx(frame_md_f)
-            prob.append(prob_tab[hist_idx])
-        return prob
+        hist_idx = self._histo_idx(candi_md_f)
+        histo = np.bincount(hist_idx, minlength=self.nhist)
+        return 1.0 / histo[hist_idx]
 
     def _histo_idx(
         self,
-        devi_f: float,
-    ) -> int:
+        devi_f: np.ndarray,
+    ) -> np.ndarray:
         """
-        return the index in histogram given a force  model deviation.
+        return the indexes in histogram given force model deviations.
         """
         dh = (self.level_f_hi - self.level_f_lo) / self.nhist
-        hist_idx = int((devi_f - self.level_f_lo) / dh)
-        if hist_idx < 0:
-            hist_idx = 0
-        elif hist_idx >= self.nhist:
-            hist_idx = self.nhist - 1
-        return hist_idx
+        if dh > 0:
+            hist_idx = np.trunc((devi_f - self.level_f_lo) / dh)
+        else:
+            hist_idx = np.zeros_like(devi_f)
+        return np.clip(hist_idx, 0, self.nhist - 1).astype(np.int64)
 
     def print_header(self) -> str:
         r"""Print the header of report"""
@@ -97,116 +97,82 @@ class ExplorationReportTrustLevels(ExplorationReport):
     def clear(
         self,
     ):
-        self.traj_nframes = []
-        self.traj_cand = []
-        self.traj_accu = []
-        self.traj_fail = []
-        self.traj_cand_picked = []
+        self.traj_nframes = np.zeros(0, dtype=np.int64)
+        self.cand_ids = np.zeros((0, 2), dtype=np.int32)
+        self.numb_accu = 0
+        self.numb_fail = 0
         self.model_devi = None
 
     def record(
         self,
         model_devi: DeviManager,
     ):
-        ntraj = model_devi.ntraj
-        md_f = model_devi.get(DeviManager.MAX_DEVI_F)
-        md_v = model_devi.get(DeviManager.MAX_DEVI_V)
-
-        for ii in range(ntraj):
-            id_f_cand, id_f_accu, id_f_fail = self._get_indexes(
-                md_f[ii], self.level_f_lo, self.level_f_hi
-            )
-            id_v_cand, id_v_accu, id_v_fail = self._get_indexes(
-                md_v[ii], self.level_v_lo, self.level_v_hi
-            )
-            nframes, set_accu, set_cand, set_fail = self._record_one_traj(
-                id_f_accu,
-                id_f_cand,
-                id_f_fail,
-                id_v_accu,
-                id_v_cand,
-                id_v_fail,
+        md_f, offsets = model_devi.get_flat(DeviManager.MAX_DEVI_F)
+        md_v, _ = model_devi.get_flat(DeviManager.MAX_DEVI_V)
+        if md_f is None:
+            md_f = np.zeros(0)
+
+        f_cand, f_accu, f_fail = self._get_masks(md_f, self.level_f_lo, self.level_f_hi)
+        v_cand, v_accu, v_fail = self._get_masks(md_v, self.level_v_lo, self.level_v_hi)
+        # frames without a valid (e.g. nan) model deviation are not counted
+        traj_nframes = np.diff(offsets) - self._count_by_traj(
+            ~(f_cand | f_accu | f_fail),
+            offsets,  # type: ignore
+        )
+        novirial = v_cand is None
+        if novirial:
+            accu, cand, fail = f_accu, f_cand, f_fail
+        else:
+            traj_nframes_v = np.diff(offsets) - self._count_by_traj(
+                ~(v_cand | v_accu | v_fail),
+                offsets,  # type: ignore
             )
-            # record
-            self.traj_nframes.append(nframes)
-            self.traj_cand.append(set_cand)
-            self.traj_accu.append(set_accu)
-            self.traj_fail.append(set_fail)
-        assert len(self.traj_nframes) == ntraj
-        assert len(self.traj_cand) == ntraj
-        assert len(self.traj_accu) == ntraj
-        assert len(self.traj_fail) == ntraj
+            if not np.array_equal(traj_nframes, traj_nframes_v):
+                raise FatalError("number of frames by virial ")
+            accu = f_accu & v_accu  # type: ignore
+            cand = (f_cand & (v_accu | v_cand)) | (f_accu & v_cand)  # type: ignore
+            fail = f_fail | v_fail  # type: ignore
+        # the accurate, candidate and failed frames are disjoint by construction
+        assert np.sum(traj_nframes) == np.count_nonzero(accu | cand | fail)  # type: ignore
+
+        # record
+        cand_flat = np.flatnonzero(cand)
+        cand_traj = np.searchsorted(offsets, cand_flat, side="right") - 1
+        self.traj_nframes = traj_nframes
+        self.cand_ids = np.stack(
+            (cand_traj, cand_flat - offsets[cand_traj]), axis=1
+        ).astype(np.int32)
+        self.numb_accu = int(np.count_nonzero(accu))
+        self.numb_fail = int(np.count_nonzero(fail))
         self.model_devi = model_devi
-        self._no_candidate = sum([len(ii) for ii in self.traj_cand]) == 0
-        self._failed_ratio = float(sum([len(ii) for ii in self.traj_fail])) / float(
-            sum(self.traj_nframes)
-        )
-        self._accurate_ratio = float(sum([len(ii) for ii in self.traj_accu])) / float(
-            sum(self.traj_nframes)
-        )
-        self._candidate_ratio = float(sum([len(ii) for ii in self.traj_cand])) / float(
-            sum(self.traj_nframes)
-        )
+        nframes = float(np.sum(self.traj_nframes))
+        self._no_candidate = self.cand_ids.shape[0] == 0
+        self._failed_ratio = float(self.numb_fail) / nframes
+        self._accurate_ratio = float(self.numb_accu) / nframes
+        self._candidate_ratio = float(self.cand_ids.shape[0]) / nframes
 
-    def _get_indexes(
-        self,
+    @staticmethod
+    def _get_masks(
         md,
         level_lo,
         level_hi,
     ):
         if (md is not None) and (level_hi is not None) and (level_lo is not None):
-            id_cand = np.where(np.logical_and(md >= level_lo, md < level_hi))[0]
-            id_accu = np.where(md < level_lo)[0]
-            id_fail = np.where(md >= level_hi)[0]
+            cand = np.logical_and(md >= level_lo, md < level_hi)
+            accu = md < level_lo
+            fail = md >= level_hi
         else:
-            id_cand = id_accu = id_fail = None
-        return id_cand, id_accu, id_fail
-
-    def _record_one_traj(
-        self,
-        id_f_accu,
-        id_f_cand,
-        id_f_fail,
-        id_v_accu,
-        id_v_cand,
-        id_v_fail,
-    ):
-        """
-        Record one trajctory. inputs are the indexes of candidate, accurate and failed frames.
+            cand = accu = fail = None
+        return cand, accu, fail
 
-        """
-        # check consistency
-        novirial = id_v_cand is None
-        if novirial:
-            assert id_v_accu is None
-            assert id_v_fail is None
-        nframes = np.size(np.concatenate((id_f_cand, id_f_accu, id_f_fail)))
-        if (not novirial) and nframes != np.size(
-            np.concatenate((id_v_cand, id_v_accu, id_v_fail))
-        ):
-            raise FatalError("number of frames by virial ")
-        # nframes
-        # to sets
-        set_f_accu = set(id_f_accu)
-        set_f_cand = set(id_f_cand)
-        set_f_fail = set(id_f_fail)
-        set_v_accu = set([ii for ii in range(nframes)]) if novirial else set(id_v_accu)
-        set_v_cand = set([]) if novirial else set(id_v_cand)
-        set_v_fail = set([]) if novirial else set(id_v_fail)
-        # accu, cand, fail
-        set_accu = set_f_accu & set_v_accu
-        set_cand = (
-            (set_f_cand & set_v_accu)
-            | (set_f_cand & set_v_cand)
-            | (set_f_accu & set_v_cand)
-        )
-        set_fail = set_f_fail | set_v_fail
-        # check size
-        assert nframes == len(set_accu | set_cand | set_fail)
-        assert 0 == len(set_accu & set_cand)
-        assert 0 == len(set_accu & set_fail)
-        assert 0 == len(set_cand & set_fail)
-        return nframes, set_accu, set_cand, set_fail
+    @staticmethod
+    def _count_by_traj(
+        mask: np.ndarray,
+        offsets: np.ndarray,
+    ) -> np.ndarray:
+        r"""Count the True frames in `mask` for each trajectory."""
+        traj = np.searchsorted(offsets, np.flatnonzero(mask), side="right") - 1
+        return np.bincount(traj, minlength=offsets.shape[0] - 1)
 
     @abstractmethod
     def converged(
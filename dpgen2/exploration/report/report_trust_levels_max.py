@@ -53,8 +53,8 @@ class ExplorationReportTrustLevelsMax(ExplorationReportTrustLevels):
         ntraj = len(self.traj_nframes)
         id_cand = self._get_candidates(max_nframes)
         id_cand_list = [[] for ii in range(ntraj)]
-        for ii in id_cand:
-            id_cand_list[ii[0]].append(ii[1])
+        for tt, ff in id_cand.tolist():
+            id_cand_list[tt].append(ff)
         # free the memory, this method should only be called once
         if clear:
             self.clear()
@@ -63,7 +63,7 @@ class ExplorationReportTrustLevelsMax(ExplorationReportTrustLevels):
     def _get_candidates(
         self,
         max_nframes: Optional[int] = None,
-    ) -> List[Tuple[int, int]]:
+    ) -> np.ndarray:
         """
         Get candidates. If number of candidates is larger than `max_nframes`,
         then select `max_nframes` frames with the largest `max_devi_f` from
@@ -76,24 +76,20 @@ class ExplorationReportTrustLevelsMax(ExplorationReportTrustLevels):
 
         Returns
         -------
-        cand_frames   List[Tuple[int,int]]
-            Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
+        cand_frames   np.ndarray
+            Candidate frames. An int32 array of shape (ncand, 2), each row
+            is (traj_idx, frame_idx).
         """
-        self.traj_cand_picked = []
-        for tidx, tt in enumerate(self.traj_cand):
-            for ff in tt:
-                self.traj_cand_picked.append((tidx, ff))
-        if max_nframes is not None and max_nframes < len(self.traj_cand_picked):
+        ncand = self.cand_ids.shape[0]
+        if max_nframes is not None and max_nframes < ncand:
             # select by maximum
-            max_devi_f = self.model_devi.get(DeviManager.MAX_DEVI_F)  # type: ignore
-            ret = sorted(
-                self.traj_cand_picked,
-                key=lambda x: max_devi_f[x[0]][x[1]],
-                reverse=True,
-            )
-            ret = ret[:max_nframes]
+            max_devi_f, offsets = self.model_devi.get_flat(DeviManager.MAX_DEVI_F)  # type: ignore
+            devi = max_devi_f[offsets[self.cand_ids[:, 0]] + self.cand_ids[:, 1]]  # type: ignore
+            # stable sort keeps the order of the frames with the same deviation
+            order = np.argsort(-devi, kind="stable")
+            ret = self.cand_ids[order[:max_nframes]]
         else:
-            ret = self.traj_cand_picked
+            ret = self.cand_ids
         return ret
 
     @staticmethod
@@ -25,6 +25,45 @@ from .report_trust_levels_base import (
 
 
 class ExplorationReportTrustLevelsRandom(ExplorationReportTrustLevels):
+    def __init__(
+        self,
+        level_f_lo,
+        level_f_hi,
+        level_v_lo=None,
+        level_v_hi=None,
+        conv_accuracy=0.9,
+        candi_sel_prob="uniform",
+    ):
+        super().__init__(
+            level_f_lo,
+            level_f_hi,
+            level_v_lo=level_v_lo,
+            level_v_hi=level_v_hi,
+            conv_accuracy=conv_accuracy,
+        )
+        self.candi_sel_prob = candi_sel_prob
+
+    @staticmethod
+    def args() -> List[Argument]:
+        doc_candi_sel_prob = (
+            "The method for selecting candidates if there are more candidates "
+            "than allowed. It can be "
+            "'uniform': all candidates are of the same probability. "
+            "'fps': the candidates are selected by the farthest-point sampling "
+            "of their radial distribution fingerprints, which covers the "
+            "configuration space better than the random selection. The "
+            "fingerprints are computed for the candidate configurations only."
+        )
+        return ExplorationReportTrustLevels.args() + [
+            Argument(
+                "candi_sel_prob",
+                str,
+                optional=True,
+                default="uniform",
+                doc=doc_candi_sel_prob,
+            ),
+        ]
+
     def converged(
         self,
         reports: Optional[List[ExplorationReport]] = None,
@@ -53,8 +92,8 @@ class ExplorationReportTrustLevelsRandom(ExplorationReportTrustLevels):
         ntraj = len(self.traj_nframes)
         id_cand = self._get_candidates(max_nframes)
         id_cand_list = [[] for ii in range(ntraj)]
-        for ii in id_cand:
-            id_cand_list[ii[0]].append(ii[1])
+        for tt, ff in id_cand.tolist():
+            id_cand_list[tt].append(ff)
         # free the memory, this method should only be called once
         if clear:
             self.clear()
@@ -63,10 +102,12 @@ class ExplorationReportTrustLevelsRandom(ExplorationReportTrustLevels):
     def _get_candidates(
         self,
         max_nframes: Optional[int] = None,
-    ) -> List[Tuple[int, int]]:
+    ) -> np.ndarray:
         """
         Get candidates. If number of candidates is larger than `max_nframes`,
-        then randomly pick `max_nframes` frames from the candidates.
+        then randomly pick `max_nframes` frames from the candidates. All the
+        candidates are returned if `candi_sel_prob` is "fps", see
+        `fps_candidates`.
 
         Parameters
         ----------
@@ -75,21 +116,29 @@ class ExplorationReportTrustLevelsRandom(ExplorationReportTrustLevels):
 
         Returns
         -------
-        cand_frames   List[Tuple[int,int]]
-            Candidate frames. A list of tuples: [(traj_idx, frame_idx), ...]
+        cand_frames   np.ndarray
+            Candidate frames. An int32 array of shape (ncand, 2), each row
+            is (traj_idx, frame_idx).
         """
-        self.traj_cand_picked = []
-        for tidx, tt in enumerate(self.traj_cand):
-            for ff in tt:
-                self.traj_cand_picked.append((tidx, ff))
-        if max_nframes is not None and max_nframes < len(self.traj_cand_picked):
+        ncand = self.cand_ids.shape[0]
+        if self.candi_sel_prob not in ("uniform", "fps"):
+            raise FatalError("unknown candidate selection style")
+        if (
+            max_nframes is not None
+            and max_nframes < ncand
+            and self.candi_sel_prob == "uniform"
+        ):
             # random selection
-            random.shuffle(self.traj_cand_picked)
-            ret = sorted(self.traj_cand_picked[:max_nframes])
+            perm = list(range(ncand))
+            random.shuffle(perm)
+            ret = self.cand_ids[np.sort(perm[:max_nframes])]
         else:
-            ret = self.traj_cand_picked
+            ret = self.cand_ids
         return ret
 
+    def fps_candidates(self) -> bool:
+        return self.candi_sel_prob == "fps"
+
     @staticmethod
     def doc() -> str:
         def make_class_doc_link(key):
@@ -1,3 +1,6 @@
+from .conf_dedup import (
+    ConfDeduplicator,
+)
 from .conf_filter import (
     ConfFilter,
     ConfFilters,
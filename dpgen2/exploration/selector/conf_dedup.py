@@ -0,0 +1,271 @@
+import logging
+import os
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+from functools import (
+    partial,
+)
+from typing import (
+    List,
+    Optional,
+)
+
+import dargs
+import dpdata
+import numpy as np
+from dargs import (
+    Argument,
+)
+
+
+def rdf_fingerprint(
+    coords: np.ndarray,
+    cell: np.ndarray,
+    atom_types: np.ndarray,
+    ntypes: int,
+    nopbc: bool = False,
+    rcut: float = 6.0,
+    nbins: int = 24,
+) -> np.ndarray:
+    r"""The structural fingerprint of a frame made of the per-type-pair
+    radial distribution functions.
+
+    The distances of the atom pairs within `rcut` are histogrammed for each
+    unordered pair of atom types into `nbins` bins, counted per atom. Each
+    distance is shared by the two nearest bin centers in proportion to the
+    closeness, so the fingerprint changes continuously with the coordinates.
+    The fingerprint is normalized to unit length.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        The coordinates of the atoms, shape (natoms, 3).
+    cell : np.ndarray
+        The cell vectors in rows, shape (3, 3).
+    atom_types : np.ndarray
+        The types of the atoms, shape (natoms,).
+    ntypes : int
+        The number of atom types.
+    nopbc : bool
+        If the periodic boundary condition is not applied.
+    rcut : float
+        The cutoff distance.
+    nbins : int
+        The number of bins of each type pair.
+
+    Returns
+    -------
+    fingerprint : np.ndarray
+        The fingerprint, shape (ntypes * (ntypes + 1) // 2 * nbins,).
+    """
+    # imported here to avoid the circular import through the package
+    from .distance_conf_filter import (
+        find_close_pairs,
+    )
+
+    ii, jj, dist = find_close_pairs(coords, cell, not nopbc, rcut)
+    ti, tj = atom_types[ii], atom_types[jj]
+    tmin, tmax = np.minimum(ti, tj), np.maximum(ti, tj)
+    # the index of the unordered type pair (tmin, tmax) in the upper triangle
+    pair = tmin * ntypes - tmin * (tmin - 1) // 2 + tmax - tmin
+    npairs = ntypes * (ntypes + 1) // 2
+    # linear interpolation between the bin centers
+    xx = dist / rcut * nbins - 0.5
+    lo = np.floor(xx).astype(int)
+    ww = xx - lo
+    idx = pair * (nbins + 1)
+    size = npairs * (nbins + 1)
+    hist = np.bincount(idx + np.clip(lo, 0, nbins), 1.0 - ww, minlength=size)
+    hist += np.bincount(idx + np.clip(lo + 1, 0, nbins), ww, minlength=size)
+    hist = hist.reshape(npairs, nbins + 1)
+    fingerprint = hist[:, :nbins].reshape(-1) / max(coords.shape[0], 1)
+    norm = np.linalg.norm(fingerprint)
+    return fingerprint / norm if norm > 0 else fingerprint
+
+
+def find_near_duplicates(
+    fingerprints: np.ndarray,
+    tolerance: float,
+    ndim_index: int = 8,
+) -> np.ndarray:
+    r"""Find the near-duplicates among the fingerprints with a KD-tree.
+
+    The frames are visited in order. A frame is a near-duplicate if its
+    fingerprint is within `tolerance` (Euclidean) to that of an earlier
+    frame that is kept.
+
+    A KD-tree is slow in high dimensions, so the fingerprints are projected
+    onto their `ndim_index` leading principal components before being
+    indexed. The projection is orthonormal and does not increase the
+    distances, thus the pairs found in the projected space include all the
+    near-duplicate pairs, and are checked with the full fingerprints.
+
+    Parameters
+    ----------
+    fingerprints : np.ndarray
+        The fingerprints, shape (nframes, nfeatures).
+    tolerance : float
+        The tolerance of the distance between the fingerprints.
+    ndim_index : int
+        The number of dimensions of the KD-tree.
+
+    Returns
+    -------
+    mask : np.ndarray
+        The bool mask of the frames to keep, shape (nframes,).
+    """
+    from scipy.spatial import (
+        cKDTree,
+    )
+
+    nframes = fingerprints.shape[0]
+    keep = np.ones(nframes, dtype=bool)
+    if nframes <= 1:
+        return keep
+    points = fingerprints
+    if fingerprints.shape[1] > ndim_index:
+        centered = fingerprints - fingerprints.mean(axis=0)
+        # the right singular vectors are the principal axes
+        _, _, vt = np.linalg.svd(centered[:: max(1, nframes // 4096)], False)
+        points = centered @ vt[:ndim_index].T
+    pairs = cKDTree(points).query_pairs(tolerance, output_type="ndarray")
+    if points is not fingerprints and pairs.shape[0] > 0:
+        diff = fingerprints[pairs[:, 0]] - fingerprints[pairs[:, 1]]
+        pairs = pairs[np.einsum("ij,ij->i", diff, diff) <= tolerance**2]
+    # i < j in each pair. after sorting by i, the fate of i is decided by
+    # the pairs (k, i) with k < i before the pairs (i, j) are visited.
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    for ii, jj in pairs:
+        if keep[ii]:
+            keep[jj] = False
+    return keep
+
+
+class ConfDeduplicator:
+    r"""Remove the near-duplicate configurations.
+
+    The configurations of the same formula are compared by the fingerprints
+    given by `rdf_fingerprint`. A configuration is removed if it is within
+    `tolerance` to a kept configuration. The number of removed
+    configurations is logged and kept in `numb_removed`.
+
+    Parameters
+    ----------
+    tolerance : float
+        The tolerance of the Euclidean distance between the normalized
+        fingerprints.
+    rcut : float
+        The cutoff distance of the radial distribution functions.
+    nbins : int
+        The number of bins of the radial distribution functions.
+    max_workers : int, optional
+        The maximum number of processes computing the fingerprints.
+        None for as many as the processors, and 1 for serial.
+    """
+
+    def __init__(
+        self,
+        tolerance: float = 0.01,
+        rcut: float = 6.0,
+        nbins: int = 24,
+        max_workers: Optional[int] = 1,
+    ):
+        self.tolerance = tolerance
+        self.rcut = rcut
+        self.nbins = nbins
+        self.max_workers = max_workers
+        self.numb_removed = 0
+
+    def fingerprints(
+        self,
+        system: dpdata.System,
+    ) -> np.ndarray:
+        r"""The fingerprints of the frames of a system, shape (nframes, nfeatures)."""
+        fingerprint = partial(
+            rdf_fingerprint,
+            atom_types=np.asarray(system["atom_types"]),
+            ntypes=len(system["atom_names"]),
+            nopbc=system.nopbc,
+            rcut=self.rcut,
+            nbins=self.nbins,
+        )
+        args = (system["coords"], system["cells"])
+        nframes = system.get_nframes()
+        if self.max_workers == 1 or nframes <= 1:
+            res = list(map(fingerprint, *args))
+        else:
+            nworkers = (
+                self.max_workers if self.max_workers is not None else os.cpu_count()
+            )
+            chunksize = max(1, nframes // (4 * (nworkers or 1)))
+            with ProcessPoolExecutor(self.max_workers) as executor:
+                res = list(executor.map(fingerprint, *args, chunksize=chunksize))
+        return np.array(res).reshape(nframes, -1)
+
+    def dedup(
+        self,
+        ms: dpdata.MultiSystems,
+    ) -> dpdata.MultiSystems:
+        r"""Remove the near-duplicate configurations.
+
+        Parameters
+        ----------
+        ms : dpdata.MultiSystems
+            The configurations.
+
+        Returns
+        -------
+        ms : dpdata.MultiSystems
+            The configurations without the near-duplicates. The order of the
+            kept frames is not changed.
+        """
+        ret = dpdata.MultiSystems(type_map=ms.atom_names)
+        nremoved, ntotal = 0, 0
+        for system in ms:
+            nframes = system.get_nframes()
+            keep = find_near_duplicates(self.fingerprints(system), self.tolerance)
+            nremoved += nframes - int(keep.sum())
+            ntotal += nframes
+            if keep.any():
+                ret.append(system.sub_system(np.flatnonzero(keep)))
+        self.numb_removed = nremoved
+        logging.info(
+            f"removed {nremoved} near-duplicate configurations out of {ntotal}"
+        )
+        return ret
+
+    @staticmethod
+    def args() -> List[dargs.Argument]:
+        r"""The argument definition of the `ConfDeduplicator`.
+
+        Returns
+        -------
+        arguments: List[dargs.Argument]
+            List of dargs.Argument defines the arguments of the `ConfDeduplicator`.
+        """
+        doc_tolerance = (
+            "The configurations are near-duplicates if the Euclidean distance "
+            "between the normalized radial distribution fingerprints is smaller "
+            "than the tolerance"
+        )
+        doc_rcut = "The cutoff distance of the radial distribution fingerprints"
+        doc_nbins = "The number of bins of the radial distribution fingerprints"
+        doc_max_workers = (
+            "The maximum number of processes used to compute the fingerprints, "
+            + "None represents as many as the processors of the machine, and 1 for serial"
+        )
+        return [
+            Argument(
+                "tolerance", float, optional=True, default=0.01, doc=doc_tolerance
+            ),
+            Argument("rcut", float, optional=True, default=6.0, doc=doc_rcut),
+            Argument("nbins", int, optional=True, default=24, doc=doc_nbins),
+            Argument(
+                "max_workers",
+                [int, None],
+                optional=True,
+                default=1,
+                doc=doc_max_workers,
+            ),
+        ]
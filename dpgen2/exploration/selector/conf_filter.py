@@ -6,8 +6,13 @@ from abc import (
     ABC,
     abstractmethod,
 )
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+)
 from typing import (
     List,
+    Optional,
 )
 
 import dpdata
@@ -54,6 +59,37 @@ class ConfFilter(ABC):
         """
         return list(map(self.check, frames))
 
+    def check_system(
+        self,
+        system: dpdata.System,
+        executor: Optional[Executor] = None,
+    ) -> np.ndarray:
+        """Check the frames of a system. Filters that can work on the
+        arrays of all the frames at once, e.g. `system["coords"]` and
+        `system["cells"]`, should override this method.
+
+        Parameters
+        ----------
+        system : dpdata.System
+            A dpdata.System containing one or more frames
+        executor : Executor, optional
+            The worker pool shared by the filters. If not provided,
+            `batched_check` is used.
+
+        Returns
+        -------
+        valid : np.ndarray
+            A boolean array of shape (nframes,). `True` if the
+            configuration is a valid configuration, else `False`.
+
+        """
+        frames = [system[ii] for ii in range(system.get_nframes())]
+        if executor is None:
+            res = self.batched_check(frames)
+        else:
+            res = list(executor.map(self.check, frames))
+        return np.array(res, dtype=bool).reshape(-1)
+
 
 class ConfFilters:
     def __init__(
@@ -68,22 +104,42 @@ class ConfFilters:
         self._filters.append(conf_filter)
         return self
 
+    def _max_workers(self) -> Optional[int]:
+        """The size of the worker pool shared by the filters, the largest
+        one requested by the filters. None represents as many as the
+        processors of the machine.
+        """
+        workers = [getattr(ff, "max_workers", 1) for ff in self._filters]
+        if None in workers:
+            return None
+        return max(workers, default=1)
+
     def check(
         self,
         ms: dpdata.MultiSystems,
     ) -> dpdata.MultiSystems:
-        selected_idx = []
-        for i in range(len(ms)):
-            for j in range(ms[i].get_nframes()):
-                selected_idx.append((i, j))
-        for ff in self._filters:
-            res = ff.batched_check([ms[i][j] for i, j in selected_idx])
-            selected_idx = [idx for i, idx in enumerate(selected_idx) if res[i]]
-        selected_idx_list = [[] for _ in range(len(ms))]
-        for i, j in selected_idx:
-            selected_idx_list[i].append(j)
+        max_workers = self._max_workers()
+        if max_workers == 1:
+            return self._check(ms, None)
+        # one pool is reused by all the filters and systems
+        with ProcessPoolExecutor(max_workers) as executor:
+            return self._check(ms, executor)
+
+    def _check(
+        self,
+        ms: dpdata.MultiSystems,
+        executor: Optional[Executor],
+    ) -> dpdata.MultiSystems:
         ms2 = dpdata.MultiSystems(type_map=ms.atom_names)
         for i in range(len(ms)):
-            if len(selected_idx_list[i]) > 0:
-                ms2.append(ms[i].sub_system(selected_idx_list[i]))
+            nframes = ms[i].get_nframes()
+            valid = np.ones(nframes, dtype=bool)
+            for ff in self._filters:
+                idx = np.nonzero(valid)[0]
+                if idx.size == 0:
+                    break
+                ss = ms[i] if idx.size == nframes else ms[i].sub_system(idx)
+                valid[idx] = ff.check_system(ss, executor)
+            if valid.any():
+                ms2.append(ms[i].sub_system(np.nonzero(valid)[0]))
         return ms2
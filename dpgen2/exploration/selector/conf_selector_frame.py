@@ -24,8 +24,12 @@ from dpgen2.exploration.render import (
 from dpgen2.exploration.report import (
     ExplorationReport,
 )
+from dpgen2.exploration.report.farthest_point import (
+    farthest_point_frames,
+)
 
 from . import (
+    ConfDeduplicator,
     ConfFilters,
     ConfSelector,
 )
@@ -39,6 +43,8 @@ class ConfSelectorFrames(ConfSelector):
         The trust level
     conf_filter: ConfFilters
         The configuration filter
+    conf_dedup: ConfDeduplicator
+        Removes the near-duplicate configurations before they are written
 
     """
 
@@ -48,9 +54,11 @@ class ConfSelectorFrames(ConfSelector):
         report: ExplorationReport,
         max_numb_sel: Optional[int] = None,
         conf_filters: Optional[ConfFilters] = None,
+        conf_dedup: Optional[ConfDeduplicator] = None,
     ):
         self.max_numb_sel = max_numb_sel
         self.conf_filters = conf_filters
+        self.conf_dedup = conf_dedup
         self.traj_render = traj_render
         self.report = report
 
@@ -92,6 +100,7 @@ class ConfSelectorFrames(ConfSelector):
 
         self.report.clear()
         self.report.record(md_model_devi)
+        fps = self.report.fps_candidates()
         id_cand_list = self.report.get_candidate_ids(self.max_numb_sel)
 
         ms = self.traj_render.get_confs(
@@ -101,6 +110,11 @@ class ConfSelectorFrames(ConfSelector):
             self.conf_filters,
             optional_outputs,
         )
+        if fps and self.max_numb_sel is not None:
+            # the farthest-point sampling of the rendered candidates
+            ms = farthest_point_frames(ms, self.max_numb_sel)
+        if self.conf_dedup is not None:
+            ms = self.conf_dedup.dedup(ms)
 
         out_path = Path("confs")
         out_path.mkdir(exist_ok=True)
@@ -1,12 +1,17 @@
 import logging
+import os
 from concurrent.futures import (
+    Executor,
     ProcessPoolExecutor,
 )
-from copy import (
-    deepcopy,
+from functools import (
+    lru_cache,
+    partial,
 )
 from typing import (
     List,
+    Optional,
+    Tuple,
 )
 
 import dargs
@@ -121,6 +126,159 @@ safe_dist_dict = {
 }
 
 
+# the lattice vector combinations checked against the safe distances
+_lattice_combinations = np.array(
+    [
+        [1, 0, 0],
+        [0, 1, 0],
+        [0, 0, 1],
+        [1, 1, 0],
+        [1, 0, 1],
+        [0, 1, 1],
+        [1, -1, 0],
+        [1, 0, -1],
+        [0, 1, -1],
+        [1, 1, 1],
+        [1, 1, -1],
+        [1, -1, 1],
+        [1, -1, -1],
+        [-1, 1, 1],
+        [-1, 1, -1],
+        [-1, -1, 1],
+        [-1, -1, -1],
+    ]
+)
+
+
+def find_close_pairs(
+    coords: np.ndarray,
+    cell: np.ndarray,
+    pbc: bool,
+    rcut: float,
+):
+    r"""Find all the pairs of different atoms closer than a cutoff with a
+    KD-tree, taking the periodic images into account.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        The coordinates of the atoms, shape (natoms, 3).
+    cell : np.ndarray
+        The cell vectors in rows, shape (3, 3).
+    pbc : bool
+        If the periodic boundary condition is applied.
+    rcut : float
+        The cutoff distance.
+
+    Returns
+    -------
+    ii : np.ndarray
+        The indexes of the first atoms of the pairs.
+    jj : np.ndarray
+        The indexes of the second atoms of the pairs.
+    dist : np.ndarray
+        The distances between the atoms of the pairs. With pbc, a pair
+        appears once for every periodic image of `jj` within the cutoff.
+        Both (i, j) and (j, i) are reported.
+    """
+    from scipy.spatial import (
+        cKDTree,
+    )
+
+    natoms = coords.shape[0]
+    if pbc:
+        # wrap the atoms into the cell
+        frac = np.linalg.solve(cell.T, coords.T).T
+        frac -= np.floor(frac)
+        coords = frac @ cell
+        # the number of images needed along each cell vector
+        volume = np.abs(np.linalg.det(cell))
+        face_area = np.linalg.norm(
+            np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]),
+            axis=1,
+        )
+        nimages = np.ceil(rcut * face_area / volume).astype(int)
+        shifts = np.stack(
+            np.meshgrid(*[np.arange(-nn, nn + 1) for nn in nimages], indexing="ij"),
+            axis=-1,
+        ).reshape(-1, 3)
+        images = (coords[None, :, :] + (shifts @ cell)[:, None, :]).reshape(-1, 3)
+    else:
+        images = coords
+    pairs = cKDTree(coords).sparse_distance_matrix(
+        cKDTree(images),
+        rcut,
+        output_type="ndarray",
+    )
+    ii = pairs["i"]
+    jj = pairs["j"] % natoms
+    mask = ii != jj
+    return ii[mask], jj[mask], pairs["v"][mask]
+
+
+@lru_cache(maxsize=None)
+def type_pair_safe_dist(
+    atom_names: Tuple[str, ...],
+    custom_safe_dist: Tuple[Tuple[str, float], ...] = (),
+    safe_dist_ratio: float = 1.0,
+) -> np.ndarray:
+    r"""The safe distance between each pair of atom types. The table is
+    cached for each combination of the arguments.
+
+    Parameters
+    ----------
+    atom_names : Tuple[str, ...]
+        The names of the atom types.
+    custom_safe_dist : Tuple[Tuple[str, float], ...]
+        The (element, safe distance in bohr) pairs overriding `safe_dist_dict`.
+    safe_dist_ratio : float
+        The ratio multiplied to the safe distance.
+
+    Returns
+    -------
+    type_pair_dist : np.ndarray
+        A read-only array of shape (ntypes, ntypes) in unit of angstrom.
+        The entries of the elements without a safe distance are nan.
+    """
+    safe_dist = dict(safe_dist_dict)
+    safe_dist.update(custom_safe_dist)
+    # bohr -> ang and multiply by a relaxation ratio
+    type_safe_dist = np.array(
+        [safe_dist.get(name, np.nan) for name in atom_names], dtype=float
+    ) * (0.529 / 1.2 * safe_dist_ratio)
+    type_pair_dist = type_safe_dist[:, None] + type_safe_dist[None, :]
+    type_pair_dist.flags.writeable = False
+    return type_pair_dist
+
+
+def standard_cells(
+    cells: np.ndarray,
+) -> np.ndarray:
+    r"""Rotate the cells to the lower triangular standard form by a QR
+    decomposition, the same as `ase.cell.Cell.standard_form`.
+
+    Parameters
+    ----------
+    cells : np.ndarray
+        The cells, shape (nframes, 3, 3).
+
+    Returns
+    -------
+    cells : np.ndarray
+        The lower triangular cells, shape (nframes, 3, 3). The diagonal
+        elements are positive for right-handed cells, and negative for
+        left-handed cells.
+    """
+    _, rr = np.linalg.qr(np.swapaxes(cells, 1, 2))
+    ll = np.swapaxes(rr, 1, 2)
+    # correct the signs of the diagonal elements by the handedness
+    handedness = np.sign(np.linalg.det(cells))
+    handedness[handedness == 0] = 1
+    signs = np.sign(np.diagonal(ll, axis1=1, axis2=2))
+    signs[signs == 0] = 1
+    return ll * np.where(signs == handedness[:, None], 1.0, -1.0)[:, None, :]
+
+
 def check_multiples(a, b, c, multiple):
     values = [a, b, c]
 
@@ -145,81 +303,79 @@ class DistanceConfFilter(ConfFilter):
         self,
         frame: dpdata.System,
     ):
-        from ase import (
-            Atoms,
+        return self._check_frame(
+            frame["coords"][0],
+            frame["cells"][0],
+            frame["atom_types"],
+            frame["atom_names"],
+            frame.nopbc,
         )
-        from ase.build import (
-            make_supercell,
+
+    def check_system(
+        self,
+        system: dpdata.System,
+        executor: Optional[Executor] = None,
+    ) -> np.ndarray:
+        check_frame = partial(
+            self._check_frame,
+            atom_types=system["atom_types"],
+            atom_names=system["atom_names"],
+            nopbc=system.nopbc,
         )
+        args = (system["coords"], system["cells"])
+        nframes = system.get_nframes()
+        if executor is None:
+            res = map(check_frame, *args)
+        else:
+            # the filter and the atom types are pickled once per chunk
+            chunksize = max(1, nframes // (4 * self._numb_workers()))
+            res = executor.map(check_frame, *args, chunksize=chunksize)
+        return np.fromiter(res, dtype=bool, count=nframes)
 
-        safe_dist = deepcopy(safe_dist_dict)
-        safe_dist.update(self.custom_safe_dist)
-        for k in safe_dist:
-            # bohr -> ang and multiply by a relaxation ratio
-            safe_dist[k] *= 0.529 / 1.2 * self.safe_dist_ratio
-
-        atom_names = list(safe_dist)
-        structure = Atoms(
-            positions=frame["coords"][0],
-            numbers=[
-                atom_names.index(frame["atom_names"][t]) + 1
-                for t in frame["atom_types"]
-            ],
-            cell=frame["cells"][0],
-            pbc=(not frame.nopbc),
+    def _numb_workers(self) -> int:
+        if self.max_workers is not None:
+            return self.max_workers
+        return os.cpu_count() or 1
+
+    def _check_frame(
+        self,
+        coords: np.ndarray,
+        cell: np.ndarray,
+        atom_types: np.ndarray,
+        atom_names: List[str],
+        nopbc: bool,
+    ) -> bool:
+        if len(atom_types) == 0:
+            return True
+        type_pair_dist = type_pair_safe_dist(
+            tuple(atom_names),
+            tuple(sorted(self.custom_safe_dist.items())),
+            self.safe_dist_ratio,
         )
+        present_types = np.unique(atom_types)
+        for tt in present_types:
+            if np.isnan(type_pair_dist[tt, tt]):
+                raise KeyError(f"No safe distance for element {atom_names[tt]}")
+        max_dist = type_pair_dist[present_types][:, present_types].max()
+
+        # the lengths are invariant under the rotation to the standard form
+        lattice_lengths = np.linalg.norm(_lattice_combinations @ cell, axis=1)
+        if lattice_lengths.min() < max_dist:
+            a = lattice_lengths[lattice_lengths < max_dist][0]
+            print(f"Lattice length {a:.3f} is less than safe distance {max_dist:.3f} ")
+            return False
 
-        coords = structure.positions
-        symbols = structure.get_chemical_symbols()
-        cell, _ = structure.get_cell().standard_form()
-        cell = cell.array
-
-        a1 = cell[0]
-        a2 = cell[1]
-        a3 = cell[2]
-
-        all_combinations = {
-            "a1": np.linalg.norm(a1),
-            "a2": np.linalg.norm(a2),
-            "a3": np.linalg.norm(a3),
-            "a1+a2": np.linalg.norm(a1 + a2),
-            "a1+a3": np.linalg.norm(a1 + a3),
-            "a2+a3": np.linalg.norm(a2 + a3),
-            "a1-a2": np.linalg.norm(a1 - a2),
-            "a1-a3": np.linalg.norm(a1 - a3),
-            "a2-a3": np.linalg.norm(a2 - a3),
-            "a1+a2+a3": np.linalg.norm(a1 + a2 + a3),
-            "a1+a2-a3": np.linalg.norm(a1 + a2 - a3),
-            "a1-a2+a3": np.linalg.norm(a1 - a2 + a3),
-            "a1-a2-a3": np.linalg.norm(a1 - a2 - a3),
-            "-a1+a2+a3": np.linalg.norm(-a1 + a2 + a3),
-            "-a1+a2-a3": np.linalg.norm(-a1 + a2 - a3),
-            "-a1-a2+a3": np.linalg.norm(-a1 - a2 + a3),
-            "-a1-a2-a3": np.linalg.norm(-a1 - a2 - a3),
-        }
-
-        A = list(all_combinations.values())
-        B = [safe_dist[type_i] * 2 for type_i in symbols]
-
-        for a in A:
-            for b in B:
-                if a < b:
-                    print(f"Lattice length {a:.3f} is less than safe distance {b:.3f} ")
-                    return False
-
-        num_atoms = len(coords)
-        for i in range(num_atoms):
-            for j in range(i + 1, num_atoms):
-                dist = structure.get_distance(i, j, mic=True)
-                type_i = symbols[i]
-                type_j = symbols[j]
-                dr = safe_dist[type_i] + safe_dist[type_j]
-
-                if dist < dr:
-                    logging.warning(
-                        f"Dangerous close for {type_i} - {type_j}, {dist:.5f} less than {dr:.5f}"
-                    )
-                    return False
+        ii, jj, dist = find_close_pairs(coords, cell, not nopbc, max_dist)
+        dr = type_pair_dist[atom_types[ii], atom_types[jj]]
+        close = np.nonzero(dist < dr)[0]
+        if close.size > 0:
+            kk = close[0]
+            type_i = atom_names[atom_types[ii[kk]]]
+            type_j = atom_names[atom_types[jj[kk]]]
+            logging.warning(
+                f"Dangerous close for {type_i} - {type_j}, {dist[kk]:.5f} less than {dr[kk]:.5f}"
+            )
+            return False
 
         return True
 
@@ -230,8 +386,9 @@ class DistanceConfFilter(ConfFilter):
         if self.max_workers == 1:
             return list(map(self.check, frames))
         else:
+            chunksize = max(1, len(frames) // (4 * self._numb_workers()))
             with ProcessPoolExecutor(self.max_workers) as executor:
-                return list(executor.map(self.check, frames))
+                return list(executor.map(self.check, frames, chunksize=chunksize))
 
     @staticmethod
     def args() -> List[dargs.Argument]:
@@ -283,41 +440,23 @@ class BoxSkewnessConfFilter(ConfFilter):
         self,
         frame: dpdata.System,
     ):
-        from ase import (
-            Atoms,
-        )
+        return bool(self.check_system(frame)[0])
 
-        atom_names = list(safe_dist_dict)
-        structure = Atoms(
-            positions=frame["coords"][0],
-            numbers=[
-                atom_names.index(frame["atom_names"][t]) + 1
-                for t in frame["atom_types"]
-            ],
-            cell=frame["cells"][0],
-            pbc=(not frame.nopbc),
+    def check_system(
+        self,
+        system: dpdata.System,
+        executor: Optional[Executor] = None,
+    ) -> np.ndarray:
+        cells = standard_cells(system["cells"])
+        tan_theta = np.tan(self.theta / 180.0 * np.pi)
+        inclined = (
+            (np.abs(cells[:, 1, 0]) > tan_theta * cells[:, 1, 1])
+            | (np.abs(cells[:, 2, 0]) > tan_theta * cells[:, 2, 2])
+            | (np.abs(cells[:, 2, 1]) > tan_theta * cells[:, 2, 2])
         )
-
-        cell, _ = structure.get_cell().standard_form()
-
-        if (
-            np.abs(cell[1][0]) > np.tan(self.theta / 180.0 * np.pi) * cell[1][1]  # type: ignore
-            or np.abs(cell[2][0]) > np.tan(self.theta / 180.0 * np.pi) * cell[2][2]  # type: ignore
-            or np.abs(cell[2][1]) > np.tan(self.theta / 180.0 * np.pi) * cell[2][2]  # type: ignore
-        ):
+        for _ in range(np.count_nonzero(inclined)):
             logging.warning("Inclined box")
-            return False
-        return True
-
-    def batched_check(
-        self,
-        frames: List[dpdata.System],
-    ):
-        if self.max_workers == 1:
-            return list(map(self.check, frames))
-        else:
-            with ProcessPoolExecutor(self.max_workers) as executor:
-                return list(executor.map(self.check, frames))
+        return ~inclined
 
     @staticmethod
     def args() -> List[dargs.Argument]:
@@ -361,41 +500,21 @@ class BoxLengthFilter(ConfFilter):
         self,
         frame: dpdata.System,
     ):
-        from ase import (
-            Atoms,
-        )
-
-        atom_names = list(safe_dist_dict)
-        structure = Atoms(
-            positions=frame["coords"][0],
-            numbers=[
-                atom_names.index(frame["atom_names"][t]) + 1
-                for t in frame["atom_types"]
-            ],
-            cell=frame["cells"][0],
-            pbc=(not frame.nopbc),
-        )
+        return bool(self.check_system(frame)[0])
 
-        cell, _ = structure.get_cell().standard_form()
-
-        a = cell[0][0]  # type: ignore
-        b = cell[1][1]  # type: ignore
-        c = cell[2][2]  # type: ignore
-
-        if check_multiples(a, b, c, self.length_ratio):
-            logging.warning("One side is %s larger than another" % self.length_ratio)
-            return False
-        return True
-
-    def batched_check(
+    def check_system(
         self,
-        frames: List[dpdata.System],
-    ):
-        if self.max_workers == 1:
-            return list(map(self.check, frames))
-        else:
-            with ProcessPoolExecutor(self.max_workers) as executor:
-                return list(executor.map(self.check, frames))
+        system: dpdata.System,
+        executor: Optional[Executor] = None,
+    ) -> np.ndarray:
+        cells = standard_cells(system["cells"])
+        lengths = np.diagonal(cells, axis1=1, axis2=2)
+        # the same as check_multiples on the three lengths of each frame
+        ratio = lengths[:, :, None] > self.length_ratio * lengths[:, None, :]
+        too_long = np.any(ratio & ~np.eye(3, dtype=bool), axis=(1, 2))
+        for _ in range(np.count_nonzero(too_long)):
+            logging.warning("One side is %s larger than another" % self.length_ratio)
+        return ~too_long
 
     @staticmethod
     def args() -> List[dargs.Argument]:
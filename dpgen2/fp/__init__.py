@@ -12,6 +12,7 @@ from .deepmd import (
     DeepmdInputs,
     PrepDeepmd,
     RunDeepmd,
+    RunDeepmdBatch,
 )
 from .gaussian import (
     GaussianInputs,
@@ -39,6 +40,7 @@ fp_styles = {
         "inputs": DeepmdInputs,
         "prep": PrepDeepmd,
         "run": RunDeepmd,
+        "run_batch": RunDeepmdBatch,
     },
     "fpop_abacus": {
         "inputs": FpOpAbacusInputs,
@@ -29,6 +29,11 @@ except ModuleNotFoundError:
 from ..constants import (
     fp_default_out_data_name,
 )
+from .fp_cache import (
+    fp_cache_default_decimals,
+    run_with_fp_cache,
+    write_fp_cache_keys,
+)
 
 
 class FpOpAbacusInputs(AbacusInputs):  # type: ignore
@@ -129,7 +134,17 @@ class PrepFpOpAbacus(OP):
             }
         )
         op = PrepAbacus()
-        return op.execute(op_in)  # type: ignore in the case of not importing fpop
+        op_out = op.execute(op_in)  # type: ignore in the case of not importing fpop
+        if ip["config"].get("cache_dir") is not None:
+            write_fp_cache_keys(
+                op_out["task_paths"],
+                confs,
+                ip["config"]["inputs"],
+                "STRU",
+                "abacus/stru",
+                ip["config"].get("cache_decimals", fp_cache_default_decimals),
+            )
+        return op_out
 
 
 from typing import (
@@ -176,41 +191,55 @@ class RunFpOpAbacus(OP):
         ip: OPIO,
     ) -> OPIO:
         run_config = ip["config"].get("run", {})
-        op_in = OPIO(
-            {
-                "task_name": ip["task_name"],
-                "task_path": ip["task_path"],
-                "backward_list": [],
-                "run_image_config": run_config,
-            }
-        )
-        op = RunAbacus()
-        op_out = op.execute(op_in)  # type: ignore in the case of not importing fpop
-        workdir = op_out["backward_dir"].parent
-
-        # convert the output to deepmd/npy format
-        with open("%s/INPUT" % workdir, "r") as f:
-            INPUT = f.readlines()
-        _, calculation = get_suffix_calculation(INPUT)
-        if calculation == "scf":
-            sys = dpdata.LabeledSystem(str(workdir), fmt="abacus/scf")
-        elif calculation == "md":
-            sys = dpdata.LabeledSystem(str(workdir), fmt="abacus/md")
-        elif calculation in ["relax", "cell-relax"]:
-            sys = dpdata.LabeledSystem(str(workdir), fmt="abacus/relax")
-        else:
-            raise ValueError("Type of calculation %s not supported" % calculation)
         out_name = fp_default_out_data_name
-        sys.to("deepmd/npy", workdir / out_name)
+
+        def run():
+            op_in = OPIO(
+                {
+                    "task_name": ip["task_name"],
+                    "task_path": ip["task_path"],
+                    "backward_list": [],
+                    "run_image_config": run_config,
+                }
+            )
+            op = RunAbacus()
+            op_out = op.execute(op_in)  # type: ignore in the case of not importing fpop
+            workdir = op_out["backward_dir"].parent
+
+            # convert the output to deepmd/npy format
+            with open("%s/INPUT" % workdir, "r") as f:
+                INPUT = f.readlines()
+            _, calculation = get_suffix_calculation(INPUT)
+            if calculation == "scf":
+                sys = dpdata.LabeledSystem(str(workdir), fmt="abacus/scf")
+            elif calculation == "md":
+                sys = dpdata.LabeledSystem(str(workdir), fmt="abacus/md")
+            elif calculation in ["relax", "cell-relax"]:
+                sys = dpdata.LabeledSystem(str(workdir), fmt="abacus/relax")
+            else:
+                raise ValueError("Type of calculation %s not supported" % calculation)
+            sys.to("deepmd/npy", workdir / out_name)
+            return workdir / out_name, workdir / "log"
+
+        labeled_data, log, cache_records = run_with_fp_cache(
+            ip["config"],
+            Path(ip["task_path"]),
+            Path(ip["task_name"]),
+            out_name,
+            "log",
+            run,
+        )
+        workdir = labeled_data.parent
 
         extra_outputs = []
         for fname in ip["config"]["extra_output_files"]:
             extra_outputs += list(workdir.glob(fname))
+        extra_outputs += cache_records
 
         return OPIO(
             {
-                "log": workdir / "log",
-                "labeled_data": workdir / out_name,
+                "log": log,
+                "labeled_data": labeled_data,
                 "extra_outputs": extra_outputs,
             }
         )
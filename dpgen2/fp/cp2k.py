@@ -31,6 +31,11 @@ except ModuleNotFoundError:
 from ..constants import (
     fp_default_out_data_name,
 )
+from .fp_cache import (
+    fp_cache_default_decimals,
+    run_with_fp_cache,
+    write_fp_cache_keys,
+)
 
 
 class FpOpCp2kInputs(Cp2kInputs):  # type: ignore
@@ -99,7 +104,17 @@ class PrepFpOpCp2k(OP):
             }
         )
         op = PrepCp2k()
-        return op.execute(op_in)  # type: ignore in the case of not importing fpop
+        op_out = op.execute(op_in)  # type: ignore in the case of not importing fpop
+        if ip["config"].get("cache_dir") is not None:
+            write_fp_cache_keys(
+                op_out["task_paths"],
+                confs,
+                ip["config"]["inputs"],
+                "POSCAR",
+                "vasp/poscar",
+                ip["config"].get("cache_decimals", fp_cache_default_decimals),
+            )
+        return op_out
 
 
 def get_run_type(lines: List[str]) -> Optional[str]:
@@ -136,49 +151,63 @@ class RunFpOpCp2k(OP):
         ip: OPIO,
     ) -> OPIO:
         run_config = ip["config"].get("run", {})
-        op_in = OPIO(
-            {
-                "task_name": ip["task_name"],
-                "task_path": ip["task_path"],
-                "backward_list": [],
-                "log_name": "output.log",
-                "run_image_config": run_config,
-            }
-        )
-        op = RunCp2k()
-        op_out = op.execute(op_in)  # type: ignore in the case of not importing fpop
-        workdir = op_out["backward_dir"].parent
-
-        file_path = os.path.join(str(workdir), "output.log")
-
-        # convert the output to deepmd/npy format
-        with open(workdir / "input.inp", "r") as f:
-            lines = f.readlines()
-
-        # 获取 RUN_TYPE
-        run_type = get_run_type(lines)
-
-        if run_type == "ENERGY_FORCE":
-            sys = dpdata.LabeledSystem(file_path, fmt="cp2kdata/e_f")
-        elif run_type == "MD":
-            sys = dpdata.LabeledSystem(
-                str(workdir), cp2k_output_name="output.log", fmt="cp2kdata/md"
-            )
-        else:
-            raise ValueError(f"Type of calculation {run_type} not supported")
-
         # out_name = run_config.get("out", fp_default_out_data_name)
         out_name = fp_default_out_data_name
-        sys.to("deepmd/npy", workdir / out_name)
+
+        def run():
+            op_in = OPIO(
+                {
+                    "task_name": ip["task_name"],
+                    "task_path": ip["task_path"],
+                    "backward_list": [],
+                    "log_name": "output.log",
+                    "run_image_config": run_config,
+                }
+            )
+            op = RunCp2k()
+            op_out = op.execute(op_in)  # type: ignore in the case of not importing fpop
+            workdir = op_out["backward_dir"].parent
+
+            file_path = os.path.join(str(workdir), "output.log")
+
+            # convert the output to deepmd/npy format
+            with open(workdir / "input.inp", "r") as f:
+                lines = f.readlines()
+
+            # 获取 RUN_TYPE
+            run_type = get_run_type(lines)
+
+            if run_type == "ENERGY_FORCE":
+                sys = dpdata.LabeledSystem(file_path, fmt="cp2kdata/e_f")
+            elif run_type == "MD":
+                sys = dpdata.LabeledSystem(
+                    str(workdir), cp2k_output_name="output.log", fmt="cp2kdata/md"
+                )
+            else:
+                raise ValueError(f"Type of calculation {run_type} not supported")
+
+            sys.to("deepmd/npy", workdir / out_name)
+            return workdir / out_name, workdir / "output.log"
+
+        labeled_data, log, cache_records = run_with_fp_cache(
+            ip["config"],
+            Path(ip["task_path"]),
+            Path(ip["task_name"]),
+            out_name,
+            "output.log",
+            run,
+        )
+        workdir = labeled_data.parent
 
         extra_outputs = []
         for fname in ip["config"]["extra_output_files"]:
             extra_outputs += list(workdir.glob(fname))
+        extra_outputs += cache_records
 
         return OPIO(
             {
-                "log": workdir / "output.log",
-                "labeled_data": workdir / out_name,
+                "log": log,
+                "labeled_data": labeled_data,
                 "extra_outputs": extra_outputs,
             }
         )
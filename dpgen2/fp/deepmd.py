@@ -5,6 +5,7 @@ from pathlib import (
 )
 from typing import (
     Any,
+    Dict,
     List,
     Optional,
     Tuple,
@@ -17,13 +18,19 @@ from dargs import (
     dargs,
 )
 from dflow.python import (
+    OP,
+    OPIO,
+    Artifact,
+    BigParameter,
     FatalError,
+    OPIOSign,
     TransientError,
 )
 
 from dpgen2.constants import (
     fp_default_log_name,
     fp_default_out_data_name,
+    fp_task_pattern,
 )
 from dpgen2.utils.run_command import (
     run_command,
@@ -31,6 +38,8 @@ from dpgen2.utils.run_command import (
 
 from ..utils import (
     BinaryFileInput,
+    load_dp_model,
+    setup_ele_temp,
 )
 from .prep_fp import (
     PrepFp,
@@ -45,6 +54,31 @@ deepmd_input_path = "one_frame_input"
 # global static variables
 deepmd_temp_path = "one_frame_temp"
 
+# the default number of frames evaluated in one call of the teacher model
+deepmd_default_batch_size = 1024
+
+
+def _load_teacher_model(teacher_model_path: BinaryFileInput):
+    ext = os.path.splitext(teacher_model_path.file_name)[-1]
+    deepmd_teacher_model = "teacher_model" + ext
+    teacher_model_path.save_as_file(deepmd_teacher_model)
+    # the teacher model is loaded once by the tasks of a grouped slice
+    dp = load_dp_model(Path(deepmd_teacher_model))
+
+    type_map_teacher = dp.get_type_map()
+
+    os.remove(deepmd_teacher_model)
+    return dp, type_map_teacher
+
+
+def _check_type_map(conf_type_map, type_map_teacher):
+    if not set(conf_type_map).issubset(set(type_map_teacher)):  # type: ignore
+        err_message = (
+            f"the type map of system ({conf_type_map}) is not subset of "
+            + f"the type map of the teacher model ({type_map_teacher})."
+        )
+        raise FatalError("deepmd labeling failed\n", "err msg", err_message, "\n")
+
 
 class DeepmdInputs:
     @staticmethod
@@ -131,28 +165,13 @@ class RunDeepmd(RunFp):
         return out_name, log_name
 
     def _get_dp_model(self, teacher_model_path: BinaryFileInput):
-        from deepmd.infer import DeepPot  # type: ignore
-
-        ext = os.path.splitext(teacher_model_path.file_name)[-1]
-        deepmd_teacher_model = "teacher_model" + ext
-        teacher_model_path.save_as_file(deepmd_teacher_model)
-        dp = DeepPot(Path(deepmd_teacher_model))
-
-        type_map_teacher = dp.get_type_map()
-
-        os.remove(deepmd_teacher_model)
-        return dp, type_map_teacher
+        return _load_teacher_model(teacher_model_path)
 
     def _prep_input(self, type_map_teacher):
         ss = dpdata.System(deepmd_input_path, fmt="deepmd/npy")
         conf_type_map = ss["atom_names"]
 
-        if not set(conf_type_map).issubset(set(type_map_teacher)):  # type: ignore
-            err_message = (
-                f"the type map of system ({conf_type_map}) is not subset of "
-                + f"the type map of the teacher model ({type_map_teacher})."
-            )
-            raise FatalError("deepmd labeling failed\n", "err msg", err_message, "\n")
+        _check_type_map(conf_type_map, type_map_teacher)
 
         # make sure the order of elements in sys_type_map
         # is the same as that in type_map_teacher
@@ -233,3 +252,175 @@ class RunDeepmd(RunFp):
                 doc=doc_deepmd_log,
             ),
         ]
+
+
+class RunDeepmdBatch(OP):
+    r"""Label all the selected configurations by a DeePMD teacher model
+    in one OP.
+
+    The teacher model is loaded once. The frames sharing the same atom
+    types and periodicity are evaluated together in batches of
+    `batch_size` frames. The labeled data of each frame are written to
+    `task_name/out` in `deepmd/npy` format, the same as running `PrepDeepmd`
+    and `RunDeepmd` for each frame.
+
+    """
+
+    @staticmethod
+    def args() -> List[dargs.Argument]:
+        r"""The argument definition of the batch labeling, `config['batch']`.
+
+        Returns
+        -------
+        arguments: List[dargs.Argument]
+            List of dargs.Argument defines the arguments of the batch labeling.
+        """
+        doc_batch_size = (
+            "The maximum number of frames evaluated in one call of the teacher model"
+        )
+        return [
+            Argument(
+                "batch_size",
+                int,
+                optional=True,
+                default=deepmd_default_batch_size,
+                doc=doc_batch_size,
+            ),
+        ]
+
+    @classmethod
+    def normalize_config(cls, data: Dict = {}, strict: bool = True) -> Dict:
+        r"""Normalized the arguments of the batch labeling."""
+        base = dargs.Argument("base", dict, cls.args())
+        data = base.normalize_value(data, trim_pattern="_*")
+        base.check_value(data, strict=strict)
+        return data
+
+    @classmethod
+    def get_input_sign(cls):
+        return OPIOSign(
+            {
+                "config": BigParameter(dict),
+                "type_map": List[str],
+                "confs": Artifact(List[Path]),
+            }
+        )
+
+    @classmethod
+    def get_output_sign(cls):
+        return OPIOSign(
+            {
+                "task_names": List[str],
+                "logs": Artifact(List[Path]),
+                "labeled_data": Artifact(List[Path]),
+                "extra_outputs": Artifact(List[Path]),
+            }
+        )
+
+    @OP.exec_sign_check
+    def execute(
+        self,
+        ip: OPIO,
+    ) -> OPIO:
+        r"""Execute the OP.
+
+        Parameters
+        ----------
+        ip : dict
+            Input dict with components:
+
+            - `config`: (`dict`) The config of FP. `config['run']` is the run config of `RunDeepmd`. `config['batch']` is the config of the batch labeling, check `RunDeepmdBatch.args` for definitions.
+            - `type_map`: (`List[str]`) The type map.
+            - `confs`: (`Artifact(List[Path])`) Configurations for the FP tasks. Stored in folders as deepmd/npy format. Can be parsed as dpdata.MultiSystems.
+
+        Returns
+        -------
+        Output dict with components:
+        - `task_names`: (`List[str]`) The names of the tasks, one for each frame, the same as named by `PrepFp`.
+        - `logs`: (`Artifact(List[Path])`) The log of the labeling.
+        - `labeled_data`: (`Artifact(List[Path])`) The labeled data of the tasks in `"deepmd/npy"` format provided by `dpdata`.
+        - `extra_outputs`: (`Artifact(List[Path])`) Always empty.
+
+        Raises
+        ------
+        FatalError
+            When the type map of a configuration is not a subset of that of the teacher model.
+        """
+        config = ip["config"]["run"] if ip["config"]["run"] is not None else {}
+        config = RunDeepmd.normalize_config(config, strict=False)
+        batch_config = RunDeepmdBatch.normalize_config(ip["config"].get("batch") or {})
+        batch_size = batch_config["batch_size"]
+        type_map = ip["type_map"]
+
+        systems = []
+        for mm in ip["confs"]:
+            if len(list(mm.rglob("fparam.npy"))) > 0:
+                setup_ele_temp(False)
+            if len(list(mm.rglob("aparam.npy"))) > 0:
+                setup_ele_temp(True)
+            ms = dpdata.MultiSystems(type_map=type_map)
+            ms.from_deepmd_npy(mm, labeled=False)  # type: ignore
+            systems += [ms[ii] for ii in range(len(ms))]
+
+        dp, type_map_teacher = _load_teacher_model(config["teacher_model_path"])
+
+        # the frames are indexed in the same order as PrepFp
+        groups: Dict[Tuple, List[Tuple[int, dpdata.System]]] = {}
+        idx = 0
+        for ss in systems:
+            _check_type_map(ss["atom_names"], type_map_teacher)
+            atype = tuple(
+                type_map_teacher.index(ss["atom_names"][tt]) for tt in ss["atom_types"]
+            )
+            groups.setdefault((atype, ss.nopbc), []).append((idx, ss))
+            idx += ss.get_nframes()
+        nframes = idx
+
+        task_names = [fp_task_pattern % ii for ii in range(nframes)]
+        labeled_data = [Path(nn) / config["out"] for nn in task_names]
+        nbatches = 0
+        for (atype, nopbc), members in groups.items():
+            coords = np.concatenate([ss["coords"] for _, ss in members])
+            cells = np.concatenate([ss["cells"] for _, ss in members])
+            energies, forces, virials = [], [], []
+            for start in range(0, coords.shape[0], batch_size):
+                end = start + batch_size
+                ee, ff, vv = dp.eval(
+                    coords[start:end],
+                    None if nopbc else cells[start:end].reshape([-1, 9]),
+                    list(atype),
+                )
+                energies.append(ee)
+                forces.append(ff)
+                virials.append(vv)
+                nbatches += 1
+            energies = np.concatenate(energies).reshape([-1])
+            forces = np.concatenate(forces).reshape(coords.shape)
+            virials = np.concatenate(virials).reshape([-1, 3, 3])
+            offset = 0
+            for idx, ss in members:
+                for ff in range(ss.get_nframes()):
+                    ls = dpdata.LabeledSystem(
+                        data={
+                            **ss.sub_system([ff]).data,
+                            "energies": energies[offset : offset + 1],
+                            "forces": forces[offset : offset + 1],
+                            "virials": virials[offset : offset + 1],
+                        }
+                    )
+                    ls.to("deepmd/npy", labeled_data[idx + ff])
+                    offset += 1
+
+        log = Path(config["log"])
+        log.write_text(
+            f"labeled {nframes} frames of {len(groups)} atom type groups "
+            f"in {nbatches} batches\njob finished!\n"
+        )
+        return OPIO(
+            {
+                "task_names": task_names,
+                "logs": [log],
+                "labeled_data": labeled_data,
+                "extra_outputs": [],
+            }
+        )
@@ -0,0 +1,345 @@
+"""Content-addressed cache of the FP labels."""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import (
+    Path,
+)
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import dpdata
+import jsonpickle
+import numpy as np
+
+from dpgen2.constants import (
+    fp_cache_key_name,
+    fp_cache_record_name,
+)
+
+# the coordinates and cells are rounded to 1e-6 angstrom by default
+fp_cache_default_decimals = 6
+
+_frame_skipped_keys = ("atom_names", "atom_numbs", "atom_types", "orig", "nopbc")
+
+
+def _update_with_array(hh, data, decimals):
+    data = np.asarray(data)
+    if np.issubdtype(data.dtype, np.floating):
+        # + 0.0 turns -0.0 to 0.0
+        data = np.round(data.astype(np.float64), decimals) + 0.0
+    hh.update(str(data.shape).encode())
+    hh.update(np.ascontiguousarray(data).tobytes())
+
+
+def fp_cache_key(
+    conf_frame: dpdata.System,
+    inputs: Any,
+    decimals: int = fp_cache_default_decimals,
+) -> str:
+    r"""The key of the FP labels of a configuration in the cache.
+
+    The key is the SHA-256 hash of the canonicalized configuration and the
+    FP inputs. The configuration is canonicalized by naming the atoms by
+    elements rather than types, and by rounding the coordinates, the cells
+    and the other frame data to `decimals` decimals. The FP inputs, e.g. the
+    INCAR template, kspacing and the pseudopotential files, are hashed by
+    their `jsonpickle` encoding.
+
+    Parameters
+    ----------
+    conf_frame : dpdata.System
+        One frame of configuration.
+    inputs : Any
+        The inputs of the FP tasks, e.g. `VaspInputs`.
+    decimals : int
+        The number of decimals kept in the coordinates and cells.
+
+    Returns
+    -------
+    key : str
+        The key in hex digits.
+    """
+    assert conf_frame.get_nframes() == 1, (
+        f"Error: the key of {conf_frame.get_nframes()} frames is not defined, "
+        "should be 1 frame"
+    )
+    hh = hashlib.sha256()
+    atom_names = conf_frame["atom_names"]
+    hh.update(" ".join([atom_names[tt] for tt in conf_frame["atom_types"]]).encode())
+    nopbc = conf_frame.nopbc
+    hh.update(b"nopbc" if nopbc else b"pbc")
+    for kk in sorted(conf_frame.data.keys()):
+        if kk in _frame_skipped_keys or (nopbc and kk == "cells"):
+            continue
+        hh.update(kk.encode())
+        _update_with_array(hh, conf_frame[kk], decimals)
+    hh.update(jsonpickle.encode(inputs, keys=True).encode())
+    return hh.hexdigest()
+
+
+def write_fp_cache_key(
+    task_path: Union[str, Path],
+    key: str,
+):
+    r"""Record the cache key of a task in the task directory."""
+    (Path(task_path) / fp_cache_key_name).write_text(key)
+
+
+def _same_structure(
+    conf_frame: dpdata.System,
+    written: dpdata.System,
+    atol: float,
+) -> bool:
+    # the writers may reorder the atoms by elements, so the atoms are
+    # compared element by element, in their order in the frame
+    names = [conf_frame["atom_names"][tt] for tt in conf_frame["atom_types"]]
+    written_names = [written["atom_names"][tt] for tt in written["atom_types"]]
+    if written.get_nframes() != 1 or sorted(names) != sorted(written_names):
+        return False
+    if not conf_frame.nopbc and not np.allclose(
+        conf_frame["cells"][0], written["cells"][0], atol=atol
+    ):
+        return False
+    for name in set(names):
+        coords = conf_frame["coords"][0][[nn == name for nn in names]]
+        written_coords = written["coords"][0][[nn == name for nn in written_names]]
+        if not np.allclose(coords, written_coords, atol=atol):
+            return False
+    return True
+
+
+def write_fp_cache_keys(
+    task_paths: List[Path],
+    confs: List[Path],
+    inputs: Any,
+    conf_name: str,
+    conf_fmt: str,
+    decimals: int = fp_cache_default_decimals,
+    atol: float = 1e-4,
+):
+    r"""Record the cache keys of the tasks prepared from the frames of
+    `confs`, in the order of the systems and then the frames.
+
+    The tasks are prepared by another package, e.g. `fpop`, so the
+    configuration written to `conf_name` in each task is read back and
+    checked against the frame before the key of the frame is recorded.
+
+    Parameters
+    ----------
+    task_paths : List[Path]
+        The task directories, one for each frame.
+    confs : List[Path]
+        The systems in `deepmd/npy` format.
+    inputs : Any
+        The inputs of the FP tasks.
+    conf_name : str
+        The configuration file in the task directories, e.g. `STRU`.
+    conf_fmt : str
+        The `dpdata` format of the configuration file, e.g. `abacus/stru`.
+    decimals : int
+        The number of decimals kept in the coordinates and cells.
+    atol : float
+        The tolerance of the coordinates and cells read back from the
+        configuration file.
+    """
+    frames = []
+    for conf in confs:
+        ss = dpdata.System(conf, fmt="deepmd/npy")
+        frames += [ss[ff] for ff in range(ss.get_nframes())]
+    assert len(frames) == len(task_paths), (
+        f"Error: the number of frames {len(frames)} is not the same as "
+        f"the number of tasks {len(task_paths)}"
+    )
+    for task_path, frame in zip(task_paths, frames):
+        written = dpdata.System(Path(task_path) / conf_name, fmt=conf_fmt)
+        assert _same_structure(frame, written, atol), (
+            f"Error: the configuration of the task {task_path} is not the "
+            "frame of its cache key"
+        )
+        write_fp_cache_key(task_path, fp_cache_key(frame, inputs, decimals))
+
+
+def read_fp_cache_key(
+    task_path: Union[str, Path],
+) -> Optional[str]:
+    r"""Read the cache key of a task, None if the task has no key."""
+    fname = Path(task_path) / fp_cache_key_name
+    return fname.read_text().strip() if fname.is_file() else None
+
+
+class FpCache:
+    r"""A directory of FP labels addressed by `fp_cache_key`.
+
+    The labeled data and the log of a task are stored in `cache_dir/key`.
+    The directory is usually on a file system shared by the FP tasks, e.g.
+    a mounted volume, so the labels are reused across the iterations and the
+    workflows.
+
+    Parameters
+    ----------
+    cache_dir : str or Path
+        The cache directory.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+    ):
+        self.cache_dir = Path(cache_dir)
+
+    @classmethod
+    def from_config(
+        cls,
+        config: dict,
+    ) -> Optional["FpCache"]:
+        r"""The cache defined by `config['cache_dir']`, None if not set."""
+        cache_dir = config.get("cache_dir")
+        return cls(cache_dir) if cache_dir is not None else None
+
+    def fetch(
+        self,
+        key: str,
+        labeled_data: Path,
+        log: Path,
+    ) -> bool:
+        r"""Copy the cached labeled data and log of `key` to `labeled_data`
+        and `log`. Returns if the key is found in the cache.
+        """
+        entry = self.cache_dir / key
+        if not entry.is_dir():
+            return False
+        labeled_data.parent.mkdir(parents=True, exist_ok=True)
+        # left by an earlier attempt of the task
+        if labeled_data.is_symlink() or labeled_data.is_file():
+            labeled_data.unlink()
+        elif labeled_data.is_dir():
+            shutil.rmtree(labeled_data)
+        shutil.copytree(entry / "labeled_data", labeled_data)
+        if (entry / "log").is_file():
+            log.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry / "log", log)
+        return True
+
+    def store(
+        self,
+        key: str,
+        labeled_data: Path,
+        log: Optional[Path] = None,
+    ):
+        r"""Store the labeled data and log of `key`. The entry is written to
+        a temporary directory and then renamed, so concurrent tasks never see
+        a partial entry. An existing entry is kept.
+        """
+        entry = self.cache_dir / key
+        if entry.is_dir():
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_dir / f".{key}.{uuid.uuid4().hex}"
+        shutil.copytree(labeled_data, tmp / "labeled_data")
+        if log is not None and Path(log).is_file():
+            shutil.copyfile(log, tmp / "log")
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # stored by another task in the meantime
+            shutil.rmtree(tmp)
+
+
+def run_with_fp_cache(
+    config: dict,
+    task_path: Path,
+    work_dir: Path,
+    out_name: str,
+    log_name: str,
+    run,
+) -> Tuple[Path, Path, List[Path]]:
+    r"""Run an FP task through the cache.
+
+    If the cache is enabled by `config['cache_dir']` and the task has a
+    cache key, the cached labels are copied to `work_dir` on a hit,
+    otherwise the task is run and its labels are stored in the cache.
+    Each lookup is logged and recorded in `work_dir/fp_cache.json`, the
+    records of an iteration are summarized by `CollectData`, see
+    `fp_cache_stats`.
+
+    Parameters
+    ----------
+    config : dict
+        The FP config.
+    task_path : Path
+        The task directory prepared by the prep OP.
+    work_dir : Path
+        The working directory of the task.
+    out_name : str
+        The name of the labeled data in `work_dir` on a cache hit.
+    log_name : str
+        The name of the log in `work_dir` on a cache hit.
+    run : Callable[[], Tuple[Path, Path]]
+        Runs the task and returns the paths to the labeled data and the log.
+
+    Returns
+    -------
+    labeled_data : Path
+        The labeled data.
+    log : Path
+        The log.
+    records : List[Path]
+        The record of the cache lookup, empty if the cache is not used.
+    """
+    cache = FpCache.from_config(config)
+    key = read_fp_cache_key(task_path) if cache is not None else None
+    if cache is None or key is None:
+        return (*run(), [])
+    labeled_data, log = work_dir / out_name, work_dir / log_name
+    hit = cache.fetch(key, labeled_data, log)
+    if hit:
+        logging.info(f"fp cache hit of task {task_path}, key {key}")
+    else:
+        logging.info(f"fp cache miss of task {task_path}, key {key}")
+        labeled_data, log = run()
+        cache.store(key, labeled_data, log)
+    record = work_dir / fp_cache_record_name
+    record.write_text(json.dumps({"key": key, "hit": hit}))
+    return labeled_data, log, [record]
+
+
+def fp_cache_stats(
+    records: List[Path],
+) -> Dict[str, Any]:
+    r"""Summarize the cache lookups recorded by `run_with_fp_cache`.
+
+    Parameters
+    ----------
+    records : List[Path]
+        The records, e.g. the `fp_cache.json` files in the extra outputs of
+        the FP tasks. Other files are ignored.
+
+    Returns
+    -------
+    stats : dict
+        The numbers of `hits` and `misses`, and the `hit_ratio`.
+    """
+    hits, misses = 0, 0
+    for ii in records:
+        if Path(ii).name != fp_cache_record_name:
+            continue
+        if json.loads(Path(ii).read_text())["hit"]:
+            hits += 1
+        else:
+            misses += 1
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total > 0 else 0.0,
+    }
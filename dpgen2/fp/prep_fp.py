@@ -1,14 +1,25 @@
+import hashlib
+import os
+import uuid
 from abc import (
     ABC,
     abstractmethod,
 )
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
+from itertools import (
+    repeat,
+)
 from pathlib import (
     Path,
 )
 from typing import (
     Any,
     List,
+    Optional,
     Tuple,
+    Union,
 )
 
 import dpdata
@@ -21,6 +32,7 @@ from dflow.python import (
 )
 
 from dpgen2.constants import (
+    fp_shared_input_dir,
     fp_task_pattern,
 )
 from dpgen2.utils import (
@@ -28,6 +40,12 @@ from dpgen2.utils import (
     setup_ele_temp,
 )
 
+from .fp_cache import (
+    fp_cache_default_decimals,
+    fp_cache_key,
+    write_fp_cache_key,
+)
+
 
 class PrepFp(OP, ABC):
     r"""Prepares the working directories for first-principles (FP) tasks.
@@ -77,6 +95,49 @@ class PrepFp(OP, ABC):
         """
         pass
 
+    def write_shared_file(
+        self,
+        fname: Union[str, Path],
+        key: str,
+        content: str,
+    ):
+        r"""Write an input file whose content is shared by many tasks, e.g.
+        the pseudopotential file. The content is written once in the shared
+        directory, named by `key` and the hash of the content, and the file
+        is hard-linked from there. The file is written directly if hard links
+        are not supported.
+
+        Parameters
+        ----------
+        fname : str or Path
+            The name of the file in the task directory.
+        key : str
+            The prefix of the name of the shared file, e.g. `POTCAR.H.O`.
+        content : str
+            The content of the file.
+        """
+        shared_dir: Optional[Path] = getattr(self, "_shared_dir", None)
+        if shared_dir is not None:
+            # a shared file left with another content is never reused
+            digest = hashlib.sha256(content.encode()).hexdigest()[:16]
+            shared_name = f"{key}.{digest}"
+            shared_file = shared_dir / shared_name
+            try:
+                if not shared_file.is_file():
+                    # write to a temporary file and rename, so the
+                    # concurrent writers never link a partial file
+                    tmp_file = shared_dir / f".{shared_name}.{uuid.uuid4().hex}"
+                    tmp_file.write_text(content)
+                    os.replace(tmp_file, shared_file)
+                # a file left in the task is never written through
+                if os.path.lexists(fname):
+                    os.remove(fname)
+                os.link(shared_file, fname)
+                return
+            except OSError:
+                pass
+        Path(fname).write_text(content)
+
     @OP.exec_sign_check
     def execute(
         self,
@@ -89,7 +150,7 @@ class PrepFp(OP, ABC):
         ip : dict
             Input dict with components:
 
-            - `config` : (`dict`) Should have `config['inputs']`, which defines the input files of the FP task.
+            - `config` : (`dict`) Should have `config['inputs']`, which defines the input files of the FP task. `config['prep_max_workers']` is the maximum number of processes preparing the tasks, 1 (default) for serial. The cache keys of the tasks are recorded if `config['cache_dir']` is set, see `fp_cache_key`.
             - `confs` : (`Artifact(List[Path])`) Configurations for the FP tasks. Stored in folders as deepmd/npy format. Can be parsed as dpdata.MultiSystems.
 
         Returns
@@ -102,12 +163,17 @@ class PrepFp(OP, ABC):
         """
 
         inputs = ip["config"]["inputs"]
+        max_workers = ip["config"].get("prep_max_workers", 1)
+        # the cache keys are recorded only if the cache is used
+        cache_decimals = (
+            ip["config"].get("cache_decimals", fp_cache_default_decimals)
+            if ip["config"].get("cache_dir") is not None
+            else None
+        )
         confs = ip["confs"]
         type_map = ip["type_map"]
 
-        task_names = []
-        task_paths = []
-        counter = 0
+        frames = []
         # loop over list of MultiSystems
         for mm in confs:
             if len(list(mm.rglob("fparam.npy"))) > 0:
@@ -121,10 +187,23 @@ class PrepFp(OP, ABC):
                 ss = ms[ii]
                 # loop over frames
                 for ff in range(ss.get_nframes()):
-                    nn, pp = self._exec_one_frame(counter, inputs, ss[ff])
-                    task_names.append(nn)
-                    task_paths.append(pp)
-                    counter += 1
+                    frames.append(ss[ff])
+
+        self._shared_dir = Path(fp_shared_input_dir).resolve()
+        self._shared_dir.mkdir(parents=True, exist_ok=True)
+        # the tasks are named by the order of the frames in any case
+        args = (range(len(frames)), repeat(inputs), frames, repeat(cache_decimals))
+        if max_workers == 1 or len(frames) <= 1:
+            rets = list(map(self._exec_one_frame, *args))
+        else:
+            nworkers = max_workers if max_workers is not None else os.cpu_count()
+            chunksize = max(1, len(frames) // (4 * (nworkers or 1)))
+            with ProcessPoolExecutor(max_workers) as executor:
+                rets = list(
+                    executor.map(self._exec_one_frame, *args, chunksize=chunksize)
+                )
+        task_names = [nn for nn, _ in rets]
+        task_paths = [pp for _, pp in rets]
         return OPIO(
             {
                 "task_names": task_names,
@@ -137,9 +216,14 @@ class PrepFp(OP, ABC):
         idx,
         inputs,
         conf_frame: dpdata.System,
+        cache_decimals: Optional[int] = None,
     ) -> Tuple[str, Path]:
         task_name = fp_task_pattern % idx
         task_path = Path(task_name)
         with set_directory(task_path):
             self.prep_task(conf_frame, inputs)
+            if cache_decimals is not None:
+                write_fp_cache_key(
+                    ".", fp_cache_key(conf_frame, inputs, cache_decimals)
+                )
         return task_name, task_path
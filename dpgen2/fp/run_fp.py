@@ -23,10 +23,18 @@ from dflow.python import (
     TransientError,
 )
 
+from dpgen2.constants import (
+    fp_default_log_name,
+    fp_default_out_data_name,
+)
 from dpgen2.utils.chdir import (
     set_directory,
 )
 
+from .fp_cache import (
+    run_with_fp_cache,
+)
+
 
 class RunFp(OP, ABC):
     r"""Execute a first-principles (FP) task.
@@ -156,6 +164,8 @@ class RunFp(OP, ABC):
             - `task_name`: (`str`) The name of task.
             - `task_path`: (`Artifact(Path)`) The path that contains all input files prepareed by `PrepFp`.
 
+            The labels are taken from the FP cache if `config['cache_dir']` is set and the task is found in the cache, see `run_with_fp_cache`.
+
         Returns
         -------
         Output dict with components:
@@ -179,29 +189,41 @@ class RunFp(OP, ABC):
         opt_input_files = [(Path(task_path) / ii).resolve() for ii in opt_input_files]
         work_dir = Path(task_name)
 
-        with set_directory(work_dir):
-            # link input files
-            for ii in input_files:
-                if os.path.isfile(ii) or os.path.isdir(ii):
-                    iname = ii.name
-                    Path(iname).symlink_to(ii)
-                else:
-                    raise FatalError(f"cannot find file {ii}")
-
-            for ii in opt_input_files:
-                if os.path.isfile(ii) or os.path.isdir(ii):
-                    iname = ii.name
-                    Path(iname).symlink_to(ii)
-            out_name, log_name = self.run_task(**config)
+        def run():
+            with set_directory(work_dir):
+                # link input files
+                for ii in input_files:
+                    if os.path.isfile(ii) or os.path.isdir(ii):
+                        iname = ii.name
+                        Path(iname).symlink_to(ii)
+                    else:
+                        raise FatalError(f"cannot find file {ii}")
+
+                for ii in opt_input_files:
+                    if os.path.isfile(ii) or os.path.isdir(ii):
+                        iname = ii.name
+                        Path(iname).symlink_to(ii)
+                out_name, log_name = self.run_task(**config)
+            return work_dir / out_name, work_dir / log_name
+
+        labeled_data, log, cache_records = run_with_fp_cache(
+            ip["config"],
+            Path(task_path),
+            work_dir,
+            config.get("out", fp_default_out_data_name),
+            config.get("log", fp_default_log_name),
+            run,
+        )
 
         extra_outputs = []
         for fname in ip["config"]["extra_output_files"]:
             extra_outputs += list(work_dir.glob(fname))
+        extra_outputs += cache_records
 
         return OPIO(
             {
-                "log": work_dir / log_name,
-                "labeled_data": work_dir / out_name,
+                "log": log,
+                "labeled_data": labeled_data,
                 "extra_outputs": extra_outputs,
             }
         )
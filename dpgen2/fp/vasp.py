@@ -139,10 +139,21 @@ class PrepVasp(PrepFp):
         incar = vasp_inputs.incar_template
         incar = self.set_ele_temp(conf_frame, incar)
 
-        Path(vasp_input_name).write_text(incar)
+        if incar == vasp_inputs.incar_template:
+            self.write_shared_file(vasp_input_name, vasp_input_name, incar)
+        else:
+            Path(vasp_input_name).write_text(incar)
         # fix the case when some element have 0 atom, e.g. H0O2
-        tmp_frame = dpdata.System(vasp_conf_name, fmt="vasp/poscar")
-        Path(vasp_pot_name).write_text(vasp_inputs.make_potcar(tmp_frame["atom_names"]))
+        atom_names = [
+            nn
+            for nn, cc in zip(conf_frame["atom_names"], conf_frame["atom_numbs"])
+            if cc > 0
+        ]
+        self.write_shared_file(
+            vasp_pot_name,
+            ".".join([vasp_pot_name] + atom_names),
+            vasp_inputs.make_potcar(atom_names),
+        )
         Path(vasp_kp_name).write_text(vasp_inputs.make_kpoints(conf_frame["cells"][0]))  # type: ignore
 
 
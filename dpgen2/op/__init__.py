@@ -7,6 +7,9 @@ from .collect_run_caly import (
 from .diffcsp_gen import (
     DiffCSPGen,
 )
+from .freeze_models import (
+    FreezeModels,
+)
 from .prep_caly_dp_optim import (
     PrepCalyDPOptim,
 )
@@ -33,6 +36,7 @@ from .run_caly_model_devi import (
 )
 from .run_dp_train import (
     RunDPTrain,
+    RunDPTrainPacked,
 )
 from .run_lmp import (
     RunLmp,
@@ -45,3 +49,6 @@ from .run_relax import (
 from .select_confs import (
     SelectConfs,
 )
+from .stage_dp_train_data import (
+    StageDPTrainData,
+)
@@ -1,15 +1,19 @@
 import json
+import logging
 import os
 from pathlib import (
     Path,
 )
 from typing import (
+    Dict,
     List,
+    Optional,
     Set,
     Tuple,
 )
 
 import dpdata
+import numpy as np
 from dflow.python import (
     OP,
     OPIO,
@@ -19,11 +23,174 @@ from dflow.python import (
     Parameter,
 )
 
+from dpgen2.fp.fp_cache import (
+    fp_cache_stats,
+)
 from dpgen2.utils import (
+    read_npy_header,
     setup_ele_temp,
+    write_data_manifest,
 )
 
 
+def _atomic_keys() -> Set[str]:
+    # the per-atom data, which are permuted when the atoms are sorted by types
+    keys = {"aparam"}
+    for dtype in dpdata.LabeledSystem.DTYPES:
+        if dtype.shape is not None and dpdata.system.Axis.NATOMS in dtype.shape[1:]:
+            keys.add(dtype.deepmd_name)
+    return keys
+
+
+def _read_system_header(
+    sys_dir: Path,
+    type_map: List[str],
+) -> Optional[dict]:
+    if not (sys_dir / "type.raw").is_file():
+        return None
+    atom_types = np.array((sys_dir / "type.raw").read_text().split(), dtype=int)
+    assert (
+        sys_dir / "type_map.raw"
+    ).is_file(), f"Error: no type_map.raw in the labeled data {sys_dir}"
+    names = (sys_dir / "type_map.raw").read_text().split()
+    for nn in names:
+        assert nn in type_map, (
+            f"Error: the element {nn} in the labeled data {sys_dir} "
+            f"is not in the type_map {type_map}"
+        )
+    atom_types = np.array([type_map.index(nn) for nn in names], dtype=int)[atom_types]
+    atom_numbs = np.bincount(atom_types, minlength=len(type_map))
+    sets = []
+    for set_dir in sorted(sys_dir.glob("set.*")):
+        keys = sorted(
+            ff.name[: -len(".npy")]
+            for ff in os.scandir(set_dir)
+            if ff.name.endswith(".npy")
+        )
+        nframes = read_npy_header(set_dir / "coord.npy")[0][0]
+        sets.append((set_dir, nframes, keys))
+    return {
+        "path": sys_dir,
+        "formula": "".join(f"{nn}{mm}" for nn, mm in zip(type_map, atom_numbs)),
+        "atom_types": atom_types,
+        "nopbc": (sys_dir / "nopbc").is_file(),
+        "nframes": sum(ss[1] for ss in sets),
+        "sets": sets,
+    }
+
+
+def _write_system(
+    out_dir: Path,
+    members: List[dict],
+    type_map: List[str],
+):
+    nopbc = all(mm["nopbc"] for mm in members)
+    keys = None
+    # the shape and dtype of each data, read from the first set having it
+    fields: Dict[str, Tuple[np.dtype, int]] = {}
+    for mm in members:
+        for set_dir, _, set_keys in mm["sets"]:
+            set_keys = set(set_keys) | {"box"}
+            if keys is None:
+                keys = set_keys
+            elif keys != set_keys:
+                raise RuntimeError(
+                    f"the labeled data {set_dir} has {sorted(set_keys)}, "
+                    f"but the others have {sorted(keys)}"
+                )
+            for kk in set_keys - fields.keys():
+                if (set_dir / f"{kk}.npy").is_file():
+                    shape, dtype = read_npy_header(set_dir / f"{kk}.npy")
+                    fields[kk] = (dtype, int(np.prod(shape[1:], dtype=int)))
+    fields.setdefault("box", (np.dtype(float), 9))
+
+    # the atoms are sorted by types if the members do not agree on the order,
+    # the same as dpdata.System.append
+    atom_types = members[0]["atom_types"]
+    if any((mm["atom_types"] != atom_types).any() for mm in members):
+        perms = [np.argsort(mm["atom_types"], kind="stable") for mm in members]
+        atom_types = np.sort(atom_types, kind="stable")
+    else:
+        perms = [None] * len(members)
+    atomic_keys = _atomic_keys()
+    natoms = atom_types.shape[0]
+
+    nframes = sum(mm["nframes"] for mm in members)
+    set_dir = out_dir / "set.000"
+    set_dir.mkdir(parents=True)
+    np.savetxt(out_dir / "type.raw", atom_types, fmt="%d")
+    np.savetxt(out_dir / "type_map.raw", type_map, fmt="%s")
+    if nopbc:
+        (out_dir / "nopbc").touch()
+    outputs = {}
+    for kk, (dtype, width) in fields.items():
+        if np.issubdtype(dtype, np.floating):
+            dtype = np.dtype(np.float64)
+        outputs[kk] = np.lib.format.open_memmap(
+            set_dir / f"{kk}.npy", mode="w+", dtype=dtype, shape=(nframes, width)
+        )
+    start = 0
+    for mm, perm in zip(members, perms):
+        for in_dir, nn, _ in mm["sets"]:
+            for kk, out in outputs.items():
+                fname = in_dir / f"{kk}.npy"
+                if not fname.is_file():
+                    # box is not required by nopbc systems
+                    out[start : start + nn] = 0.0
+                    continue
+                data = np.load(fname).reshape(nn, -1)
+                if perm is not None and kk in atomic_keys:
+                    data = data.reshape(nn, natoms, -1)[:, perm].reshape(nn, -1)
+                out[start : start + nn] = data
+            start += nn
+    for out in outputs.values():
+        out.flush()
+
+
+def collect_deepmd_npy(
+    labeled_data: List[Optional[Path]],
+    type_map: List[str],
+    out_dir: Path,
+) -> List[str]:
+    r"""Collect labeled systems in `deepmd/npy` format into one data
+    directory by streaming.
+
+    The systems are grouped by the formula, in the same way as
+    `dpdata.MultiSystems`. Only the headers of the data files are read to
+    group the systems. The data of each group are then written to
+    preallocated `set.000` numpy files, one labeled system at a time, so the
+    collected data are never held in memory.
+
+    Parameters
+    ----------
+    labeled_data : List[Path]
+        The labeled systems. `None` or the directories without `type.raw`
+        are skipped.
+    type_map : List[str]
+        The type map.
+    out_dir : Path
+        The output directory. Each group is written to the sub-directory
+        named by the formula.
+
+    Returns
+    -------
+    formulas : List[str]
+        The formulas of the collected systems.
+    """
+    groups: Dict[str, List[dict]] = {}
+    for ii in labeled_data:
+        if not ii:
+            continue
+        header = _read_system_header(Path(ii), type_map)
+        if header is None:
+            continue
+        groups.setdefault(header["formula"], []).append(header)
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    for formula, members in groups.items():
+        _write_system(Path(out_dir) / formula, members, type_map)
+    return list(groups.keys())
+
+
 class CollectData(OP):
     """Collect labeled data and add to the iteration dataset.
 
@@ -51,6 +218,7 @@ class CollectData(OP):
                 ),
                 "labeled_data": Artifact(List[Path]),
                 "iter_data": Artifact(List[Path]),
+                "fp_extra_outputs": Artifact(List[Path], optional=True),
             }
         )
 
@@ -69,7 +237,9 @@ class CollectData(OP):
     ) -> OPIO:
         r"""Execute the OP. This OP collect data scattered in directories given by `ip['labeled_data']`
         in to one `dpdata.Multisystems` and store it in a directory named `name`. This directory is appended
-        to the list `iter_data`.
+        to the list `iter_data`. The data are streamed to the disk by `collect_deepmd_npy` unless
+        `mixed_type` is set. The sizes of the systems are recorded in the manifest `data_manifest.json`
+        of the directory, see `dpgen2.utils.write_data_manifest`.
 
         Parameters
         ----------
@@ -79,6 +249,7 @@ class CollectData(OP):
             - `name`: (`str`) The name of this iteration. The data generated by this iteration will be place in a sub-directory of `name`.
             - `labeled_data`: (`Artifact(List[Path])`) The paths of labeled data generated by FP tasks of the current iteration.
             - `iter_data`: (`Artifact(List[Path])`) The data paths previous iterations.
+            - `fp_extra_outputs`: (`Artifact(List[Path])`) Optional. The extra outputs of the FP tasks of the current iteration. The FP cache hits and misses recorded in them are logged, see `dpgen2.fp.fp_cache.fp_cache_stats`.
 
         Returns
         -------
@@ -93,24 +264,34 @@ class CollectData(OP):
         labeled_data = ip["labeled_data"]
         iter_data = ip["iter_data"]
 
-        ms = dpdata.MultiSystems(type_map=type_map)
-        for ii in labeled_data:
-            if ii and len(list(ii.rglob("fparam.npy"))) > 0:
-                setup_ele_temp(False)
-            if ii and len(list(ii.rglob("aparam.npy"))) > 0:
-                setup_ele_temp(True)
-            ss = dpdata.LabeledSystem(ii, fmt="deepmd/npy")
-            ms.append(ss)
-
-        # NOTICE:
-        # if ms.get_nframes() == 0, ms.to_deepmd_npy would not make the dir Path(name)
-        Path(name).mkdir()
         if mixed_type:
+            ms = dpdata.MultiSystems(type_map=type_map)
+            for ii in labeled_data:
+                if ii and len(list(ii.rglob("fparam.npy"))) > 0:
+                    setup_ele_temp(False)
+                if ii and len(list(ii.rglob("aparam.npy"))) > 0:
+                    setup_ele_temp(True)
+                ss = dpdata.LabeledSystem(ii, fmt="deepmd/npy")
+                ms.append(ss)
+            # NOTICE:
+            # if ms.get_nframes() == 0, ms.to_deepmd_npy would not make the dir Path(name)
+            Path(name).mkdir()
             ms.to_deepmd_npy_mixed(name)  # type: ignore
         else:
-            ms.to_deepmd_npy(name)  # type: ignore
+            Path(name).mkdir()
+            collect_deepmd_npy(labeled_data, type_map, Path(name))
+        # the data size is read from the manifest by the training OPs
+        write_data_manifest(Path(name))
         iter_data.append(Path(name))
 
+        if ip["fp_extra_outputs"] is not None:
+            stats = fp_cache_stats(ip["fp_extra_outputs"])
+            if stats["hits"] + stats["misses"] > 0:
+                logging.info(
+                    f"fp cache of {name}: {stats['hits']} hits, "
+                    f"{stats['misses']} misses, hit ratio {stats['hit_ratio']:.4f}"
+                )
+
         return OPIO(
             {
                 "iter_data": iter_data,
@@ -0,0 +1,96 @@
+import os
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+)
+
+from dflow.python import (
+    OP,
+    OPIO,
+    Artifact,
+    BigParameter,
+    OPIOSign,
+)
+
+from dpgen2.constants import (
+    pytorch_model_name_pattern,
+)
+
+from .run_lmp import (
+    freeze_model,
+)
+
+
+class FreezeModels(OP):
+    r"""Freeze the models of the exploration once for all the tasks.
+
+    The pytorch models (`.pt`) are frozen to `model.%03d.pth`, with the
+    head `model_frozen_head` of the exploration config, and the other
+    models are passed through. The frozen models are used by all the
+    exploration tasks of the iteration, which then do not freeze the
+    models by themselves.
+
+    """
+
+    @classmethod
+    def get_input_sign(cls):
+        return OPIOSign(
+            {
+                "config": BigParameter(dict),
+                "models": Artifact(List[Path]),
+            }
+        )
+
+    @classmethod
+    def get_output_sign(cls):
+        return OPIOSign(
+            {
+                "models": Artifact(List[Path]),
+            }
+        )
+
+    @OP.exec_sign_check
+    def execute(
+        self,
+        ip: OPIO,
+    ) -> OPIO:
+        r"""Execute the OP.
+
+        Parameters
+        ----------
+        ip : dict
+            Input dict with components:
+
+            - `config`: (`dict`) The config of the exploration task. Check `RunLmp.lmp_args` for definitions.
+            - `models`: (`Artifact(List[Path])`) The models of the exploration.
+
+        Returns
+        -------
+        op : dict
+            Output dict with components:
+
+            - `models`: (`Artifact(List[Path])`) The frozen models, in the same order as the input models.
+
+        Raises
+        ------
+        TransientError
+            On the failure of freezing.
+        """
+        config = ip["config"] if ip["config"] is not None else {}
+        head = config.get("model_frozen_head")
+        models = []
+        for idx, mm in enumerate(ip["models"]):
+            if os.path.splitext(mm)[-1] == ".pt":
+                mname = Path(pytorch_model_name_pattern % idx)
+                freeze_model(mm, mname, head)
+                models.append(mname)
+            else:
+                models.append(mm)
+
+        return OPIO(
+            {
+                "models": models,
+            }
+        )
@@ -6,6 +6,9 @@ from pathlib import (
 )
 from typing import (
     List,
+    Optional,
+    Sequence,
+    Tuple,
     Union,
 )
 
@@ -20,9 +23,42 @@ from dflow.python import (
 )
 
 from dpgen2.utils import (
+    load_dp_model,
     set_directory,
 )
 
+model_devi_default_batch_size = 1024
+# the safe distances in bohr of the elements, used by parse_traj
+caly_safe_dist_dict = {
+    "He": 0.0,
+    "Li": 1.5,
+    "Na": 1.45,
+    "K": 2.3,
+    "Rb": 2.5,
+    "Mg": 1.7,
+    "Ca": 2.3,
+    "Sr": 2.5,
+    "Al": 1.7,
+    "Sc": 2.0,
+    "Y": 2.1,
+    "La": 2.5,
+    "Ti": 2.0,
+    "Zr": 2.1,
+    "Hf": 2.4,
+    "Mo": 2.1,
+    "W": 2.3,
+    "B": 1.1,
+    "C": 1.1,
+    "Si": 1.6,
+    "P": 1.5,
+    "As": 2.0,
+    "S": 1.5,
+    "Se": 2.1,
+    "Te": 2.0,
+    "Br": 2.3,
+    "H": 0.813,
+}
+
 
 class RunCalyModelDevi(OP):
     r"""calculate model deviaion of trajectories structures.
@@ -30,6 +66,9 @@ class RunCalyModelDevi(OP):
     Structure optimization will be executed in `optim_path`. The trajectory
     will be stored in files `op["traj"]` and `op["model_devi"]`, respectively.
 
+    The frames of all the trajectories are evaluated by the models in
+    batches, see `calc_batched_model_devi`.
+
     """
 
     @classmethod
@@ -79,7 +118,6 @@ class RunCalyModelDevi(OP):
 
         """
         from deepmd.infer import (  # type: ignore
-            DeepPot,
             calc_model_devi,
         )
 
@@ -87,7 +125,7 @@ class RunCalyModelDevi(OP):
 
         models = ip["models"]
         all_models = [model.resolve() for model in models]
-        graphs = [DeepPot(model) for model in all_models]
+        graphs = [load_dp_model(model) for model in all_models]
 
         work_dir = Path(ip["task_name"])
 
@@ -99,25 +137,23 @@ class RunCalyModelDevi(OP):
 
         tcount = 0
         with set_directory(work_dir):
-            dump_str_dict = defaultdict(list)  # key: natoms, value: dump_strs
-            devis_dict = defaultdict(list)  # key: natoms, value: Devis-s
+            dump_str_dict = {}  # key: tcount, value: dump_str
+            frames = []  # the frames of all the trajectories
+            traj_ranges = {}  # key: tcount, value: the range in frames
             for traj_dir in traj_dirs:
                 for traj_name in traj_dir.rglob("*.traj"):
                     atoms_list = parse_traj(traj_name)
                     if atoms_list is None:
                         continue
-                    for atoms in atoms_list:
-                        natoms = len(atoms)
-                        dump_str = atoms2lmpdump(atoms, tcount, type_map, ignore=True)
-                        dump_str_dict[tcount].append(dump_str)
-
-                        pbc = np.all(atoms.get_pbc())
-                        coord = atoms.get_positions().reshape(1, -1)
-                        cell = atoms.get_cell().array.reshape(1, -1) if pbc else None
-                        atype = [type_map.index(atom.symbol) for atom in atoms]  # type: ignore
-                        devi = calc_model_devi(coord, cell, atype, graphs)[0]
-                        devis_dict[tcount].append(devi)
+                    if len(atoms_list) > 0:
+                        dump_str_dict[tcount] = traj2lmpdump(atoms_list, type_map)
+                        traj_ranges[tcount] = (
+                            len(frames),
+                            len(frames) + len(atoms_list),
+                        )
+                        frames += atoms_list
                     tcount += 1
+            devis = calc_batched_model_devi(frames, type_map, graphs, calc_model_devi)
 
             traj_file_list = []
             model_devi_file_list = []
@@ -126,19 +162,10 @@ class RunCalyModelDevi(OP):
                 dump_file = Path().joinpath(dump_file_name % key)
                 model_devi_file = Path().joinpath(model_devi_file_name % key)
 
-                traj_str = dump_str_dict[key]
-                model_devis = devis_dict[key]
-                assert len(traj_str) == len(
-                    model_devis
-                ), "The length of traj_str and model_devis should be same."
-                for idx in range(len(model_devis)):
-                    traj_str[idx] = traj_str[idx] % idx
-                    model_devis[idx][0] = idx
-
-                traj_str = "".join(traj_str)
-                dump_file.write_text(traj_str)
-
-                model_devis = np.vstack(model_devis)
+                start, end = traj_ranges[key]
+                model_devis = devis[start:end]
+                model_devis[:, 0] = np.arange(end - start)
+                dump_file.write_text(dump_str_dict[key])
                 write_model_devi_out(model_devis, model_devi_file)
 
                 traj_file_list.append(dump_file)
@@ -157,6 +184,244 @@ class RunCalyModelDevi(OP):
         return OPIO(ret_dict)
 
 
+def calc_batched_model_devi(
+    frames: list,
+    type_map: List[str],
+    graphs: list,
+    calc_model_devi,
+    batch_size: int = model_devi_default_batch_size,
+) -> np.ndarray:
+    r"""Calculate the model deviation of the frames in batches.
+
+    The frames having the same atom types and periodicity are evaluated
+    together by `calc_model_devi`, in batches of at most `batch_size`
+    frames, and the results are put back in the order of the frames.
+
+    Parameters
+    ----------
+    frames : List[ase.Atoms]
+        The frames.
+    type_map : List[str]
+        The type map of elements.
+    graphs : list
+        The models, passed to `calc_model_devi`.
+    calc_model_devi : Callable
+        The `deepmd.infer.calc_model_devi` function.
+    batch_size : int
+        The maximal number of frames evaluated at once.
+
+    Returns
+    -------
+    devi : np.ndarray
+        The model deviation of each frame, the rows of `model_devi.out`.
+        The steps are the indexes of the frames in the batches and are
+        expected to be overwritten by the caller.
+    """
+    type_index = _type_index(type_map)
+    groups = defaultdict(list)  # key: (pbc, atom types), value: frame indexes
+    for idx, atoms in enumerate(frames):
+        atype = get_atom_types(atoms, type_map, type_index)
+        pbc = bool(np.all(atoms.get_pbc()))
+        groups[(pbc, atype.tobytes())].append(idx)
+
+    devis = np.zeros((len(frames), 8))
+    for (pbc, atype_bytes), indexes in groups.items():
+        atype = np.frombuffer(atype_bytes, dtype=int)
+        for start in range(0, len(indexes), batch_size):
+            batch = indexes[start : start + batch_size]
+            coord = np.array([frames[ii].get_positions() for ii in batch])
+            coord = coord.reshape(len(batch), -1)
+            cell = None
+            if pbc:
+                cell = np.array([frames[ii].get_cell().array for ii in batch])
+                cell = cell.reshape(len(batch), -1)
+            devis[batch] = calc_model_devi(coord, cell, atype.tolist(), graphs)
+    return devis
+
+
+def _type_index(type_map: List[str]) -> np.ndarray:
+    # the index in type_map of each atomic number, -1 if it is not in type_map
+    from ase.data import (  # type: ignore
+        atomic_numbers,
+    )
+
+    type_index = np.full(max(atomic_numbers.values()) + 1, -1, dtype=int)
+    for ii, name in reversed(list(enumerate(type_map))):
+        if name in atomic_numbers:
+            type_index[atomic_numbers[name]] = ii
+    return type_index
+
+
+def get_atom_types(
+    atoms,
+    type_map: List[str],
+    type_index: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    r"""The indexes of the atoms in `type_map`. The lookup table
+    `type_index` is made from `type_map` if not given."""
+    if type_index is None:
+        type_index = _type_index(type_map)
+    atype = type_index[atoms.numbers]
+    if (atype < 0).any():
+        missing = set(np.array(atoms.get_chemical_symbols())[atype < 0])
+        raise ValueError(f"elements {sorted(missing)} are not in {type_map}")
+    return atype
+
+
+def to_lmp_frames(
+    coords: np.ndarray,
+    cells: np.ndarray,
+    pbc: Union[bool, Sequence[bool]] = True,
+) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Rotate the frames to the LAMMPS convention of the triclinic box, in
+    which the cell is lower triangular. The same as rebuilding the cell by
+    `ase.geometry.cellpar_to_cell`, and the coordinates from the scaled
+    positions, which are wrapped in the periodic directions.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        The coordinates, of shape (nframes, natoms, 3).
+    cells : np.ndarray
+        The cells, of shape (nframes, 3, 3).
+    pbc : bool or List[bool]
+        The periodicity, of all or each of the directions.
+
+    Returns
+    -------
+    lmp_coords : np.ndarray
+        The coordinates in the LAMMPS box, of shape (nframes, natoms, 3).
+    lmp_cells : np.ndarray
+        The lower triangular cells, of shape (nframes, 3, 3).
+    """
+    coords = np.asarray(coords, dtype=float)
+    cells = np.asarray(cells, dtype=float)
+    aa, bb, cc = cells[:, 0], cells[:, 1], cells[:, 2]
+    lx = np.linalg.norm(aa, axis=1)
+    xy = np.einsum("ij,ij->i", bb, aa) / lx
+    xz = np.einsum("ij,ij->i", cc, aa) / lx
+    ly = np.sqrt(np.einsum("ij,ij->i", bb, bb) - xy**2)
+    yz = (np.einsum("ij,ij->i", bb, cc) - xy * xz) / ly
+    lz = np.sqrt(np.einsum("ij,ij->i", cc, cc) - xz**2 - yz**2)
+    # the rounding errors of the orthogonal cells are dropped
+    tilt_eps = 1e-10
+    xy[np.abs(xy) < tilt_eps] = 0.0
+    xz[np.abs(xz) < tilt_eps] = 0.0
+    yz[np.abs(yz) < tilt_eps] = 0.0
+    zeros = np.zeros_like(lx)
+    lmp_cells = np.stack(
+        [
+            np.stack([lx, zeros, zeros], axis=1),
+            np.stack([xy, ly, zeros], axis=1),
+            np.stack([xz, yz, lz], axis=1),
+        ],
+        axis=1,
+    )
+
+    scaled = np.linalg.solve(
+        cells.transpose(0, 2, 1), coords.transpose(0, 2, 1)
+    ).transpose(0, 2, 1)
+    periodic = np.broadcast_to(np.asarray(pbc, dtype=bool), (3,))
+    for ii in np.flatnonzero(periodic):
+        # twice, the same as ase.Atoms.get_scaled_positions
+        scaled[:, :, ii] %= 1.0
+        scaled[:, :, ii] %= 1.0
+    return scaled @ lmp_cells, lmp_cells
+
+
+def frames2lmpdump(
+    coords: np.ndarray,
+    cells: np.ndarray,
+    atom_types: np.ndarray,
+    steps: Sequence,
+    pbc: Union[bool, Sequence[bool]] = True,
+) -> str:
+    r"""The LAMMPS dump of the frames. The frames are rotated to the
+    LAMMPS triclinic box by `to_lmp_frames`, and each frame is rendered by
+    one string formatting.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        The coordinates, of shape (nframes, natoms, 3).
+    cells : np.ndarray
+        The cells, of shape (nframes, 3, 3).
+    atom_types : np.ndarray
+        The types of the atoms, the indexes in the type map.
+    steps : List
+        The timestep of each frame.
+    pbc : bool or List[bool]
+        The periodicity, of all or each of the directions.
+
+    Returns
+    -------
+    dump_str : str
+        The dump.
+    """
+    lmp_coords, lmp_cells = to_lmp_frames(coords, cells, pbc)
+    natoms = lmp_coords.shape[1]
+    frame_fmt = (
+        "ITEM: TIMESTEP\n%s\nITEM: NUMBER OF ATOMS\n%d\n"
+        "ITEM: BOX BOUNDS xy xz yz pp pp pp\n"
+        + "%20.10f %20.10f %20.10f\n" * 3
+        + "ITEM: ATOMS id type x y z fx fy fz\n"
+        + ("%5d %5d%20.10f %20.10f %20.10f" + "%20.10f %20.10f %20.10f\n" % (0, 0, 0))
+        * natoms
+    )
+    ids_types = np.stack(
+        [np.arange(1, natoms + 1), np.asarray(atom_types, dtype=int) + 1], axis=1
+    )
+    dump_str = []
+    for step, coord, cell in zip(steps, lmp_coords, lmp_cells):
+        lx, ly, lz = cell[0][0], cell[1][1], cell[2][2]
+        xy, xz, yz = cell[1][0], cell[2][0], cell[2][1]
+        bounds = (
+            min(0.0, xy, xz, xy + xz),
+            lx + max(0.0, xy, xz, xy + xz),
+            xy,
+            min(0.0, yz),
+            ly + max(0.0, yz),
+            xz,
+            0.0,
+            lz,
+            yz,
+        )
+        atoms = np.concatenate([ids_types, coord], axis=1).ravel().tolist()
+        dump_str.append(frame_fmt % (step, natoms, *bounds, *atoms))
+    return "".join(dump_str)
+
+
+def traj2lmpdump(atoms_list: list, type_map: List[str]) -> str:
+    r"""The LAMMPS dump of a list of ASE `Atoms`, the timesteps are the
+    indexes in the list. The consecutive frames of the same atoms are
+    rendered together by `frames2lmpdump`.
+    """
+    type_index = _type_index(type_map)
+    dump_str = []
+    start = 0
+    while start < len(atoms_list):
+        first = atoms_list[start]
+        end = start + 1
+        while (
+            end < len(atoms_list)
+            and np.array_equal(atoms_list[end].numbers, first.numbers)
+            and np.array_equal(atoms_list[end].get_pbc(), first.get_pbc())
+        ):
+            end += 1
+        frames = atoms_list[start:end]
+        dump_str.append(
+            frames2lmpdump(
+                np.array([atoms.get_positions() for atoms in frames]),
+                np.array([atoms.get_cell().array for atoms in frames]),
+                get_atom_types(first, type_map, type_index),
+                range(start, end),
+                pbc=first.get_pbc(),
+            )
+        )
+        start = end
+    return "".join(dump_str)
+
+
 def atoms2lmpdump(atoms, struc_idx, type_map, ignore=False):
     """down triangle cell can be obtained from
     cell params: a, b, c, alpha, beta, gamma.
@@ -172,112 +437,90 @@ def atoms2lmpdump(atoms, struc_idx, type_map, ignore=False):
     zhi_bound = zhi
 
     ref: https://docs.lammps.org/Howto_triclinic.html
+
+    The dump is rendered by `frames2lmpdump`, which renders many frames at
+    once. The timestep is left as `%d` if `ignore` is set.
     """
-    from ase import (  # type: ignore
-        Atoms,
+    return frames2lmpdump(
+        atoms.get_positions()[None],
+        atoms.get_cell().array[None],
+        get_atom_types(atoms, type_map),
+        ["%d" if ignore else struc_idx],
+        pbc=atoms.get_pbc(),
     )
-    from ase.geometry import (  # type: ignore
-        cellpar_to_cell,
+
+
+def _image_pairs(atoms, rcut: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    r"""All the pairs of atoms closer than `rcut`, found by a KD-tree over
+    the periodic images. An atom is paired with its own images, but not
+    with itself.
+
+    Along a periodic direction the images within `rcut` are searched, which
+    gives the minimum image distances. Along a non-periodic direction the
+    neighbor cells (-1, 0, 1) are searched. This is what the distances in
+    the 2x2x2 supercell of `atoms` cover, without building the supercell.
+    """
+    from scipy.spatial import (  # type: ignore
+        cKDTree,
     )
 
-    dump_str = "ITEM: TIMESTEP\n"
-    if not ignore:
-        dump_str += f"{struc_idx}\n"
-    else:
-        dump_str += "%d\n"
-    dump_str += "ITEM: NUMBER OF ATOMS\n"
-    dump_str += f"{atoms.get_global_number_of_atoms()}\n"
-
-    cellpars = atoms.cell.cellpar()
-    new_cell = cellpar_to_cell(cellpars)
-    new_atoms = Atoms(
-        numbers=atoms.numbers,
-        cell=new_cell,
-        scaled_positions=atoms.get_scaled_positions(),
+    natoms = len(atoms)
+    cell = atoms.get_cell().array
+    pbc = atoms.get_pbc()
+    frac = np.linalg.solve(cell.T, atoms.get_positions().T).T
+    frac[:, pbc] -= np.floor(frac[:, pbc])
+    coords = frac @ cell
+    volume = np.abs(np.linalg.det(cell))
+    face_area = np.linalg.norm(np.cross(cell[[1, 2, 0]], cell[[2, 0, 1]]), axis=1)
+    nimages = np.where(pbc, np.ceil(rcut * face_area / volume).astype(int), 1)
+    shifts = np.stack(
+        np.meshgrid(*[np.arange(-nn, nn + 1) for nn in nimages], indexing="ij"),
+        axis=-1,
+    ).reshape(-1, 3)
+    images = (coords[None, :, :] + (shifts @ cell)[:, None, :]).reshape(-1, 3)
+    pairs = cKDTree(coords).sparse_distance_matrix(
+        cKDTree(images), rcut, output_type="ndarray"
     )
+    # the atom itself, in the image of zero shift
+    origin = int(np.flatnonzero((shifts == 0).all(axis=1))[0])
+    mask = pairs["j"] != origin * natoms + pairs["i"]
+    return pairs["i"][mask], pairs["j"][mask] % natoms, pairs["v"][mask]
 
-    xy, xz, yz = new_cell[1][0], new_cell[2][0], new_cell[2][1]
-    xlo, ylo, zlo = 0, 0, 0
-    lx, ly, lz = new_cell[0][0], new_cell[1][1], new_cell[2][2]
-    xhi, yhi, zhi = lx + xlo, ly + ylo, lz + zlo
-    xlo_bound = xlo + min(0.0, xy, xz, xy + xz)
-    xhi_bound = xhi + max(0.0, xy, xz, xy + xz)
-    ylo_bound = ylo + min(0.0, yz)
-    yhi_bound = yhi + max(0.0, yz)
-    zlo_bound = zlo
-    zhi_bound = zhi
 
-    dump_str += "ITEM: BOX BOUNDS xy xz yz pp pp pp\n"
-    dump_str += "%20.10f %20.10f %20.10f\n" % (xlo_bound, xhi_bound, xy)
-    dump_str += "%20.10f %20.10f %20.10f\n" % (ylo_bound, yhi_bound, xz)
-    dump_str += "%20.10f %20.10f %20.10f\n" % (zlo_bound, zhi_bound, yz)
-    dump_str += "ITEM: ATOMS id type x y z fx fy fz\n"
-    for idx, atom in enumerate(new_atoms):
-        type_id = type_map.index(atom.symbol) + 1  # type: ignore
-        dump_str += "%5d %5d" % (idx + 1, type_id)
-        dump_str += "%20.10f %20.10f %20.10f" % (
-            atom.position[0],  # type: ignore
-            atom.position[1],  # type: ignore
-            atom.position[2],  # type: ignore
-        )
-        dump_str += "%20.10f %20.10f %20.10f\n" % (0, 0, 0)
-    # dump_str = dump_str.strip("\n")
-    return dump_str
+def _is_reasonable(atoms) -> bool:
+    # no pair of atoms is closer than the sum of the safe distances
+    safe_dist = np.array(
+        [caly_safe_dist_dict[ss] for ss in atoms.get_chemical_symbols()]
+    )
+    rcut = (safe_dist.max(initial=0.0) * 2) * 0.529 / 1.2
+    ii, jj, dist = _image_pairs(atoms, rcut)
+    return not (dist < (safe_dist[ii] + safe_dist[jj]) * 0.529 / 1.2).any()
 
 
 def parse_traj(traj_file):
+    r"""Read a CALYPSO trajectory and select the reasonable frames.
+
+    The trajectory is dropped if any pair of atoms in the initial
+    configuration is closer than 0.72. Otherwise a few frames are selected,
+    and those having a pair of atoms closer than the sum of the safe
+    distances `caly_safe_dist_dict` are dropped. The distances are the
+    minimum image distances found by a neighbor list.
+    """
     from ase import (  # type: ignore
         Atoms,
     )
-    from ase.build import (  # type: ignore
-        make_supercell,
-    )
     from ase.io import (  # type: ignore
         read,
     )
 
-    safe_dist_dict = {
-        "He": 0.0,
-        "Li": 1.5,
-        "Na": 1.45,
-        "K": 2.3,
-        "Rb": 2.5,
-        "Mg": 1.7,
-        "Ca": 2.3,
-        "Sr": 2.5,
-        "Al": 1.7,
-        "Sc": 2.0,
-        "Y": 2.1,
-        "La": 2.5,
-        "Ti": 2.0,
-        "Zr": 2.1,
-        "Hf": 2.4,
-        "Mo": 2.1,
-        "W": 2.3,
-        "B": 1.1,
-        "C": 1.1,
-        "Si": 1.6,
-        "P": 1.5,
-        "As": 2.0,
-        "S": 1.5,
-        "Se": 2.1,
-        "Te": 2.0,
-        "Br": 2.3,
-        "H": 0.813,
-    }
-
     trajs: List[Atoms] = read(traj_file, index=":", format="traj")  # type: ignore
     dthresh = 0.72
     numb_traj = len(trajs)
     assert numb_traj >= 1, "traj file is broken."
 
     # 1st Filter, initial configuration
-    origin = trajs[0]
-    origin = make_supercell(origin, [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
-    dis_mtx = origin.get_all_distances(mic=True)
-    row, col = np.diag_indices_from(dis_mtx)
-    dis_mtx[row, col] = np.nan
-    is_reasonable = np.nanmin(dis_mtx) > dthresh
+    _, _, dist = _image_pairs(trajs[0], dthresh)
+    is_reasonable = len(dist) == 0
 
     selected_traj: Union[List[Atoms], None] = None
     if is_reasonable:
@@ -297,27 +540,7 @@ def parse_traj(traj_file):
             selected_traj = [trajs[0]]
 
         # 2nd filter for selected traj. It filters out all FRAMES that are to close.
-        i_keep = []
-        for t in selected_traj:
-            t2 = make_supercell(t, [[2, 0, 0], [0, 2, 0], [0, 0, 2]])
-
-            frame_is_reasonable = True
-            dist_dict = t2.get_all_distances(mic=True)
-            atype = t2.get_chemical_symbols()
-            for a in range(len(atype)):
-                for b in range(a + 1, len(atype)):
-                    dd = dist_dict[a][b]
-                    dr = (
-                        (safe_dist_dict[atype[a]] + safe_dist_dict[atype[b]])
-                        * 0.529
-                        / 1.2
-                    )
-                    if dd < dr:
-                        frame_is_reasonable = False
-
-            if frame_is_reasonable:
-                i_keep.append(selected_traj.index(t))
-        selected_traj = [selected_traj[iii] for iii in i_keep]
+        selected_traj = [t for t in selected_traj if _is_reasonable(t)]
     else:
         selected_traj = None
 
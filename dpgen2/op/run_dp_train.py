@@ -1,3 +1,4 @@
+import functools
 import glob
 import json
 import logging
@@ -5,6 +6,8 @@ import math
 import os
 import random
 import shutil
+import subprocess
+import tempfile
 from pathlib import (
     Path,
 )
@@ -16,7 +19,7 @@ from typing import (
     Union,
 )
 
-import dpdata
+import numpy as np
 from dargs import (
     Argument,
     ArgumentEncoder,
@@ -42,6 +45,11 @@ from dpgen2.constants import (
 from dpgen2.utils.chdir import (
     set_directory,
 )
+from dpgen2.utils.data_manifest import (
+    get_data_size,
+    read_data_manifest,
+    read_npy_header,
+)
 from dpgen2.utils.run_command import (
     run_command,
 )
@@ -102,6 +110,22 @@ def _make_train_command(
     return command
 
 
+def _log_command_error(name, out, err):
+    logging.error(
+        "".join(
+            (
+                f"{name} failed\n",
+                "out msg: ",
+                out,
+                "\n",
+                "err msg: ",
+                err,
+                "\n",
+            )
+        )
+    )
+
+
 class RunDPTrain(OP):
     r"""Execute a DP training task. Train and freeze a DP model.
 
@@ -133,6 +157,8 @@ class RunDPTrain(OP):
                 "iter_data": Artifact(List[Path]),
                 "valid_data": Artifact(NestedDict[Path], optional=True),
                 "optional_files": Artifact(List[Path], optional=True),
+                "staged_train_data": Artifact(Path, optional=True),
+                "staged_valid_data": Artifact(Path, optional=True),
             }
         )
 
@@ -165,6 +191,8 @@ class RunDPTrain(OP):
             - `init_model`: (`Artifact(Path)`) A frozen model to initialize the training.
             - `init_data`: (`Artifact(NestedDict[Path])`) Initial training data.
             - `iter_data`: (`Artifact(List[Path])`) Training data generated in the DPGEN iterations.
+            - `staged_train_data`: (`Artifact(Path)`) Optional. The directory of the training systems split from the last iteration by `StageDPTrainData`. If given, it replaces the last iteration in `iter_data`.
+            - `staged_valid_data`: (`Artifact(Path)`) Optional. The directory of the validation systems split from the last iteration by `StageDPTrainData`. If given, the last iteration in `iter_data` is taken as already split.
 
         Returns
         -------
@@ -180,34 +208,121 @@ class RunDPTrain(OP):
         FatalError
             On the failure of training or freezing. Human intervention needed.
         """
-        mixed_type = ip["optional_parameter"]["mixed_type"]
-        finetune_mode = ip["optional_parameter"]["finetune_mode"]
-        config = ip["config"] if ip["config"] is not None else {}
-        impl = ip["config"].get("impl", "tensorflow")
-        dp_command = ip["config"].get("command", "dp").split()
-        assert impl in ["tensorflow", "pytorch"]
-        if impl == "pytorch":
-            dp_command.append("--pt")
-        finetune_args = config.get("finetune_args", "")
-        train_args = config.get("train_args", "")
-        config = RunDPTrain.normalize_config(config)
+        settings = RunDPTrain._get_settings(ip)
+        train_data = RunDPTrain._get_train_data(ip, settings["config"])
         task_name = ip["task_name"]
         task_path = ip["task_path"]
         init_model = ip["init_model"]
-        init_data = ip["init_data"]
         iter_data = ip["iter_data"]
+        finetune_mode = settings["finetune_mode"]
+        work_dir = Path(task_name)
+
+        train_dict, do_init_model = RunDPTrain._make_train_dict(
+            ip, settings, train_data, task_path, init_model
+        )
+
+        if RunDPTrain.skip_training(
+            work_dir, train_dict, init_model, iter_data, finetune_mode
+        ):
+            return OPIO(
+                {
+                    "script": work_dir / train_script_name,
+                    "model": init_model,
+                    "lcurve": work_dir / "lcurve.out",
+                    "log": work_dir / "train.log",
+                }
+            )
+
+        with set_directory(work_dir):
+            # open log
+            fplog = open("train.log", "w")
+
+            # dump train script and train model
+            command = RunDPTrain._setup_work_dir(
+                ip, settings, train_dict, do_init_model, init_model
+            )
+            ret, out, err = run_command(command)
+            if ret != 0:
+                fplog.close()
+                _log_command_error("dp train", out, err)
+                raise FatalError("dp train failed")
+
+            # freeze model
+            model_file = RunDPTrain._freeze_model(
+                fplog, out, err, settings["impl"], finetune_mode
+            )
+            fplog.close()
+
+        return OPIO(
+            {
+                "script": work_dir / train_script_name,
+                "model": work_dir / model_file,
+                "lcurve": work_dir / "lcurve.out",
+                "log": work_dir / "train.log",
+            }
+        )
+
+    @staticmethod
+    def _get_settings(ip: OPIO) -> dict:
+        config = ip["config"] if ip["config"] is not None else {}
+        impl = config.get("impl", "tensorflow")
+        dp_command = config.get("command", "dp").split()
+        assert impl in ["tensorflow", "pytorch"]
+        if impl == "pytorch":
+            dp_command.append("--pt")
+        return {
+            "config": RunDPTrain.normalize_config(config),
+            "impl": impl,
+            "dp_command": dp_command,
+            "finetune_args": config.get("finetune_args", ""),
+            "train_args": config.get("train_args", ""),
+            "mixed_type": ip["optional_parameter"]["mixed_type"],
+            "finetune_mode": ip["optional_parameter"]["finetune_mode"],
+        }
+
+    @staticmethod
+    def _get_train_data(
+        ip: OPIO,
+        config: dict,
+    ) -> Tuple[List[str], List[str], Optional[Union[List, Dict]]]:
+        # the systems of the old and the last iterations, and the valid data
         valid_data = ip["valid_data"]
+        iter_data = ip["iter_data"]
         iter_data_old_exp = _expand_all_multi_sys_to_sys(iter_data[:-1])
-        iter_data_new_exp = _expand_all_multi_sys_to_sys(iter_data[-1:])
-        if config["split_last_iter_valid_ratio"] is not None:
+        iter_data_new = iter_data[-1:]
+        if ip["staged_train_data"] is not None and len(iter_data_new) > 0:
+            iter_data_new = [ip["staged_train_data"]]
+        iter_data_new_exp = _expand_all_multi_sys_to_sys(iter_data_new)
+        if ip["staged_valid_data"] is not None:
+            # split once for all the models by StageDPTrainData
+            valid_data = append_valid_data(
+                config,
+                valid_data,
+                _expand_multi_sys_to_sys(str(ip["staged_valid_data"])),
+            )
+        elif config["split_last_iter_valid_ratio"] is not None:
             train_systems, valid_systems = split_valid(
-                iter_data_new_exp, config["split_last_iter_valid_ratio"]
+                iter_data_new_exp,
+                config["split_last_iter_valid_ratio"],
+                seed=config["split_seed"],
             )
             iter_data_new_exp = train_systems
             valid_data = append_valid_data(config, valid_data, valid_systems)
+        return iter_data_old_exp, iter_data_new_exp, valid_data
+
+    @staticmethod
+    def _make_train_dict(
+        ip: OPIO,
+        settings: dict,
+        train_data: tuple,
+        task_path: Path,
+        init_model: Optional[Path],
+    ) -> Tuple[dict, bool]:
+        config = settings["config"]
+        init_data = ip["init_data"]
+        iter_data = ip["iter_data"]
+        iter_data_old_exp, iter_data_new_exp, valid_data = train_data
         iter_data_exp = iter_data_old_exp + iter_data_new_exp
-        work_dir = Path(task_name)
-        init_model_with_finetune = config["init_model_with_finetune"]
 
         # update the input script
         input_script = Path(task_path) / train_script_name
@@ -224,7 +339,7 @@ class RunDPTrain(OP):
             init_model,
             init_data,
             iter_data,
-            mixed_type=mixed_type,
+            mixed_type=settings["mixed_type"],
         )
         auto_prob_str = "prob_sys_size"
         if do_init_model:
@@ -251,109 +366,67 @@ class RunDPTrain(OP):
         train_dict = RunDPTrain.write_other_to_input_script(
             train_dict, config, do_init_model, major_version
         )
+        return train_dict, do_init_model
 
-        if RunDPTrain.skip_training(
-            work_dir, train_dict, init_model, iter_data, finetune_mode
-        ):
-            return OPIO(
-                {
-                    "script": work_dir / train_script_name,
-                    "model": init_model,
-                    "lcurve": work_dir / "lcurve.out",
-                    "log": work_dir / "train.log",
-                }
-            )
-
-        with set_directory(work_dir):
-            # open log
-            fplog = open("train.log", "w")
+    @staticmethod
+    def _setup_work_dir(
+        ip: OPIO,
+        settings: dict,
+        train_dict: dict,
+        do_init_model: bool,
+        init_model: Optional[Path],
+    ) -> List[str]:
+        # run in the work dir, returns the training command
+        with open(train_script_name, "w") as fp:
+            json.dump(train_dict, fp, indent=4)
 
-            def clean_before_quit():
-                fplog.close()
+        if ip["optional_files"] is not None:
+            for f in ip["optional_files"]:
+                Path(f.name).symlink_to(f)
 
-            # dump train script
-            with open(train_script_name, "w") as fp:
-                json.dump(train_dict, fp, indent=4)
+        return _make_train_command(
+            settings["dp_command"],
+            train_script_name,
+            settings["impl"],
+            do_init_model,
+            init_model,
+            settings["finetune_mode"],
+            settings["finetune_args"],
+            settings["config"]["init_model_with_finetune"],
+            settings["train_args"],
+        )
 
-            if ip["optional_files"] is not None:
-                for f in ip["optional_files"]:
-                    Path(f.name).symlink_to(f)
+    @staticmethod
+    def _freeze_model(
+        fplog,
+        out: str,
+        err: str,
+        impl: str,
+        finetune_mode: str,
+    ) -> str:
+        # run in the work dir after the training, returns the model file name
+        fplog.write("#=================== train std out ===================\n")
+        fplog.write(out)
+        fplog.write("#=================== train std err ===================\n")
+        fplog.write(err)
 
-            # train model
-            command = _make_train_command(
-                dp_command,
-                train_script_name,
-                impl,
-                do_init_model,
-                init_model,
-                finetune_mode,
-                finetune_args,
-                init_model_with_finetune,
-                train_args,
-            )
+        if finetune_mode == "finetune" and os.path.exists("input_v2_compat.json"):
+            shutil.copy2("input_v2_compat.json", train_script_name)
 
-            ret, out, err = run_command(command)
+        if impl == "pytorch":
+            model_file = "model.ckpt.pt"
+        else:
+            ret, out, err = run_command(["dp", "freeze", "-o", "frozen_model.pb"])
             if ret != 0:
-                clean_before_quit()
-                logging.error(
-                    "".join(
-                        (
-                            "dp train failed\n",
-                            "out msg: ",
-                            out,
-                            "\n",
-                            "err msg: ",
-                            err,
-                            "\n",
-                        )
-                    )
-                )
-                raise FatalError("dp train failed")
-            fplog.write("#=================== train std out ===================\n")
-            fplog.write(out)
-            fplog.write("#=================== train std err ===================\n")
-            fplog.write(err)
-
-            if finetune_mode == "finetune" and os.path.exists("input_v2_compat.json"):
-                shutil.copy2("input_v2_compat.json", train_script_name)
-
-            # freeze model
-            if impl == "pytorch":
-                model_file = "model.ckpt.pt"
-            else:
-                ret, out, err = run_command(["dp", "freeze", "-o", "frozen_model.pb"])
-                if ret != 0:
-                    clean_before_quit()
-                    logging.error(
-                        "".join(
-                            (
-                                "dp freeze failed\n",
-                                "out msg: ",
-                                out,
-                                "\n",
-                                "err msg: ",
-                                err,
-                                "\n",
-                            )
-                        )
-                    )
-                    raise FatalError("dp freeze failed")
-                model_file = "frozen_model.pb"
-            fplog.write("#=================== freeze std out ===================\n")
-            fplog.write(out)
-            fplog.write("#=================== freeze std err ===================\n")
-            fplog.write(err)
-
-            clean_before_quit()
-
-        return OPIO(
-            {
-                "script": work_dir / train_script_name,
-                "model": work_dir / model_file,
-                "lcurve": work_dir / "lcurve.out",
-                "log": work_dir / "train.log",
-            }
-        )
+                fplog.close()
+                _log_command_error("dp freeze", out, err)
+                raise FatalError("dp freeze failed")
+            model_file = "frozen_model.pb"
+        fplog.write("#=================== freeze std out ===================\n")
+        fplog.write(out)
+        fplog.write("#=================== freeze std err ===================\n")
+        fplog.write(err)
+        return model_file
 
     @staticmethod
     def write_data_to_input_script(
@@ -528,6 +601,20 @@ class RunDPTrain(OP):
         doc_split_last_iter_valid_ratio = (
             "Ratio of valid data if split data of last iter"
         )
+        doc_split_seed = (
+            "The random seed of splitting the valid data of the last iter. "
+            "The split is reproducible and the same for all the models if set"
+        )
+        doc_packed = (
+            "Train all the models in one step on one node. The training "
+            "processes run concurrently, each pinned to its own CPUs. "
+            "See `RunDPTrainPacked`"
+        )
+        doc_packed_threads = (
+            "The number of threads of each training process in the packed "
+            "training. The CPUs of the node are evenly divided among the "
+            "processes if not set"
+        )
         return [
             Argument(
                 "command",
@@ -636,6 +723,27 @@ class RunDPTrain(OP):
                 default=None,
                 doc=doc_split_last_iter_valid_ratio,
             ),
+            Argument(
+                "split_seed",
+                int,
+                optional=True,
+                default=None,
+                doc=doc_split_seed,
+            ),
+            Argument(
+                "packed",
+                bool,
+                optional=True,
+                default=False,
+                doc=doc_packed,
+            ),
+            Argument(
+                "packed_threads",
+                int,
+                optional=True,
+                default=None,
+                doc=doc_packed_threads,
+            ),
         ]
 
     @staticmethod
@@ -649,35 +757,25 @@ class RunDPTrain(OP):
         return data
 
 
-def _get_data_size_of_system(data_dir):
-    ss = dpdata.System(data_dir, fmt="deepmd/npy")
-    return ss.get_nframes()
-
-
 def _get_data_size_of_all_systems(data_dirs):
-    count = 0
-    for ii in data_dirs:
-        count += _get_data_size_of_system(ii)
-    return count
-
-
-def _get_data_size_of_mult_sys(data_dir, mixed_type=False):
-    ms = dpdata.MultiSystems()
-    if mixed_type:
-        ms.from_deepmd_npy_mixed(data_dir)  # type: ignore
-    else:
-        ms.from_deepmd_npy(data_dir)  # type: ignore
-    return ms.get_nframes()
+    # the frames are counted by the manifests or the npy headers
+    return get_data_size(data_dirs)
 
 
 def _get_data_size_of_all_mult_sys(data_dirs, mixed_type=False):
-    count = 0
-    for ii in data_dirs:
-        count += _get_data_size_of_mult_sys(ii, mixed_type)
-    return count
+    # the standard and mixed type systems are counted in the same way
+    return get_data_size(data_dirs)
 
 
 def _expand_multi_sys_to_sys(multi_sys_dir):
+    manifest = read_data_manifest(multi_sys_dir)
+    if manifest is not None:
+        # the systems in the direct sub-directories, as found by the glob below
+        return [
+            os.path.join(multi_sys_dir, kk)
+            for kk in sorted(manifest["systems"].keys())
+            if len(Path(kk).parts) == 1 and kk != "."
+        ]
     all_type_raws = sorted(glob.glob(os.path.join(multi_sys_dir, "*", "type.raw")))
     all_sys_dirs = [str(Path(ii).parent) for ii in all_type_raws]
     return all_sys_dirs
@@ -686,59 +784,86 @@ def _expand_multi_sys_to_sys(multi_sys_dir):
 def _expand_all_multi_sys_to_sys(list_multi_sys):
     all_sys_dirs = []
     for ii in list_multi_sys:
-        all_sys_dirs = all_sys_dirs + _expand_multi_sys_to_sys(ii)
+        all_sys_dirs.extend(_expand_multi_sys_to_sys(ii))
     return all_sys_dirs
 
 
-def split_valid(systems: List[str], valid_ratio: float):
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _write_sub_system(
+    system: Path,
+    target: Path,
+    sets: List[Tuple[Path, int]],
+    frames: np.ndarray,
+):
+    r"""Write the frames of a system in `deepmd/npy` or `deepmd/npy/mixed`
+    format to `target`. The frames are gathered from the memory mapped npy
+    files, and the files of a set are hard linked if all the frames of the
+    set are written.
+    """
+    target.mkdir(parents=True)
+    for ff in system.iterdir():
+        if ff.is_file():
+            shutil.copyfile(ff, target / ff.name)
+    set_idx = 0
+    start = 0
+    for set_dir, nframes in sets:
+        local = frames[(frames >= start) & (frames < start + nframes)] - start
+        start += nframes
+        if local.shape[0] == 0:
+            continue
+        out_dir = target / ("set.%03d" % set_idx)
+        out_dir.mkdir()
+        set_idx += 1
+        for ff in sorted(set_dir.glob("*.npy")):
+            if local.shape[0] == nframes:
+                _link_or_copy(ff, out_dir / ff.name)
+            else:
+                # all the data in a set are per-frame
+                np.save(out_dir / ff.name, np.load(ff, mmap_mode="r")[local])
+
+
+def split_valid(
+    systems: List[str],
+    valid_ratio: float,
+    seed: Optional[int] = None,
+    target_names: Optional[List[str]] = None,
+):
+    r"""Randomly split the frames of each system into the training and
+    validation systems, written to `train_data/name` and `valid_data/name`.
+    The `name` of a system is given by `target_names`, and is the system
+    path by default. The split is reproducible if `seed` is given.
+    """
+    rng = random.Random(seed) if seed is not None else random
+    if target_names is None:
+        target_names = systems
     train_systems = []
     valid_systems = []
-    for system in systems:
-        d = dpdata.MultiSystems()
-        mixed_type = len(glob.glob("%s/*/real_atom_types.npy" % system)) > 0
-        if mixed_type:
-            d.load_systems_from_file(system, fmt="deepmd/npy/mixed")
-        else:
-            k = dpdata.LabeledSystem(system, fmt="deepmd/npy")
-            d.append(k)
-
-        train_multi_systems = dpdata.MultiSystems()
-        valid_multi_systems = dpdata.MultiSystems()
-        for s in d:
-            nvalid = math.floor(len(s) * valid_ratio)
-            if random.random() < len(s) * valid_ratio - nvalid:
-                nvalid += 1
-            valid_indices = random.sample(range(len(s)), nvalid)
-            train_indices = list(set(range(len(s))).difference(valid_indices))
-            if len(valid_indices) > 0:
-                valid_multi_systems.append(s.sub_system(valid_indices))
-            if len(train_indices) > 0:
-                train_multi_systems.append(s.sub_system(train_indices))
-
-        if len(train_multi_systems) > 0:
-            target = "train_data/" + system
-            if mixed_type:
-                # The multisystem is loaded from one dir, thus we can safely keep one dir
-                train_multi_systems.to_deepmd_npy_mixed("%s.tmp" % target)  # type: ignore
-                fs = os.listdir("%s.tmp" % target)
-                assert len(fs) == 1
-                os.rename(os.path.join("%s.tmp" % target, fs[0]), target)
-                os.rmdir("%s.tmp" % target)
-            else:
-                train_multi_systems[0].to_deepmd_npy(target)  # type: ignore
+    for system, name in zip(systems, target_names):
+        sets = [
+            (set_dir, read_npy_header(set_dir / "coord.npy")[0][0])
+            for set_dir in sorted(Path(system).glob("set.*"))
+        ]
+        nframes = sum(nn for _, nn in sets)
+        nvalid = math.floor(nframes * valid_ratio)
+        if rng.random() < nframes * valid_ratio - nvalid:
+            nvalid += 1
+        valid_indices = np.sort(np.array(rng.sample(range(nframes), nvalid), dtype=int))
+        train_indices = np.setdiff1d(np.arange(nframes), valid_indices)
+
+        if train_indices.shape[0] > 0:
+            target = "train_data/" + name
+            _write_sub_system(Path(system), Path(target), sets, train_indices)
             train_systems.append(os.path.abspath(target))
 
-        if len(valid_multi_systems) > 0:
-            target = "valid_data/" + system
-            if mixed_type:
-                # The multisystem is loaded from one dir, thus we can safely keep one dir
-                valid_multi_systems.to_deepmd_npy_mixed("%s.tmp" % target)  # type: ignore
-                fs = os.listdir("%s.tmp" % target)
-                assert len(fs) == 1
-                os.rename(os.path.join("%s.tmp" % target, fs[0]), target)
-                os.rmdir("%s.tmp" % target)
-            else:
-                valid_multi_systems[0].to_deepmd_npy(target)  # type: ignore
+        if valid_indices.shape[0] > 0:
+            target = "valid_data/" + name
+            _write_sub_system(Path(system), Path(target), sets, valid_indices)
             valid_systems.append(os.path.abspath(target))
 
     return train_systems, valid_systems
@@ -762,3 +887,208 @@ def append_valid_data(config, valid_data, valid_systems):
 
 
 config_args = RunDPTrain.training_args
+
+
+def _packed_cpus(
+    ntasks: int,
+    numb_threads: Optional[int] = None,
+) -> List[List[int]]:
+    r"""Divide the CPUs available to this process among `ntasks`
+    concurrent tasks, `numb_threads` CPUs for each task. The CPUs are
+    shared by the tasks if there are not enough of them.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    if numb_threads is None:
+        numb_threads = max(1, len(cpus) // max(1, ntasks))
+    return [
+        sorted(
+            {cpus[(ii * numb_threads + jj) % len(cpus)] for jj in range(numb_threads)}
+        )
+        for ii in range(ntasks)
+    ]
+
+
+def run_packed_commands(
+    commands: List[List[str]],
+    work_dirs: List[Path],
+    numb_threads: Optional[int] = None,
+) -> List[Tuple[int, str, str]]:
+    r"""Run the commands concurrently, each in its work directory.
+
+    Each process is pinned to its own CPUs by `_packed_cpus`, and the
+    numbers of OpenMP and TensorFlow/PyTorch threads are limited to the
+    number of its CPUs, so the processes do not oversubscribe the node.
+
+    Parameters
+    ----------
+    commands : List[List[str]]
+        The commands.
+    work_dirs : List[Path]
+        The work directory of each command.
+    numb_threads : int, optional
+        The number of threads of each process. The CPUs are evenly divided
+        among the processes if not given.
+
+    Returns
+    -------
+    results : List[Tuple[int, str, str]]
+        The return code, the stdout and the stderr of each command.
+    """
+    cpu_sets = _packed_cpus(len(commands), numb_threads)
+    procs = []
+    for command, work_dir, cpus in zip(commands, work_dirs, cpu_sets):
+        nthreads = str(len(cpus))
+        env = os.environ.copy()
+        env.update(
+            {
+                "OMP_NUM_THREADS": nthreads,
+                "DP_INTRA_OP_PARALLELISM_THREADS": nthreads,
+                "DP_INTER_OP_PARALLELISM_THREADS": "1",
+                "TF_INTRA_OP_PARALLELISM_THREADS": nthreads,
+                "TF_INTER_OP_PARALLELISM_THREADS": "1",
+            }
+        )
+        preexec_fn = None
+        if hasattr(os, "sched_setaffinity"):
+            preexec_fn = functools.partial(os.sched_setaffinity, 0, cpus)
+        # the outputs go to files, a full pipe would block the process
+        stdout, stderr = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+        proc = subprocess.Popen(
+            command,
+            cwd=work_dir,
+            env=env,
+            stdout=stdout,
+            stderr=stderr,
+            preexec_fn=preexec_fn,
+        )
+        procs.append((proc, stdout, stderr))
+    results = []
+    for proc, stdout, stderr in procs:
+        ret = proc.wait()
+        outs = []
+        for ff in (stdout, stderr):
+            ff.seek(0)
+            outs.append(ff.read().decode(errors="replace"))
+            ff.close()
+        results.append((ret, outs[0], outs[1]))
+    return results
+
+
+class RunDPTrainPacked(RunDPTrain):
+    r"""Execute several DP training tasks on one node. Train and freeze
+    the DP models.
+
+    The training data are expanded, and split if required, once for all
+    the tasks. The `dp train` processes of the tasks run concurrently by
+    `run_packed_commands`, each with its share of the CPUs, see the
+    `packed_threads` of the training config. The tasks are otherwise the
+    same as those of `RunDPTrain`.
+
+    """
+
+    @classmethod
+    def get_input_sign(cls):
+        input_sign = super().get_input_sign()
+        input_sign["task_name"] = BigParameter(List[str])
+        input_sign["task_path"] = Artifact(List[Path])
+        input_sign["init_model"] = Artifact(List[Path], optional=True)
+        return input_sign
+
+    @classmethod
+    def get_output_sign(cls):
+        return OPIOSign(
+            {
+                "script": Artifact(List[Path]),
+                "model": Artifact(List[Path]),
+                "lcurve": Artifact(List[Path]),
+                "log": Artifact(List[Path]),
+            }
+        )
+
+    @OP.exec_sign_check
+    def execute(
+        self,
+        ip: OPIO,
+    ) -> OPIO:
+        r"""Execute the OP.
+
+        Parameters
+        ----------
+        ip : dict
+            Input dict with the components of `RunDPTrain`, except:
+
+            - `task_name`: (`List[str]`) The names of training tasks.
+            - `task_path`: (`Artifact(List[Path])`) The paths of the training tasks prepareed by `PrepDPTrain`.
+            - `init_model`: (`Artifact(List[Path])`) The frozen models to initialize the training tasks.
+
+        Returns
+        -------
+        Any
+            Output dict with components:
+            - `script`: (`Artifact(List[Path])`) The training scripts.
+            - `model`: (`Artifact(List[Path])`) The trained frozen models.
+            - `lcurve`: (`Artifact(List[Path])`) The learning curve files.
+            - `log`: (`Artifact(List[Path])`) The log files of training.
+
+        Raises
+        ------
+        FatalError
+            On the failure of training or freezing. Human intervention needed.
+        """
+        settings = RunDPTrain._get_settings(ip)
+        train_data = RunDPTrain._get_train_data(ip, settings["config"])
+        task_names = ip["task_name"]
+        task_paths = ip["task_path"]
+        init_models = ip["init_model"]
+        if init_models is None:
+            init_models = [None] * len(task_names)
+        assert len(task_paths) == len(task_names) and len(init_models) == len(
+            task_names
+        ), "Error: the numbers of task names, task paths and init models do not match"
+        finetune_mode = settings["finetune_mode"]
+
+        outputs = {"script": [], "model": [], "lcurve": [], "log": []}
+        commands = []
+        for task_name, task_path, init_model in zip(
+            task_names, task_paths, init_models
+        ):
+            work_dir = Path(task_name)
+            train_dict, do_init_model = RunDPTrain._make_train_dict(
+                ip, settings, train_data, task_path, init_model
+            )
+            outputs["script"].append(work_dir / train_script_name)
+            outputs["lcurve"].append(work_dir / "lcurve.out")
+            outputs["log"].append(work_dir / "train.log")
+            outputs["model"].append(init_model)
+            if RunDPTrain.skip_training(
+                work_dir, train_dict, init_model, ip["iter_data"], finetune_mode
+            ):
+                continue
+            with set_directory(work_dir):
+                command = RunDPTrain._setup_work_dir(
+                    ip, settings, train_dict, do_init_model, init_model
+                )
+            commands.append((len(outputs["model"]) - 1, work_dir, command))
+
+        results = run_packed_commands(
+            [cc for _, _, cc in commands],
+            [ww for _, ww, _ in commands],
+            numb_threads=settings["config"]["packed_threads"],
+        )
+        for (idx, work_dir, _), (ret, out, err) in zip(commands, results):
+            with set_directory(work_dir):
+                fplog = open("train.log", "w")
+                if ret != 0:
+                    fplog.close()
+                    _log_command_error(f"dp train of {work_dir}", out, err)
+                    raise FatalError(f"dp train of {work_dir} failed")
+                model_file = RunDPTrain._freeze_model(
+                    fplog, out, err, settings["impl"], finetune_mode
+                )
+                fplog.close()
+            outputs["model"][idx] = work_dir / model_file
+
+        return OPIO(outputs)
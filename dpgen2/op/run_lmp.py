@@ -36,15 +36,23 @@ from dpgen2.constants import (
     lmp_conf_name,
     lmp_input_name,
     lmp_log_name,
+    lmp_model_devi_hdf5_name,
     lmp_model_devi_name,
+    lmp_traj_hdf5_name,
     lmp_traj_name,
     model_name_match_pattern,
     model_name_pattern,
     plm_output_name,
     pytorch_model_name_pattern,
 )
+from dpgen2.exploration.render import (
+    lammps_dump_to_hdf5,
+    load_model_devi,
+    write_model_devi_hdf5,
+)
 from dpgen2.utils import (
     BinaryFileInput,
+    freeze_model_cached,
     set_directory,
 )
 from dpgen2.utils.run_command import (
@@ -152,6 +160,10 @@ class RunLmp(OP):
                 if ext == ".pb":
                     mname = model_name_pattern % (idx)
                     Path(mname).symlink_to(mm)
+                elif ext == ".pth":
+                    # frozen once for all the tasks by FreezeModels
+                    mname = pytorch_model_name_pattern % (idx)
+                    Path(mname).symlink_to(mm)
                 elif ext == ".pt":
                     # freeze model
                     mname = pytorch_model_name_pattern % (idx)
@@ -200,10 +212,21 @@ class RunLmp(OP):
 
             merge_pimd_files()
 
+            traj_name, model_devi_name = lmp_traj_name, lmp_model_devi_name
+            if config["use_hdf5_traj"]:
+                lammps_dump_to_hdf5(lmp_traj_name, lmp_traj_hdf5_name)
+                write_model_devi_hdf5(
+                    lmp_model_devi_hdf5_name, load_model_devi(lmp_model_devi_name)
+                )
+                traj_name, model_devi_name = (
+                    lmp_traj_hdf5_name,
+                    lmp_model_devi_hdf5_name,
+                )
+
         ret_dict = {
             "log": work_dir / lmp_log_name,
-            "traj": work_dir / lmp_traj_name,
-            "model_devi": self.get_model_devi(work_dir / lmp_model_devi_name),
+            "traj": work_dir / traj_name,
+            "model_devi": self.get_model_devi(work_dir / model_devi_name),
         }
         plm_output = (
             {"plm_output": work_dir / plm_output_name}
@@ -231,6 +254,11 @@ class RunLmp(OP):
         doc_head = "Select a head from multitask"
         doc_use_ele_temp = "Whether to use electronic temperature, 0 for no, 1 for frame temperature, and 2 for atomic temperature"
         doc_use_hdf5 = "Use HDF5 to store trajs and model_devis"
+        doc_use_hdf5_traj = (
+            "Convert the trajectory and the model deviation to chunked, "
+            "compressed HDF5 files, from which the selected frames are read by "
+            "slicing. Can not be used together with `use_hdf5`"
+        )
         doc_extra_output_files = "Extra output file names, support wildcards"
         return [
             Argument("command", str, optional=True, default="lmp", doc=doc_lmp_cmd),
@@ -262,6 +290,13 @@ class RunLmp(OP):
                 default=False,
                 doc=doc_use_hdf5,
             ),
+            Argument(
+                "use_hdf5_traj",
+                bool,
+                optional=True,
+                default=False,
+                doc=doc_use_hdf5_traj,
+            ),
             Argument(
                 "extra_output_files",
                 list,
@@ -363,6 +398,11 @@ def get_ele_temp(lmp_log_name):
 
 
 def freeze_model(input_model, frozen_model, head=None):
+    # the tasks of a grouped slice share the model frozen by the first task
+    freeze_model_cached(input_model, frozen_model, _run_freeze, head)
+
+
+def _run_freeze(input_model, frozen_model, head=None):
     freeze_args = "-o %s" % frozen_model
     if head is not None:
         freeze_args += " --head %s" % head
@@ -411,4 +451,4 @@ class RunLmpHDF5(RunLmp):
         return output_sign
 
     def get_model_devi(self, model_devi_file):
-        return np.loadtxt(model_devi_file)
+        return load_model_devi(model_devi_file)
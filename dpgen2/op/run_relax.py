@@ -22,12 +22,21 @@ from dflow.python import (
 from dpgen2.constants import (
     pytorch_model_name_pattern,
 )
+from dpgen2.exploration.render import (
+    write_model_devi_hdf5,
+    write_traj_hdf5,
+)
 from dpgen2.exploration.task import (
     DiffCSPTaskGroup,
 )
+from dpgen2.utils import (
+    load_dp_model,
+)
 
 from .run_caly_model_devi import (
-    atoms2lmpdump,
+    frames2lmpdump,
+    get_atom_types,
+    to_lmp_frames,
 )
 from .run_lmp import (
     freeze_model,
@@ -93,9 +102,6 @@ class RunRelax(OP):
         from ase.calculators.singlepoint import (  # type: ignore
             SinglePointCalculator,
         )
-        from deepmd.infer import (  # type: ignore
-            DeepPot,
-        )
         from deepmd.infer.model_devi import (  # type: ignore
             calc_model_devi_f,
             calc_model_devi_v,
@@ -138,8 +144,9 @@ class RunRelax(OP):
 
         trajs = []
         model_devis = []
-        graphs = [None] + [DeepPot(model) for model in models[1:]]
+        graphs = [None] + [load_dp_model(model) for model in models[1:]]
         trj_freq = task.trj_freq
+        use_hdf5_traj = config["use_hdf5_traj"]
         for fname in os.listdir("relax_trajs"):
             with open(os.path.join("relax_trajs", fname), "rb") as f:
                 try:
@@ -154,7 +161,6 @@ class RunRelax(OP):
             step_list = []
             forces_list = [[] for _ in range(len(models))]
             virial_list = [[] for _ in range(len(models))]
-            dump_str = ""
             coords_list = []
             cell_list = []
             for i in range(0, nsteps, trj_freq):
@@ -171,7 +177,6 @@ class RunRelax(OP):
                     stress=data["stresses"][i],
                 )
                 atoms.calc = calc
-                dump_str += atoms2lmpdump(atoms, i, type_map)
                 coords_list.append(data["atom_positions"][i])
                 cell_list.append(data["cell"][i])
                 step_list.append(i)
@@ -193,15 +198,29 @@ class RunRelax(OP):
                 )
                 forces_list[j] = forces
                 virial_list[j] = virial / len(atype)
-            traj_file = ip["task_path"] / ("traj.%s.dump" % fname)
-            traj_file = self.write_traj(dump_str, traj_file)
-            trajs.append(traj_file)
             devi = [np.array(step_list)]
             devi += list(calc_model_devi_v(np.array(virial_list)))
             devi += list(calc_model_devi_f(np.array(forces_list)))
             devi = np.vstack(devi).T
-            model_devi_file = ip["task_path"] / ("model_devi.%s.out" % fname)
-            model_devi_file = self.write_model_devi(devi, model_devi_file)
+            atom_types = get_atom_types(atoms, type_map)
+            if use_hdf5_traj:
+                # the same cell and coordinates as written to the dump
+                lmp_coords, lmp_cells = to_lmp_frames(
+                    np.array(coords_list), np.array(cell_list)
+                )
+                traj_file = ip["task_path"] / ("traj.%s.h5" % fname)
+                write_traj_hdf5(traj_file, lmp_coords, lmp_cells, atom_types)
+                model_devi_file = ip["task_path"] / ("model_devi.%s.h5" % fname)
+                write_model_devi_hdf5(model_devi_file, devi)
+            else:
+                dump_str = frames2lmpdump(
+                    np.array(coords_list), np.array(cell_list), atom_types, step_list
+                )
+                traj_file = ip["task_path"] / ("traj.%s.dump" % fname)
+                traj_file = self.write_traj(dump_str, traj_file)
+                model_devi_file = ip["task_path"] / ("model_devi.%s.out" % fname)
+                model_devi_file = self.write_model_devi(devi, model_devi_file)
+            trajs.append(traj_file)
             model_devis.append(model_devi_file)
         return OPIO(
             {
@@ -213,10 +232,22 @@ class RunRelax(OP):
     @staticmethod
     def relax_args():
         doc_head = "Select a head from multitask"
+        doc_use_hdf5_traj = (
+            "Write the trajectories and the model deviations to chunked, "
+            "compressed HDF5 files, from which the selected frames are read by "
+            "slicing. Can not be used together with `use_hdf5`"
+        )
         return [
             Argument(
                 "model_frozen_head", str, optional=True, default=None, doc=doc_head
             ),
+            Argument(
+                "use_hdf5_traj",
+                bool,
+                optional=True,
+                default=False,
+                doc=doc_use_hdf5_traj,
+            ),
         ]
 
     @staticmethod
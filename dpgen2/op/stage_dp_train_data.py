@@ -0,0 +1,113 @@
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+)
+
+from dflow.python import (
+    OP,
+    OPIO,
+    Artifact,
+    OPIOSign,
+)
+
+from dpgen2.utils import (
+    write_data_manifest,
+)
+
+from .run_dp_train import (
+    RunDPTrain,
+    _expand_all_multi_sys_to_sys,
+    split_valid,
+)
+
+
+class StageDPTrainData(OP):
+    r"""Stages the training data shared by the DP training tasks.
+
+    The data of the last iteration is split into the training and
+    validation systems once, following `split_last_iter_valid_ratio` and
+    `split_seed` of the training config, so all the models are trained and
+    validated on the same data, and the split is not repeated by each of
+    the training tasks. Only the data of the last iteration is read, and
+    only its split is output, the data of the earlier iterations are passed
+    to the training tasks as they are.
+
+    """
+
+    @classmethod
+    def get_input_sign(cls):
+        return OPIOSign(
+            {
+                "config": dict,
+                "iter_data": Artifact(List[Path]),
+            }
+        )
+
+    @classmethod
+    def get_output_sign(cls):
+        return OPIOSign(
+            {
+                "train_data": Artifact(Path),
+                "valid_data": Artifact(Path),
+            }
+        )
+
+    @OP.exec_sign_check
+    def execute(
+        self,
+        ip: OPIO,
+    ) -> OPIO:
+        r"""Execute the OP.
+
+        Parameters
+        ----------
+        ip : dict
+            Input dict with components:
+
+            - `config`: (`dict`) The config of training task. Check `RunDPTrain.training_args` for definitions.
+            - `iter_data`: (`Artifact(List[Path])`) Training data generated in the DPGEN iterations. Only the last iteration is read.
+
+        Returns
+        -------
+        op : dict
+            Output dict with components:
+
+            - `train_data`: (`Artifact(Path)`) The directory of the training systems split from the last iteration. It replaces the last iteration in `iter_data` of the training tasks.
+            - `valid_data`: (`Artifact(Path)`) The directory of the validation systems split from the last iteration. Empty if the data is not split.
+
+        """
+        config = RunDPTrain.normalize_config(ip["config"])
+        # the earlier iterations are not split
+        iter_data = ip["iter_data"][-1:]
+        valid_ratio = config["split_last_iter_valid_ratio"]
+        train_dir = Path("train_data")
+        valid_dir = Path("valid_data")
+        if len(iter_data) == 0:
+            train_dir.mkdir(parents=True, exist_ok=True)
+            write_data_manifest(train_dir)
+        elif valid_ratio is None:
+            train_dir = Path(iter_data[-1])
+        else:
+            last = Path(iter_data[-1])
+            systems = _expand_all_multi_sys_to_sys([last])
+            split_valid(
+                systems,
+                valid_ratio,
+                seed=config["split_seed"],
+                target_names=[f"{last.name}/{Path(ii).name}" for ii in systems],
+            )
+            train_dir = train_dir / last.name
+            train_dir.mkdir(parents=True, exist_ok=True)
+            write_data_manifest(train_dir)
+            valid_dir = valid_dir / last.name
+        valid_dir.mkdir(parents=True, exist_ok=True)
+        write_data_manifest(valid_dir)
+
+        return OPIO(
+            {
+                "train_data": train_dir,
+                "valid_data": valid_dir,
+            }
+        )
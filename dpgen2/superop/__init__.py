@@ -16,3 +16,6 @@ from .prep_run_fp import (
 from .prep_run_lmp import (
     PrepRunLmp,
 )
+from .run_fp_batch import (
+    RunFpBatch,
+)
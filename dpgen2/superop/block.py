@@ -64,6 +64,9 @@ from .prep_run_fp import (
 from .prep_run_lmp import (
     PrepRunLmp,
 )
+from .run_fp_batch import (
+    RunFpBatch,
+)
 
 block_default_optional_parameter = {
     "data_mixed_type": False,
@@ -91,7 +94,7 @@ class ConcurrentLearningBlock(Steps):
         prep_run_dp_train_op: PrepRunDPTrain,
         prep_run_explore_op: Union[PrepRunLmp, PrepRunCaly, PrepRunDiffCSP],
         select_confs_op: Type[OP],
-        prep_run_fp_op: PrepRunFp,
+        prep_run_fp_op: Union[PrepRunFp, RunFpBatch],
         collect_data_op: Type[OP],
         select_confs_config: dict = normalize_step_dict({}),
         collect_data_config: dict = normalize_step_dict({}),
@@ -309,6 +312,7 @@ def _block_cl(
         artifacts={
             "iter_data": block_steps.inputs.artifacts["iter_data"],
             "labeled_data": prep_run_fp.outputs.artifacts["labeled_data"],
+            "fp_extra_outputs": prep_run_fp.outputs.artifacts["extra_outputs"],
         },
         key=step_keys["collect-data"],
         executor=collect_data_executor,
@@ -47,11 +47,16 @@ from dpgen2.constants import (
 )
 from dpgen2.op import (
     RunDPTrain,
+    RunDPTrainPacked,
+    StageDPTrainData,
 )
 from dpgen2.utils.step_config import (
     init_executor,
 )
 from dpgen2.utils.step_config import normalize as normalize_step_dict
+from dpgen2.utils.step_config import (
+    unsliced_step_config,
+)
 
 
 class PrepRunDPTrain(Steps):
@@ -65,6 +70,7 @@ class PrepRunDPTrain(Steps):
         upload_python_packages: Optional[List[os.PathLike]] = None,
         valid_data: Optional[S3Artifact] = None,
         optional_files: Optional[List[str]] = None,
+        stage_data: bool = False,
     ):
         prep_config = normalize_step_dict({}) if prep_config is None else prep_config
         run_config = normalize_step_dict({}) if run_config is None else run_config
@@ -105,13 +111,23 @@ class PrepRunDPTrain(Steps):
         )
 
         self._keys = ["prep-train", "run-train"]
+        if stage_data:
+            self._keys = ["prep-train", "stage-train-data", "run-train"]
         self.step_keys = {}
-        ii = "prep-train"
-        self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
+        for ii in ["prep-train", "stage-train-data"]:
+            self.step_keys[ii] = "--".join(
+                ["%s" % self.inputs.parameters["block_id"], ii]
+            )
         ii = "run-train"
-        self.step_keys[ii] = "--".join(
-            ["%s" % self.inputs.parameters["block_id"], ii + "-{{item}}"]
-        )
+        if issubclass(run_train_op, RunDPTrainPacked):
+            # all the models are trained in one step
+            self.step_keys[ii] = "--".join(
+                ["%s" % self.inputs.parameters["block_id"], ii]
+            )
+        else:
+            self.step_keys[ii] = "--".join(
+                ["%s" % self.inputs.parameters["block_id"], ii + "-{{item}}"]
+            )
 
         self = _prep_run_dp_train(
             self,
@@ -123,6 +139,7 @@ class PrepRunDPTrain(Steps):
             upload_python_packages=upload_python_packages,
             valid_data=valid_data,
             optional_files=optional_files,
+            stage_data=stage_data,
         )
 
     @property
@@ -156,6 +173,7 @@ def _prep_run_dp_train(
     upload_python_packages: Optional[List[os.PathLike]] = None,
     valid_data: Optional[S3Artifact] = None,
     optional_files: Optional[List[str]] = None,
+    stage_data: bool = False,
 ):
     prep_config = deepcopy(prep_config)
     run_config = deepcopy(run_config)
@@ -184,9 +202,42 @@ def _prep_run_dp_train(
     )
     train_steps.add(prep_train)
 
-    run_train = Step(
-        "run-train",
-        template=PythonOPTemplate(
+    staged_train_data = None
+    staged_valid_data = None
+    if stage_data:
+        # split the data once, shared by all the training tasks
+        stage_train_data = Step(
+            "stage-train-data",
+            template=PythonOPTemplate(
+                StageDPTrainData,
+                python_packages=upload_python_packages,
+                **prep_template_config,
+            ),
+            parameters={
+                "config": train_steps.inputs.parameters["train_config"],
+            },
+            artifacts={
+                "iter_data": train_steps.inputs.artifacts["iter_data"],
+            },
+            key=step_keys["stage-train-data"],
+            executor=prep_executor,
+            **prep_config,
+        )
+        train_steps.add(stage_train_data)
+        staged_train_data = stage_train_data.outputs.artifacts["train_data"]
+        staged_valid_data = stage_train_data.outputs.artifacts["valid_data"]
+
+    if issubclass(run_train_op, RunDPTrainPacked):
+        # the tasks are packed in one step, not sliced
+        run_template = PythonOPTemplate(
+            run_train_op,
+            python_packages=upload_python_packages,
+            **run_template_config,
+        )
+        run_sequence = {}
+        run_config = unsliced_step_config(run_config)
+    else:
+        run_template = PythonOPTemplate(
             run_train_op,
             slices=Slices(
                 "int('{{item}}')",
@@ -197,7 +248,16 @@ def _prep_run_dp_train(
             ),
             python_packages=upload_python_packages,
             **run_template_config,
-        ),
+        )
+        run_sequence = {
+            "with_sequence": argo_sequence(
+                argo_len(prep_train.outputs.parameters["task_names"]),
+                format=train_index_pattern,
+            ),
+        }
+    run_train = Step(
+        "run-train",
+        template=run_template,
         parameters={
             "config": train_steps.inputs.parameters["train_config"],
             "task_name": prep_train.outputs.parameters["task_names"],
@@ -211,17 +271,16 @@ def _prep_run_dp_train(
             "init_data": train_steps.inputs.artifacts["init_data"],
             "iter_data": train_steps.inputs.artifacts["iter_data"],
             "valid_data": valid_data,
+            "staged_train_data": staged_train_data,
+            "staged_valid_data": staged_valid_data,
             "optional_files": upload_artifact(optional_files)
             if optional_files is not None
             else None,
         },
-        with_sequence=argo_sequence(
-            argo_len(prep_train.outputs.parameters["task_names"]),
-            format=train_index_pattern,
-        ),
         # with_param=argo_range(train_steps.inputs.parameters["numb_models"]),
         key=step_keys["run-train"],
         executor=run_executor,
+        **run_sequence,
         **run_config,
     )
     train_steps.add(run_train)
@@ -40,10 +40,16 @@ from dflow.python import (
 from dpgen2.constants import (
     lmp_index_pattern,
 )
+from dpgen2.op import (
+    FreezeModels,
+)
 from dpgen2.utils.step_config import (
     init_executor,
 )
 from dpgen2.utils.step_config import normalize as normalize_step_dict
+from dpgen2.utils.step_config import (
+    unsliced_step_config,
+)
 
 
 class PrepRunLmp(Steps):
@@ -55,6 +61,7 @@ class PrepRunLmp(Steps):
         prep_config: Optional[dict] = None,
         run_config: Optional[dict] = None,
         upload_python_packages: Optional[List[os.PathLike]] = None,
+        freeze_models: bool = False,
     ):
         prep_config = normalize_step_dict({}) if prep_config is None else prep_config
         run_config = normalize_step_dict({}) if run_config is None else run_config
@@ -92,9 +99,13 @@ class PrepRunLmp(Steps):
         )
 
         self._keys = ["prep-lmp", "run-lmp"]
+        if freeze_models:
+            self._keys = ["prep-lmp", "freeze-models", "run-lmp"]
         self.step_keys = {}
-        ii = "prep-lmp"
-        self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
+        for ii in ["prep-lmp", "freeze-models"]:
+            self.step_keys[ii] = "--".join(
+                ["%s" % self.inputs.parameters["block_id"], ii]
+            )
         ii = "run-lmp"
         self.step_keys[ii] = "--".join(
             ["%s" % self.inputs.parameters["block_id"], ii + "-{{item}}"]
@@ -108,6 +119,7 @@ class PrepRunLmp(Steps):
             prep_config=prep_config,
             run_config=run_config,
             upload_python_packages=upload_python_packages,
+            freeze_models=freeze_models,
         )
 
     @property
@@ -139,6 +151,7 @@ def _prep_run_lmp(
     prep_config: dict = normalize_step_dict({}),
     run_config: dict = normalize_step_dict({}),
     upload_python_packages: Optional[List[os.PathLike]] = None,
+    freeze_models: bool = False,
 ):
     prep_config = deepcopy(prep_config)
     run_config = deepcopy(run_config)
@@ -166,6 +179,29 @@ def _prep_run_lmp(
     )
     prep_run_steps.add(prep_lmp)
 
+    models = prep_run_steps.inputs.artifacts["models"]
+    if freeze_models:
+        # the models are frozen once, shared by all the lmp tasks
+        freeze = Step(
+            "freeze-models",
+            template=PythonOPTemplate(
+                FreezeModels,
+                python_packages=upload_python_packages,
+                **run_template_config,
+            ),
+            parameters={
+                "config": prep_run_steps.inputs.parameters["explore_config"],
+            },
+            artifacts={
+                "models": prep_run_steps.inputs.artifacts["models"],
+            },
+            key=step_keys["freeze-models"],
+            executor=run_executor,
+            **unsliced_step_config(run_config),
+        )
+        prep_run_steps.add(freeze)
+        models = freeze.outputs.artifacts["models"]
+
     run_lmp = Step(
         "run-lmp",
         template=PythonOPTemplate(
@@ -193,7 +229,7 @@ def _prep_run_lmp(
         },
         artifacts={
             "task_path": prep_lmp.outputs.artifacts["task_paths"],
-            "models": prep_run_steps.inputs.artifacts["models"],
+            "models": models,
         },
         with_sequence=argo_sequence(
             argo_len(prep_lmp.outputs.parameters["task_names"]),
@@ -0,0 +1,157 @@
+import os
+from copy import (
+    deepcopy,
+)
+from typing import (
+    List,
+    Optional,
+    Type,
+)
+
+from dflow import (
+    InputArtifact,
+    InputParameter,
+    Inputs,
+    OutputArtifact,
+    OutputParameter,
+    Outputs,
+    Step,
+    Steps,
+)
+from dflow.python import (
+    OP,
+    PythonOPTemplate,
+)
+
+from dpgen2.utils.step_config import (
+    init_executor,
+)
+from dpgen2.utils.step_config import normalize as normalize_step_dict
+from dpgen2.utils.step_config import (
+    unsliced_step_config,
+)
+
+
+class RunFpBatch(Steps):
+    r"""Label all the selected configurations in one step.
+
+    A drop-in replacement of `PrepRunFp` with the same inputs and outputs,
+    for the FP styles that label the configurations in batches, e.g.
+    `RunDeepmdBatch`.
+
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_op: Type[OP],
+        run_config: Optional[dict] = None,
+        upload_python_packages: Optional[List[os.PathLike]] = None,
+    ):
+        run_config = normalize_step_dict({}) if run_config is None else run_config
+        self._input_parameters = {
+            "block_id": InputParameter(type=str, value=""),
+            "fp_config": InputParameter(),
+            "type_map": InputParameter(),
+        }
+        self._input_artifacts = {"confs": InputArtifact()}
+        self._output_parameters = {
+            "task_names": OutputParameter(),
+        }
+        self._output_artifacts = {
+            "logs": OutputArtifact(),
+            "labeled_data": OutputArtifact(),
+            "extra_outputs": OutputArtifact(),
+        }
+
+        super().__init__(
+            name=name,
+            inputs=Inputs(
+                parameters=self._input_parameters,
+                artifacts=self._input_artifacts,
+            ),
+            outputs=Outputs(
+                parameters=self._output_parameters,
+                artifacts=self._output_artifacts,
+            ),
+        )
+
+        self._keys = ["run-fp-batch"]
+        self.step_keys = {}
+        ii = "run-fp-batch"
+        self.step_keys[ii] = "--".join(["%s" % self.inputs.parameters["block_id"], ii])
+
+        self = _run_fp_batch(
+            self,
+            self.step_keys,
+            run_op,
+            run_config=run_config,
+            upload_python_packages=upload_python_packages,
+        )
+
+    @property
+    def input_parameters(self):
+        return self._input_parameters
+
+    @property
+    def input_artifacts(self):
+        return self._input_artifacts
+
+    @property
+    def output_parameters(self):
+        return self._output_parameters
+
+    @property
+    def output_artifacts(self):
+        return self._output_artifacts
+
+    @property
+    def keys(self):
+        return self._keys
+
+
+def _run_fp_batch(
+    run_steps,
+    step_keys,
+    run_op: Type[OP],
+    run_config: dict = normalize_step_dict({}),
+    upload_python_packages: Optional[List[os.PathLike]] = None,
+):
+    # a single step, the slice-only configs are not used
+    run_config = unsliced_step_config(deepcopy(run_config))
+    run_template_config = run_config.pop("template_config")
+    run_executor = init_executor(run_config.pop("executor"))
+
+    run_fp = Step(
+        "run-fp-batch",
+        template=PythonOPTemplate(
+            run_op,
+            output_artifact_archive={"labeled_data": None},
+            python_packages=upload_python_packages,
+            **run_template_config,
+        ),
+        parameters={
+            "config": run_steps.inputs.parameters["fp_config"],
+            "type_map": run_steps.inputs.parameters["type_map"],
+        },
+        artifacts={
+            "confs": run_steps.inputs.artifacts["confs"],
+        },
+        key=step_keys["run-fp-batch"],
+        executor=run_executor,
+        **run_config,
+    )
+    run_steps.add(run_fp)
+
+    run_steps.outputs.parameters[
+        "task_names"
+    ].value_from_parameter = run_fp.outputs.parameters["task_names"]
+    run_steps.outputs.artifacts["logs"]._from = run_fp.outputs.artifacts["logs"]
+    run_steps.outputs.artifacts["labeled_data"]._from = run_fp.outputs.artifacts[
+        "labeled_data"
+    ]
+    run_steps.outputs.artifacts["extra_outputs"]._from = run_fp.outputs.artifacts[
+        "extra_outputs"
+    ]
+
+    return run_steps
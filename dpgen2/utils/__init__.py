@@ -12,6 +12,13 @@ from .chdir import (
     chdir,
     set_directory,
 )
+from .data_manifest import (
+    get_data_size,
+    make_data_manifest,
+    read_data_manifest,
+    read_npy_header,
+    write_data_manifest,
+)
 from .dflow_config import (
     dflow_config,
     dflow_s3_config,
@@ -27,6 +34,12 @@ from .dflow_query import (
     print_keys_in_nice_format,
     sort_slice_ops,
 )
+from .model_cache import (
+    clear_model_cache,
+    file_digest,
+    freeze_model_cached,
+    load_dp_model,
+)
 from .obj_artifact import (
     dump_object_to_file,
     load_object_from_file,
@@ -44,4 +57,5 @@ from .step_config import (
 from .step_config import normalize as normalize_step_dict
 from .step_config import (
     step_conf_args,
+    unsliced_step_config,
 )
@@ -0,0 +1,154 @@
+import glob
+import json
+import os
+from pathlib import (
+    Path,
+)
+from typing import (
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from dpgen2.constants import (
+    data_manifest_name,
+)
+
+
+def read_npy_header(
+    fname: Union[str, Path],
+) -> Tuple[Tuple[int, ...], np.dtype]:
+    r"""Read the shape and dtype of a npy file without loading the data."""
+    with open(fname, "rb") as fp:
+        version = np.lib.format.read_magic(fp)
+        if version == (1, 0):
+            shape, _, dtype = np.lib.format.read_array_header_1_0(fp)
+        else:
+            shape, _, dtype = np.lib.format.read_array_header_2_0(fp)
+    return shape, dtype
+
+
+def system_manifest(
+    sys_dir: Union[str, Path],
+) -> dict:
+    r"""The size and composition of a system in `deepmd/npy` or
+    `deepmd/npy/mixed` format. The number of frames is read from the
+    headers of the coordinate files, no data array is loaded.
+
+    Parameters
+    ----------
+    sys_dir : str or Path
+        The system directory.
+
+    Returns
+    -------
+    manifest : dict
+        `nframes`: the number of frames, `natoms`: the number of atoms,
+        `mixed_type`: if the system is in mixed type, and `atom_numbs`:
+        the number of atoms of each element, None for mixed type as the
+        elements change from frame to frame.
+    """
+    sys_dir = Path(sys_dir)
+    atom_types = np.array((sys_dir / "type.raw").read_text().split(), dtype=int)
+    natoms = atom_types.shape[0]
+    if (sys_dir / "type_map.raw").is_file():
+        names = (sys_dir / "type_map.raw").read_text().split()
+    else:
+        names = [f"Type_{ii}" for ii in range(atom_types.max(initial=-1) + 1)]
+    nframes = 0
+    mixed_type = False
+    for set_dir in sorted(sys_dir.glob("set.*")):
+        nframes += read_npy_header(set_dir / "coord.npy")[0][0]
+        mixed_type = mixed_type or (set_dir / "real_atom_types.npy").is_file()
+    atom_numbs = None
+    if not mixed_type:
+        numbs = np.bincount(atom_types, minlength=len(names))
+        atom_numbs = {nn: int(mm) for nn, mm in zip(names, numbs)}
+    return {
+        "nframes": int(nframes),
+        "natoms": int(natoms),
+        "mixed_type": mixed_type,
+        "atom_numbs": atom_numbs,
+    }
+
+
+def make_data_manifest(
+    data_dir: Union[str, Path],
+) -> dict:
+    r"""The manifest of the systems in a directory. The systems are all
+    the directories having a `type.raw` file, including `data_dir` itself,
+    as they are found by `dpdata.MultiSystems`.
+
+    Parameters
+    ----------
+    data_dir : str or Path
+        The data directory.
+
+    Returns
+    -------
+    manifest : dict
+        `systems`: the `system_manifest` of each system, keyed by the path
+        relative to `data_dir`, and `nframes`: the total number of frames.
+    """
+    data_dir = str(data_dir)
+    type_raws = sorted(
+        glob.glob(os.path.join(data_dir, "**", "type.raw"), recursive=True)
+    )
+    systems = {}
+    for ii in type_raws:
+        sys_dir = os.path.dirname(ii)
+        systems[os.path.relpath(sys_dir, data_dir)] = system_manifest(sys_dir)
+    return {
+        "systems": systems,
+        "nframes": sum(ss["nframes"] for ss in systems.values()),
+    }
+
+
+def write_data_manifest(
+    data_dir: Union[str, Path],
+) -> Path:
+    r"""Write the manifest of a data directory to `data_dir/data_manifest.json`.
+    See `make_data_manifest`.
+    """
+    fname = Path(data_dir) / data_manifest_name
+    fname.write_text(json.dumps(make_data_manifest(data_dir), indent=4))
+    return fname
+
+
+def read_data_manifest(
+    data_dir: Union[str, Path],
+) -> Optional[dict]:
+    r"""Read the manifest of a data directory, None if there is no manifest."""
+    fname = Path(data_dir) / data_manifest_name
+    if not fname.is_file():
+        return None
+    return json.loads(fname.read_text())
+
+
+def get_data_size(
+    data_dirs: List[Union[str, Path]],
+) -> int:
+    r"""The total number of frames in the data directories. The manifest of
+    a directory is used if it exists, otherwise the frames are counted from
+    the npy headers.
+
+    Parameters
+    ----------
+    data_dirs : List[str or Path]
+        The data directories, each holds one or more systems.
+
+    Returns
+    -------
+    nframes : int
+        The number of frames.
+    """
+    count = 0
+    for ii in data_dirs:
+        manifest = read_data_manifest(ii)
+        if manifest is None:
+            manifest = make_data_manifest(ii)
+        count += manifest["nframes"]
+    return count
@@ -0,0 +1,173 @@
+"""Per-process cache of the loaded DP models and per-node cache of the
+frozen models, shared by the tasks of a grouped slice."""
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from collections import (
+    OrderedDict,
+)
+from pathlib import (
+    Path,
+)
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+    Union,
+)
+
+# the maximal number of the models held by the process
+model_cache_max_size = 8
+# the environment variable overriding the directory of the frozen models
+model_cache_dir_env = "DPGEN2_MODEL_CACHE_DIR"
+
+_digest_cache: Dict[Tuple[str, int, int], str] = {}
+_model_cache: "OrderedDict[Tuple[Any, str], Any]" = OrderedDict()
+
+
+def file_digest(
+    fname: Union[str, Path],
+) -> str:
+    r"""The sha256 digest of the content of a file. The digest is memoized
+    by the path, size and modification time of the file, so a model file is
+    read only once by the process.
+
+    Parameters
+    ----------
+    fname : str or Path
+        The file.
+
+    Returns
+    -------
+    digest : str
+        The hex digest.
+    """
+    fname = os.path.abspath(fname)
+    stat = os.stat(fname)
+    key = (fname, stat.st_size, stat.st_mtime_ns)
+    if key not in _digest_cache:
+        hh = hashlib.sha256()
+        with open(fname, "rb") as fp:
+            for chunk in iter(lambda: fp.read(1 << 20), b""):
+                hh.update(chunk)
+        _digest_cache[key] = hh.hexdigest()
+    return _digest_cache[key]
+
+
+def _model_key(
+    model: Union[str, Path],
+) -> str:
+    if os.path.isfile(model):
+        return file_digest(model)
+    # not a local file, left to the loader
+    return os.path.abspath(model)
+
+
+def load_dp_model(
+    model: Union[str, Path],
+) -> Any:
+    r"""Load a DP model by `deepmd.infer.DeepPot`. The loaded models are
+    kept by the process, keyed by the content of the model file, so the
+    tasks of a grouped slice load each model of the committee once. At most
+    `model_cache_max_size` models are kept, the least recently used model
+    is released first.
+
+    Parameters
+    ----------
+    model : str or Path
+        The model file.
+
+    Returns
+    -------
+    dp : deepmd.infer.DeepPot
+        The loaded model.
+    """
+    from deepmd.infer import (  # type: ignore
+        DeepPot,
+    )
+
+    key = (DeepPot, _model_key(model))
+    if key in _model_cache:
+        _model_cache.move_to_end(key)
+        return _model_cache[key]
+    dp = DeepPot(model)
+    _model_cache[key] = dp
+    while len(_model_cache) > model_cache_max_size:
+        _model_cache.popitem(last=False)
+    return dp
+
+
+def clear_model_cache():
+    r"""Release the models and the digests kept by the process."""
+    _model_cache.clear()
+    _digest_cache.clear()
+
+
+def model_cache_dir() -> Path:
+    r"""The directory of the frozen models. It is given by the environment
+    variable `DPGEN2_MODEL_CACHE_DIR`, by default `dpgen2_model_cache` in
+    the temporary directory of the node."""
+    cache_dir = os.environ.get(model_cache_dir_env)
+    if cache_dir is None:
+        cache_dir = os.path.join(tempfile.gettempdir(), "dpgen2_model_cache")
+    return Path(cache_dir)
+
+
+def freeze_model_cached(
+    input_model: Union[str, Path],
+    frozen_model: Union[str, Path],
+    freeze: Callable[[str, str, Optional[str]], None],
+    head: Optional[str] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
+) -> Path:
+    r"""Freeze a model through the frozen-model cache of the node. The
+    model is frozen by `freeze` only if no frozen model of the same content
+    and head is in the cache, otherwise the cached one is linked (or copied)
+    to `frozen_model`.
+
+    Parameters
+    ----------
+    input_model : str or Path
+        The model to freeze.
+    frozen_model : str or Path
+        The frozen model.
+    freeze : Callable
+        Called as `freeze(input_model, output, head)` to freeze the model.
+    head : str, optional
+        The head of the multi-task model to freeze.
+    cache_dir : str or Path, optional
+        The cache directory, see `model_cache_dir` for the default.
+
+    Returns
+    -------
+    frozen_model : Path
+        The frozen model.
+    """
+    cache_dir = Path(cache_dir) if cache_dir is not None else model_cache_dir()
+    ext = os.path.splitext(frozen_model)[-1]
+    key = hashlib.sha256(
+        f"{file_digest(input_model)} {head}".encode("utf-8")
+    ).hexdigest()
+    entry = cache_dir / (key + ext)
+    if not entry.is_file():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache_dir / f".{key}.{uuid.uuid4().hex}{ext}"
+        try:
+            freeze(str(input_model), str(tmp), head)
+            # atomic, the concurrent tasks of the node freeze the same model
+            os.replace(tmp, entry)
+        finally:
+            if tmp.is_file():
+                tmp.unlink()
+    frozen_model = Path(frozen_model)
+    if frozen_model.is_file() or frozen_model.is_symlink():
+        frozen_model.unlink()
+    try:
+        os.link(entry, frozen_model)
+    except OSError:
+        shutil.copyfile(entry, frozen_model)
+    return frozen_model
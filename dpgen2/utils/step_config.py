@@ -139,6 +139,23 @@ def normalize(data):
     return data
 
 
+def unsliced_step_config(data):
+    r"""The config of a step that is not sliced. The keys only valid for the
+    sliced steps, `template_slice_config`, `continue_on_num_success`,
+    `continue_on_success_ratio` and `parallelism`, are removed from a copy of
+    the normalized step config `data`.
+    """
+    data = dict(data)
+    for kk in [
+        "template_slice_config",
+        "continue_on_num_success",
+        "continue_on_success_ratio",
+        "parallelism",
+    ]:
+        data.pop(kk, None)
+    return data
+
+
 def gen_doc(*, make_anchor=True, make_link=True, **kwargs):
     if make_link:
         make_anchor = True
@@ -0,0 +1 @@
+/root/package/tests/block-4rhlo/iter-002--run-train-0000/workdir//tmp/outputs/artifacts/model/task.0000/model.pb
\ No newline at end of file
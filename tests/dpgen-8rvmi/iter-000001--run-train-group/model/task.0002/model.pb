@@ -0,0 +1 @@
+/root/package/tests/dpgen-8rvmi/iter-000001--run-train-0002/workdir//tmp/outputs/artifacts/model/task.0002/model.pb
\ No newline at end of file
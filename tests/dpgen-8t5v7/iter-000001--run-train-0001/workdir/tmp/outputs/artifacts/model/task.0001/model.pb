@@ -0,0 +1,4 @@
+read from init model: 
+read from init model: 
+This is init model 1
+
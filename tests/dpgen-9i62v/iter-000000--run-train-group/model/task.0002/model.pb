@@ -0,0 +1 @@
+/root/package/tests/dpgen-9i62v/iter-000000--run-train-0002/workdir//tmp/outputs/artifacts/model/task.0002/model.pb
\ No newline at end of file
@@ -0,0 +1 @@
+/root/package/tests/dpgen-dt3lh/iter-000001--run-train-0000/workdir//tmp/outputs/artifacts/model/task.0000/model.pb
\ No newline at end of file
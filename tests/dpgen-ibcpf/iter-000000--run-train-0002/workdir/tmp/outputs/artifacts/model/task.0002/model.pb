@@ -0,0 +1,2 @@
+read from init model: 
+This is init model 2
@@ -11,14 +11,21 @@ from pathlib import (
 
 import dpdata
 import numpy as np
+from dargs import (
+    Argument,
+)
 
 # isort: off
 from .context import (
     dpgen2,
 )
 from dpgen2.entrypoint.args import (
+    fp_args,
     normalize,
 )
+from dpgen2.fp import (
+    fp_styles,
+)
 from dpgen2.op import (
     RunDPTrain,
     RunLmp,
@@ -30,6 +37,14 @@ from dpgen2.utils import (
 # isort: on
 
 
+def fp_args_of(style):
+    return {
+        "inputs": fp_styles[style]["inputs"],
+        "run": fp_styles[style]["run"],
+        "run_batch": fp_styles[style].get("run_batch"),
+    }
+
+
 class TestArgs(unittest.TestCase):
     def test(self):
         old_data = json.loads(old_str)
@@ -140,6 +155,37 @@ class TestArgs(unittest.TestCase):
         )
         self.assertEqual(old_data["init_data_sys"], new_data["inputs"]["init_data_sys"])
 
+    def test_render_max_workers(self):
+        data = json.loads(new_str)
+        self.assertEqual(normalize(data)["explore"]["render_max_workers"], 1)
+        # None for as many as the processors
+        data["explore"]["render_max_workers"] = None
+        self.assertIsNone(normalize(data)["explore"]["render_max_workers"])
+
+    def test_prep_max_workers(self):
+        data = json.loads(new_str)
+        self.assertEqual(normalize(data)["fp"]["prep_max_workers"], 1)
+        data["fp"]["prep_max_workers"] = None
+        self.assertIsNone(normalize(data)["fp"]["prep_max_workers"])
+
+    def test_fp_batch_config(self):
+        base = Argument("fp", dict, fp_args(**fp_args_of("deepmd")))
+        data = {
+            "inputs_config": {},
+            "run_config": {"teacher_model_path": "foo.pb"},
+            "batch_config": {},
+        }
+        data = base.normalize_value(data, trim_pattern="_*")
+        base.check_value(data, strict=True)
+        self.assertEqual(data["batch_config"], {"batch_size": 1024})
+        # the per-task fp is not given the batch options
+        self.assertEqual(
+            sorted(data["run_config"].keys()), ["log", "out", "teacher_model_path"]
+        )
+        # not supported by the per-task only styles
+        base = Argument("fp", dict, fp_args(**fp_args_of("vasp")))
+        self.assertNotIn("batch_config", [aa.name for aa in base.sub_fields.values()])
+
     def test_bohrium(self):
         new_data = normalize(json.loads(new_str_bhr))
         self.assertEqual(
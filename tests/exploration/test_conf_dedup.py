@@ -0,0 +1,124 @@
+import unittest
+
+import dargs
+import dpdata
+import numpy as np
+
+from dpgen2.exploration.selector import (
+    ConfDeduplicator,
+)
+from dpgen2.exploration.selector.conf_dedup import (
+    find_near_duplicates,
+    rdf_fingerprint,
+)
+
+from .context import (
+    dpgen2,
+)
+
+
+def make_system(coords, cells, atom_types, type_map):
+    return dpdata.System(
+        data={
+            "atom_names": list(type_map),
+            "atom_numbs": np.bincount(atom_types, minlength=len(type_map)).tolist(),
+            "atom_types": np.array(atom_types),
+            "orig": np.zeros(3),
+            "cells": np.array(cells),
+            "coords": np.array(coords),
+        }
+    )
+
+
+class TestRdfFingerprint(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.cell = np.diag([6.0, 7.0, 8.0])
+        self.coords = rng.random((8, 3)) @ self.cell
+        self.atom_types = np.array([0, 1, 1, 0, 1, 1, 1, 1])
+
+    def test_invariance(self):
+        fp0 = rdf_fingerprint(self.coords, self.cell, self.atom_types, 2)
+        self.assertEqual(fp0.shape, (3 * 24,))
+        self.assertAlmostEqual(np.linalg.norm(fp0), 1.0)
+        # translated, wrapped and permuted within the same type
+        coords = self.coords + np.array([1.5, -2.0, 9.0])
+        coords -= np.floor(coords / np.diag(self.cell)) * np.diag(self.cell)
+        perm = [3, 4, 5, 0, 2, 1, 7, 6]
+        fp1 = rdf_fingerprint(coords[perm], self.cell, self.atom_types[perm], 2)
+        np.testing.assert_allclose(fp0, fp1, atol=1e-10)
+
+    def test_continuity(self):
+        fp0 = rdf_fingerprint(self.coords, self.cell, self.atom_types, 2)
+        coords = self.coords.copy()
+        coords[0] += 1e-4
+        fp1 = rdf_fingerprint(coords, self.cell, self.atom_types, 2)
+        self.assertLess(np.linalg.norm(fp1 - fp0), 1e-3)
+        coords[0] += 1.0
+        fp2 = rdf_fingerprint(coords, self.cell, self.atom_types, 2)
+        self.assertGreater(np.linalg.norm(fp2 - fp0), 1e-2)
+
+    def test_nopbc(self):
+        coords = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 10.0, 0.0]])
+        fp = rdf_fingerprint(
+            coords, np.eye(3), np.array([0, 1, 1]), 2, nopbc=True, rcut=2.0, nbins=4
+        )
+        # only the 0-1 pair at 1.0 in the bins of the type pair (0, 1)
+        np.testing.assert_allclose(fp[:4], 0.0)
+        np.testing.assert_allclose(fp[8:], 0.0)
+        self.assertGreater(fp[4:8].sum(), 0.0)
+
+
+class TestFindNearDuplicates(unittest.TestCase):
+    def test_keep_first(self):
+        fps = np.array([[0.0], [0.005], [0.012], [0.5], [0.0]])
+        keep = find_near_duplicates(fps, 0.01)
+        # 1 and 4 are close to 0. 2 is close to the removed 1 only
+        np.testing.assert_array_equal(keep, [True, False, True, True, False])
+        np.testing.assert_array_equal(find_near_duplicates(fps[:1], 0.01), [True])
+        np.testing.assert_array_equal(
+            find_near_duplicates(np.zeros((0, 3)), 0.01), np.zeros(0, dtype=bool)
+        )
+
+
+class TestConfDeduplicator(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.type_map = ["H", "O"]
+        cell = np.diag([5.0, 5.0, 5.0])
+        coords = rng.random((3, 6, 3)) @ cell
+        # frames 3 and 4 are noisy copies of 0 and 2
+        coords = np.concatenate(
+            [coords, coords[[0, 2]] + 1e-5 * rng.standard_normal((2, 6, 3))]
+        )
+        self.sys0 = make_system(
+            coords, np.tile(cell, (5, 1, 1)), [0, 0, 0, 0, 1, 1], self.type_map
+        )
+        self.sys1 = make_system(
+            coords[:2, :3], np.tile(cell, (2, 1, 1)), [0, 1, 1], self.type_map
+        )
+
+    def test_dedup(self):
+        ms = dpdata.MultiSystems(self.sys0, self.sys1, type_map=self.type_map)
+        for max_workers in [1, 2]:
+            dedup = ConfDeduplicator(tolerance=1e-3, max_workers=max_workers)
+            ret = dedup.dedup(ms)
+            self.assertEqual(dedup.numb_removed, 2)
+            self.assertEqual(ret.get_nframes(), 5)
+            np.testing.assert_array_equal(
+                ret["H4O2"]["coords"], self.sys0["coords"][:3]
+            )
+            np.testing.assert_array_equal(ret["H1O2"]["coords"], self.sys1["coords"])
+
+    def test_zero_tolerance(self):
+        ms = dpdata.MultiSystems(self.sys0, type_map=self.type_map)
+        dedup = ConfDeduplicator(tolerance=0.0)
+        ret = dedup.dedup(ms)
+        self.assertEqual(dedup.numb_removed, 0)
+        self.assertEqual(ret.get_nframes(), 5)
+
+    def test_args(self):
+        base = dargs.Argument("base", dict, ConfDeduplicator.args())
+        data = base.normalize_value({"max_workers": None})
+        base.check_value(data, strict=True)
+        self.assertIsNone(ConfDeduplicator(**data).max_workers)
@@ -1,5 +1,8 @@
 import os
 import unittest
+from concurrent.futures import (
+    ProcessPoolExecutor,
+)
 
 import dpdata
 import numpy as np
@@ -46,6 +49,11 @@ class BazFilter(ConfFilter):
         return frame["coords"][0][0][2] > 0.0
 
 
+class QuxFilter(FooFilter):
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+
+
 class TestConfFilter(unittest.TestCase):
     def test_filter_0(self):
         faked_sys = fake_system(4, 3)
@@ -102,3 +110,43 @@ class TestConfFilter(unittest.TestCase):
         ms.append(faked_sys)
         sel_ms = filters.check(ms)
         self.assertEqual(sel_ms.get_nframes(), 0)
+
+    def test_filter_systems(self):
+        sys_0 = fake_system(4, 3)
+        sys_0["coords"][1][0] = 1.0
+        sys_0["coords"][3][0] = 3.0
+        sys_1 = fake_system(3, 4)
+        sys_1["coords"][2][0] = 2.0
+        ms = dpdata.MultiSystems()
+        ms.append(sys_0)
+        ms.append(sys_1)
+        filters = ConfFilters()
+        filters.add(FooFilter()).add(BarFilter()).add(BazFilter())
+        sel_ms = filters.check(ms)
+        self.assertEqual(len(sel_ms), 2)
+        self.assertEqual(sel_ms.get_nframes(), 3)
+        coords = sorted([ss["coords"][:, 0, 0].tolist() for ss in sel_ms])
+        self.assertEqual(coords, [[1.0, 3.0], [2.0]])
+
+    def test_shared_pool(self):
+        faked_sys = fake_system(4, 3)
+        faked_sys["coords"][1][0] = 1.0
+        faked_sys["coords"][3][0] = 3.0
+        ms = dpdata.MultiSystems()
+        ms.append(faked_sys)
+        filters = ConfFilters()
+        filters.add(QuxFilter(2)).add(BarFilter()).add(QuxFilter(None))
+        self.assertIsNone(filters._max_workers())
+        filters = ConfFilters()
+        filters.add(QuxFilter(2)).add(BarFilter()).add(BazFilter())
+        self.assertEqual(filters._max_workers(), 2)
+        with patch(
+            "dpgen2.exploration.selector.conf_filter.ProcessPoolExecutor",
+            wraps=ProcessPoolExecutor,
+        ) as mocked_pool:
+            sel_sys = filters.check(ms)[0]
+        # one pool for all the filters
+        mocked_pool.assert_called_once_with(2)
+        self.assertEqual(sel_sys.get_nframes(), 2)
+        self.assertAlmostEqual(sel_sys["coords"][0][0][0], 1)
+        self.assertAlmostEqual(sel_sys["coords"][1][0][0], 3)
@@ -5,6 +5,9 @@ import unittest
 from pathlib import (
     Path,
 )
+from unittest import (
+    mock,
+)
 
 import dpdata
 import numpy as np
@@ -19,7 +22,11 @@ from dpgen2.exploration.render import (
 from dpgen2.exploration.report import (
     ExplorationReportTrustLevelsRandom,
 )
+from dpgen2.exploration.report.farthest_point import (
+    farthest_point_frames,
+)
 from dpgen2.exploration.selector import (
+    ConfDeduplicator,
     ConfSelectorFrames,
 )
 
@@ -120,6 +127,48 @@ class TestConfSelectorFrames(unittest.TestCase):
         self.assertAlmostEqual(report.accurate_ratio(), 0.0)
         self.assertAlmostEqual(report.failed_ratio(), 0.0)
 
+    def test_f_0_dedup(self):
+        report = ExplorationReportTrustLevelsRandom(0.1, 0.5, conv_accuracy=0.9)
+        traj_render = TrajRenderLammps()
+        conf_dedup = ConfDeduplicator(tolerance=1e-6)
+        conf_selector = ConfSelectorFrames(
+            traj_render,
+            report,
+            conf_dedup=conf_dedup,
+        )
+        confs, report = conf_selector.select(
+            self.trajs, self.model_devis, self.type_map
+        )
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        # the frames are the translations of the first one
+        self.assertEqual(conf_dedup.numb_removed, 5)
+        self.assertEqual(ms.get_nframes(), 1)
+        self.assertAlmostEqual(ms[0]["coords"][0][0][1], 2.87, places=2)
+        self.assertAlmostEqual(report.candidate_ratio(), 1.0)
+
+    def test_f_0_fps(self):
+        report = ExplorationReportTrustLevelsRandom(
+            0.1, 0.5, conv_accuracy=0.9, candi_sel_prob="fps"
+        )
+        traj_render = TrajRenderLammps()
+        conf_selector = ConfSelectorFrames(traj_render, report, max_numb_sel=2)
+        with mock.patch(
+            "dpgen2.exploration.selector.conf_selector_frame.farthest_point_frames",
+            wraps=farthest_point_frames,
+        ) as mocked_fps:
+            confs, report = conf_selector.select(
+                self.trajs, self.model_devis, self.type_map
+            )
+        # all the candidates are rendered before the sampling
+        mocked_fps.assert_called_once()
+        self.assertEqual(mocked_fps.call_args[0][0].get_nframes(), 6)
+        self.assertEqual(mocked_fps.call_args[0][1], 2)
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.from_deepmd_npy(confs[0], labeled=False)
+        self.assertEqual(ms.get_nframes(), 2)
+        self.assertAlmostEqual(report.candidate_ratio(), 1.0)
+
     def test_f_1(self):
         report = ExplorationReportTrustLevelsRandom(0.25, 0.35, conv_accuracy=0.9)
         traj_render = TrajRenderLammps()
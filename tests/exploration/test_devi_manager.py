@@ -1,4 +1,5 @@
 import os
+import shutil
 import unittest
 from pathlib import (
     Path,
@@ -12,6 +13,7 @@ from .context import (
 )
 from dpgen2.exploration.deviation import (
     DeviManager,
+    DeviManagerColumnar,
     DeviManagerStd,
 )
 
@@ -109,3 +111,131 @@ class TestDeviManagerStd(unittest.TestCase):
             model_devi.get,
             DeviManager.MAX_DEVI_V,
         )
+
+
+class TestDeviManagerColumnar(unittest.TestCase):
+    def tearDown(self):
+        if os.path.isdir("devi_columnar"):
+            shutil.rmtree("devi_columnar")
+
+    def test_success(self):
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([4, 5, 6]))
+
+        self.assertEqual(model_devi.ntraj, 2)
+        self.assertTrue(
+            np.allclose(
+                model_devi.get(DeviManager.MAX_DEVI_F), np.array([[1, 2, 3], [4, 5, 6]])
+            )
+        )
+        self.assertEqual(model_devi.get(DeviManager.MAX_DEVI_V), [None, None])
+
+        model_devi.clear()
+        self.assertEqual(model_devi.ntraj, 0)
+        self.assertEqual(model_devi.get(DeviManager.MAX_DEVI_F), [])
+        self.assertEqual(model_devi.get(DeviManager.MAX_DEVI_V), [])
+
+    def test_same_as_std(self):
+        std = DeviManagerStd()
+        col = DeviManagerColumnar()
+        rng = np.random.default_rng(0)
+        for nn in [3, 0, 1, 100, 7]:
+            ff = rng.random(nn)
+            vv = rng.random(nn)
+            for md in (std, col):
+                md.add(DeviManager.MAX_DEVI_F, ff)
+                md.add(DeviManager.MAX_DEVI_V, vv)
+        self.assertEqual(std.ntraj, col.ntraj)
+        for name in (DeviManager.MAX_DEVI_F, DeviManager.MAX_DEVI_V):
+            for aa, bb in zip(std.get(name), col.get(name)):
+                np.testing.assert_array_equal(aa, bb)
+            flat_std, offsets_std = std.get_flat(name)
+            flat_col, offsets_col = col.get_flat(name)
+            np.testing.assert_array_equal(flat_std, flat_col)
+            np.testing.assert_array_equal(offsets_std, offsets_col)
+        np.testing.assert_array_equal(offsets_col, [0, 3, 3, 4, 104, 111])
+        flat, offsets = col.get_flat(DeviManager.AVG_DEVI_F)
+        self.assertIsNone(flat)
+        np.testing.assert_array_equal(offsets, offsets_col)
+
+    def test_save_load(self):
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([1.0, 2.0, 3.0]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([4.0, 5.0]))
+        model_devi.add(DeviManager.AVG_DEVI_F, np.array([0.1, 0.2, 0.3]))
+        model_devi.add(DeviManager.AVG_DEVI_F, np.array([0.4, 0.5]))
+        model_devi.save("devi_columnar")
+
+        loaded = DeviManagerColumnar.load("devi_columnar")
+        self.assertEqual(loaded.ntraj, 2)
+        flat, offsets = loaded.get_flat(DeviManager.MAX_DEVI_F)
+        self.assertIsInstance(flat, np.memmap)
+        np.testing.assert_array_equal(offsets, [0, 3, 5])
+        for name in (DeviManager.MAX_DEVI_F, DeviManager.AVG_DEVI_F):
+            for aa, bb in zip(model_devi.get(name), loaded.get(name)):
+                np.testing.assert_array_equal(aa, bb)
+        self.assertEqual(loaded.get(DeviManager.MAX_DEVI_V), [None, None])
+
+        # appending to a memory-mapped manager
+        loaded.add(DeviManager.MAX_DEVI_F, np.array([6.0]))
+        loaded.add(DeviManager.AVG_DEVI_F, np.array([0.6]))
+        self.assertEqual(loaded.ntraj, 3)
+        np.testing.assert_array_equal(
+            loaded.get(DeviManager.MAX_DEVI_F)[2], np.array([6.0])
+        )
+        np.testing.assert_array_equal(
+            np.load("devi_columnar/max_devi_f.npy"), [1.0, 2.0, 3.0, 4.0, 5.0]
+        )
+
+    def test_add_invalid_deviation(self):
+        model_devi = DeviManagerColumnar()
+
+        self.assertRaisesRegex(
+            AssertionError,
+            "Error: deviation\\(shape: ",
+            model_devi.add,
+            DeviManager.MAX_DEVI_F,
+            np.array([[1], [2], [3]]),
+        )
+
+        self.assertRaisesRegex(
+            AssertionError,
+            "Error: deviation\\(type: ",
+            model_devi.add,
+            DeviManager.MAX_DEVI_F,
+            "foo",
+        )
+
+    def test_check_data(self):
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([4, 5, 6]))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([4, 5, 6]))
+        self.assertRaisesRegex(
+            AssertionError,
+            "Error: the number of model deviation",
+            model_devi.get,
+            DeviManager.MAX_DEVI_V,
+        )
+
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([1, 2, 3]))
+        self.assertRaisesRegex(
+            AssertionError,
+            f"Error: cannot find model deviation {DeviManager.MAX_DEVI_F}",
+            model_devi.get,
+            DeviManager.MAX_DEVI_V,
+        )
+
+        model_devi = DeviManagerColumnar()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([4, 5, 6]))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([1, 2, 3]))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([4, 5]))
+        self.assertRaisesRegex(
+            AssertionError,
+            f"Error: the number of frames in",
+            model_devi.get,
+            DeviManager.MAX_DEVI_F,
+        )
@@ -1,7 +1,11 @@
 import os
 import unittest
+from concurrent.futures import (
+    ThreadPoolExecutor,
+)
 
 import dpdata
+import mock
 import numpy as np
 
 from dpgen2.exploration.selector import (
@@ -9,6 +13,13 @@ from dpgen2.exploration.selector import (
     BoxSkewnessConfFilter,
     DistanceConfFilter,
 )
+from dpgen2.exploration.selector.distance_conf_filter import (
+    _lattice_combinations,
+    find_close_pairs,
+    safe_dist_dict,
+    standard_cells,
+    type_pair_safe_dist,
+)
 
 from .context import (
     dpgen2,
@@ -172,3 +183,202 @@ class TestDistanceConfFilter(unittest.TestCase):
             os.remove("POSCAR_valid")
         if os.path.isfile("POSCAR_close"):
             os.remove("POSCAR_close")
+
+
+def check_distance_with_ase(frame, safe_dist_ratio=1.0, custom_safe_dist={}):
+    from ase import (
+        Atoms,
+    )
+
+    safe_dist = {**safe_dist_dict, **custom_safe_dist}
+    safe_dist = {k: v * 0.529 / 1.2 * safe_dist_ratio for k, v in safe_dist.items()}
+    structure = Atoms(
+        symbols=[frame["atom_names"][t] for t in frame["atom_types"]],
+        positions=frame["coords"][0],
+        cell=frame["cells"][0],
+        pbc=(not frame.nopbc),
+    )
+    symbols = structure.get_chemical_symbols()
+    cell, _ = structure.get_cell().standard_form()
+    lengths = np.linalg.norm(_lattice_combinations @ cell.array, axis=1)
+    if lengths.min() < 2 * max([safe_dist[ii] for ii in symbols]):
+        return False
+    for i in range(len(symbols)):
+        for j in range(i + 1, len(symbols)):
+            dist = structure.get_distance(i, j, mic=True)
+            if dist < safe_dist[symbols[i]] + safe_dist[symbols[j]]:
+                return False
+    return True
+
+
+def make_random_frame(rng, natoms, length, nopbc=False):
+    cell = np.diag(rng.uniform(0.8, 1.2, 3)) * length
+    cell[1, 0], cell[2, 0], cell[2, 1] = rng.uniform(-0.5, 0.5, 3) * length
+    coords = rng.uniform(-0.2, 1.2, (natoms, 3)) @ cell
+    atom_types = rng.integers(0, 3, natoms)
+    return dpdata.System(
+        data={
+            "atom_names": ["H", "O", "Cu"],
+            "atom_numbs": np.bincount(atom_types, minlength=3).tolist(),
+            "atom_types": atom_types,
+            "orig": np.zeros(3),
+            "cells": cell[None, :, :],
+            "coords": coords[None, :, :],
+            "nopbc": nopbc,
+        }
+    )
+
+
+class TestDistanceConfFilterNeighborList(unittest.TestCase):
+    def test_same_verdicts(self):
+        rng = np.random.default_rng(0)
+        verdicts = []
+        for ii in range(60):
+            frame = make_random_frame(
+                rng, int(rng.integers(2, 12)), rng.uniform(2.0, 8.0), ii % 4 == 0
+            )
+            valid = DistanceConfFilter().check(frame)
+            self.assertEqual(valid, check_distance_with_ase(frame))
+            verdicts.append(valid)
+        # both verdicts are covered
+        self.assertTrue(any(verdicts))
+        self.assertFalse(all(verdicts))
+
+    def test_periodic_image(self):
+        frame = make_random_frame(np.random.default_rng(1), 2, 5.0)
+        frame.data["cells"][0] = np.eye(3) * 5.0
+        frame.data["atom_types"] = np.array([1, 1])
+        frame.data["atom_numbs"] = [0, 2, 0]
+        frame.data["coords"][0] = [[0.2, 2.5, 2.5], [4.6, 2.5, 2.5]]
+        self.assertFalse(DistanceConfFilter().check(frame))
+        frame.nopbc = True
+        self.assertTrue(DistanceConfFilter().check(frame))
+
+    def test_find_close_pairs(self):
+        cell = np.array([[3.0, 0.0, 0.0], [1.5, 3.0, 0.0], [0.5, 0.5, 3.0]])
+        coords = np.random.default_rng(2).uniform(0, 1, (5, 3)) @ cell
+        ii, jj, dist = find_close_pairs(coords, cell, True, 4.0)
+        # brute force over the images
+        shifts = np.stack(
+            np.meshgrid(*[np.arange(-3, 4)] * 3, indexing="ij"), axis=-1
+        ).reshape(-1, 3)
+        ref = []
+        for aa in range(5):
+            for bb in range(5):
+                if aa == bb:
+                    continue
+                dd = np.linalg.norm(coords[bb] + shifts @ cell - coords[aa], axis=1)
+                ref += [(aa, bb, round(vv, 8)) for vv in dd[dd <= 4.0]]
+        self.assertEqual(
+            sorted(ref),
+            sorted(zip(ii.tolist(), jj.tolist(), np.round(dist, 8).tolist())),
+        )
+
+    def test_safe_dist_table(self):
+        type_pair_safe_dist.cache_clear()
+        table = type_pair_safe_dist(("H", "O", "Xx"), (("O", 2.0),), 0.5)
+        scale = 0.529 / 1.2 * 0.5
+        np.testing.assert_allclose(
+            table[:2, :2],
+            [[1.224 * scale, 2.612 * scale], [2.612 * scale, 4.0 * scale]],
+        )
+        self.assertTrue(np.isnan(table[2]).all())
+        self.assertFalse(table.flags.writeable)
+
+        rng = np.random.default_rng(3)
+        ff = DistanceConfFilter(custom_safe_dist={"Cu": 3.0}, safe_dist_ratio=0.8)
+        for ii in range(5):
+            frame = make_random_frame(rng, 6, 4.0)
+            self.assertEqual(
+                ff.check(frame), check_distance_with_ase(frame, 0.8, {"Cu": 3.0})
+            )
+        # the table is built once for the filter
+        self.assertEqual(type_pair_safe_dist.cache_info().misses, 2)
+
+    def test_unknown_element(self):
+        frame = make_random_frame(np.random.default_rng(4), 3, 6.0)
+        frame.data["atom_names"] = ["H", "O", "Xx"]
+        frame.data["atom_types"] = np.array([0, 1, 1])
+        frame.data["atom_numbs"] = [1, 2, 0]
+        DistanceConfFilter().check(frame)
+        frame.data["atom_types"] = np.array([0, 1, 2])
+        frame.data["atom_numbs"] = [1, 1, 1]
+        self.assertRaises(KeyError, DistanceConfFilter().check, frame)
+
+    def test_check_system_chunksize(self):
+        rng = np.random.default_rng(5)
+        frames = [make_random_frame(rng, 6, 4.0) for ii in range(40)]
+        system = frames[0].copy()
+        system.data["cells"] = np.concatenate([ff["cells"] for ff in frames])
+        system.data["coords"] = np.concatenate([ff["coords"] for ff in frames])
+        ref = [DistanceConfFilter().check(system[ii]) for ii in range(40)]
+        ff = DistanceConfFilter(max_workers=2)
+        with ThreadPoolExecutor(2) as executor:
+            with mock.patch.object(executor, "map", wraps=executor.map) as mocked:
+                valid = ff.check_system(system, executor)
+        self.assertEqual(valid.tolist(), ref)
+        # the frames are sent to the workers in chunks
+        self.assertEqual(mocked.call_args.kwargs["chunksize"], 5)
+
+
+class TestBatchedBoxFilters(unittest.TestCase):
+    def setUp(self):
+        for name, content in [
+            ("POSCAR_valid", POSCAR_valid),
+            ("POSCAR_tilt", POSCAR_tilt),
+            ("POSCAR_long", POSCAR_long),
+        ]:
+            with open(name, "w") as f:
+                f.write(content)
+        # right- and left-handed random cells
+        rng = np.random.default_rng(0)
+        self.cells = rng.uniform(-1.0, 1.0, (20, 3, 3)) + np.eye(3) * 2.0
+        self.cells[::2] *= -1
+
+    def tearDown(self):
+        for name in ["POSCAR_valid", "POSCAR_tilt", "POSCAR_long"]:
+            if os.path.isfile(name):
+                os.remove(name)
+
+    def test_standard_cells(self):
+        from ase.cell import (
+            Cell,
+        )
+
+        cells = standard_cells(self.cells)
+        for ii in range(len(self.cells)):
+            ref, _ = Cell(self.cells[ii]).standard_form()
+            np.testing.assert_allclose(cells[ii], ref.array, atol=1e-12)
+
+    def test_check_system(self):
+        with open("POSCAR_close", "w") as f:
+            f.write(POSCAR_close)
+        system = dpdata.System("POSCAR_tilt", fmt="poscar")
+        for name in ["POSCAR_long", "POSCAR_close"]:
+            system.append(dpdata.System(name, fmt="poscar"))
+        os.remove("POSCAR_close")
+        np.testing.assert_array_equal(
+            BoxSkewnessConfFilter().check_system(system), [False, True, True]
+        )
+        np.testing.assert_array_equal(
+            BoxLengthFilter().check_system(system), [True, False, True]
+        )
+        np.testing.assert_array_equal(
+            DistanceConfFilter().check_system(system), [True, False, False]
+        )
+
+    def test_same_as_single_frame(self):
+        system = make_random_frame(np.random.default_rng(1), 4, 1.0)
+        frac = np.random.default_rng(2).uniform(0.0, 1.0, (4, 3))
+        system.data["cells"] = self.cells * 2.5
+        system.data["coords"] = frac @ system["cells"]
+        for ff in [
+            BoxSkewnessConfFilter(theta=30.0),
+            BoxLengthFilter(length_ratio=1.5),
+            DistanceConfFilter(),
+        ]:
+            res = ff.check_system(system)
+            self.assertEqual(res.dtype, bool)
+            self.assertEqual(res.tolist(), [ff.check(system[ii]) for ii in range(20)])
+            self.assertTrue(res.any())
+            self.assertFalse(res.all())
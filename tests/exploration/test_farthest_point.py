@@ -0,0 +1,108 @@
+import unittest
+
+import dpdata
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.report.farthest_point import (
+    farthest_point_frames,
+    farthest_point_sampling,
+    structure_features,
+)
+from dpgen2.exploration.selector.conf_dedup import (
+    rdf_fingerprint,
+)
+
+# isort: on
+
+
+def naive_fps(xx, numb, first):
+    xx = (xx - xx.mean(axis=0)) / xx.std(axis=0)
+    sel = [first]
+    while len(sel) < numb:
+        dist = [
+            min(np.sum((xx[ii] - xx[jj]) ** 2) for jj in sel) if ii not in sel else -1.0
+            for ii in range(xx.shape[0])
+        ]
+        sel.append(int(np.argmax(dist)))
+    return sorted(sel)
+
+
+class TestFarthestPointSampling(unittest.TestCase):
+    def test_naive(self):
+        rng = np.random.default_rng(0)
+        xx = rng.random((50, 4)) * [1.0, 10.0, 0.1, 1.0]
+        sel = farthest_point_sampling(xx, 12)
+        self.assertEqual(sel.tolist(), naive_fps(xx, 12, int(np.argmax(xx[:, 0]))))
+        sel = farthest_point_sampling(xx, 12, first=3)
+        self.assertEqual(sel.tolist(), naive_fps(xx, 12, 3))
+
+    def test_clusters(self):
+        rng = np.random.default_rng(0)
+        centers = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0], [10.0, 10.0]])
+        label = rng.integers(0, 4, 200)
+        xx = centers[label] + 0.1 * rng.standard_normal((200, 2))
+        sel = farthest_point_sampling(xx, 4)
+        # one frame from each cluster
+        self.assertEqual(sorted(label[sel].tolist()), [0, 1, 2, 3])
+
+    def test_degenerate(self):
+        xx = np.ones((5, 2))
+        xx[3] = [np.nan, 1.0]
+        sel = farthest_point_sampling(xx, 3)
+        self.assertEqual(len(set(sel.tolist())), 3)
+        self.assertEqual(farthest_point_sampling(xx, 10).tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(farthest_point_sampling(xx, 0).shape, (0,))
+
+
+def make_dimers(atom_names, atom_types, dists):
+    coords = np.zeros((len(dists), len(atom_types), 3))
+    for ii in range(1, len(atom_types)):
+        coords[:, ii, 0] = np.array(dists) * ii
+    return dpdata.System(
+        data={
+            "atom_names": atom_names,
+            "atom_numbs": [atom_types.count(ii) for ii in range(len(atom_names))],
+            "atom_types": np.array(atom_types),
+            "orig": np.zeros(3),
+            "cells": np.tile(np.eye(3) * 20.0, (len(dists), 1, 1)),
+            "coords": coords,
+        }
+    )
+
+
+class TestStructureFeatures(unittest.TestCase):
+    def setUp(self):
+        self.ms = dpdata.MultiSystems(type_map=["O", "H"])
+        self.ms.append(make_dimers(["O", "H"], [0, 1], [1.0, 1.01, 2.0, 2.01, 3.0]))
+        self.ms.append(make_dimers(["O", "H"], [1, 0, 1], [1.5, 1.51]))
+
+    def test_features(self):
+        features = structure_features(self.ms)
+        self.assertEqual(features.shape, (7, 3 * 24))
+        ii = 0
+        for system in self.ms:
+            for jj in range(system.get_nframes()):
+                expected = rdf_fingerprint(
+                    system["coords"][jj],
+                    system["cells"][jj],
+                    np.array(system["atom_types"]),
+                    2,
+                )
+                np.testing.assert_allclose(features[ii], expected)
+                ii += 1
+
+    def test_frames(self):
+        sel = farthest_point_frames(self.ms, 4)
+        self.assertEqual(sel.get_nframes(), 4)
+        # one frame of each distinct structure
+        dists = sorted(
+            float(np.round(ss["coords"][ii][1][0] - ss["coords"][ii][0][0], 1))
+            for ss in sel
+            for ii in range(ss.get_nframes())
+        )
+        self.assertEqual(dists, [1.0, 1.5, 2.0, 3.0])
+        self.assertIs(farthest_point_frames(self.ms, 7), self.ms)
@@ -0,0 +1,126 @@
+import os
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.deviation import (
+    DeviManager,
+)
+from dpgen2.exploration.render import (
+    TrajRenderLammps,
+    load_model_devi,
+    load_model_devis,
+)
+
+# isort: on
+
+lmp_header = "#       step         max_devi_v         min_devi_v         avg_devi_v         max_devi_f         min_devi_f         avg_devi_f\n"
+
+
+def write_lmp_model_devi(fname, data, header=lmp_header):
+    with open(fname, "w") as fp:
+        fp.write(header)
+        for dd in data:
+            fp.write("%12d" % dd[0] + "".join(["%19.6e" % ii for ii in dd[1:]]) + "\n")
+
+
+class TestLoadModelDevi(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("model_devi_reader")
+        self.work_dir.mkdir(exist_ok=True)
+        rng = np.random.default_rng(0)
+        self.data = rng.random((10, 7))
+        self.data[:, 0] = np.arange(10) * 10
+
+    def tearDown(self):
+        if self.work_dir.is_dir():
+            shutil.rmtree(self.work_dir)
+
+    def test_lmp(self):
+        fname = self.work_dir / "model_devi.out"
+        write_lmp_model_devi(fname, self.data)
+        dd = load_model_devi(fname)
+        self.assertEqual(dd.shape, (10, 7))
+        np.testing.assert_allclose(dd, np.loadtxt(fname))
+        np.testing.assert_allclose(dd, self.data, atol=1e-6)
+
+    def test_one_line(self):
+        fname = self.work_dir / "model_devi.out"
+        write_lmp_model_devi(fname, self.data[:1])
+        dd = load_model_devi(fname)
+        self.assertEqual(dd.shape, (1, 7))
+        np.testing.assert_allclose(dd[0], np.loadtxt(fname))
+
+    def test_merged_headers(self):
+        fname = self.work_dir / "model_devi.out"
+        write_lmp_model_devi(fname, self.data[:4])
+        with open(fname, "a") as fp:
+            fp.write(lmp_header)
+            fp.write("\n")
+            for dd in self.data[4:]:
+                fp.write(" ".join([str(ii) for ii in dd]) + "\n")
+        dd = load_model_devi(fname)
+        np.testing.assert_allclose(dd, np.loadtxt(fname))
+        np.testing.assert_allclose(dd, self.data, atol=1e-6)
+
+    def test_eight_columns(self):
+        from dpgen2.op.run_caly_model_devi import (
+            write_model_devi_out,
+        )
+
+        fname = self.work_dir / "model_devi.out"
+        data = np.concatenate([self.data, np.ones((10, 1))], axis=1)
+        write_model_devi_out(data, fname)
+        dd = load_model_devi(fname)
+        self.assertEqual(dd.shape, (10, 8))
+        np.testing.assert_allclose(dd, np.loadtxt(fname))
+
+    def test_empty(self):
+        fname = self.work_dir / "model_devi.out"
+        with open(fname, "w") as fp:
+            fp.write(lmp_header)
+        dd = load_model_devi(fname)
+        self.assertEqual(dd.shape, (0, 7))
+
+    def test_invalid(self):
+        fname = self.work_dir / "model_devi.out"
+        with open(fname, "w") as fp:
+            fp.write("0 1 2 3 4 5 6\n1 1 2 3 4 5\n")
+        self.assertRaises(ValueError, load_model_devi, fname)
+
+    def test_parallel(self):
+        fnames = []
+        for ii in range(5):
+            fname = self.work_dir / f"model_devi.{ii}.out"
+            write_lmp_model_devi(fname, self.data[: ii + 1])
+            fnames.append(fname)
+        serial = load_model_devis(fnames)
+        parallel = load_model_devis(fnames, max_workers=2)
+        self.assertEqual(len(parallel), 5)
+        for ii in range(5):
+            self.assertEqual(parallel[ii].shape, (ii + 1, 7))
+            np.testing.assert_array_equal(serial[ii], parallel[ii])
+
+    def test_traj_render(self):
+        fnames = []
+        for ii in range(3):
+            fname = self.work_dir / f"model_devi.{ii}.out"
+            write_lmp_model_devi(fname, self.data[: ii + 1])
+            fnames.append(fname)
+        for max_workers in [1, 2]:
+            render = TrajRenderLammps(max_workers=max_workers)
+            model_devi = render.get_model_devi(fnames)
+            self.assertEqual(model_devi.ntraj, 3)
+            md_f = model_devi.get(DeviManager.MAX_DEVI_F)
+            md_v = model_devi.get(DeviManager.AVG_DEVI_V)
+            for ii in range(3):
+                np.testing.assert_allclose(md_f[ii], self.data[: ii + 1, 4], atol=1e-6)
+                np.testing.assert_allclose(md_v[ii], self.data[: ii + 1, 3], atol=1e-6)
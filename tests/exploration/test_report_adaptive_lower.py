@@ -26,6 +26,10 @@ from dpgen2.exploration.report import (
 # isort: on
 
 
+def mask_to_set(ter, mask):
+    return set([tuple(ii) for ii in ter._mask_to_ids(mask).tolist()])
+
+
 class TestTrajsExplorationReport(unittest.TestCase):
     def test_fv(self):
         model_devi = DeviManagerStd()
@@ -66,9 +70,9 @@ class TestTrajsExplorationReport(unittest.TestCase):
             conv_tolerance=0.001,
         )
         ter.record(model_devi)
-        self.assertEqual(ter.candi, expected_cand)
-        self.assertEqual(ter.accur, expected_accu)
-        self.assertEqual(set(ter.failed), expected_fail)
+        self.assertEqual(mask_to_set(ter, ter.candi), expected_cand)
+        self.assertEqual(mask_to_set(ter, ter.accur), expected_accu)
+        self.assertEqual(mask_to_set(ter, ter.failed), expected_fail)
 
         class MockedReport:
             level_f_lo = 0
@@ -149,9 +153,9 @@ class TestTrajsExplorationReport(unittest.TestCase):
         )
         ter.record(model_devi)
         self.assertFalse(ter.converged([]))
-        self.assertEqual(ter.candi, expected_cand)
-        self.assertEqual(ter.accur, expected_accu)
-        self.assertEqual(set(ter.failed), expected_fail)
+        self.assertEqual(mask_to_set(ter, ter.candi), expected_cand)
+        self.assertEqual(mask_to_set(ter, ter.accur), expected_accu)
+        self.assertEqual(mask_to_set(ter, ter.failed), expected_fail)
 
         picked = ter.get_candidate_ids(2)
         npicked = 0
@@ -220,9 +224,9 @@ class TestTrajsExplorationReport(unittest.TestCase):
             return ret_indices
 
         ter.record(model_devi)
-        self.assertEqual(ter.candi, expected_cand)
-        self.assertEqual(ter.accur, expected_accu)
-        self.assertEqual(set(ter.failed), expected_fail)
+        self.assertEqual(mask_to_set(ter, ter.candi), expected_cand)
+        self.assertEqual(mask_to_set(ter, ter.accur), expected_accu)
+        self.assertEqual(mask_to_set(ter, ter.failed), expected_fail)
         with mock.patch("numpy.random.choice", faked_choices):
             picked = ter.get_candidate_ids(11)
         self.assertFalse(ter.converged([]))
@@ -230,6 +234,31 @@ class TestTrajsExplorationReport(unittest.TestCase):
         self.assertEqual(sorted(picked[0]), [1, 3])
         self.assertEqual(sorted(picked[1]), [1, 5, 7])
 
+    def test_f_fps(self):
+        md_f = [
+            np.array([0.90, 0.10, 0.91, 0.11, 0.50, 0.53, 0.51, 0.52, 0.92]),
+            np.array([0.41, 0.20, 0.80, 0.81, 0.82, 0.21, 0.41, 0.22, 0.42]),
+        ]
+        ter = ExplorationReportAdaptiveLower(
+            level_f_hi=0.7,
+            numb_candi_f=20,
+            rate_candi_f=0.001,
+            candi_sel_prob="fps",
+        )
+        # the trajectories are recorded one by one
+        for ii in md_f:
+            model_devi = DeviManagerStd()
+            model_devi.add(DeviManager.MAX_DEVI_F, ii)
+            ter.record(model_devi)
+        expected = [[], []]
+        for tt, ff in ter._mask_to_ids(ter.candi).tolist():
+            expected[tt].append(ff)
+        # all the candidates, they are picked by the selector
+        self.assertTrue(ter.fps_candidates())
+        picked = ter.get_candidate_ids(4)
+        self.assertEqual(picked, expected)
+        self.assertGreater(sum([len(ii) for ii in picked]), 4)
+
     def test_v(self):
         model_devi = DeviManagerStd()
         model_devi.add(
@@ -271,9 +300,9 @@ class TestTrajsExplorationReport(unittest.TestCase):
             conv_tolerance=0.001,
         )
         ter.record(model_devi)
-        self.assertEqual(ter.candi, expected_cand)
-        self.assertEqual(ter.accur, expected_accu)
-        self.assertEqual(set(ter.failed), expected_fail)
+        self.assertEqual(mask_to_set(ter, ter.candi), expected_cand)
+        self.assertEqual(mask_to_set(ter, ter.accur), expected_accu)
+        self.assertEqual(mask_to_set(ter, ter.failed), expected_fail)
 
         class MockedReport:
             level_f_lo = 0
@@ -318,3 +347,84 @@ class TestTrajsExplorationReport(unittest.TestCase):
         self.assertAlmostEqual(data["conv_tolerance"], 0.01)
         self.assertAlmostEqual(data["candi_sel_prob"], "uniform")
         ExplorationReportAdaptiveLower(*data)
+
+
+def record_with_sort(md_f, md_v, level_f_hi, level_v_hi, numb_candi_f, numb_candi_v):
+    # the sort based reference implementation
+    coll_f, coll_v, failed, accur, candi = [], [], set(), set(), set()
+    for tt in range(len(md_f)):
+        for ii in range(md_f[tt].shape[0]):
+            if md_f[tt][ii] > level_f_hi or md_v[tt][ii] > level_v_hi:
+                failed.add((tt, ii))
+            else:
+                coll_f.append([md_f[tt][ii], tt, ii])
+                coll_v.append([md_v[tt][ii], tt, ii])
+                accur.add((tt, ii))
+    coll_f.sort()
+    coll_v.sort()
+    numb_candi_f = min(numb_candi_f, len(coll_f))
+    numb_candi_v = min(numb_candi_v, len(coll_v))
+    level_f_lo = coll_f[-numb_candi_f][0] if numb_candi_f > 0 else level_f_hi
+    level_v_lo = coll_v[-numb_candi_v][0] if numb_candi_v > 0 else level_v_hi
+    for ii in range(len(coll_f) - numb_candi_f, len(coll_f)):
+        candi.add(tuple(coll_f[ii][1:]))
+    for ii in range(len(coll_v) - numb_candi_v, len(coll_v)):
+        candi.add(tuple(coll_v[ii][1:]))
+    return candi, accur - candi, failed, level_f_lo, level_v_lo
+
+
+class TestAdaptiveLowerRegression(unittest.TestCase):
+    def test_record(self):
+        rng = np.random.default_rng(7)
+        nframes = [20, 0, 1, 300, 45]
+        # rounded to produce ties
+        md_f = [np.round(rng.random(nn), 2) for nn in nframes]
+        md_v = [np.round(rng.random(nn), 2) for nn in nframes]
+        model_devi = DeviManagerStd()
+        for ff, vv in zip(md_f, md_v):
+            model_devi.add(DeviManager.MAX_DEVI_F, ff)
+            model_devi.add(DeviManager.MAX_DEVI_V, vv)
+        for numb_candi_f, numb_candi_v in [(30, 10), (0, 25), (1000, 0)]:
+            candi, accur, failed, level_f_lo, level_v_lo = record_with_sort(
+                md_f, md_v, 0.8, 0.9, numb_candi_f, numb_candi_v
+            )
+            ter = ExplorationReportAdaptiveLower(
+                level_f_hi=0.8,
+                numb_candi_f=numb_candi_f,
+                rate_candi_f=0.0,
+                level_v_hi=0.9,
+                numb_candi_v=numb_candi_v,
+                rate_candi_v=0.0,
+            )
+            ter.record(model_devi)
+            self.assertEqual(mask_to_set(ter, ter.candi), candi)
+            self.assertEqual(mask_to_set(ter, ter.accur), accur)
+            self.assertEqual(mask_to_set(ter, ter.failed), failed)
+            self.assertEqual(ter.level_f_lo, level_f_lo)
+            self.assertEqual(ter.level_v_lo, level_v_lo)
+            self.assertEqual(ter.candidate_ratio(), len(candi) / sum(nframes))
+            picked = ter.get_candidate_ids(clear=False)
+            self.assertEqual(
+                set([(tt, ff) for tt in range(len(picked)) for ff in picked[tt]]),
+                candi,
+            )
+            picked = ter.get_candidate_ids(5)
+            picked = [(tt, ff) for tt in range(len(picked)) for ff in picked[tt]]
+            self.assertEqual(len(picked), 5)
+            self.assertTrue(set(picked) <= candi)
+
+    def test_inv_pop_prob(self):
+        ter = ExplorationReportAdaptiveLower(
+            level_f_hi=0.7,
+            candi_sel_prob="inv_pop_f:3",
+        )
+        ter.level_f_lo = 0.1
+        md_f = np.array([0.05, 0.15, 0.3, 0.35, 0.5, 0.69, 0.7])
+        # bins: [<0.1, 0.1-0.3) -> 0, [0.3-0.5) -> 1, [0.5, ...] -> 2
+        np.testing.assert_array_equal(
+            ter._histo_idx(md_f), np.array([0, 0, 1, 1, 2, 2, 2])
+        )
+        np.testing.assert_allclose(
+            ter._choice_prob_inv_pop_f(md_f),
+            [1.0 / 2, 1.0 / 2, 1.0 / 2, 1.0 / 2, 1.0 / 3, 1.0 / 3, 1.0 / 3],
+        )
@@ -46,6 +46,15 @@ class TestTrajsExplorationReport(unittest.TestCase):
         self.args_test(ExplorationReportTrustLevelsRandom)
         self.args_test(ExplorationReportTrustLevelsMax)
 
+    def check_record(self, ter, expected_cand, expected_accu, expected_fail):
+        self.assertEqual(ter.cand_ids.dtype, np.int32)
+        traj_cand = [set() for _ in expected_cand]
+        for tt, ff in ter.cand_ids.tolist():
+            traj_cand[tt].add(ff)
+        self.assertEqual(traj_cand, expected_cand)
+        self.assertEqual(ter.numb_accu, sum([len(ii) for ii in expected_accu]))
+        self.assertEqual(ter.numb_fail, sum([len(ii) for ii in expected_fail]))
+
     def fv_selection_test(self, exploration_report: ExplorationReportTrustLevels):
         model_devi = DeviManagerStd()
         model_devi.add(
@@ -81,9 +90,7 @@ class TestTrajsExplorationReport(unittest.TestCase):
 
         ter = exploration_report(0.3, 0.6, 0.3, 0.6, conv_accuracy=0.9)
         ter.record(model_devi)
-        self.assertEqual(ter.traj_cand, expected_cand)
-        self.assertEqual(ter.traj_accu, expected_accu)
-        self.assertEqual(ter.traj_fail, expected_fail)
+        self.check_record(ter, expected_cand, expected_accu, expected_fail)
 
         picked = ter.get_candidate_ids(2)
         npicked = 0
@@ -124,9 +131,7 @@ class TestTrajsExplorationReport(unittest.TestCase):
 
         ter = exploration_report(0.3, 0.6, 0.3, 0.6, conv_accuracy=0.2)
         ter.record(model_devi)
-        self.assertEqual(ter.traj_cand, expected_cand)
-        self.assertEqual(ter.traj_accu, expected_accu)
-        self.assertEqual(ter.traj_fail, expected_fail)
+        self.check_record(ter, expected_cand, expected_accu, expected_fail)
 
         picked = ter.get_candidate_ids(2)
         npicked = 0
@@ -164,9 +169,7 @@ class TestTrajsExplorationReport(unittest.TestCase):
 
         ter = exploration_report(0.3, 0.6, 0.3, 0.6, conv_accuracy=0.2)
         ter.record(model_devi)
-        self.assertEqual(ter.traj_cand, expected_cand)
-        self.assertEqual(ter.traj_accu, expected_accu)
-        self.assertEqual(ter.traj_fail, expected_fail)
+        self.check_record(ter, expected_cand, expected_accu, expected_fail)
 
         picked = ter.get_candidate_ids(10)
         npicked = 0
@@ -284,3 +287,124 @@ class TestTrajsExplorationReport(unittest.TestCase):
         ter = ExplorationReportTrustLevelsRandom(0.3, 0.6, 0.3, 0.6, conv_accuracy=0.2)
         ter.record(model_devi)
         self.assertTrue(ter.converged())
+
+
+def record_with_sets(md_f, md_v, level_f_lo, level_f_hi, level_v_lo, level_v_hi):
+    # the set based reference implementation
+    traj_accu, traj_cand, traj_fail = [], [], []
+    for ii in range(len(md_f)):
+        nframes = md_f[ii].shape[0]
+        set_f_accu = set(np.where(md_f[ii] < level_f_lo)[0])
+        set_f_fail = set(np.where(md_f[ii] >= level_f_hi)[0])
+        set_f_cand = set(range(nframes)) - set_f_accu - set_f_fail
+        if md_v[ii] is None:
+            set_v_accu, set_v_cand, set_v_fail = set(range(nframes)), set(), set()
+        else:
+            set_v_accu = set(np.where(md_v[ii] < level_v_lo)[0])
+            set_v_fail = set(np.where(md_v[ii] >= level_v_hi)[0])
+            set_v_cand = set(range(nframes)) - set_v_accu - set_v_fail
+        traj_accu.append(set_f_accu & set_v_accu)
+        traj_cand.append(
+            (set_f_cand & set_v_accu)
+            | (set_f_cand & set_v_cand)
+            | (set_f_accu & set_v_cand)
+        )
+        traj_fail.append(set_f_fail | set_v_fail)
+    return traj_accu, traj_cand, traj_fail
+
+
+class TestTrustLevelsRegression(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2024)
+        self.nframes = [0, 1, 37, 200, 5, 0, 64]
+        self.md_f = [rng.random(nn) for nn in self.nframes]
+        self.md_v = [rng.random(nn) for nn in self.nframes]
+
+    def make_model_devi(self, virial):
+        model_devi = DeviManagerStd()
+        for ii in range(len(self.nframes)):
+            model_devi.add(DeviManager.MAX_DEVI_F, self.md_f[ii])
+            if virial:
+                model_devi.add(DeviManager.MAX_DEVI_V, self.md_v[ii])
+        return model_devi
+
+    def test_record(self):
+        for virial in [True, False]:
+            md_v = self.md_v if virial else [None] * len(self.nframes)
+            traj_accu, traj_cand, traj_fail = record_with_sets(
+                self.md_f, md_v, 0.3, 0.6, 0.4, 0.8
+            )
+            expected_cand = [
+                (tt, ff) for tt, cc in enumerate(traj_cand) for ff in sorted(cc)
+            ]
+            for report in [
+                ExplorationReportTrustLevelsRandom,
+                ExplorationReportTrustLevelsMax,
+            ]:
+                ter = report(0.3, 0.6, 0.4, 0.8)
+                ter.record(self.make_model_devi(virial))
+                self.assertEqual(
+                    [tuple(ii) for ii in ter.cand_ids.tolist()], expected_cand
+                )
+                nframes = sum(self.nframes)
+                self.assertEqual(
+                    ter.accurate_ratio(), sum([len(ii) for ii in traj_accu]) / nframes
+                )
+                self.assertEqual(ter.candidate_ratio(), len(expected_cand) / nframes)
+                self.assertEqual(
+                    ter.failed_ratio(), sum([len(ii) for ii in traj_fail]) / nframes
+                )
+                self.assertEqual(
+                    ter.get_candidate_ids(), [sorted(ii) for ii in traj_cand]
+                )
+
+    def test_random_selection(self):
+        import random
+
+        _, traj_cand, _ = record_with_sets(self.md_f, self.md_v, 0.3, 0.6, 0.4, 0.8)
+        picked = [(tt, ff) for tt, cc in enumerate(traj_cand) for ff in sorted(cc)]
+        random.seed(1)
+        random.shuffle(picked)
+        expected = [[] for _ in self.nframes]
+        for tt, ff in sorted(picked[:10]):
+            expected[tt].append(ff)
+
+        ter = ExplorationReportTrustLevelsRandom(0.3, 0.6, 0.4, 0.8)
+        ter.record(self.make_model_devi(True))
+        random.seed(1)
+        self.assertEqual(ter.get_candidate_ids(10), expected)
+
+    def test_fps_selection(self):
+        _, traj_cand, _ = record_with_sets(self.md_f, self.md_v, 0.3, 0.6, 0.4, 0.8)
+        expected = [sorted(cc) for cc in traj_cand]
+
+        ter = ExplorationReportTrustLevelsRandom(
+            0.3, 0.6, 0.4, 0.8, candi_sel_prob="fps"
+        )
+        ter.record(self.make_model_devi(True))
+        # all the candidates, they are picked by the selector
+        self.assertTrue(ter.fps_candidates())
+        self.assertEqual(ter.get_candidate_ids(10), expected)
+
+    def test_max_selection(self):
+        _, traj_cand, _ = record_with_sets(self.md_f, self.md_v, 0.3, 0.6, 0.4, 0.8)
+        picked = [(tt, ff) for tt, cc in enumerate(traj_cand) for ff in sorted(cc)]
+        picked = sorted(picked, key=lambda x: self.md_f[x[0]][x[1]], reverse=True)
+        expected = [[] for _ in self.nframes]
+        for tt, ff in picked[:10]:
+            expected[tt].append(ff)
+
+        ter = ExplorationReportTrustLevelsMax(0.3, 0.6, 0.4, 0.8)
+        ter.record(self.make_model_devi(True))
+        self.assertEqual(ter.get_candidate_ids(10), expected)
+
+    def test_nframes_by_virial(self):
+        from dflow.python import (
+            FatalError,
+        )
+
+        model_devi = DeviManagerStd()
+        model_devi.add(DeviManager.MAX_DEVI_F, np.array([0.1, 0.5, 0.9]))
+        model_devi.add(DeviManager.MAX_DEVI_V, np.array([0.1, np.nan, 0.9]))
+        ter = ExplorationReportTrustLevelsRandom(0.3, 0.6, 0.3, 0.6)
+        self.assertRaises(FatalError, ter.record, model_devi)
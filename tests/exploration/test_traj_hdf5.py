@@ -0,0 +1,127 @@
+import os
+import shutil
+import unittest
+from io import (
+    StringIO,
+)
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.exploration.deviation import (
+    DeviManager,
+)
+from dpgen2.exploration.render import (
+    TrajRenderLammps,
+    lammps_dump_to_hdf5,
+    load_model_devi,
+    read_traj_hdf5,
+    write_model_devi_hdf5,
+    write_traj_hdf5,
+)
+
+# isort: on
+
+dump_frame = """ITEM: TIMESTEP
+%d
+ITEM: NUMBER OF ATOMS
+4
+ITEM: BOX BOUNDS xy xz yz pp pp pp
+-1.0 12.0 -1.0
+0.0 11.0 0.5
+0.0 10.0 0.0
+ITEM: ATOMS id type x y z
+2 1 1.83 2.56 2.18
+1 3 %.2f 2.74 0.20
+4 3 2.25 3.32 1.68
+3 1 5.00 6.00 7.00
+"""
+
+
+class TestTrajHDF5(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("traj_hdf5")
+        self.work_dir.mkdir(exist_ok=True)
+        self.nframes = 6
+        self.dump = "".join(
+            [dump_frame % (ii * 10, 1.0 + ii) for ii in range(self.nframes)]
+        )
+        self.dump_file = self.work_dir / "traj.dump"
+        self.dump_file.write_text(self.dump)
+        self.h5_file = self.work_dir / "traj.h5"
+        lammps_dump_to_hdf5(self.dump_file, self.h5_file, chunk_frames=4)
+        self.type_map = ["O", "H", "C"]
+
+    def tearDown(self):
+        if self.work_dir.is_dir():
+            shutil.rmtree(self.work_dir)
+
+    def check_system(self, ss, ref):
+        self.assertEqual(ss["atom_names"], ref["atom_names"])
+        self.assertEqual(ss["atom_numbs"], ref["atom_numbs"])
+        np.testing.assert_array_equal(ss["atom_types"], ref["atom_types"])
+        np.testing.assert_allclose(ss["coords"], ref["coords"])
+        np.testing.assert_allclose(ss["cells"], ref["cells"])
+
+    def test_read_selected(self):
+        for type_map in [None, self.type_map]:
+            ref = dpdata.System(self.dump_file, fmt="lammps/dump", type_map=type_map)
+            ss = read_traj_hdf5(self.h5_file, [5, 0, 3, 0], type_map=type_map)
+            self.check_system(ss, ref.sub_system([5, 0, 3, 0]))
+        self.assertRaises(IndexError, read_traj_hdf5, self.h5_file, [self.nframes])
+        self.assertRaises(IndexError, read_traj_hdf5, self.h5_file, [-1])
+
+    def test_write(self):
+        import h5py
+
+        rng = np.random.default_rng(0)
+        coords = rng.random((10, 4, 3))
+        cells = rng.random((10, 3, 3))
+        fname = self.work_dir / "foo.h5"
+        write_traj_hdf5(fname, coords, cells, [1, 0, 1, 1], chunk_frames=3)
+        with h5py.File(fname, "r") as f:
+            self.assertEqual(f["coords"].chunks, (3, 4, 3))
+            self.assertEqual(f["coords"].compression, "gzip")
+        ss = read_traj_hdf5(fname, [9, 2], type_map=["A", "B"])
+        self.assertEqual(ss["atom_numbs"], [1, 3])
+        np.testing.assert_array_equal(ss["coords"], coords[[9, 2]])
+        np.testing.assert_array_equal(ss["cells"], cells[[9, 2]])
+        with self.assertRaises(AssertionError):
+            write_traj_hdf5(fname, coords, cells, [1, 0, 1])
+
+    def test_model_devi(self):
+        rng = np.random.default_rng(0)
+        data = rng.random((self.nframes, 7))
+        fname = self.work_dir / "model_devi.h5"
+        write_model_devi_hdf5(fname, data)
+        np.testing.assert_array_equal(load_model_devi(fname), data)
+        write_model_devi_hdf5(fname, np.zeros((0, 7)))
+        self.assertEqual(load_model_devi(fname).shape, (0, 7))
+
+    def test_traj_render(self):
+        rng = np.random.default_rng(0)
+        data = rng.random((self.nframes, 7))
+        model_devi_file = self.work_dir / "model_devi.h5"
+        write_model_devi_hdf5(model_devi_file, data)
+        id_selected = [[4, 1], [], [2]]
+        for max_workers in [1, 2]:
+            traj_render = TrajRenderLammps(max_workers=max_workers)
+            model_devi = traj_render.get_model_devi([model_devi_file] * 3)
+            np.testing.assert_array_equal(
+                model_devi.get(DeviManager.MAX_DEVI_F)[2], data[:, 4]
+            )
+            ms = traj_render.get_confs(
+                [self.h5_file] * 3, id_selected, type_map=self.type_map
+            )
+            ref = traj_render.get_confs(
+                [self.dump_file] * 3, id_selected, type_map=self.type_map
+            )
+            self.assertEqual(len(ms), 1)
+            self.check_system(ms[0], ref[0])
@@ -1,6 +1,13 @@
 import json
 import os
+import textwrap
 import unittest
+from io import (
+    StringIO,
+)
+from pathlib import (
+    Path,
+)
 
 import dpdata
 import numpy as np
@@ -10,6 +17,11 @@ from .context import (
     dpgen2,
 )
 from dpgen2.exploration.render import TrajRenderLammps
+from dpgen2.exploration.render import (
+    get_dump_frame_offsets,
+    read_dump_frames,
+    select_dump_frames,
+)
 
 # isort: on
 
@@ -60,3 +72,117 @@ class TestTrajRenderLammps(unittest.TestCase):
     def tearDown(self):
         if os.path.exists("job.json"):
             os.remove("job.json")
+
+
+dump_frame = """ITEM: TIMESTEP
+%d
+ITEM: NUMBER OF ATOMS
+3
+ITEM: BOX BOUNDS xy xz yz pp pp pp
+0.0000000000000000e+00 1.2444699999999999e+01 0.0000000000000000e+00
+0.0000000000000000e+00 1.2444699999999999e+01 0.0000000000000000e+00
+0.0000000000000000e+00 1.2444699999999999e+01 0.0000000000000000e+00
+ITEM: ATOMS id type x y z fx fy fz
+1 2 11.09 %.2f 2.74 0.183043 -0.287677 -0.0974527
+2 1 11.83 2.56 2.18 -0.224674 0.5841 0.074659
+3 2 12.25 3.32 1.68 0.0416311 -0.296424 0.0227936
+"""
+
+
+class TestDumpFrameIndex(unittest.TestCase):
+    def setUp(self):
+        self.nframes = 5
+        self.dump = "".join(
+            [dump_frame % (ii * 10, 2.0 + ii) for ii in range(self.nframes)]
+        )
+        self.fname = Path("traj.dump")
+        self.fname.write_text(self.dump)
+        self.type_map = ["O", "H"]
+
+    def tearDown(self):
+        for ii in [self.fname, Path("job.json")]:
+            if ii.is_file():
+                os.remove(ii)
+
+    def test_offsets(self):
+        offsets = get_dump_frame_offsets(self.fname)
+        self.assertEqual(offsets.shape, (self.nframes + 1,))
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(offsets[-1], len(self.dump))
+        for ii in range(self.nframes):
+            self.assertEqual(
+                self.dump[offsets[ii] : offsets[ii + 1]],
+                dump_frame % (ii * 10, 2.0 + ii),
+            )
+        # the index is refreshed when the file changes
+        self.fname.write_text(self.dump + dump_frame % (50, 7.0))
+        self.assertEqual(get_dump_frame_offsets(self.fname).shape, (self.nframes + 2,))
+
+    def test_read_frames(self):
+        expected = dump_frame % (30, 5.0) + dump_frame % (10, 3.0)
+        self.assertEqual(read_dump_frames(self.fname, [3, 1]), expected)
+        self.assertEqual(select_dump_frames(self.dump, [3, 1]), expected)
+        self.assertEqual(read_dump_frames(self.fname, []), "")
+        self.assertRaises(IndexError, read_dump_frames, self.fname, [self.nframes])
+        self.assertRaises(IndexError, select_dump_frames, self.dump, [-1])
+
+    def test_get_confs(self):
+        with open("job.json", "w") as f:
+            json.dump({"ele_temp": 6.6}, f)
+        traj_render = TrajRenderLammps(use_ele_temp=1)
+        id_selected = [[4, 0, 2], [], [1]]
+        ms = traj_render.get_confs(
+            [self.fname, self.fname, self.fname],
+            id_selected,
+            type_map=self.type_map,
+            optional_outputs=[Path("job.json")] * 3,
+        )
+        ref = dpdata.System(self.fname, fmt="lammps/dump", type_map=self.type_map)
+        ref = ref.sub_system([4, 0, 2, 1])
+        self.assertEqual(len(ms), 1)
+        np.testing.assert_allclose(ms[0]["coords"], ref["coords"])
+        np.testing.assert_allclose(ms[0]["cells"], ref["cells"])
+        np.testing.assert_array_equal(ms[0]["atom_types"], ref["atom_types"])
+        np.testing.assert_allclose(ms[0].data["fparam"], [[6.6]] * 4)
+
+    def test_get_confs_parallel(self):
+        with open("job.json", "w") as f:
+            json.dump({"ele_temp": 6.6}, f)
+        id_selected = [[4, 0], [], [1], [3, 2, 1], [0]]
+        ms = [
+            TrajRenderLammps(use_ele_temp=1, max_workers=max_workers).get_confs(
+                [self.fname] * 5,
+                id_selected,
+                type_map=self.type_map,
+                optional_outputs=[Path("job.json")] * 5,
+            )
+            for max_workers in [1, 2]
+        ]
+        ref = dpdata.System(self.fname, fmt="lammps/dump", type_map=self.type_map)
+        ref = ref.sub_system([4, 0, 1, 3, 2, 1, 0])
+        for mm in ms:
+            self.assertEqual(len(mm), 1)
+            np.testing.assert_allclose(mm[0]["coords"], ref["coords"])
+            np.testing.assert_allclose(mm[0]["cells"], ref["cells"])
+            np.testing.assert_allclose(mm[0].data["fparam"], [[6.6]] * 7)
+
+    def test_get_confs_hdf5(self):
+        class FakedHDF5Dataset:
+            def __init__(self, data):
+                self.data = data
+
+            def get_data(self):
+                return self.data
+
+        import dpgen2.exploration.render.traj_render_lammps as trl
+
+        orig = trl.HDF5Dataset
+        trl.HDF5Dataset = FakedHDF5Dataset
+        try:
+            ms = TrajRenderLammps().get_confs(
+                [FakedHDF5Dataset(self.dump)], [[3, 1]], type_map=self.type_map
+            )
+        finally:
+            trl.HDF5Dataset = orig
+        ref = dpdata.System(self.fname, fmt="lammps/dump", type_map=self.type_map)
+        np.testing.assert_allclose(ms[0]["coords"], ref.sub_system([3, 1])["coords"])
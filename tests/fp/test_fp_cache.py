@@ -0,0 +1,296 @@
+import json
+import os
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+from dflow.python import (
+    OPIO,
+)
+from fake_data_set import (
+    fake_multi_sys,
+)
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.constants import (
+    fp_cache_key_name,
+    fp_cache_record_name,
+    fp_shared_input_dir,
+    fp_task_pattern,
+)
+from dpgen2.fp import (
+    FpOpAbacusInputs,
+    FpOpCp2kInputs,
+    PrepFpOpAbacus,
+    PrepFpOpCp2k,
+)
+from dpgen2.fp.fp_cache import (
+    FpCache,
+    fp_cache_key,
+    fp_cache_stats,
+    read_fp_cache_key,
+    run_with_fp_cache,
+    write_fp_cache_keys,
+)
+from dpgen2.fp.vasp import (
+    PrepVasp,
+    VaspInputs,
+)
+
+# isort: on
+
+
+def make_frame(atom_names, atom_types, coords, cells, nopbc=False):
+    return dpdata.System(
+        data={
+            "atom_names": atom_names,
+            "atom_numbs": np.bincount(atom_types, minlength=len(atom_names)).tolist(),
+            "atom_types": np.array(atom_types),
+            "cells": np.reshape(cells, [1, 3, 3]),
+            "coords": np.reshape(coords, [1, -1, 3]),
+            "orig": np.zeros(3),
+            "nopbc": nopbc,
+        }
+    )
+
+
+class TestFpCacheKey(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.coords = rng.random((3, 3))
+        self.cells = np.eye(3) * 5.0
+        self.frame = make_frame(["H", "O"], [1, 0, 0], self.coords, self.cells)
+        self.inputs = {"incar": "ENCUT = 500", "kspacing": 0.2}
+
+    def test_canonical(self):
+        key = fp_cache_key(self.frame, self.inputs, decimals=4)
+        # the same atoms with another type map
+        frame = make_frame(["O", "H"], [0, 1, 1], self.coords, self.cells)
+        self.assertEqual(fp_cache_key(frame, self.inputs, decimals=4), key)
+        # a perturbation below the tolerance
+        frame = make_frame(["H", "O"], [1, 0, 0], self.coords + 1e-7, self.cells)
+        self.assertEqual(fp_cache_key(frame, self.inputs, decimals=4), key)
+        # negative zero
+        coords = np.zeros((3, 3))
+        ref = fp_cache_key(make_frame(["H", "O"], [1, 0, 0], coords, self.cells), {})
+        coords[0, 0] = -0.0
+        ret = fp_cache_key(make_frame(["H", "O"], [1, 0, 0], coords, self.cells), {})
+        self.assertEqual(ret, ref)
+        # the cells do not matter without pbc
+        ref = fp_cache_key(
+            make_frame(["H", "O"], [1, 0, 0], self.coords, self.cells, nopbc=True), {}
+        )
+        ret = fp_cache_key(
+            make_frame(["H", "O"], [1, 0, 0], self.coords, self.cells * 2, nopbc=True),
+            {},
+        )
+        self.assertEqual(ret, ref)
+
+    def test_different(self):
+        key = fp_cache_key(self.frame, self.inputs, decimals=4)
+        frame = make_frame(["H", "O"], [1, 0, 0], self.coords + 1e-3, self.cells)
+        self.assertNotEqual(fp_cache_key(frame, self.inputs, decimals=4), key)
+        frame = make_frame(["H", "O"], [0, 1, 0], self.coords, self.cells)
+        self.assertNotEqual(fp_cache_key(frame, self.inputs, decimals=4), key)
+        frame = make_frame(["H", "O"], [1, 0, 0], self.coords, self.cells * 1.01)
+        self.assertNotEqual(fp_cache_key(frame, self.inputs, decimals=4), key)
+        inputs = {"incar": "ENCUT = 600", "kspacing": 0.2}
+        self.assertNotEqual(fp_cache_key(self.frame, inputs, decimals=4), key)
+        self.assertRaises(
+            AssertionError,
+            fp_cache_key,
+            self.frame.sub_system([0, 0]),
+            self.inputs,
+        )
+
+
+class TestFpCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = Path("fp_cache")
+        self.task_path = Path("task_path")
+        self.task_path.mkdir()
+        (self.task_path / fp_cache_key_name).write_text("abc\n")
+        self.nruns = 0
+
+    def tearDown(self):
+        for ii in [self.cache_dir, self.task_path, Path("work.0"), Path("work.1")]:
+            if ii.is_dir():
+                shutil.rmtree(ii)
+
+    def run_task(self, work_dir):
+        def run():
+            self.nruns += 1
+            (work_dir / "out").mkdir(parents=True)
+            (work_dir / "out" / "energy.npy").write_text("energy")
+            (work_dir / "log").write_text("log")
+            return work_dir / "out", work_dir / "log"
+
+        return run
+
+    def test_run(self):
+        config = {"cache_dir": str(self.cache_dir)}
+        records = []
+        for ii in range(2):
+            work_dir = Path(f"work.{ii}")
+            with self.assertLogs(level="INFO") as logs:
+                labeled_data, log, record = run_with_fp_cache(
+                    config,
+                    self.task_path,
+                    work_dir,
+                    "out",
+                    "log",
+                    self.run_task(work_dir),
+                )
+            self.assertIn(
+                f"fp cache {'hit' if ii else 'miss'} of task task_path, key abc",
+                logs.output[0],
+            )
+            self.assertEqual(labeled_data, work_dir / "out")
+            self.assertEqual(log, work_dir / "log")
+            self.assertEqual((labeled_data / "energy.npy").read_text(), "energy")
+            self.assertEqual(log.read_text(), "log")
+            self.assertEqual(record, [work_dir / fp_cache_record_name])
+            records += record
+        self.assertEqual(self.nruns, 1)
+        self.assertEqual(os.listdir(self.cache_dir), ["abc"])
+        self.assertEqual(
+            fp_cache_stats(records + [Path("foo")]),
+            {"hits": 1, "misses": 1, "hit_ratio": 0.5},
+        )
+
+    def test_disabled(self):
+        work_dir = Path("work.0")
+        # no cache dir
+        _, _, record = run_with_fp_cache(
+            {}, self.task_path, work_dir, "out", "log", self.run_task(work_dir)
+        )
+        self.assertEqual(record, [])
+        shutil.rmtree(work_dir)
+        # no key
+        os.remove(self.task_path / fp_cache_key_name)
+        _, _, record = run_with_fp_cache(
+            {"cache_dir": str(self.cache_dir)},
+            self.task_path,
+            work_dir,
+            "out",
+            "log",
+            self.run_task(work_dir),
+        )
+        self.assertEqual(record, [])
+        self.assertEqual(self.nruns, 2)
+        self.assertFalse(self.cache_dir.exists())
+
+    def test_store_existing(self):
+        cache = FpCache(self.cache_dir)
+        work_dir = Path("work.0")
+        self.run_task(work_dir)()
+        cache.store("abc", work_dir / "out", work_dir / "log")
+        (work_dir / "out" / "energy.npy").write_text("other")
+        cache.store("abc", work_dir / "out")
+        self.assertTrue(
+            cache.fetch("abc", Path("work.1") / "out", Path("work.1") / "log")
+        )
+        self.assertEqual((Path("work.1") / "out" / "energy.npy").read_text(), "energy")
+        self.assertFalse(
+            cache.fetch("def", Path("work.1") / "foo", Path("work.1") / "bar")
+        )
+        self.assertEqual(os.listdir(self.cache_dir), ["abc"])
+
+    def test_fetch_existing(self):
+        cache = FpCache(self.cache_dir)
+        work_dir = Path("work.0")
+        self.run_task(work_dir)()
+        cache.store("abc", work_dir / "out", work_dir / "log")
+        # the partial outputs of an earlier attempt
+        out = Path("work.1") / "out"
+        out.mkdir(parents=True)
+        (out / "energy.npy").write_text("partial")
+        (out / "stale.npy").write_text("stale")
+        self.assertTrue(cache.fetch("abc", out, Path("work.1") / "log"))
+        self.assertEqual((out / "energy.npy").read_text(), "energy")
+        self.assertFalse((out / "stale.npy").exists())
+
+
+class TestPrepVaspCacheKey(unittest.TestCase):
+    def setUp(self):
+        Path("template.incar").write_text("foo")
+        Path("POTCAR_H").write_text("bar H\n")
+        ms = fake_multi_sys([2, 3], [4, 3], "H")
+        ms.to_deepmd_npy("data-0")
+        self.nframes = 5
+
+    def tearDown(self):
+        for ii in ["template.incar", "POTCAR_H"]:
+            os.remove(ii)
+        shutil.rmtree("data-0")
+        if Path(fp_shared_input_dir).is_dir():
+            shutil.rmtree(fp_shared_input_dir)
+        for ii in range(self.nframes):
+            if Path(fp_task_pattern % ii).is_dir():
+                shutil.rmtree(fp_task_pattern % ii)
+
+    def test_keys(self):
+        vi = VaspInputs(0.1, "template.incar", {"H": "POTCAR_H"}, True)
+        config = {"inputs": vi}
+        ip = OPIO({"config": config, "confs": [Path("data-0")], "type_map": ["H"]})
+        opout = PrepVasp().execute(ip)
+        for pp in opout["task_paths"]:
+            self.assertIsNone(read_fp_cache_key(pp))
+        config["cache_dir"] = "fp_cache"
+        opout = PrepVasp().execute(ip)
+        keys = [read_fp_cache_key(pp) for pp in opout["task_paths"]]
+        # the fake frames of the same system are the same
+        self.assertEqual(len(set(keys)), 2)
+        ms = dpdata.MultiSystems(type_map=["H"])
+        ms.from_deepmd_npy("data-0", labeled=False)
+        self.assertEqual(keys[0], fp_cache_key(ms[0][0], vi))
+
+
+class TestFpOpCacheKeys(unittest.TestCase):
+    def setUp(self):
+        self.data_path = Path(__file__).parent
+        ss = dpdata.System(self.data_path / "data.abacus" / "sys-2", fmt="deepmd/npy")
+        ss.to_deepmd_npy("fp_conf_0")
+        ss.data["coords"] = ss["coords"] + 0.5
+        ss.to_deepmd_npy("fp_conf_1")
+        self.confs = [Path("fp_conf_0"), Path("fp_conf_1")]
+
+    def tearDown(self):
+        for ii in ["fp_conf_0", "fp_conf_1", "output"]:
+            if Path(ii).is_dir():
+                shutil.rmtree(ii)
+        for ii in range(2):
+            if Path(fp_task_pattern % ii).is_dir():
+                shutil.rmtree(fp_task_pattern % ii)
+
+    def check_keys(self, op, inputs, conf_name, conf_fmt):
+        config = {"inputs": inputs, "cache_dir": "fp_cache"}
+        ip = OPIO({"config": config, "confs": self.confs, "type_map": ["Na"]})
+        opout = op.execute(ip)
+        keys = [read_fp_cache_key(pp) for pp in opout["task_paths"]]
+        for conf, key in zip(self.confs, keys):
+            ss = dpdata.System(conf, fmt="deepmd/npy")
+            self.assertEqual(key, fp_cache_key(ss, inputs))
+        # the keys are not written to the tasks of other frames
+        with self.assertRaises(AssertionError):
+            write_fp_cache_keys(
+                opout["task_paths"][::-1], self.confs, inputs, conf_name, conf_fmt
+            )
+
+    def test_abacus(self):
+        inputs = FpOpAbacusInputs(
+            self.data_path / "data.abacus" / "INPUT",
+            {"Na": self.data_path / "data.abacus" / "Na_ONCV_PBE-1.0.upf"},
+        )
+        self.check_keys(PrepFpOpAbacus(), inputs, "STRU", "abacus/stru")
+
+    def test_cp2k(self):
+        inputs = FpOpCp2kInputs(self.data_path / "data.cp2k" / "input.inp")
+        self.check_keys(PrepFpOpCp2k(), inputs, "POSCAR", "vasp/poscar")
@@ -29,6 +29,7 @@ from .context import (
     dpgen2,
 )
 from dpgen2.constants import (
+    fp_shared_input_dir,
     fp_task_pattern,
 )
 from dpgen2.fp.vasp import (
@@ -77,6 +78,8 @@ class TestPrepVasp(unittest.TestCase):
             tname = Path(fp_task_pattern % ii)
             if tname.is_dir():
                 shutil.rmtree(tname)
+        if Path(fp_shared_input_dir).is_dir():
+            shutil.rmtree(fp_shared_input_dir)
 
     def check_sys(self, ss0, ss1):
         self.assertEqual(ss0["atom_numbs"], ss1["atom_numbs"])
@@ -147,3 +150,77 @@ Gamma
         self.assertEqual(sys_record_1[2], 2)
         self.assertEqual(sys_record_1[3], 4)
         self.assertEqual(sys_record_1[5], 3)
+
+    def test_parallel(self):
+        iincar = "template.incar"
+        ipotcar = {"H": "POTCAR_H", "O": "POTCAR_O"}
+        vi = VaspInputs(0.1, iincar, ipotcar, True)
+        tot_f = sum(self.nframes_0) + sum(self.nframes_1)
+        contents = []
+        for max_workers in [1, 2]:
+            opout = PrepVasp().execute(
+                OPIO(
+                    {
+                        "config": {"inputs": vi, "prep_max_workers": max_workers},
+                        "confs": self.confs,
+                        "type_map": self.type_map,
+                    }
+                )
+            )
+            self.assertEqual(
+                opout["task_names"], [fp_task_pattern % ii for ii in range(tot_f)]
+            )
+            contents.append(
+                [
+                    [
+                        (pp / ff).read_text()
+                        for ff in [
+                            vasp_conf_name,
+                            vasp_input_name,
+                            vasp_pot_name,
+                            vasp_kp_name,
+                        ]
+                    ]
+                    for pp in opout["task_paths"]
+                ]
+            )
+            # the shared inputs are hard-linked
+            for pp in opout["task_paths"]:
+                self.assertGreater(os.stat(pp / vasp_pot_name).st_nlink, 1)
+                self.assertGreater(os.stat(pp / vasp_input_name).st_nlink, 1)
+            for ii in range(tot_f):
+                shutil.rmtree(fp_task_pattern % ii)
+        self.assertEqual(contents[0], contents[1])
+        self.assertEqual(contents[0][0][2], "bar O\n")
+        self.assertEqual(contents[0][-1][2], "bar H\n")
+        # the shared files are named by the keys and the content hashes
+        self.assertEqual(
+            sorted([nn.rsplit(".", 1)[0] for nn in os.listdir(fp_shared_input_dir)]),
+            ["INCAR", "POTCAR.H", "POTCAR.O"],
+        )
+
+    def test_shared_changed_inputs(self):
+        ipotcar = {"H": "POTCAR_H", "O": "POTCAR_O"}
+        for incar, potcar_h in [("foo", "bar H\n"), ("baz", "qux H\n")]:
+            Path("template.incar").write_text(incar)
+            Path("POTCAR_H").write_text(potcar_h)
+            vi = VaspInputs(0.1, "template.incar", ipotcar, True)
+            opout = PrepVasp().execute(
+                OPIO(
+                    {
+                        "config": {"inputs": vi},
+                        "confs": self.confs,
+                        "type_map": self.type_map,
+                    }
+                )
+            )
+            # the files shared by the earlier execution are not reused
+            for pp in opout["task_paths"]:
+                self.assertEqual((pp / vasp_input_name).read_text(), incar)
+            self.assertEqual(
+                (opout["task_paths"][-1] / vasp_pot_name).read_text(), potcar_h
+            )
+            self.assertEqual(
+                (opout["task_paths"][0] / vasp_pot_name).read_text(), "bar O\n"
+            )
+        self.assertEqual(len(os.listdir(fp_shared_input_dir)), 5)
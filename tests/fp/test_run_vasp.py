@@ -24,6 +24,7 @@ from .context import (
     dpgen2,
 )
 from dpgen2.constants import (
+    fp_cache_key_name,
     fp_default_log_name,
     fp_default_out_data_name,
 )
@@ -55,6 +56,59 @@ class TestRunVasp(unittest.TestCase):
             shutil.rmtree("task")
         if Path(self.task_name).is_dir():
             shutil.rmtree(self.task_name)
+        if Path("fp_cache").is_dir():
+            shutil.rmtree("fp_cache")
+
+    @patch("dpgen2.fp.vasp.run_command")
+    def test_cache(self, mocked_run):
+        mocked_run.side_effect = [(0, "foo\n", "")]
+        (self.task_path / fp_cache_key_name).write_text("abc")
+        op = RunVasp()
+
+        def new_to(obj, foo, bar):
+            data_path = Path("data")
+            data_path.mkdir()
+            (data_path / "foo").write_text("bar")
+
+        def new_init(obj, foo):
+            pass
+
+        records = []
+        for ii in range(2):
+            with mock.patch.object(
+                dpgen2.fp.vasp.dpdata.LabeledSystem, "to", new=new_to
+            ):
+                with mock.patch.object(
+                    dpgen2.fp.vasp.dpdata.LabeledSystem, "__init__", new=new_init
+                ):
+                    out = op.execute(
+                        OPIO(
+                            {
+                                "config": {
+                                    "run": {
+                                        "command": "myvasp",
+                                        "log": "foo.log",
+                                        "out": "data",
+                                    },
+                                    "extra_output_files": [],
+                                    "cache_dir": "fp_cache",
+                                },
+                                "task_name": self.task_name,
+                                "task_path": self.task_path,
+                            }
+                        )
+                    )
+            work_dir = Path(self.task_name)
+            self.assertEqual(out["labeled_data"], work_dir / "data")
+            self.assertEqual((work_dir / "data" / "foo").read_text(), "bar")
+            records.append(out["extra_outputs"][0].read_text())
+            shutil.rmtree(work_dir)
+        # vasp runs once
+        self.assertEqual(mocked_run.call_count, 1)
+        self.assertEqual(
+            [json.loads(ii)["hit"] for ii in records],
+            [False, True],
+        )
 
     @patch("dpgen2.fp.vasp.run_command")
     def test_success(self, mocked_run):
@@ -0,0 +1 @@
+pb
\ No newline at end of file
@@ -1,4 +1,5 @@
 import json
+import os
 import shutil
 import unittest
 from pathlib import (
@@ -37,6 +38,11 @@ from dpgen2.constants import (
 )
 from dpgen2.op.collect_data import (
     CollectData,
+    collect_deepmd_npy,
+)
+from dpgen2.utils import (
+    read_data_manifest,
+    setup_ele_temp,
 )
 
 # isort: on
@@ -68,10 +74,36 @@ class TestRunLmp(unittest.TestCase):
         for ii in ["iter0", "iter1"]:
             if Path(ii).is_dir():
                 shutil.rmtree(ii)
-        for ii in ["data0", "data1"]:
+        for ii in ["data0", "data1", "fp_extra"]:
             if Path(ii).is_dir():
                 shutil.rmtree(ii)
 
+    def test_fp_cache_stats(self):
+        records = []
+        for ii, hit in enumerate([True, False, True]):
+            task = Path("fp_extra") / f"task.{ii:06d}"
+            task.mkdir(parents=True)
+            records.append(task / "fp_cache.json")
+            records[-1].write_text(json.dumps({"key": str(ii), "hit": hit}))
+        records.append(Path("fp_extra") / "task.000000" / "OUTCAR")
+        records[-1].write_text("foo")
+        op = CollectData()
+        with self.assertLogs(level="INFO") as logs:
+            op.execute(
+                OPIO(
+                    {
+                        "name": "iter1",
+                        "type_map": ["bar", "foo"],
+                        "iter_data": self.iter_data,
+                        "labeled_data": self.labeled_data,
+                        "fp_extra_outputs": records,
+                    }
+                )
+            )
+        self.assertIn(
+            "fp cache of iter1: 2 hits, 1 misses, hit ratio 0.6667", logs.output[-1]
+        )
+
     def test_success(self):
         op = CollectData()
         self.type_map = ["bar", "foo"]
@@ -97,6 +129,12 @@ class TestRunLmp(unittest.TestCase):
         self.assertEqual(sorted(ms.systems.keys()), ["bar0foo1", "bar0foo2"])
         self.assertEqual(ms.systems["bar0foo1"].get_nframes(), 3)
         self.assertEqual(ms.systems["bar0foo2"].get_nframes(), 4)
+        manifest = read_data_manifest(out["iter_data"][1])
+        self.assertEqual(manifest["nframes"], 11)
+        self.assertEqual(manifest["systems"]["bar3foo0"]["natoms"], 3)
+        self.assertEqual(
+            manifest["systems"]["bar4foo0"]["atom_numbs"], {"bar": 4, "foo": 0}
+        )
 
     def test_success_other_type(self):
         op = CollectData()
@@ -153,3 +191,79 @@ class TestRunLmpEmpty(unittest.TestCase):
         ms = dpdata.MultiSystems(type_map=self.type_map)
         ms.from_deepmd_npy(out["iter_data"][0])
         self.assertEqual(ms.get_nframes(), 0)
+
+
+def random_labeled_system(rng, nframes, atom_names, atom_types):
+    natoms = len(atom_types)
+    ss = dpdata.LabeledSystem(
+        data={
+            "atom_names": atom_names,
+            "atom_numbs": np.bincount(atom_types, minlength=len(atom_names)).tolist(),
+            "atom_types": np.array(atom_types),
+            "orig": np.zeros(3),
+            "cells": rng.random((nframes, 3, 3)),
+            "coords": rng.random((nframes, natoms, 3)),
+            "energies": rng.random(nframes),
+            "forces": rng.random((nframes, natoms, 3)),
+            "virials": rng.random((nframes, 3, 3)),
+        }
+    )
+    ss.data["fparam"] = rng.random((nframes, 1))
+    return ss
+
+
+class TestCollectDeepmdNpy(unittest.TestCase):
+    def setUp(self):
+        setup_ele_temp(False)
+        rng = np.random.default_rng(0)
+        self.type_map = ["H", "O", "C"]
+        systems = [
+            random_labeled_system(rng, 2, ["O", "H"], [0, 1, 1]),
+            random_labeled_system(rng, 1, ["H", "O"], [0, 1, 0]),
+            random_labeled_system(rng, 3, ["C", "H"], [1, 0, 1, 1, 1]),
+            random_labeled_system(rng, 1, ["O", "H"], [0, 1, 1]),
+        ]
+        self.labeled_data = []
+        for ii, ss in enumerate(systems):
+            self.labeled_data.append(Path(f"labeled.{ii:03d}"))
+            ss.to_deepmd_npy(self.labeled_data[-1])
+
+    def tearDown(self):
+        for ii in self.labeled_data + [Path("collected"), Path("ref")]:
+            if ii.is_dir():
+                shutil.rmtree(ii)
+
+    def test_same_as_dpdata(self):
+        formulas = collect_deepmd_npy(
+            self.labeled_data + [None], self.type_map, Path("collected")
+        )
+        self.assertEqual(formulas, ["H2O1C0", "H4O0C1"])
+        ref = dpdata.MultiSystems(type_map=self.type_map)
+        for ii in self.labeled_data:
+            ref.append(dpdata.LabeledSystem(ii, fmt="deepmd/npy"))
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.from_deepmd_npy("collected", labeled=True)
+        self.assertEqual(sorted(ms.systems.keys()), sorted(ref.systems.keys()))
+        for kk in ref.systems.keys():
+            self.assertEqual(
+                sorted(Path("collected", kk).glob("set.*")),
+                [Path("collected", kk, "set.000")],
+            )
+            for dd in [
+                "atom_types",
+                "cells",
+                "coords",
+                "energies",
+                "forces",
+                "virials",
+                "fparam",
+            ]:
+                np.testing.assert_array_equal(
+                    np.asarray(ms[kk][dd]).reshape(ref[kk][dd].shape),
+                    ref[kk][dd],
+                )
+
+    def test_inconsistent_data(self):
+        os.remove(self.labeled_data[3] / "set.000" / "virial.npy")
+        with self.assertRaises(RuntimeError):
+            collect_deepmd_npy(self.labeled_data, self.type_map, Path("collected"))
@@ -0,0 +1,93 @@
+import os
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+from dflow.python import (
+    OPIO,
+    TransientError,
+)
+from mock import (
+    patch,
+)
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.constants import (
+    pytorch_model_name_pattern,
+)
+from dpgen2.op.freeze_models import (
+    FreezeModels,
+)
+
+# isort: on
+
+
+def fake_freeze(cmd, shell=False):
+    fields = cmd.split()
+    Path(fields[fields.index("-o") + 1]).write_text(cmd)
+    return 0, "", ""
+
+
+class TestFreezeModels(unittest.TestCase):
+    def setUp(self):
+        self.model_path = Path("models")
+        self.model_path.mkdir()
+        self.models = [self.model_path / f"model_{ii}.pt" for ii in range(3)]
+        for idx, ii in enumerate(self.models):
+            ii.write_text(f"model{idx}")
+        self.pb_model = self.model_path / "model.pb"
+        self.pb_model.write_text("pb")
+        self.cache_dir = Path("model_cache")
+        self.env = patch.dict(os.environ, {"DPGEN2_MODEL_CACHE_DIR": "model_cache"})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        for ii in [self.model_path, self.cache_dir]:
+            if ii.is_dir():
+                shutil.rmtree(ii)
+        for ii in range(4):
+            if Path(pytorch_model_name_pattern % ii).is_file():
+                os.remove(pytorch_model_name_pattern % ii)
+
+    @patch("dpgen2.op.run_lmp.run_command")
+    def test_freeze(self, mocked_run):
+        mocked_run.side_effect = fake_freeze
+        out = FreezeModels().execute(
+            OPIO(
+                {
+                    "config": {"model_frozen_head": "foo"},
+                    "models": self.models + [self.pb_model],
+                }
+            )
+        )
+        self.assertEqual(
+            out["models"],
+            [Path(pytorch_model_name_pattern % ii) for ii in range(3)]
+            + [self.pb_model],
+        )
+        self.assertEqual(mocked_run.call_count, 3)
+        for ii in range(3):
+            self.assertEqual(
+                out["models"][ii].read_text().split()[:5],
+                ["dp", "--pt", "freeze", "-c", str(self.models[ii])],
+            )
+            self.assertTrue(out["models"][ii].read_text().endswith("--head foo"))
+
+    @patch("dpgen2.op.run_lmp.run_command")
+    def test_freeze_failed(self, mocked_run):
+        mocked_run.side_effect = [(1, "", "error")]
+        with self.assertRaises(TransientError):
+            FreezeModels().execute(
+                OPIO(
+                    {
+                        "config": {},
+                        "models": self.models,
+                    }
+                )
+            )
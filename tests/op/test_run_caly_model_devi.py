@@ -1,5 +1,7 @@
 import os
 import shutil
+import sys
+import types
 import unittest
 from pathlib import (
     Path,
@@ -33,7 +35,11 @@ from dpgen2.constants import (
 from dpgen2.op.run_caly_model_devi import (
     RunCalyModelDevi,
     atoms2lmpdump,
+    calc_batched_model_devi,
+    frames2lmpdump,
     parse_traj,
+    to_lmp_frames,
+    traj2lmpdump,
 )
 from dpgen2.utils import (
     BinaryFileInput,
@@ -287,7 +293,7 @@ ITEM: ATOMS id type x y z fx fy fz
         mocked_run_1.side_effect = side_effect_1
 
         def side_effect_2(*args, **kwargs):
-            return [[1, 1, 1, 1, 1, 1, 1, 1]]
+            return np.ones((len(args[0]), 8))
 
         mocked_run_2.side_effect = side_effect_2
 
@@ -335,3 +341,141 @@ ITEM: ATOMS id type x y z fx fy fz
         self.assertTrue(
             self.task_name / "model_devi.7.out" in out["model_devi"],
         )
+
+    def test_03_batched(self):
+        calls = []
+
+        def fake_calc_model_devi(coord, cell, atype, graphs):
+            calls.append(coord.shape[0])
+            devi = np.zeros((coord.shape[0], 8))
+            devi[:, 1] = len(atype)
+            devi[:, 4] = coord.sum(axis=1)
+            return devi
+
+        fake_infer = types.ModuleType("deepmd.infer")
+        fake_infer.DeepPot = lambda model: str(model)
+        fake_infer.calc_model_devi = fake_calc_model_devi
+        with patch.dict(
+            sys.modules,
+            {"deepmd": types.ModuleType("deepmd"), "deepmd.infer": fake_infer},
+        ):
+            op = RunCalyModelDevi()
+            out = op.execute(
+                OPIO(
+                    {
+                        "type_map": self.type_map,
+                        "task_name": str(self.task_name),
+                        "traj_dirs": [self.work_dir],
+                        "models": self.models,
+                    }
+                )
+            )
+        # one batch for each composition
+        self.assertEqual(len(calls), 3)
+        nframes = sum(np.loadtxt(ii, ndmin=2).shape[0] for ii in out["model_devi"])
+        self.assertEqual(sum(calls), nframes)
+        # the model deviations are in the order of the dumped frames
+        self.assertEqual(len(out["model_devi"]), 8)
+        for dump, devi in zip(out["traj"], out["model_devi"]):
+            devi = np.loadtxt(devi, ndmin=2)
+            frames = dump.read_text().split("ITEM: TIMESTEP\n")[1:]
+            self.assertEqual(devi.shape[0], len(frames))
+            for ii, frame in enumerate(frames):
+                atoms = frame.split("fx fy fz\n")[1].strip().split("\n")
+                coord = np.array([aa.split()[2:5] for aa in atoms], dtype=float)
+                self.assertEqual(devi[ii, 0], ii)
+                self.assertEqual(devi[ii, 1], len(atoms))
+                self.assertAlmostEqual(devi[ii, 4], coord.sum(), places=6)
+
+    def test_04_calc_batched_model_devi(self):
+        frames = [self.atoms_normal_3, self.atoms_normal_1] * 3
+        frames[2] = self.atoms_normal_4
+        frames = [atoms.copy() for atoms in frames]
+        for atoms in frames:
+            atoms.set_pbc(True)
+        frames[4] = self.atoms_normal_5
+
+        def fake_calc_model_devi(coord, cell, atype, graphs):
+            devi = np.zeros((coord.shape[0], 8))
+            devi[:, 1] = coord.sum(axis=1)
+            devi[:, 2] = -1.0 if cell is None else cell.sum(axis=1)
+            devi[:, 3] = sum(atype)
+            return devi
+
+        devi = calc_batched_model_devi(
+            frames, self.type_map, [], fake_calc_model_devi, batch_size=2
+        )
+        for ii, atoms in enumerate(frames):
+            self.assertAlmostEqual(devi[ii, 1], atoms.get_positions().sum())
+        self.assertEqual(devi[:, 2].tolist(), [30.0, 30.0, 30.0, 30.0, -1.0, 30.0])
+        self.assertEqual(devi[:, 3].tolist(), [3.0, 0.0, 3.0, 0.0, 3.0, 0.0])
+        with self.assertRaises(ValueError):
+            calc_batched_model_devi(frames, ["H"], [], fake_calc_model_devi)
+
+    def test_05_frames2lmpdump(self):
+        from ase.geometry import (
+            cellpar_to_cell,
+        )
+
+        rng = np.random.default_rng(0)
+        cells = np.eye(3)[None] * 6.0 + rng.uniform(-1.0, 1.0, (4, 3, 3))
+        coords = rng.uniform(-2.0, 8.0, (4, 5, 3))
+        lmp_coords, lmp_cells = to_lmp_frames(coords, cells)
+        for ii in range(4):
+            atoms = Atoms(
+                numbers=[1] * 5, positions=coords[ii], cell=cells[ii], pbc=True
+            )
+            ref_cell = cellpar_to_cell(atoms.cell.cellpar())
+            np.testing.assert_allclose(lmp_cells[ii], ref_cell, atol=1e-10)
+            np.testing.assert_allclose(
+                lmp_coords[ii], atoms.get_scaled_positions() @ ref_cell, atol=1e-10
+            )
+
+        # the same as rendering the frames one by one
+        atom_types = np.array([0, 1, 2, 1, 0])
+        dump_str = frames2lmpdump(coords, cells, atom_types, [3, 5, 7, 9])
+        ref = ""
+        for ii, step in enumerate([3, 5, 7, 9]):
+            atoms = Atoms(
+                symbols=[self.type_map[tt] for tt in atom_types],
+                positions=coords[ii],
+                cell=cells[ii],
+                pbc=True,
+            )
+            ref += atoms2lmpdump(atoms, step, self.type_map)
+        self.assertEqual(dump_str, ref)
+
+        # consecutive frames of different atoms
+        atoms_list = [self.atoms_normal_2, self.atoms_normal_3, self.atoms_normal_3]
+        ref = "".join(
+            atoms2lmpdump(atoms, ii, self.type_map)
+            for ii, atoms in enumerate(atoms_list)
+        )
+        self.assertEqual(traj2lmpdump(atoms_list, self.type_map), ref)
+        self.assertEqual(
+            atoms2lmpdump(self.atoms_normal_2, 1, self.type_map, ignore=True) % 1,
+            self.ref_dump_str,
+        )
+
+    def test_06_parse_traj_images(self):
+        # the atom is too close to its own images in the small cell
+        for pbc in [True, False]:
+            for length, nkept in [(1.2, 0), (1.4, 1)]:
+                atoms = Atoms(
+                    symbols=["Li"], positions=[[0.1, 0.2, 0.3]], cell=np.eye(3) * length
+                )
+                atoms.set_pbc(pbc)
+                write(self.traj_file_1, [atoms], format="traj")
+                self.assertEqual(len(parse_traj(self.traj_file_1)), nkept)
+        # close across the periodic boundary
+        atoms = Atoms(
+            symbols=["H", "H"],
+            positions=[[0.1, 0.0, 0.0], [9.4, 0.0, 0.0]],
+            cell=np.eye(3) * 10.0,
+        )
+        atoms.set_pbc([True, False, False])
+        write(self.traj_file_1, [atoms], format="traj")
+        self.assertIsNone(parse_traj(self.traj_file_1))
+        atoms.positions[1, 0] = 8.0
+        write(self.traj_file_1, [atoms], format="traj")
+        self.assertEqual(len(parse_traj(self.traj_file_1)), 1)
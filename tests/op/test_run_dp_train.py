@@ -2,6 +2,7 @@ import itertools
 import json
 import os
 import shutil
+import sys
 import unittest
 from pathlib import (
     Path,
@@ -36,10 +37,16 @@ from dpgen2.constants import (
 )
 from dpgen2.op.run_dp_train import (
     RunDPTrain,
+    RunDPTrainPacked,
+    _expand_all_multi_sys_to_sys,
     _get_data_size_of_all_mult_sys,
     _make_train_command,
+    run_packed_commands,
     split_valid,
 )
+from dpgen2.utils import (
+    write_data_manifest,
+)
 
 # isort: on
 
@@ -239,6 +246,7 @@ class TestRunDPTrain(unittest.TestCase):
             "data-1",
             "mixed-data-0",
             "mixed-data-1",
+            "staged-data",
             self.task_path,
             self.task_name,
         ]:
@@ -265,6 +273,36 @@ class TestRunDPTrain(unittest.TestCase):
         cc = _get_data_size_of_all_mult_sys(self.mixed_iter_data, mixed_type=False)
         self.assertEqual(cc, sum(self.nframes_0) + sum(self.nframes_1))
 
+    def test_get_train_data_staged(self):
+        fake_multi_sys([2, 1], [5, 3], self.atom_name).to_deepmd_npy(
+            "staged-data/train/data-1"
+        )
+        fake_multi_sys([1], [2], self.atom_name).to_deepmd_npy(
+            "staged-data/valid/data-1"
+        )
+        ip = OPIO(
+            {
+                "valid_data": None,
+                "iter_data": self.iter_data,
+                "staged_train_data": Path("staged-data/train/data-1"),
+                "staged_valid_data": Path("staged-data/valid/data-1"),
+            }
+        )
+        old_exp, new_exp, valid_data = RunDPTrain._get_train_data(ip, self.config)
+        # the last iteration is replaced by the staged training data
+        self.assertEqual(old_exp, ["data-0/foo3", "data-0/foo4"])
+        self.assertEqual(
+            new_exp,
+            ["staged-data/train/data-1/foo3", "staged-data/train/data-1/foo5"],
+        )
+        self.assertEqual(valid_data, ["staged-data/valid/data-1/foo2"])
+
+        # no iteration data to replace
+        ip["iter_data"] = []
+        old_exp, new_exp, _ = RunDPTrain._get_train_data(ip, self.config)
+        self.assertEqual(old_exp, [])
+        self.assertEqual(new_exp, [])
+
     def test_decide_init_model_no_model(self):
         do_init_model = RunDPTrain.decide_init_model(
             self.config, None, self.init_data, self.iter_data
@@ -487,6 +525,92 @@ class TestRunDPTrain(unittest.TestCase):
             jdata = json.load(fp)
             self.assertDictEqual(jdata, self.expected_odict_v2)
 
+    @patch("dpgen2.op.run_dp_train.run_packed_commands")
+    @patch("dpgen2.op.run_dp_train.run_command")
+    def test_exec_v2_packed(self, mocked_run, mocked_packed):
+        mocked_packed.return_value = [(0, "foo\n", ""), (0, "foo\n", "")]
+        mocked_run.side_effect = [(0, "bar\n", ""), (0, "bar\n", "")]
+
+        config = self.config.copy()
+        config["init_model_policy"] = "no"
+        config["packed_threads"] = 2
+
+        task_paths = [Path(self.task_path) / ii for ii in ["000", "001"]]
+        task_names = [self.task_name + "/" + ii for ii in ["000", "001"]]
+        for ii in task_paths:
+            ii.mkdir(parents=True)
+            with open(ii / train_script_name, "w") as fp:
+                json.dump(self.idict_v2, fp, indent=4)
+
+        ptrain = RunDPTrainPacked()
+        out = ptrain.execute(
+            OPIO(
+                {
+                    "config": config,
+                    "task_name": task_names,
+                    "task_path": task_paths,
+                    "init_model": [Path(self.init_model)] * 2,
+                    "init_data": [Path(ii) for ii in self.init_data],
+                    "iter_data": [Path(ii) for ii in self.iter_data],
+                }
+            )
+        )
+        work_dirs = [Path(ii) for ii in task_names]
+        self.assertEqual(out["script"], [ii / train_script_name for ii in work_dirs])
+        self.assertEqual(out["model"], [ii / "frozen_model.pb" for ii in work_dirs])
+        self.assertEqual(out["lcurve"], [ii / "lcurve.out" for ii in work_dirs])
+        self.assertEqual(out["log"], [ii / "train.log" for ii in work_dirs])
+
+        # the training commands are run at once, the freezing one by one
+        mocked_packed.assert_called_once_with(
+            [["dp", "train", train_script_name]] * 2, work_dirs, numb_threads=2
+        )
+        self.assertEqual(mocked_run.call_count, 2)
+        for ii in range(2):
+            self.assertEqual(
+                out["log"][ii].read_text(),
+                "#=================== train std out ===================\n"
+                "foo\n"
+                "#=================== train std err ===================\n"
+                "#=================== freeze std out ===================\n"
+                "bar\n"
+                "#=================== freeze std err ===================\n",
+            )
+            with open(out["script"][ii]) as fp:
+                self.assertDictEqual(json.load(fp), self.expected_odict_v2)
+
+    @patch("dpgen2.op.run_dp_train.run_packed_commands")
+    @patch("dpgen2.op.run_dp_train.run_command")
+    def test_exec_v2_packed_train_error(self, mocked_run, mocked_packed):
+        mocked_packed.return_value = [(0, "foo\n", ""), (1, "", "foo\n")]
+        mocked_run.side_effect = [(0, "bar\n", ""), (0, "bar\n", "")]
+
+        config = self.config.copy()
+        config["init_model_policy"] = "no"
+
+        task_paths = [Path(self.task_path) / ii for ii in ["000", "001"]]
+        task_names = [self.task_name + "/" + ii for ii in ["000", "001"]]
+        for ii in task_paths:
+            ii.mkdir(parents=True)
+            with open(ii / train_script_name, "w") as fp:
+                json.dump(self.idict_v2, fp, indent=4)
+
+        ptrain = RunDPTrainPacked()
+        with self.assertRaises(FatalError):
+            ptrain.execute(
+                OPIO(
+                    {
+                        "config": config,
+                        "task_name": task_names,
+                        "task_path": task_paths,
+                        "init_model": None,
+                        "init_data": [Path(ii) for ii in self.init_data],
+                        "iter_data": [Path(ii) for ii in self.iter_data],
+                    }
+                )
+            )
+        mocked_run.assert_called_once_with(["dp", "freeze", "-o", "frozen_model.pb"])
+
     @patch("dpgen2.op.run_dp_train.run_command")
     def test_exec_v2_init_model(self, mocked_run):
         mocked_run.side_effect = [(0, "foo\n", ""), (0, "bar\n", "")]
@@ -946,6 +1070,35 @@ class TestRunDPTrainNullIterData(unittest.TestCase):
             self.assertDictEqual(jdata, self.expected_odict_v2)
 
 
+class TestRunPackedCommands(unittest.TestCase):
+    def setUp(self):
+        self.work_dirs = [Path("packed-000"), Path("packed-001")]
+        for ii in self.work_dirs:
+            ii.mkdir()
+
+    def tearDown(self):
+        for ii in self.work_dirs:
+            if ii.exists():
+                shutil.rmtree(ii)
+
+    def test_run(self):
+        script = (
+            "import os, sys; "
+            "open('cwd', 'w').write(os.getcwd()); "
+            "print(os.environ['OMP_NUM_THREADS']); "
+            "print(len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else 1); "
+            "sys.stderr.write('err'); "
+            "sys.exit(int(os.path.basename(os.getcwd())[-1]))"
+        )
+        commands = [[sys.executable, "-c", script]] * 2
+        ret = run_packed_commands(commands, self.work_dirs, numb_threads=1)
+        self.assertEqual([ii[0] for ii in ret], [0, 1])
+        self.assertEqual([ii[1].split() for ii in ret], [["1", "1"], ["1", "1"]])
+        self.assertEqual([ii[2] for ii in ret], ["err", "err"])
+        for ii in self.work_dirs:
+            self.assertEqual((ii / "cwd").read_text(), str(ii.absolute()))
+
+
 class TestSplitValid(unittest.TestCase):
     def setUp(self):
         s = fake_system(10, 1)
@@ -981,7 +1134,81 @@ class TestSplitValid(unittest.TestCase):
         ms.load_systems_from_file(valid_systems[1], fmt="deepmd/npy/mixed")
         self.assertEqual(len(ms[0]), 2)
 
+    def test_split_valid_frames(self):
+        import random
+
+        ss = fake_system(12, 2)
+        ss.data["energies"] = np.arange(12, dtype=float)
+        ss.to_deepmd_npy("fake_sets_data", set_size=5)
+        random.seed(0)
+        train_systems, valid_systems = split_valid(["fake_sets_data"], 0.1)
+        train = dpdata.LabeledSystem(train_systems[0], fmt="deepmd/npy")
+        valid = dpdata.LabeledSystem(valid_systems[0], fmt="deepmd/npy")
+        self.assertEqual(len(valid), 1)
+        # no frame is lost or duplicated, the order is kept
+        energies = np.concatenate([train["energies"], valid["energies"]])
+        self.assertEqual(sorted(energies.tolist()), list(range(12)))
+        self.assertTrue(np.all(np.diff(train["energies"]) > 0))
+        # the sets without valid frames are hard linked
+        nlinked = 0
+        for set_dir in sorted(Path(train_systems[0]).glob("set.*")):
+            src = Path("fake_sets_data") / set_dir.name
+            if os.path.samefile(set_dir / "energy.npy", src / "energy.npy"):
+                nlinked += 1
+        self.assertEqual(len(list(Path(train_systems[0]).glob("set.*"))), 3)
+        self.assertEqual(nlinked, 2)
+
+    def test_split_valid_seed(self):
+        ss = fake_system(20, 2)
+        ss.data["energies"] = np.arange(20, dtype=float)
+        ss.to_deepmd_npy("fake_sets_data", set_size=5)
+        energies = []
+        for _ in range(2):
+            train_systems, valid_systems = split_valid(
+                ["fake_sets_data"], 0.2, seed=1, target_names=["foo"]
+            )
+            self.assertEqual(valid_systems, [os.path.abspath("valid_data/foo")])
+            valid = dpdata.LabeledSystem(valid_systems[0], fmt="deepmd/npy")
+            energies.append(valid["energies"].tolist())
+            shutil.rmtree("train_data")
+            shutil.rmtree("valid_data")
+        self.assertEqual(len(energies[0]), 4)
+        self.assertEqual(energies[0], energies[1])
+
     def tearDown(self):
-        for f in ["fake_data", "fake_mixed_data", "train_data", "valid_data"]:
+        for f in [
+            "fake_data",
+            "fake_mixed_data",
+            "fake_sets_data",
+            "train_data",
+            "valid_data",
+        ]:
             if os.path.exists(f):
                 shutil.rmtree(f)
+
+
+class TestExpandMultiSys(unittest.TestCase):
+    def setUp(self):
+        fake_multi_sys([2, 3], [1, 2]).to_deepmd_npy("fake_ms_0")
+        fake_multi_sys([4], [3]).to_deepmd_npy_mixed("fake_ms_1")
+
+    def tearDown(self):
+        for f in ["fake_ms_0", "fake_ms_1"]:
+            if os.path.exists(f):
+                shutil.rmtree(f)
+
+    def test_expand(self):
+        expected = [
+            os.path.join("fake_ms_0", "foo1"),
+            os.path.join("fake_ms_0", "foo2"),
+            os.path.join("fake_ms_1", "3"),
+        ]
+        self.assertEqual(
+            _expand_all_multi_sys_to_sys(["fake_ms_0", "fake_ms_1"]), expected
+        )
+        write_data_manifest("fake_ms_0")
+        write_data_manifest("fake_ms_1")
+        with patch("glob.glob") as mocked_glob:
+            ret = _expand_all_multi_sys_to_sys(["fake_ms_0", "fake_ms_1"])
+        mocked_glob.assert_not_called()
+        self.assertEqual(ret, expected)
@@ -29,9 +29,12 @@ from dpgen2.constants import (
     lmp_conf_name,
     lmp_input_name,
     lmp_log_name,
+    lmp_model_devi_hdf5_name,
     lmp_model_devi_name,
+    lmp_traj_hdf5_name,
     lmp_traj_name,
     model_name_pattern,
+    pytorch_model_name_pattern,
 )
 from dpgen2.op.run_lmp import (
     RunLmp,
@@ -102,6 +105,74 @@ class TestRunLmp(unittest.TestCase):
                 (work_dir / (model_name_pattern % ii)).read_text(), f"model{ii}"
             )
 
+    @patch("dpgen2.op.run_lmp.run_command")
+    def test_frozen_models(self, mocked_run):
+        mocked_run.side_effect = [(0, "foo\n", "")]
+        models = [self.model_path / f"model.{ii:03d}.pth" for ii in range(2)]
+        for idx, ii in enumerate(models):
+            ii.write_text(f"frozen{idx}")
+        op = RunLmp()
+        op.execute(
+            OPIO(
+                {
+                    "config": {"command": "mylmp"},
+                    "task_name": self.task_name,
+                    "task_path": self.task_path,
+                    "models": models,
+                }
+            )
+        )
+        # the frozen models are linked, not frozen again
+        self.assertEqual(mocked_run.call_count, 1)
+        work_dir = Path(self.task_name)
+        for ii in range(2):
+            self.assertEqual(
+                (work_dir / (pytorch_model_name_pattern % ii)).read_text(),
+                f"frozen{ii}",
+            )
+
+    @patch("dpgen2.op.run_lmp.run_command")
+    def test_hdf5_traj(self, mocked_run):
+        dump = "".join(
+            [
+                "ITEM: TIMESTEP\n%d\nITEM: NUMBER OF ATOMS\n2\n" % ii
+                + "ITEM: BOX BOUNDS pp pp pp\n0 10\n0 10\n0 10\n"
+                + "ITEM: ATOMS id type x y z\n1 1 1 2 %d\n2 2 4 5 6\n" % ii
+                for ii in range(3)
+            ]
+        )
+        model_devi = np.arange(21, dtype=float).reshape(3, 7)
+
+        def run_lmp(*args, **kwargs):
+            Path(lmp_traj_name).write_text(dump)
+            np.savetxt(lmp_model_devi_name, model_devi)
+            return (0, "foo\n", "")
+
+        mocked_run.side_effect = run_lmp
+        op = RunLmp()
+        out = op.execute(
+            OPIO(
+                {
+                    "config": {"command": "mylmp", "use_hdf5_traj": True},
+                    "task_name": self.task_name,
+                    "task_path": self.task_path,
+                    "models": self.models,
+                }
+            )
+        )
+        work_dir = Path(self.task_name)
+        self.assertEqual(out["traj"], work_dir / lmp_traj_hdf5_name)
+        self.assertEqual(out["model_devi"], work_dir / lmp_model_devi_hdf5_name)
+        from dpgen2.exploration.render import (
+            load_model_devi,
+            read_traj_hdf5,
+        )
+
+        np.testing.assert_array_equal(load_model_devi(out["model_devi"]), model_devi)
+        ss = read_traj_hdf5(out["traj"], [2, 0], type_map=["H", "O"])
+        np.testing.assert_allclose(ss["coords"][:, 0, 2], [2.0, 0.0])
+        self.assertEqual(ss["atom_names"], ["H", "O"])
+
     @patch("dpgen2.op.run_lmp.run_command")
     def test_error(self, mocked_run):
         mocked_run.side_effect = [(1, "foo\n", "")]
@@ -3,6 +3,9 @@ import pickle
 import shutil
 import sys
 import unittest
+from io import (
+    StringIO,
+)
 from pathlib import (
     Path,
 )
@@ -10,6 +13,7 @@ from unittest.mock import (
     patch,
 )
 
+import dpdata
 import numpy as np
 from dflow.python import (
     OPIO,
@@ -262,7 +266,7 @@ class Relaxer:
 
 
 class TestRunRelax(unittest.TestCase):
-    @patch("dpgen2.op.run_relax.atoms2lmpdump")
+    @patch("dpgen2.op.run_relax.frames2lmpdump")
     def testRunRelax(self, mocked_run):
         mocked_run.side_effect = ["ITEM: TIMESTEP"]
         sys.modules["deepmd.infer"] = sys.modules[__name__]
@@ -293,6 +297,62 @@ class TestRunRelax(unittest.TestCase):
             np.loadtxt(op_out["model_devis"][0]), model_devi
         )
 
+    def testRunRelaxHDF5Traj(self):
+        sys.modules["deepmd.infer"] = sys.modules[__name__]
+        sys.modules["deepmd.infer.model_devi"] = sys.modules[__name__]
+        sys.modules["lam_optimize.main"] = sys.modules[__name__]
+        sys.modules["lam_optimize.relaxer"] = sys.modules[__name__]
+
+        task_group = DiffCSPTaskGroup()
+        task_group.make_task()
+        os.makedirs("task.000000", exist_ok=True)
+        op_in = OPIO(
+            {
+                "diffcsp_task_grp": task_group,
+                "expl_config": {"use_hdf5_traj": True},
+                "task_path": Path("task.000000"),
+                "models": [Path("model_0.pt"), Path("model_1.pt")],
+            }
+        )
+        op_out = RunRelax().execute(op_in)
+        self.assertEqual(op_out["trajs"], [Path("task.000000/traj.0.h5")])
+        self.assertEqual(op_out["model_devis"], [Path("task.000000/model_devi.0.h5")])
+        model_devi = np.array(
+            [0.0, 0.1132373, 0.00632493, 0.04404319, 0.0897801, 0.006415, 0.04564122]
+        )
+        from dpgen2.exploration.render import (
+            load_model_devi,
+            read_traj_hdf5,
+        )
+        from dpgen2.op.run_caly_model_devi import (
+            atoms2lmpdump,
+        )
+
+        np.testing.assert_array_almost_equal(
+            load_model_devi(op_out["model_devis"][0])[0], model_devi
+        )
+        # the same configuration as written to the LAMMPS dump
+        import ase
+
+        with open("relax_trajs/0", "rb") as f:
+            data = pickle.load(f)
+        atoms = ase.Atoms(
+            numbers=data["atomic_number"],
+            positions=data["atom_positions"][0],
+            pbc=True,
+            cell=data["cell"][0],
+        )
+        ref = dpdata.System(
+            StringIO(atoms2lmpdump(atoms, 0, type_map)),
+            fmt="lammps/dump",
+            type_map=type_map,
+        )
+        ss = read_traj_hdf5(op_out["trajs"][0], [0], type_map=type_map)
+        self.assertEqual(ss["atom_names"], ref["atom_names"])
+        np.testing.assert_array_equal(ss["atom_types"], ref["atom_types"])
+        np.testing.assert_allclose(ss["coords"], ref["coords"], atol=1e-8)
+        np.testing.assert_allclose(ss["cells"], ref["cells"], atol=1e-8)
+
     def tearDown(self):
         if os.path.isdir("task.000000"):
             shutil.rmtree("task.000000")
@@ -0,0 +1,98 @@
+import os
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import numpy as np
+from dflow.python import (
+    OPIO,
+)
+from fake_data_set import (
+    fake_multi_sys,
+    fake_system,
+)
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.op.stage_dp_train_data import (
+    StageDPTrainData,
+)
+from dpgen2.utils import (
+    read_data_manifest,
+)
+
+# isort: on
+
+
+class TestStageDPTrainData(unittest.TestCase):
+    def setUp(self):
+        fake_multi_sys([3, 4], [1, 2]).to_deepmd_npy("iter-000000")
+        ms = dpdata.MultiSystems()
+        for natoms in [1, 2]:
+            ss = fake_system(10, natoms)
+            ss.data["energies"] = np.arange(10, dtype=float) + 10 * natoms
+            ms.append(ss)
+        ms.to_deepmd_npy("iter-000001")
+        self.iter_data = [Path("iter-000000"), Path("iter-000001")]
+        self.config = {
+            "split_last_iter_valid_ratio": 0.2,
+            "split_seed": 0,
+        }
+
+    def tearDown(self):
+        for f in ["iter-000000", "iter-000001", "train_data", "valid_data"]:
+            if os.path.exists(f):
+                shutil.rmtree(f)
+
+    def frames(self, data_dir):
+        ms = dpdata.MultiSystems()
+        ms.from_deepmd_npy(str(data_dir), labeled=True)
+        return sorted(np.concatenate([ss["energies"] for ss in ms]).tolist())
+
+    def test_split(self):
+        op = StageDPTrainData()
+        out = op.execute(OPIO({"config": self.config, "iter_data": self.iter_data}))
+        train_data = out["train_data"]
+        valid_data = out["valid_data"]
+        self.assertEqual(train_data, Path("train_data/iter-000001"))
+        self.assertEqual(valid_data, Path("valid_data/iter-000001"))
+        # only the last iteration is split
+        self.assertEqual(os.listdir("train_data"), ["iter-000001"])
+        self.assertEqual(os.listdir("valid_data"), ["iter-000001"])
+        # no frame is lost or duplicated
+        train = self.frames(train_data)
+        valid = self.frames(valid_data)
+        self.assertEqual(len(valid), 4)
+        self.assertEqual(sorted(train + valid), list(range(10, 30)))
+        # the manifests are written for the training tasks
+        self.assertEqual(read_data_manifest(train_data)["nframes"], 16)
+        self.assertEqual(read_data_manifest(valid_data)["nframes"], 4)
+
+        # the split is reproducible with the seed
+        shutil.rmtree("train_data")
+        shutil.rmtree("valid_data")
+        out = op.execute(OPIO({"config": self.config, "iter_data": self.iter_data}))
+        self.assertEqual(self.frames(out["valid_data"]), valid)
+
+    def test_no_split(self):
+        op = StageDPTrainData()
+        self.config["split_last_iter_valid_ratio"] = None
+        out = op.execute(OPIO({"config": self.config, "iter_data": self.iter_data}))
+        self.assertEqual(out["train_data"], Path("iter-000001"))
+        self.assertEqual(read_data_manifest(out["valid_data"])["nframes"], 0)
+        self.assertFalse(Path("train_data").exists())
+
+    def test_empty_iter_data(self):
+        op = StageDPTrainData()
+        out = op.execute(OPIO({"config": self.config, "iter_data": []}))
+        self.assertEqual(read_data_manifest(out["train_data"])["systems"], {})
+        self.assertEqual(read_data_manifest(out["valid_data"])["systems"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,7 @@ from dargs import (
     Argument,
 )
 from dflow.python import (
+    OPIO,
     FatalError,
 )
 from mock import (
@@ -19,15 +20,35 @@ from mock import (
     patch,
 )
 
+try:
+    from context import (
+        dpgen2,
+    )
+except ModuleNotFoundError:
+    # case of upload everything to argo, no context needed
+    pass
+from context import (
+    skip_ut_with_dflow,
+    skip_ut_with_dflow_reason,
+)
+
+from dpgen2.constants import (
+    fp_task_pattern,
+)
 from dpgen2.fp.deepmd import (
     PrepDeepmd,
     RunDeepmd,
+    RunDeepmdBatch,
     deepmd_input_path,
     deepmd_temp_path,
 )
+from dpgen2.superop.run_fp_batch import (
+    RunFpBatch,
+)
 from dpgen2.utils import (
     BinaryFileInput,
 )
+from dpgen2.utils.step_config import normalize as normalize_step_dict
 
 
 class TestPrepDeepmd(unittest.TestCase):
@@ -229,3 +250,145 @@ class TestRunDeepmd(unittest.TestCase):
         self.assertEqual(
             dp.eval.call_args[0][2], self.system_nopbc["atom_types"].tolist()
         )
+
+
+def fake_dp_eval(coord, cell, atype):
+    coord = np.reshape(coord, [len(coord), -1, 3])
+    energy = coord.sum(axis=(1, 2)).reshape([-1, 1])
+    force = coord * 2.0 + np.array(atype).reshape([1, -1, 1])
+    if cell is None:
+        virial = np.tile(np.arange(9.0), [len(coord), 1])
+    else:
+        virial = np.reshape(cell, [len(coord), 9]) * 3.0
+    return energy, force, virial
+
+
+class TestRunDeepmdBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.type_map = ["H", "O", "C"]
+        self.confs = [Path("confs.0"), Path("confs.1")]
+
+        def make_system(atom_types, nframes, nopbc=False):
+            ss = dpdata.System(
+                data={
+                    "atom_names": self.type_map,
+                    "atom_numbs": np.bincount(atom_types, minlength=3).tolist(),
+                    "atom_types": np.array(atom_types),
+                    "cells": rng.random((nframes, 3, 3)),
+                    "coords": rng.random((nframes, len(atom_types), 3)),
+                    "orig": np.zeros(3),
+                    "nopbc": nopbc,
+                }
+            )
+            return ss
+
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.append(make_system([0, 1], 3))
+        ms.append(make_system([1, 0, 0], 2))
+        ms.to_deepmd_npy(self.confs[0])
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.append(make_system([1, 0], 2, nopbc=True))
+        ms.to_deepmd_npy(self.confs[1])
+        self.nframes = 7
+        self.task_path = Path("task")
+        self.task_path.mkdir(parents=True, exist_ok=True)
+        Path(self.task_path / "teacher-model.pb").write_bytes(b"0123456789")
+        self.teacher_model = BinaryFileInput(self.task_path / "teacher-model.pb")
+
+    def tearDown(self):
+        for ii in self.confs + [self.task_path, Path("ref")]:
+            shutil.rmtree(ii, ignore_errors=True)
+        if Path("fp.log").is_file():
+            os.remove("fp.log")
+        for ii in range(self.nframes):
+            shutil.rmtree(fp_task_pattern % ii, ignore_errors=True)
+        shutil.rmtree(deepmd_input_path, ignore_errors=True)
+        shutil.rmtree(deepmd_temp_path, ignore_errors=True)
+
+    def run_batch(self, dp, batch_size):
+        deepmd = Mock()
+        modules = {"deepmd": deepmd, "deepmd.infer": deepmd.infer}
+        deepmd.infer.DeepPot = Mock(return_value=dp)
+        with patch.dict("sys.modules", modules):
+            return RunDeepmdBatch().execute(
+                OPIO(
+                    {
+                        "config": {
+                            "run": {
+                                "teacher_model_path": self.teacher_model,
+                            },
+                            "batch": {
+                                "batch_size": batch_size,
+                            },
+                        },
+                        "type_map": self.type_map,
+                        "confs": self.confs,
+                    }
+                )
+            )
+
+    def test_same_as_run_deepmd(self):
+        dp = Mock()
+        dp.get_type_map.return_value = ["O", "C", "H"]
+        dp.eval.side_effect = fake_dp_eval
+        out = self.run_batch(dp, 2)
+        task_names = [fp_task_pattern % ii for ii in range(self.nframes)]
+        self.assertEqual(out["task_names"], task_names)
+        self.assertEqual(out["labeled_data"], [Path(ii) / "data" for ii in task_names])
+        self.assertEqual(out["logs"], [Path("fp.log")])
+        # 3 groups of 3, 2 and 2 frames in batches of 2 frames
+        self.assertEqual(dp.eval.call_count, 4)
+
+        # label the frames one by one
+        frames = []
+        for mm in self.confs:
+            ms = dpdata.MultiSystems(type_map=self.type_map)
+            ms.from_deepmd_npy(mm, labeled=False)
+            for ii in range(len(ms)):
+                frames += [ms[ii][ff] for ff in range(ms[ii].get_nframes())]
+        self.assertEqual(len(frames), self.nframes)
+        for ii, frame in enumerate(frames):
+            shutil.rmtree(deepmd_input_path, ignore_errors=True)
+            shutil.rmtree(deepmd_temp_path, ignore_errors=True)
+            PrepDeepmd().prep_task(frame, {})
+            RunDeepmd()._dp_infer(dp, ["O", "C", "H"], "ref")
+            ref = dpdata.LabeledSystem("ref", fmt="deepmd/npy")
+            ss = dpdata.LabeledSystem(out["labeled_data"][ii], fmt="deepmd/npy")
+            self.assertEqual(ss["atom_names"], ref["atom_names"])
+            self.assertEqual(ss.nopbc, ref.nopbc)
+            for kk in [
+                "atom_types",
+                "cells",
+                "coords",
+                "energies",
+                "forces",
+                "virials",
+            ]:
+                np.testing.assert_allclose(ss[kk], ref[kk])
+            shutil.rmtree("ref")
+
+    def test_type_map_not_subset(self):
+        dp = Mock()
+        dp.get_type_map.return_value = ["O", "H"]
+        dp.eval.side_effect = fake_dp_eval
+        with self.assertRaisesRegex(FatalError, "is not subset"):
+            self.run_batch(dp, 2)
+
+
+@unittest.skipIf(skip_ut_with_dflow, skip_ut_with_dflow_reason)
+class TestRunFpBatch(unittest.TestCase):
+    def test_slice_configs(self):
+        # the configs of the sliced steps are not applied to the single step
+        steps = RunFpBatch(
+            "run-fp-batch",
+            RunDeepmdBatch,
+            run_config=normalize_step_dict(
+                {"continue_on_success_ratio": 0.8, "parallelism": 2}
+            ),
+        )
+        step = steps.steps[0]
+        self.assertEqual(step.name, "run-fp-batch")
+        self.assertIsNone(step.continue_on_success_ratio)
+        self.assertIsNone(step.parallelism)
+        self.assertFalse(step.continue_on_failed)
@@ -62,6 +62,9 @@ from mocked_ops import (
 from dpgen2.constants import (
     train_task_pattern,
 )
+from dpgen2.op import (
+    RunDPTrainPacked,
+)
 from dpgen2.superop.prep_run_dp_train import (
     PrepRunDPTrain,
 )
@@ -270,6 +273,24 @@ class TestMockedRunDPTrain(unittest.TestCase):
             )
 
 
+@unittest.skipIf(skip_ut_with_dflow, skip_ut_with_dflow_reason)
+class TestPackedRunDPTrain(unittest.TestCase):
+    def test_slice_configs(self):
+        # the configs of the sliced steps are not applied to the packed step
+        steps = PrepRunDPTrain(
+            "train-steps",
+            MockedPrepDPTrain,
+            RunDPTrainPacked,
+            run_config=normalize_step_dict(
+                {"continue_on_success_ratio": 0.8, "parallelism": 2}
+            ),
+        )
+        step = [ss for ss in steps.steps if ss.name == "run-train"][0]
+        self.assertIsNone(step.continue_on_success_ratio)
+        self.assertIsNone(step.parallelism)
+        self.assertFalse(step.continue_on_failed)
+
+
 @unittest.skipIf(skip_ut_with_dflow, skip_ut_with_dflow_reason)
 class TestTrainDp(unittest.TestCase):
     def setUp(self):
@@ -305,3 +305,29 @@ class TestPrepRunLmp(unittest.TestCase):
 
         for ii in step.outputs.parameters["task_names"].value:
             self.check_run_lmp_output(ii, self.model_list)
+
+    def test_freeze_models_slice_configs(self):
+        steps = PrepRunLmp(
+            "prep-run-lmp",
+            PrepLmp,
+            MockedRunLmp,
+            upload_python_packages=upload_python_packages,
+            prep_config=default_config,
+            run_config=normalize_step_dict(
+                {
+                    "template_config": {"image": default_image},
+                    "continue_on_success_ratio": 0.8,
+                    "parallelism": 2,
+                }
+            ),
+            freeze_models=True,
+        )
+        steps = {ss.name: ss for ss in steps.steps}
+        # the configs of the sliced steps are not applied to the single step
+        freeze = steps["freeze-models"]
+        self.assertIsNone(freeze.continue_on_success_ratio)
+        self.assertIsNone(freeze.parallelism)
+        self.assertFalse(freeze.continue_on_failed)
+        run_lmp = steps["run-lmp"]
+        self.assertEqual(run_lmp.continue_on_success_ratio, 0.8)
+        self.assertEqual(run_lmp.parallelism, 2)
@@ -0,0 +1,115 @@
+import json
+import shutil
+import unittest
+from pathlib import (
+    Path,
+)
+
+import dpdata
+import mock
+import numpy as np
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.constants import (
+    data_manifest_name,
+)
+from dpgen2.utils import (
+    get_data_size,
+    make_data_manifest,
+    read_data_manifest,
+    read_npy_header,
+    write_data_manifest,
+)
+
+# isort: on
+
+
+def make_system(nframes, atom_types, type_map):
+    return dpdata.LabeledSystem(
+        data={
+            "atom_names": list(type_map),
+            "atom_numbs": np.bincount(atom_types, minlength=len(type_map)).tolist(),
+            "atom_types": np.array(atom_types),
+            "orig": np.zeros(3),
+            "cells": np.tile(np.eye(3) * 10.0, (nframes, 1, 1)),
+            "coords": np.zeros((nframes, len(atom_types), 3)),
+            "energies": np.zeros(nframes),
+            "forces": np.zeros((nframes, len(atom_types), 3)),
+        }
+    )
+
+
+class TestDataManifest(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("data_manifest")
+        self.type_map = ["H", "O"]
+        ms = dpdata.MultiSystems(
+            make_system(3, [0, 0, 1], self.type_map),
+            make_system(5, [1, 1], self.type_map),
+            type_map=self.type_map,
+        )
+        self.ms_dir = self.work_dir / "ms"
+        ms.to_deepmd_npy(self.ms_dir, set_size=2)
+        self.mixed_dir = self.work_dir / "mixed"
+        ms.to_deepmd_npy_mixed(self.mixed_dir)
+        self.sys_dir = self.work_dir / "sys"
+        make_system(4, [0, 1, 1, 1], self.type_map).to_deepmd_npy(self.sys_dir)
+
+    def tearDown(self):
+        if self.work_dir.is_dir():
+            shutil.rmtree(self.work_dir)
+
+    def test_npy_header(self):
+        fname = self.work_dir / "foo.npy"
+        np.save(fname, np.zeros((7, 2), dtype=np.float32))
+        shape, dtype = read_npy_header(fname)
+        self.assertEqual(shape, (7, 2))
+        self.assertEqual(dtype, np.float32)
+
+    def test_manifest(self):
+        manifest = make_data_manifest(self.ms_dir)
+        self.assertEqual(manifest["nframes"], 8)
+        self.assertEqual(
+            manifest["systems"]["H2O1"],
+            {
+                "nframes": 3,
+                "natoms": 3,
+                "mixed_type": False,
+                "atom_numbs": {"H": 2, "O": 1},
+            },
+        )
+        self.assertEqual(manifest["systems"]["H0O2"]["nframes"], 5)
+        manifest = make_data_manifest(self.sys_dir)
+        self.assertEqual(list(manifest["systems"].keys()), ["."])
+        self.assertEqual(manifest["systems"]["."]["atom_numbs"], {"H": 1, "O": 3})
+        manifest = make_data_manifest(self.mixed_dir)
+        self.assertEqual(manifest["nframes"], 8)
+        for ss in manifest["systems"].values():
+            self.assertTrue(ss["mixed_type"])
+            self.assertIsNone(ss["atom_numbs"])
+
+    def test_write_read(self):
+        self.assertIsNone(read_data_manifest(self.ms_dir))
+        fname = write_data_manifest(self.ms_dir)
+        self.assertEqual(fname, self.ms_dir / data_manifest_name)
+        self.assertEqual(
+            read_data_manifest(self.ms_dir), make_data_manifest(self.ms_dir)
+        )
+        # the manifest is not taken as a system
+        ms = dpdata.MultiSystems(type_map=self.type_map)
+        ms.from_deepmd_npy(self.ms_dir)
+        self.assertEqual(ms.get_nframes(), 8)
+
+    def test_data_size(self):
+        dirs = [self.ms_dir, self.mixed_dir, self.sys_dir]
+        self.assertEqual(get_data_size(dirs), 20)
+        # the manifest is used when it exists
+        manifest = make_data_manifest(self.ms_dir)
+        manifest["nframes"] = 100
+        (self.ms_dir / data_manifest_name).write_text(json.dumps(manifest))
+        with mock.patch("numpy.load") as mocked_load:
+            self.assertEqual(get_data_size(dirs), 112)
+        mocked_load.assert_not_called()
@@ -0,0 +1,150 @@
+import os
+import shutil
+import sys
+import types
+import unittest
+from pathlib import (
+    Path,
+)
+
+import mock
+
+# isort: off
+from .context import (
+    dpgen2,
+)
+from dpgen2.utils import (
+    clear_model_cache,
+    file_digest,
+    freeze_model_cached,
+    load_dp_model,
+)
+from dpgen2.utils.model_cache import (
+    model_cache_max_size,
+)
+
+# isort: on
+
+
+class FakeDeepPot:
+    nload = 0
+
+    def __init__(self, model):
+        FakeDeepPot.nload += 1
+        self.model = model
+
+
+class TestLoadDPModel(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("model_cache")
+        self.work_dir.mkdir()
+        self.model_0 = self.work_dir / "model.000.pb"
+        self.model_1 = self.work_dir / "model.001.pb"
+        self.model_0.write_text("foo")
+        self.model_1.write_text("bar")
+        fake = types.ModuleType("deepmd.infer")
+        fake.DeepPot = FakeDeepPot
+        self.patcher = mock.patch.dict(
+            sys.modules, {"deepmd": types.ModuleType("deepmd"), "deepmd.infer": fake}
+        )
+        self.patcher.start()
+        clear_model_cache()
+        FakeDeepPot.nload = 0
+
+    def tearDown(self):
+        self.patcher.stop()
+        clear_model_cache()
+        shutil.rmtree(self.work_dir)
+
+    def test_digest(self):
+        self.assertEqual(
+            file_digest(self.model_0),
+            "2c26b46b68ffc68ff99b453c1d30413413422d706483bfa0f98a5e886266e7ae",
+        )
+        self.assertNotEqual(file_digest(self.model_0), file_digest(self.model_1))
+
+    def test_load(self):
+        dp_0 = load_dp_model(self.model_0)
+        dp_1 = load_dp_model(self.model_1)
+        self.assertEqual(FakeDeepPot.nload, 2)
+        # the same content is loaded once
+        copied = self.work_dir / "copied.pb"
+        shutil.copyfile(self.model_0, copied)
+        self.assertIs(load_dp_model(copied), dp_0)
+        self.assertIs(load_dp_model(self.model_1), dp_1)
+        self.assertEqual(FakeDeepPot.nload, 2)
+        # a changed file is loaded again
+        self.model_1.write_text("barbar")
+        self.assertIsNot(load_dp_model(self.model_1), dp_1)
+        self.assertEqual(FakeDeepPot.nload, 3)
+
+    def test_evict(self):
+        models = []
+        for ii in range(model_cache_max_size + 1):
+            models.append(self.work_dir / f"model.{ii}.pb")
+            models[-1].write_text(str(ii))
+            load_dp_model(models[-1])
+        self.assertEqual(FakeDeepPot.nload, model_cache_max_size + 1)
+        load_dp_model(models[-1])
+        self.assertEqual(FakeDeepPot.nload, model_cache_max_size + 1)
+        # the least recently used model is released
+        load_dp_model(models[0])
+        self.assertEqual(FakeDeepPot.nload, model_cache_max_size + 2)
+
+
+class TestFreezeModelCached(unittest.TestCase):
+    def setUp(self):
+        self.work_dir = Path("model_cache")
+        self.cache_dir = self.work_dir / "cache"
+        self.work_dir.mkdir()
+        self.model = self.work_dir / "model.pt"
+        self.model.write_text("foo")
+        self.freeze = mock.Mock(
+            side_effect=lambda ii, oo, head: Path(oo).write_text(f"frozen {head}")
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_freeze(self):
+        for ii in range(3):
+            out = freeze_model_cached(
+                self.model,
+                self.work_dir / f"model.{ii}.pth",
+                self.freeze,
+                cache_dir=self.cache_dir,
+            )
+            self.assertEqual(out.read_text(), "frozen None")
+        # frozen once
+        self.assertEqual(self.freeze.call_count, 1)
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
+        # a different head is frozen again
+        out = freeze_model_cached(
+            self.model,
+            self.work_dir / "model.head.pth",
+            self.freeze,
+            head="foo",
+            cache_dir=self.cache_dir,
+        )
+        self.assertEqual(out.read_text(), "frozen foo")
+        self.assertEqual(self.freeze.call_count, 2)
+
+    def test_freeze_failed(self):
+        self.freeze.side_effect = RuntimeError("freeze failed")
+        with self.assertRaises(RuntimeError):
+            freeze_model_cached(
+                self.model,
+                self.work_dir / "model.pth",
+                self.freeze,
+                cache_dir=self.cache_dir,
+            )
+        # no partial model is left in the cache
+        self.assertEqual(list(self.cache_dir.iterdir()), [])
+        self.assertFalse((self.work_dir / "model.pth").exists())
+
+    def test_env_cache_dir(self):
+        with mock.patch.dict(
+            os.environ, {"DPGEN2_MODEL_CACHE_DIR": str(self.cache_dir)}
+        ):
+            freeze_model_cached(self.model, self.work_dir / "model.pth", self.freeze)
+        self.assertEqual(len(list(self.cache_dir.iterdir())), 1)
@@ -32,6 +32,9 @@ from dpgen2.utils import (
     init_executor,
 )
 from dpgen2.utils import normalize_step_dict as normalize
+from dpgen2.utils import (
+    unsliced_step_config,
+)
 
 # isort: on
 
@@ -96,6 +99,26 @@ class TestStepConfig(unittest.TestCase):
         odict = normalize(idict)
         self.assertEqual(odict, expected_odict)
 
+    def test_unsliced(self):
+        data = normalize(
+            {
+                "continue_on_success_ratio": 0.8,
+                "parallelism": 4,
+                "template_slice_config": {"group_size": 2},
+            }
+        )
+        unsliced = unsliced_step_config(data)
+        for kk in [
+            "template_slice_config",
+            "continue_on_num_success",
+            "continue_on_success_ratio",
+            "parallelism",
+        ]:
+            self.assertNotIn(kk, unsliced)
+        self.assertEqual(unsliced["template_config"], data["template_config"])
+        # the input config is not changed
+        self.assertEqual(data["continue_on_success_ratio"], 0.8)
+
     def test_init_executor(self):
         idict = {
             "template_config": {